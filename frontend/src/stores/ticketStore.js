@@ -43,7 +43,8 @@ export const useTicketStore = defineStore('tickets', () => {
       // URL'i Ingress path'ine göre göreceli olarak güncelliyoruz.
       // axios baseURL'i sayesinde bu, https://helpdesk.cloudpro.com.tr/api/tickets/ olarak tamamlanacaktır.
       const response = await apiClient.get('api/tickets/');
-      const fetchedTickets = response.data;
+      // Liste yanıtı keyset sayfalamalıdır: { items, next_cursor }
+      const fetchedTickets = response.data.items;
 
       tickets.value = fetchedTickets;
 
@@ -0,0 +1,199 @@
+# scripts/benchmark_ticket_service.py
+"""
+ticket_service için tekrarlanabilir performans ölçümleri.
+
+    python scripts/benchmark_ticket_service.py pagination [--tickets 200000] [--limit 100]
+    python scripts/benchmark_ticket_service.py concurrency [--requests 20] [--delay 0.2]
+
+- pagination: N bilet ekler ve artan derinliklerde bir sayfanın süresini keyset (cursor,
+  crud.get_tickets_page) ile eski OFFSET yolu (crud.get_tickets) için karşılaştırır. Keyset sayfasının
+  süresi derinlikten bağımsız kalmalı, OFFSET ise derinlikle doğrusal büyümelidir.
+- concurrency: aynı anda gelen, her biri yavaş bir sorgu çalıştıran istekleri eski yol (senkron Session,
+  event loop üzerinde) ve async motor (AsyncSession) ile çalıştırıp toplam süre ve istek/sn verir.
+
+DATABASE_URL verilmezse geçici bir SQLite dosyası kullanılır. PostgreSQL'e karşı çalıştırılacaksa
+DATABASE_URL atılabilir bir veritabanını göstermelidir; eklenen biletler çıkışta silinir.
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+_TEMP_DIR = None
+if not os.getenv("DATABASE_URL"):
+    _TEMP_DIR = tempfile.mkdtemp(prefix="ticket_service_bench_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{_TEMP_DIR}/tickets.db"
+for _name, _value in {
+    "KEYCLOAK_ISSUER_URI": "http://keycloak.local/realms/helpdesk",
+    "KEYCLOAK_JWKS_URI": "http://keycloak.local/realms/helpdesk/protocol/openid-connect/certs",
+    "KEYCLOAK_TOKEN_AUDIENCE": "account",
+    "VAULT_ADDR": "http://vault.local",
+}.items():
+    os.environ.setdefault(_name, _value)
+
+from sqlalchemy import event, insert, select, text  # noqa: E402
+
+from ticket_service import crud, database, db_models  # noqa: E402
+from ticket_service.pagination import encode_cursor  # noqa: E402
+
+BENCH_TENANT_ID = uuid.UUID("00000000-0000-0000-0000-00000000bec4")
+
+
+def _prepare_database() -> None:
+    if database.engine.dialect.name == "sqlite":
+        def attach_schema(dbapi_connection, connection_record):
+            dbapi_connection.execute(f"ATTACH DATABASE '{_TEMP_DIR}/tickets_schema.db' AS tickets_schema")
+
+        def register_sleep(dbapi_connection, connection_record):
+            # PostgreSQL'deki pg_sleep'in karşılığı (yavaş sorgu benzetimi).
+            dbapi_connection.create_function("bench_sleep", 1, lambda seconds: time.sleep(seconds) or 0)
+
+        for engine in (database.engine, database.async_engine.sync_engine):
+            if _TEMP_DIR:
+                event.listen(engine, "connect", attach_schema)
+            event.listen(engine, "connect", register_sleep)
+    else:
+        with database.engine.begin() as connection:
+            connection.execute(text("CREATE SCHEMA IF NOT EXISTS tickets_schema"))
+    database.Base.metadata.create_all(database.engine)
+
+
+def _slow_query(delay: float):
+    if database.engine.dialect.name == "sqlite":
+        return text("SELECT bench_sleep(:delay)").bindparams(delay=delay)
+    return text("SELECT pg_sleep(:delay)").bindparams(delay=delay)
+
+
+def _cleanup() -> None:
+    with database.engine.begin() as connection:
+        connection.execute(db_models.Ticket.__table__.delete().where(db_models.Ticket.tenant_id == BENCH_TENANT_ID))
+
+
+# --- pagination ---
+
+def _seed_tickets(count: int, batch_size: int = 10000) -> None:
+    started_at = datetime.now(timezone.utc) - timedelta(seconds=count)
+    creator_ids = [uuid.uuid4() for _ in range(50)]
+    with database.engine.begin() as connection:
+        for batch_start in range(0, count, batch_size):
+            rows = [
+                {
+                    "id": uuid.uuid4(),
+                    "title": f"Benchmark bileti {index}",
+                    "description": "Performans ölçümü için oluşturuldu.",
+                    "status": "Açık",
+                    "created_at": started_at + timedelta(seconds=index),
+                    "updated_at": started_at + timedelta(seconds=index),
+                    "creator_id": creator_ids[index % len(creator_ids)],
+                    "tenant_id": BENCH_TENANT_ID,
+                }
+                for index in range(batch_start, min(batch_start + batch_size, count))
+            ]
+            connection.execute(insert(db_models.Ticket.__table__), rows)
+    print(f"{count} bilet eklendi.")
+
+
+def _cursor_at_depth(depth: int):
+    """Keyset yolunun `depth`. satırdan devam etmesi için gereken cursor (ölçüme dahil değildir)."""
+    if depth == 0:
+        return None
+    with database.engine.connect() as connection:
+        row = connection.execute(
+            select(db_models.Ticket.created_at, db_models.Ticket.id)
+            .order_by(db_models.Ticket.created_at.desc(), db_models.Ticket.id.desc())
+            .offset(depth - 1)
+            .limit(1)
+        ).one()
+    return encode_cursor([row.created_at.isoformat(), str(row.id)])
+
+
+async def _time_call(factory, repeats: int) -> float:
+    durations = []
+    for _ in range(repeats):
+        async with database.AsyncSessionLocal() as db:
+            started = time.perf_counter()
+            await factory(db)
+            durations.append(time.perf_counter() - started)
+    return statistics.median(durations) * 1000
+
+
+async def _run_pagination(args) -> None:
+    _seed_tickets(args.tickets)
+    depths = [depth for depth in (0, 1000, 10000, 50000, 100000, 200000, 500000) if depth < args.tickets]
+    print(f"{'derinlik':>10} {'keyset (ms)':>12} {'offset (ms)':>12}")
+    for depth in depths:
+        cursor = _cursor_at_depth(depth)
+        keyset_ms = await _time_call(
+            lambda db: crud.get_tickets_page(db, limit=args.limit, cursor=cursor), args.repeats
+        )
+        offset_ms = await _time_call(
+            lambda db: crud.get_tickets(db, skip=depth, limit=args.limit), args.repeats
+        )
+        print(f"{depth:>10} {keyset_ms:>12.2f} {offset_ms:>12.2f}")
+
+
+# --- concurrency ---
+
+async def _blocking_request(delay: float) -> None:
+    # Async motordan önceki endpoint'ler: senkron Session event loop üzerinde çalışıyordu.
+    with database.SessionLocal() as db:
+        db.execute(_slow_query(delay))
+
+
+async def _async_request(delay: float) -> None:
+    async with database.AsyncSessionLocal() as db:
+        await db.execute(_slow_query(delay))
+
+
+async def _run_concurrency(args) -> None:
+    print(f"{args.requests} eşzamanlı istek, her biri {args.delay:.2f} sn süren bir sorgu çalıştırıyor")
+    print(f"{'yol':>22} {'toplam (sn)':>12} {'istek/sn':>10}")
+    for label, request in (("senkron Session", _blocking_request), ("AsyncSession", _async_request)):
+        await request(0)  # Bağlantı havuzunu ısıt.
+        started = time.perf_counter()
+        await asyncio.gather(*(request(args.delay) for _ in range(args.requests)))
+        elapsed = time.perf_counter() - started
+        print(f"{label:>22} {elapsed:>12.2f} {args.requests / elapsed:>10.1f}")
+
+
+async def _run(benchmark, args) -> None:
+    try:
+        await benchmark(args)
+    finally:
+        # aiosqlite bağlantıları kapatılmazsa çalışan iş parçacıkları süreç kapanışını bekletir.
+        await database.async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+    pagination = subparsers.add_parser("pagination", help="Keyset ve OFFSET sayfalamayı derinliğe göre karşılaştırır")
+    pagination.add_argument("--tickets", type=int, default=200000)
+    pagination.add_argument("--limit", type=int, default=100)
+    pagination.add_argument("--repeats", type=int, default=5)
+    concurrency = subparsers.add_parser("concurrency", help="Yavaş sorgular altında senkron ve async motoru karşılaştırır")
+    concurrency.add_argument("--requests", type=int, default=20)
+    concurrency.add_argument("--delay", type=float, default=0.2)
+    args = parser.parse_args()
+
+    _prepare_database()
+    try:
+        benchmark = _run_pagination if args.benchmark == "pagination" else _run_concurrency
+        asyncio.run(_run(benchmark, args))
+    finally:
+        _cleanup()
+        if _TEMP_DIR:
+            shutil.rmtree(_TEMP_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# scripts/benchmark_user_sync.py
+"""
+user_service başlangıç senkronizasyonu için tekrarlanabilir ölçüm (kayıt/sn ve tepe bellek).
+
+    python scripts/benchmark_user_sync.py [--users 50000] [--groups 500] [--page-size 500] [--concurrency 4]
+
+Keycloak Admin API'si httpx.MockTransport ile taklit edilir; kullanıcı/grup temsilleri istenen sayfa için
+anında üretilir, böylece sahte dizin belleği ölçümü bozmaz. Tam senkronizasyon iki kez çalıştırılır:
+ilki tüm satırları yazar, ikincisi değişiklik olmadığı için hiçbir satır yazmamalıdır. Her tur için işlenen
+ve yazılan kayıt sayısı, süre, işlenen kayıt/sn ve sürecin tepe RSS değeri raporlanır.
+
+DATABASE_URL verilmezse geçici bir SQLite dosyası kullanılır. PostgreSQL'e karşı çalıştırılacaksa
+DATABASE_URL atılabilir bir veritabanını göstermelidir; tablolar boşaltılır.
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from urllib.parse import urlparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+_TEMP_DIR = None
+if not os.getenv("DATABASE_URL"):
+    _TEMP_DIR = tempfile.mkdtemp(prefix="user_service_bench_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{_TEMP_DIR}/users.db"
+os.environ.setdefault("KEYCLOAK_ISSUER_URI", "http://keycloak.local/realms/helpdesk")
+os.environ.setdefault("KEYCLOAK_ADMIN_CLIENT_ID", "user-service")
+os.environ.setdefault("KEYCLOAK_ADMIN_CLIENT_SECRET", "benchmark")
+
+import httpx  # noqa: E402
+from sqlalchemy import event, text  # noqa: E402
+
+from user_service import database, db_models, keycloak_api_helpers, keycloak_sync  # noqa: E402
+from user_service.config import settings  # noqa: E402
+
+_NAMESPACE = uuid.UUID("00000000-0000-0000-0000-0000000be9c4")
+
+
+class GeneratedKeycloak:
+    """Admin API'nin /users ve /groups sayfalarını deterministik olarak üretir."""
+
+    def __init__(self, users: int, groups: int):
+        self.users = users
+        self.groups = groups
+        self.realm_path = urlparse(settings.keycloak.admin_api_realm_url).path
+        self.token_path = urlparse(settings.keycloak.admin_api_token_endpoint).path
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path == self.token_path:
+            return httpx.Response(200, json={"access_token": "benchmark-token", "expires_in": 3600})
+        first = int(request.url.params.get("first", 0))
+        last = first + int(request.url.params.get("max", 100))
+        if request.url.path == f"{self.realm_path}/users":
+            return httpx.Response(200, json=[self._user(index) for index in range(first, min(last, self.users))])
+        if request.url.path == f"{self.realm_path}/groups":
+            return httpx.Response(200, json=[self._group(index) for index in range(first, min(last, self.groups))])
+        return httpx.Response(404)
+
+    @staticmethod
+    def _user(index: int) -> dict:
+        return {
+            "id": str(uuid.uuid5(_NAMESPACE, f"user-{index}")),
+            "username": f"kullanici{index}",
+            "email": f"kullanici{index}@example.com",
+            "firstName": "Kullanıcı",
+            "lastName": str(index),
+            "enabled": True,
+        }
+
+    @staticmethod
+    def _group(index: int) -> dict:
+        return {"id": str(uuid.uuid5(_NAMESPACE, f"group-{index}")), "name": f"Şirket {index}", "path": f"/Şirket {index}"}
+
+
+def _prepare_database() -> None:
+    if _TEMP_DIR:
+        def attach_schemas(dbapi_connection, connection_record):
+            dbapi_connection.execute(f"ATTACH DATABASE '{_TEMP_DIR}/users_schema.db' AS users_schema")
+            dbapi_connection.execute(f"ATTACH DATABASE '{_TEMP_DIR}/public.db' AS public")
+
+        for engine in (database.engine, database.async_engine.sync_engine):
+            event.listen(engine, "connect", attach_schemas)
+    else:
+        with database.engine.begin() as connection:
+            connection.execute(text("CREATE SCHEMA IF NOT EXISTS users_schema"))
+    database.Base.metadata.create_all(database.engine)
+    _truncate()
+
+
+def _truncate() -> None:
+    with database.engine.begin() as connection:
+        connection.execute(db_models.User.__table__.delete())
+        connection.execute(db_models.Company.__table__.delete())
+
+
+async def _run(args) -> None:
+    keycloak = GeneratedKeycloak(args.users, args.groups)
+    keycloak_api_helpers._http_client = httpx.AsyncClient(transport=httpx.MockTransport(keycloak.handler))
+    settings.keycloak.sync_page_size = args.page_size
+    settings.keycloak.sync_concurrency = args.concurrency
+    processed = args.users + args.groups
+
+    print(f"{'tur':>10} {'işlenen':>9} {'yazılan':>9} {'süre (sn)':>10} {'kayıt/sn':>10} {'tepe RSS (MB)':>14}")
+    try:
+        for label in ("ilk", "değişmeyen"):
+            started = time.perf_counter()
+            async with database.AsyncSessionLocal() as db:
+                await keycloak_sync.sync_all_tenants_from_keycloak(db, settings)
+                await keycloak_sync.sync_all_users_from_keycloak(db, settings)
+            elapsed = time.perf_counter() - started
+            written = keycloak_sync.sync_progress.tenants_synced + keycloak_sync.sync_progress.users_synced
+            peak_memory = keycloak_sync._peak_memory_mb()
+            print(
+                f"{label:>10} {processed:>9} {written:>9} {elapsed:>10.2f} {processed / elapsed:>10.0f} "
+                f"{peak_memory if peak_memory is not None else float('nan'):>14.1f}"
+            )
+    finally:
+        await keycloak_api_helpers.close_http_client()
+        # aiosqlite bağlantıları kapatılmazsa çalışan iş parçacıkları süreç kapanışını bekletir.
+        await database.async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50000)
+    parser.add_argument("--groups", type=int, default=500)
+    parser.add_argument("--page-size", type=int, default=settings.keycloak.sync_page_size)
+    parser.add_argument("--concurrency", type=int, default=settings.keycloak.sync_concurrency)
+    args = parser.parse_args()
+
+    _prepare_database()
+    try:
+        asyncio.run(_run(args))
+    finally:
+        _truncate()
+        if _TEMP_DIR:
+            shutil.rmtree(_TEMP_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
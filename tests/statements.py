@@ -0,0 +1,34 @@
+# tests/statements.py
+"""Testlerde veritabanına giden SQL ifadelerini saymak için yardımcılar (round-trip bütçeleri)."""
+from contextlib import contextmanager
+from typing import Iterator, List
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class StatementLog:
+    """Bir motorda `before_cursor_execute` ile yakalanan SQL ifadeleri."""
+
+    def __init__(self):
+        self.statements: List[str] = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(" ".join(statement.split()))
+
+    def matching(self, fragment: str) -> List[str]:
+        return [statement for statement in self.statements if fragment in statement]
+
+    def __len__(self) -> int:
+        return len(self.statements)
+
+
+@contextmanager
+def capture_statements(engine: Engine) -> Iterator[StatementLog]:
+    """Blok içinde `engine` üzerinde çalıştırılan ifadeleri kaydeder (async motorlar için `sync_engine` verilir)."""
+    log = StatementLog()
+    event.listen(engine, "before_cursor_execute", log._record)
+    try:
+        yield log
+    finally:
+        event.remove(engine, "before_cursor_execute", log._record)
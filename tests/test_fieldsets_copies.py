@@ -0,0 +1,27 @@
+# tests/test_fieldsets_copies.py
+"""
+ticket_service/fieldsets.py ve user_service/fieldsets.py bilerek kopyadır (servis imajları yalnızca kendi
+dizinlerini paketler). Bu test iki kopyanın kodunun ayrışmadığını denetler; yalnızca başlık yorumları,
+docstring'ler ve örnek alan listeleri farklı olabilir.
+"""
+import ast
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _code_without_docs(path):
+    tree = ast.parse(path.read_text(encoding="utf-8"))
+    for node in ast.walk(tree):
+        body = getattr(node, "body", None)
+        if isinstance(body, list) and body and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant):
+            body.pop(0)
+    # Açıklama metni servis örneği içerir (`id,title,status` / `id,email,full_name`).
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and node.targets[0].id == "FIELDS_QUERY_DESCRIPTION":
+            node.value = ast.Constant(value=None)
+    return ast.dump(tree)
+
+
+def test_fieldsets_copies_have_identical_code():
+    assert _code_without_docs(ROOT / "ticket_service" / "fieldsets.py") == _code_without_docs(ROOT / "user_service" / "fieldsets.py")
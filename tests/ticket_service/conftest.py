@@ -0,0 +1,154 @@
+# tests/ticket_service/conftest.py
+"""
+ticket_service testleri için ortak fikstürler.
+
+Servis, modül yüklenirken ayarlarını ortam değişkenlerinden okuduğu için ortam burada, ticket_service
+import edilmeden önce hazırlanır. Veritabanı geçici bir SQLite dosyasıdır; `tickets_schema` her
+bağlantıya ayrı bir dosya olarak eklenir (PostgreSQL'deki şemanın karşılığı). user_service'e giden
+istekler httpx.MockTransport ile karşılanır, kimlik doğrulaması `current_user` ile değiştirilir.
+"""
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import uuid
+
+_TEST_DIR = tempfile.mkdtemp(prefix="ticket_service_tests_")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{_TEST_DIR}/tickets.db",
+    "KEYCLOAK_ISSUER_URI": "http://keycloak.test/realms/helpdesk",
+    "KEYCLOAK_JWKS_URI": "http://keycloak.test/realms/helpdesk/protocol/openid-connect/certs",
+    "KEYCLOAK_TOKEN_AUDIENCE": "account",
+    "VAULT_ADDR": "http://vault.test",
+    "USER_SERVICE_URL": "http://user-service.test",
+})
+for _name in ("ASYNC_DATABASE_URL", "VAULT_TOKEN", "LIST_CACHE_REDIS_URL"):
+    os.environ.pop(_name, None)
+
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event, text  # noqa: E402
+
+from ticket_service import database, db_models, list_cache, main, user_service_client  # noqa: E402
+from ticket_service.auth import get_current_user_payload  # noqa: E402
+from ticket_service.config import settings  # noqa: E402
+
+
+def _attach_tickets_schema(dbapi_connection, connection_record):
+    dbapi_connection.execute(f"ATTACH DATABASE '{_TEST_DIR}/tickets_schema.db' AS tickets_schema")
+
+
+for _engine in (database.engine, database.async_engine.sync_engine):
+    event.listen(_engine, "connect", _attach_tickets_schema)
+database.Base.metadata.create_all(database.engine)
+
+TENANT_ID = uuid.UUID("00000000-0000-0000-0000-0000000000aa")
+
+
+class StubUserService:
+    """user_service'in ticket_service'in kullandığı dahili uçlarını taklit eder ve gelen istekleri kaydeder."""
+
+    def __init__(self):
+        self.requests = []
+        self.tenants = [{"id": str(TENANT_ID), "name": "Acme"}]
+        self.missing_user_ids = set()
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if request.url.path == "/api/users/internal/tenants":
+            return httpx.Response(200, json=self.tenants)
+        if request.url.path == "/api/users/internal/users/batch":
+            ids = json.loads(request.content)["ids"]
+            return httpx.Response(200, json={
+                "users": {user_id: self._user(user_id) for user_id in ids if user_id not in self.missing_user_ids},
+                "missing": [user_id for user_id in ids if user_id in self.missing_user_ids],
+            })
+        if request.url.path.startswith("/api/users/internal/users/"):
+            user_id = request.url.path.rsplit("/", 1)[-1]
+            if user_id in self.missing_user_ids:
+                return httpx.Response(404)
+            return httpx.Response(200, json=self._user(user_id))
+        return httpx.Response(404)
+
+    @staticmethod
+    def _user(user_id):
+        return {"id": user_id, "full_name": "Test Kullanıcı", "email": "test@example.com"}
+
+    def user_detail_requests(self):
+        return [request for request in self.requests if request.url.path.startswith("/api/users/internal/users/")]
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _remove_test_dir():
+    yield
+    shutil.rmtree(_TEST_DIR, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def _clean_state(tmp_path, monkeypatch):
+    """Her test boş bir veritabanı, boş önbellekler ve kendi dosya deposuyla başlar."""
+    with database.engine.begin() as connection:
+        for table in reversed(database.Base.metadata.sorted_tables):
+            connection.execute(table.delete())
+        connection.execute(text("DELETE FROM tickets_fts"))
+    monkeypatch.setattr(settings, "attachment_storage_dir", str(tmp_path / "storage"))
+    monkeypatch.setattr(settings, "internal_service_secret", "test-secret")
+    list_cache.configure(list_cache.InMemoryListCacheBackend(max_entries=1000), ttl=60)
+    monkeypatch.setattr(user_service_client, "_tenant_directory_loaded_at", 0.0)
+    monkeypatch.setattr(user_service_client, "_user_details_cache", None)
+    yield
+    main.app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def user_service():
+    stub = StubUserService()
+    user_service_client._http_client = httpx.AsyncClient(transport=httpx.MockTransport(stub.handler))
+    yield stub
+    user_service_client._http_client = None
+
+
+@pytest.fixture
+def current_user():
+    """İsteklerde kullanılacak token içeriği; testler rolleri ve `sub`'ı değiştirebilir."""
+    return {
+        "sub": str(uuid.uuid4()),
+        "realm_access": {"roles": ["agent"]},
+        "groups": ["/Acme"],
+        "email": "agent@example.com",
+        "name": "Test Agent",
+    }
+
+
+@pytest.fixture
+def client(current_user, user_service):
+    main.app.dependency_overrides[get_current_user_payload] = lambda: current_user
+    return TestClient(main.app)
+
+
+def run(coroutine):
+    """Async crud fonksiyonlarını testlerden çağırmak için."""
+    return asyncio.run(coroutine)
+
+
+def make_ticket(title="Destek talebi", description="Sorunun ayrıntıları burada", creator_id=None, tenant_id=TENANT_ID, **values):
+    """Bileti ORM üzerinden ekler (mapper olayları, örn. SQLite FTS eşitlemesi, çalışır) ve ID'sini döndürür."""
+    with database.SessionLocal() as session:
+        ticket = db_models.Ticket(
+            title=title,
+            description=description,
+            creator_id=creator_id or uuid.uuid4(),
+            tenant_id=tenant_id,
+            **values,
+        )
+        session.add(ticket)
+        session.commit()
+        return ticket.id
+
+
+def add_comment(ticket_id, content, author_id=None):
+    with database.SessionLocal() as session:
+        session.add(db_models.Comment(ticket_id=ticket_id, content=content, author_id=author_id or uuid.uuid4()))
+        session.commit()
@@ -0,0 +1,135 @@
+# tests/ticket_service/test_attachment_blob_gc.py
+"""
+Referanssız blob temizliği: bekleme süresi ve aynı içeriğin eşzamanlı yüklenmesiyle yarış.
+Temizlik hiçbir sıralamada hâlâ kullanılan bir blob'un kaydını ya da dosyasını silmemeli. SQLite yazarları
+veritabanı düzeyinde sıraya soktuğu için PostgreSQL'deki satır düzeyindeki yarış burada upsert'in satırı
+kilitleyen biçimiyle denetlenir.
+"""
+import asyncio
+import hashlib
+import uuid
+from pathlib import Path
+
+import pytest
+from sqlalchemy import select
+
+from tests.statements import capture_statements
+from ticket_service import attachment_store, database, db_models
+from ticket_service.config import settings
+from ticket_service.upload_stream import StagedUpload
+
+from .conftest import make_ticket, run
+
+CONTENT = b"iki biletin paylastigi ek"
+SHA256 = hashlib.sha256(CONTENT).hexdigest()
+
+
+def _upload(client, ticket_id, content=CONTENT):
+    response = client.post(f"/api/tickets/{ticket_id}/attachments", files=[("files", ("ek.txt", content, "text/plain"))])
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _delete_ticket(client, current_user, ticket_id):
+    roles = current_user["realm_access"]["roles"]
+    current_user["realm_access"]["roles"] = ["general-admin"]
+    assert client.delete(f"/api/tickets/{ticket_id}").status_code == 204
+    current_user["realm_access"]["roles"] = roles
+
+
+def _blob():
+    with database.SessionLocal() as session:
+        return session.get(db_models.AttachmentBlob, SHA256)
+
+
+def _blob_path():
+    return Path(settings.attachment_storage_dir) / attachment_store.storage_key_for(SHA256)
+
+
+def _staged_upload():
+    upload = StagedUpload("ek.txt", "text/plain", Path(settings.attachment_storage_dir) / "tmp")
+    upload.write(CONTENT)
+    upload.finish()
+    return upload
+
+
+async def _collect():
+    async with database.AsyncSessionLocal() as db:
+        return await attachment_store.delete_unreferenced_blobs(db, settings)
+
+
+def test_recently_created_unreferenced_blob_survives_gc(client, current_user):
+    ticket_id = make_ticket()
+    _upload(client, ticket_id)
+
+    # Silme endpoint'inin arka plan temizliği çalışır ama blob bekleme süresinden yeni.
+    _delete_ticket(client, current_user, ticket_id)
+
+    assert _blob().ref_count == 0
+    assert _blob_path().exists()
+
+
+def test_blob_past_grace_period_is_collected(client, current_user, monkeypatch):
+    ticket_id = make_ticket()
+    _upload(client, ticket_id)
+    monkeypatch.setattr(settings, "attachment_blob_gc_grace", 0)
+
+    _delete_ticket(client, current_user, ticket_id)
+
+    assert _blob() is None
+    assert not _blob_path().exists()
+
+
+def test_upload_of_freed_content_reuses_the_blob(client, current_user):
+    first_ticket, second_ticket = make_ticket(), make_ticket()
+    _upload(client, first_ticket)
+    _delete_ticket(client, current_user, first_ticket)
+
+    attachments = _upload(client, second_ticket)
+
+    assert [attachment["sha256"] for attachment in attachments] == [SHA256]
+    assert _blob().ref_count == 1
+    assert _blob_path().read_bytes() == CONTENT
+
+
+def test_existing_blob_upsert_locks_the_row(client):
+    # PostgreSQL'de DO NOTHING çakışan satırı kilitlemez; temizlik blob'u ek INSERT'inden önce silebilirdi.
+    ticket_id = make_ticket()
+    with capture_statements(database.async_engine.sync_engine) as log:
+        _upload(client, ticket_id)
+
+    [blob_upsert] = log.matching("INSERT INTO tickets_schema.attachment_blobs")
+    assert "ON CONFLICT (sha256) DO UPDATE" in blob_upsert
+
+
+@pytest.mark.parametrize("gc_delay_steps", range(8))
+def test_concurrent_upload_and_gc_leave_a_consistent_store(client, current_user, monkeypatch, gc_delay_steps):
+    first_ticket, second_ticket = make_ticket(), make_ticket()
+    _upload(client, first_ticket)
+    _delete_ticket(client, current_user, first_ticket)
+    monkeypatch.setattr(settings, "attachment_blob_gc_grace", 0)
+    uploader_id = uuid.uuid4()
+
+    async def upload():
+        async with database.AsyncSessionLocal() as db:
+            return await attachment_store.store_uploads(db, [_staged_upload()], second_ticket, uploader_id, settings)
+
+    async def delayed_gc():
+        # Temizliği yüklemenin farklı noktalarına (hash kontrolü, blob upsert'i, ek INSERT'i) denk getirir.
+        for _ in range(gc_delay_steps):
+            await asyncio.sleep(0)
+        return await _collect()
+
+    async def upload_and_gc():
+        try:
+            return await asyncio.gather(upload(), delayed_gc())
+        finally:
+            await database.async_engine.dispose()
+
+    attachments, _ = run(upload_and_gc())
+
+    assert len(attachments) == 1
+    assert _blob().ref_count == 1
+    assert _blob_path().read_bytes() == CONTENT
+    with database.SessionLocal() as session:
+        assert session.scalars(select(db_models.Attachment.sha256)).all() == [SHA256]
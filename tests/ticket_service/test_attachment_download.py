@@ -0,0 +1,155 @@
+# tests/ticket_service/test_attachment_download.py
+"""
+Ek indirme: kayıtlı içerik türü, Range / If-Range ile kısmi yanıt (206), If-None-Match ve
+If-Modified-Since ile dosyaya dokunmadan 304 ve satır içi önizlemede `Content-Security-Policy: sandbox`.
+"""
+import hashlib
+import uuid
+from datetime import timedelta
+from email.utils import parsedate_to_datetime
+
+import pytest
+
+from ticket_service import attachment_store, database, db_models
+from ticket_service.config import settings
+from ticket_service.etag import http_date
+
+from .conftest import make_ticket
+
+CONTENT = b"<html><script>alert('ek')</script></html>"
+ETAG = f'"{hashlib.sha256(CONTENT).hexdigest()}"'
+
+
+@pytest.fixture
+def attachment(client):
+    ticket_id = make_ticket()
+    response = client.post(f"/api/tickets/{ticket_id}/attachments", files=[("files", ("sayfa.html", CONTENT, "text/html"))])
+    assert response.status_code == 200, response.text
+    return response.json()[0]
+
+
+def _download(client, attachment, method="GET", params=None, **headers):
+    return client.request(method, f"/api/tickets/attachments/{attachment['id']}", params=params, headers=headers)
+
+
+def _delete_stored_file(attachment):
+    with database.SessionLocal() as session:
+        stored = session.get(db_models.Attachment, uuid.UUID(attachment["id"]))
+        attachment_store.resolve_path(stored, settings).unlink()
+
+
+def test_download_uses_the_stored_content_type_and_cache_headers(client, attachment):
+    response = _download(client, attachment)
+
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["Content-Type"].startswith("text/html")
+    assert response.headers["Content-Disposition"].startswith("attachment;")
+    assert 'filename="sayfa.html"' in response.headers["Content-Disposition"]
+    assert response.headers["ETag"] == ETAG
+    assert response.headers["Cache-Control"] == "private, max-age=31536000, immutable"
+    assert response.headers["X-Content-Type-Options"] == "nosniff"
+    assert response.headers["Accept-Ranges"] == "bytes"
+    assert "Content-Security-Policy" not in response.headers
+
+
+def test_inline_preview_is_sandboxed(client, attachment):
+    response = _download(client, attachment, params={"inline": "true"})
+
+    assert response.status_code == 200
+    assert response.headers["Content-Disposition"].startswith("inline;")
+    assert response.headers["Content-Security-Policy"] == "sandbox"
+
+
+def test_head_returns_headers_without_a_body(client, attachment):
+    response = _download(client, attachment, method="HEAD")
+
+    assert response.status_code == 200
+    assert response.content == b""
+    assert response.headers["Content-Length"] == str(len(CONTENT))
+    assert response.headers["ETag"] == ETAG
+
+
+def test_range_returns_partial_content(client, attachment):
+    response = _download(client, attachment, Range="bytes=6-13")
+
+    assert response.status_code == 206
+    assert response.content == CONTENT[6:14]
+    assert response.headers["Content-Range"] == f"bytes 6-13/{len(CONTENT)}"
+    assert response.headers["Content-Type"].startswith("text/html")
+
+
+def test_if_range_serves_the_range_only_for_the_current_version(client, attachment):
+    partial = _download(client, attachment, Range="bytes=0-5", **{"If-Range": ETAG})
+    full = _download(client, attachment, Range="bytes=0-5", **{"If-Range": '"eski-surum"'})
+
+    assert (partial.status_code, partial.content) == (206, CONTENT[:6])
+    assert (full.status_code, full.content) == (200, CONTENT)
+
+
+def test_unsatisfiable_range_is_rejected(client, attachment):
+    response = _download(client, attachment, Range=f"bytes={len(CONTENT) + 10}-")
+
+    assert response.status_code == 416
+    assert response.headers["Content-Range"] == f"*/{len(CONTENT)}"
+
+
+@pytest.mark.parametrize("if_none_match", [ETAG, f"W/{ETAG}", f'"baska", {ETAG}', "*"])
+def test_matching_if_none_match_returns_304_without_reading_the_file(client, attachment, if_none_match):
+    _delete_stored_file(attachment)
+
+    response = _download(client, attachment, **{"If-None-Match": if_none_match})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == ETAG
+    assert response.headers["Cache-Control"] == "private, max-age=31536000, immutable"
+
+
+def test_if_modified_since_returns_304_until_the_upload_time(client, attachment):
+    last_modified = _download(client, attachment).headers["Last-Modified"]
+    uploaded_at = parsedate_to_datetime(last_modified)
+
+    not_modified = _download(client, attachment, **{"If-Modified-Since": last_modified})
+    modified = _download(client, attachment, **{"If-Modified-Since": http_date(uploaded_at - timedelta(seconds=1))})
+
+    assert not_modified.status_code == 304
+    assert not_modified.headers["Last-Modified"] == last_modified
+    assert modified.status_code == 200
+
+
+def test_if_none_match_takes_precedence_over_if_modified_since(client, attachment):
+    last_modified = _download(client, attachment).headers["Last-Modified"]
+
+    response = _download(client, attachment, **{"If-None-Match": '"baska"', "If-Modified-Since": last_modified})
+
+    assert response.status_code == 200
+    assert response.content == CONTENT
+
+
+def test_legacy_attachment_without_checksum_falls_back_to_file_validators(client, tmp_path):
+    legacy_file = tmp_path / "eski.bin"
+    legacy_file.write_bytes(b"eski ek")
+    ticket_id = make_ticket()
+    with database.SessionLocal() as session:
+        legacy = db_models.Attachment(file_name="eski.bin", file_path=str(legacy_file), ticket_id=ticket_id, uploader_id=uuid.uuid4())
+        session.add(legacy)
+        session.commit()
+        legacy_id = str(legacy.id)
+
+    response = _download(client, {"id": legacy_id})
+
+    assert response.status_code == 200
+    assert response.content == b"eski ek"
+    assert response.headers["Content-Type"] == "application/octet-stream"
+    assert response.headers["Cache-Control"] == "private, no-cache"
+    # ETag dosya bilgisinden (FileResponse) üretilir.
+    assert response.headers["ETag"]
+    assert _download(client, {"id": legacy_id}, **{"If-Modified-Since": response.headers["Last-Modified"]}).status_code == 304
+
+
+def test_missing_attachment_or_file_is_404(client, attachment):
+    assert _download(client, {"id": str(uuid.uuid4())}).status_code == 404
+
+    _delete_stored_file(attachment)
+    assert _download(client, attachment).status_code == 404
@@ -0,0 +1,279 @@
+# tests/ticket_service/test_bulk_import.py
+"""
+Toplu içe aktarım (/admin/import ve komut satırı): satır doğrulaması, satır numaralı hatalar, parçalara
+bölme ve yazılan bilet/yorum satırları. Testler SQLite yolunu uçtan uca çalıştırır; PostgreSQL'in COPY
+ve staging tablosu yolu, COPY'yi ve SQL'i kaydeden bir oturumla denetlenir.
+"""
+import io
+import json
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import select
+
+from ticket_service import bulk_import, database, db_models, models
+from ticket_service.config import settings
+
+from .conftest import TENANT_ID, make_ticket, run
+
+CREATOR_ID = uuid.UUID("00000000-0000-0000-0000-0000000000c1")
+AUTHOR_ID = uuid.UUID("00000000-0000-0000-0000-0000000000c2")
+
+
+@pytest.fixture
+def admin(current_user):
+    current_user["realm_access"]["roles"] = ["helpdesk_admin"]
+    return current_user
+
+
+def _csv(*rows):
+    header = "id,title,description,status,created_at,creator_id,tenant_id"
+    return "\n".join([header, *rows]).encode("utf-8") + b"\n"
+
+
+def _ticket_csv_row(ticket_id="", title="Eski sistem bileti", description="Eski sistemden aktarılan açıklama",
+                    status="Kapalı", created_at="2024-03-01T09:30:00+00:00", creator_id=CREATOR_ID):
+    return f"{ticket_id},{title},{description},{status},{created_at},{creator_id},{TENANT_ID}"
+
+
+def _jsonl(*records):
+    return "\n".join(record if isinstance(record, str) else json.dumps(record) for record in records).encode("utf-8") + b"\n"
+
+
+def _import(client, kind, file_name, content, **params):
+    return client.post(
+        "/api/tickets/admin/import",
+        params={"kind": kind, **params},
+        files={"file": (file_name, content, "application/octet-stream")},
+    )
+
+
+def _tickets():
+    with database.SessionLocal() as session:
+        return {ticket.id: ticket for ticket in session.scalars(select(db_models.Ticket))}
+
+
+def _comments():
+    with database.SessionLocal() as session:
+        return {comment.id: comment for comment in session.scalars(select(db_models.Comment))}
+
+
+def test_csv_tickets_import_valid_rows_and_report_invalid_ones(client, admin):
+    existing_id = make_ticket()
+    imported_id, duplicate_id = uuid.uuid4(), uuid.uuid4()
+    content = _csv(
+        _ticket_csv_row(imported_id),                                  # satır 2
+        _ticket_csv_row(title="Ab"),                                   # satır 3: başlık kısa
+        _ticket_csv_row(creator_id=""),                                # satır 4: creator_id yok
+        _ticket_csv_row(duplicate_id, title="Varsayılan durum", status="", created_at=""),  # satır 5
+        _ticket_csv_row(duplicate_id),                                 # satır 6: dosyada tekrar
+        _ticket_csv_row(existing_id),                                  # satır 7: veritabanında var
+    )
+
+    response = _import(client, "tickets", "eski.csv", content)
+
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert (result["total_rows"], result["imported"], result["failed"]) == (6, 2, 4)
+    assert [error["line"] for error in result["errors"]] == [3, 4, 6, 7]
+    assert result["errors"][0]["error"].startswith("title:")
+    assert result["errors"][1]["error"].startswith("creator_id:")
+    assert result["errors"][2]["error"] == f"ID {duplicate_id} bu parçada tekrar ediyor."
+    assert result["errors"][3]["error"] == f"ID {existing_id} zaten mevcut."
+    assert result["errors_truncated"] is False
+
+    tickets = _tickets()
+    assert set(tickets) == {existing_id, imported_id, duplicate_id}
+    imported = tickets[imported_id]
+    assert (imported.title, imported.status, imported.creator_id, imported.tenant_id) == ("Eski sistem bileti", "Kapalı", CREATOR_ID, TENANT_ID)
+    assert imported.created_at.replace(tzinfo=timezone.utc) == datetime(2024, 3, 1, 9, 30, tzinfo=timezone.utc)
+    # Boş hücreler model varsayılanlarını kullanır.
+    assert tickets[duplicate_id].status == "Açık"
+    assert tickets[duplicate_id].created_at is not None
+
+
+def test_imported_tickets_are_searchable(client, admin):
+    ticket_id = uuid.uuid4()
+    _import(client, "tickets", "eski.csv", _csv(_ticket_csv_row(ticket_id, title="Yazıcı arızası")))
+
+    response = client.get("/api/tickets/search", params={"q": "yazıcı"})
+
+    assert [item["id"] for item in response.json()["items"]] == [str(ticket_id)]
+
+
+def test_jsonl_comments_import_valid_rows_and_report_invalid_ones(client, admin):
+    ticket_id = make_ticket()
+    comment_id = uuid.uuid4()
+    content = _jsonl(
+        {"id": str(comment_id), "ticket_id": str(ticket_id), "author_id": str(AUTHOR_ID), "content": "Eski yanıt",
+         "created_at": "2024-03-02T10:00:00+00:00"},                                   # satır 1
+        "{bozuk json",                                                                 # satır 2
+        "",                                                                            # satır 3: boş, sayılmaz
+        '["nesne", "değil"]',                                                          # satır 4
+        {"ticket_id": str(uuid.uuid4()), "author_id": str(AUTHOR_ID), "content": "Bilet yok"},  # satır 5
+        {"ticket_id": str(ticket_id), "author_id": str(AUTHOR_ID), "content": ""},     # satır 6: boş içerik
+        {"ticket_id": str(ticket_id), "author_id": str(AUTHOR_ID), "content": "Tarihsiz yanıt"},  # satır 7
+    )
+
+    response = _import(client, "comments", "eski.jsonl", content)
+
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert (result["total_rows"], result["imported"], result["failed"]) == (6, 2, 4)
+    assert [(error["line"], error["error"].split(":")[0]) for error in result["errors"]] == [
+        (2, "Geçersiz JSON"), (4, "Satır bir nesne olmalıdır."), (5, "Bağlı olduğu bilet bulunamadı."), (6, "content"),
+    ]
+
+    comments = _comments()
+    assert len(comments) == 2
+    assert {comment.ticket_id for comment in comments.values()} == {ticket_id}
+    assert (comments[comment_id].content, comments[comment_id].author_id) == ("Eski yanıt", AUTHOR_ID)
+
+
+def test_rows_are_written_in_batches_and_errors_keep_source_line_numbers(client, admin, monkeypatch):
+    monkeypatch.setattr(settings, "import_batch_size", 2)
+    first_id = uuid.uuid4()
+    content = _csv(
+        _ticket_csv_row(first_id),     # satır 2, parça 1
+        _ticket_csv_row(title="Ab"),   # satır 3, parça 1
+        _ticket_csv_row(),             # satır 4, parça 2
+        _ticket_csv_row(first_id),     # satır 5, parça 2: önceki parçada yazıldı
+        _ticket_csv_row(),             # satır 6, parça 3
+    )
+
+    result = _import(client, "tickets", "eski.csv", content).json()
+
+    assert (result["total_rows"], result["imported"], result["failed"]) == (5, 3, 2)
+    assert [error["line"] for error in result["errors"]] == [3, 5]
+    assert len(_tickets()) == 3
+
+
+def test_reported_errors_are_capped():
+    content = _jsonl(*["{bozuk"] * 3)
+
+    async def import_and_dispose():
+        try:
+            return await bulk_import.import_stream("tickets", io.BytesIO(content), "jsonl", max_reported_errors=2)
+        finally:
+            await database.async_engine.dispose()
+
+    result = run(import_and_dispose())
+
+    assert (result.failed, len(result.errors), result.errors_truncated) == (3, 2, True)
+
+
+def test_format_comes_from_the_query_or_the_file_extension(client, admin):
+    content = _jsonl({"title": "Uzantısız dosya", "description": "Format parametresiyle verildi",
+                      "creator_id": str(CREATOR_ID), "tenant_id": str(TENANT_ID)})
+
+    assert _import(client, "tickets", "eski.txt", content).status_code == 400
+    response = _import(client, "tickets", "eski.txt", content, format="jsonl")
+    assert response.status_code == 200
+    assert response.json()["imported"] == 1
+
+
+def test_non_utf8_file_is_rejected(client, admin):
+    response = _import(client, "tickets", "eski.csv", _csv(_ticket_csv_row(title="Yazıcı")).decode().encode("utf-16"))
+
+    assert response.status_code == 400
+    assert _tickets() == {}
+
+
+def test_import_requires_an_admin(client):
+    response = _import(client, "tickets", "eski.csv", _csv(_ticket_csv_row()))
+
+    assert response.status_code == 403
+    assert _tickets() == {}
+
+
+class _RecordingPostgresSession:
+    """_write_batch_postgres'in kullandığı AsyncSession yüzeyini kaydeder; INSERT ... SELECT'e `rejected` satırlarını döndürür."""
+
+    def __init__(self, rejected):
+        self.rejected = rejected
+        self.statements = []
+        self.copies = []
+        self.committed = False
+        self.driver_connection = self
+
+    async def execute(self, statement):
+        self.statements.append(" ".join(str(statement).split()))
+        return self
+
+    def all(self):
+        return self.rejected
+
+    async def connection(self):
+        return self
+
+    async def get_raw_connection(self):
+        return self
+
+    async def copy_records_to_table(self, table_name, records, columns):
+        self.copies.append((table_name, records, columns))
+
+    async def commit(self):
+        self.committed = True
+
+
+def test_postgres_batch_is_copied_to_staging_and_moved_with_one_insert_select():
+    rows = [
+        (2, models.TicketImportRow(title="Birinci", description="Birinci açıklama", creator_id=CREATOR_ID, tenant_id=TENANT_ID)),
+        (3, models.TicketImportRow(title="İkinci", description="İkinci açıklama", creator_id=CREATOR_ID, tenant_id=TENANT_ID)),
+    ]
+    session = _RecordingPostgresSession(rejected=[(3, rows[1][1].id, False)])
+
+    imported, errors = run(bulk_import._write_batch_postgres(session, "tickets", rows))
+
+    create_staging, insert_select = session.statements
+    assert create_staging.startswith("CREATE TEMP TABLE tickets_import_staging (line_no integer, id uuid,")
+    assert create_staging.endswith("ON COMMIT DROP")
+    [(table_name, records, columns)] = session.copies
+    assert table_name == "tickets_import_staging"
+    assert columns == ["line_no", "id", "title", "description", "status", "created_at", "creator_id", "tenant_id"]
+    assert records[0] == (2, rows[0][1].id, "Birinci", "Birinci açıklama", "Açık", None, CREATOR_ID, TENANT_ID)
+    assert "INSERT INTO tickets_schema.tickets" in insert_select
+    assert "FROM tickets_import_staging s ON CONFLICT (id) DO NOTHING" in insert_select
+    assert session.committed
+    assert imported == 1
+    assert errors == [models.ImportRowError(line=3, error=f"ID {rows[1][1].id} zaten mevcut.")]
+
+
+def test_postgres_comment_batch_reports_missing_tickets():
+    row = models.CommentImportRow(ticket_id=uuid.uuid4(), author_id=AUTHOR_ID, content="Yanıt")
+    session = _RecordingPostgresSession(rejected=[(1, row.id, True)])
+
+    imported, errors = run(bulk_import._write_batch_postgres(session, "comments", [(1, row)]))
+
+    assert "JOIN tickets_schema.tickets t ON t.id = s.ticket_id" in session.statements[1]
+    assert (imported, errors) == (0, [models.ImportRowError(line=1, error="Bağlı olduğu bilet bulunamadı.")])
+
+
+def test_cli_imports_a_file_and_exits_non_zero_on_row_errors(tmp_path, capsys):
+    clean_file = tmp_path / "temiz.csv"
+    clean_file.write_bytes(_csv(_ticket_csv_row(), _ticket_csv_row()))
+    mixed_file = tmp_path / "karisik.jsonl"
+    mixed_file.write_bytes(_jsonl({"ticket_id": str(uuid.uuid4()), "author_id": str(AUTHOR_ID), "content": "Yanıt"}))
+
+    try:
+        assert bulk_import.main(["tickets", str(clean_file), "--batch-size", "1"]) == 0
+        clean_output = capsys.readouterr().out
+        assert bulk_import.main(["comments", str(mixed_file)]) == 1
+        mixed_output = capsys.readouterr().out
+    finally:
+        run(database.async_engine.dispose())
+
+    assert json.loads(clean_output[clean_output.index("{"):])["imported"] == 2
+    assert json.loads(mixed_output[mixed_output.index("{"):])["errors"][0]["line"] == 1
+    assert len(_tickets()) == 2
+
+
+def test_cli_needs_a_format_for_unknown_extensions(tmp_path):
+    path = tmp_path / "eski.txt"
+    path.write_bytes(b"")
+
+    with pytest.raises(SystemExit) as exit_info:
+        bulk_import.main(["tickets", str(path)])
+
+    assert exit_info.value.code == 2
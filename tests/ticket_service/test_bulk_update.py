@@ -0,0 +1,113 @@
+# tests/ticket_service/test_bulk_update.py
+"""
+PATCH /bulk: ID listesi veya filtreyle seçim, bilet başına sonuçlar, çağrı başına boyut sınırı ve
+güncellemenin tek bir set tabanlı UPDATE ile yapılması.
+"""
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+from tests.statements import capture_statements
+from ticket_service import database, db_models
+from ticket_service.config import settings
+
+from .conftest import TENANT_ID, make_ticket
+
+OTHER_TENANT_ID = uuid.UUID("00000000-0000-0000-0000-0000000000bb")
+
+
+def _bulk_patch(client, **body):
+    return client.patch("/api/tickets/bulk", json=body)
+
+
+def _statuses():
+    with database.SessionLocal() as session:
+        return {ticket.id: ticket.status for ticket in session.query(db_models.Ticket)}
+
+
+def test_ids_are_updated_with_one_update_and_missing_ids_reported(client):
+    first, second = make_ticket(), make_ticket()
+    untouched = make_ticket()
+    missing = uuid.uuid4()
+    ids = [str(first), str(missing), str(second), str(first)]
+
+    with capture_statements(database.async_engine.sync_engine) as log:
+        response = _bulk_patch(client, ids=ids, changes={"status": "Kapalı"})
+
+    assert response.status_code == 200, response.text
+    assert response.json() == {
+        "requested": 3,
+        "succeeded": 2,
+        "results": [
+            {"id": str(first), "result": "updated"},
+            {"id": str(missing), "result": "not_found"},
+            {"id": str(second), "result": "updated"},
+        ],
+    }
+    [update_statement] = log.statements
+    assert update_statement.startswith("UPDATE tickets_schema.tickets")
+    assert _statuses() == {first: "Kapalı", second: "Kapalı", untouched: "Açık"}
+
+
+def test_filter_selects_matching_tickets_only(client):
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    matching = make_ticket(status="Açık", created_at=start)
+    other_status = make_ticket(status="Beklemede", created_at=start)
+    other_tenant = make_ticket(status="Açık", created_at=start, tenant_id=OTHER_TENANT_ID)
+    too_late = make_ticket(status="Açık", created_at=datetime(2026, 2, 1, tzinfo=timezone.utc))
+    body_filter = {"tenant_id": str(TENANT_ID), "status": "Açık", "created_from": start.isoformat(), "created_to": "2026-02-01T00:00:00+00:00"}
+
+    with capture_statements(database.async_engine.sync_engine) as log:
+        response = _bulk_patch(client, filter=body_filter, changes={"status": "Spam"})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["results"] == [{"id": str(matching), "result": "updated"}]
+    # Hedefleri seçen SELECT ve tek UPDATE.
+    assert len(log) == 2
+    assert len(log.matching("UPDATE tickets_schema.tickets")) == 1
+    assert _statuses() == {matching: "Spam", other_status: "Beklemede", other_tenant: "Açık", too_late: "Açık"}
+
+
+def test_id_list_over_the_limit_is_rejected(client, monkeypatch):
+    monkeypatch.setattr(settings, "bulk_max_tickets", 2)
+    ids = [str(make_ticket()) for _ in range(3)]
+
+    assert _bulk_patch(client, ids=ids[:2], changes={"status": "Kapalı"}).status_code == 200
+    response = _bulk_patch(client, ids=ids, changes={"status": "Spam"})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Tek çağrıda en fazla 2 bilet işlenebilir."
+    assert sorted(_statuses().values()) == ["Açık", "Kapalı", "Kapalı"]
+
+
+def test_filter_matching_over_the_limit_is_rejected(client, monkeypatch):
+    monkeypatch.setattr(settings, "bulk_max_tickets", 2)
+    for _ in range(3):
+        make_ticket()
+
+    response = _bulk_patch(client, filter={"status": "Açık"}, changes={"status": "Spam"})
+
+    assert response.status_code == 400
+    assert "2 biletten fazlasıyla eşleşiyor" in response.json()["detail"]
+    assert set(_statuses().values()) == {"Açık"}
+
+
+def test_customers_cannot_bulk_update(client, current_user):
+    current_user["realm_access"]["roles"] = ["customer-user"]
+    ticket_id = make_ticket()
+
+    response = _bulk_patch(client, ids=[str(ticket_id)], changes={"status": "Kapalı"})
+
+    assert response.status_code == 403
+    assert _statuses() == {ticket_id: "Açık"}
+
+
+@pytest.mark.parametrize("body, status_code", [
+    ({"ids": ["00000000-0000-0000-0000-000000000001"], "changes": {}}, 400),
+    ({"changes": {"status": "Kapalı"}}, 422),
+    ({"ids": ["00000000-0000-0000-0000-000000000001"], "filter": {}, "changes": {"status": "Kapalı"}}, 422),
+    ({"ids": [], "changes": {"status": "Kapalı"}}, 422),
+])
+def test_invalid_requests_are_rejected(client, body, status_code):
+    assert _bulk_patch(client, **body).status_code == status_code
@@ -0,0 +1,195 @@
+# tests/ticket_service/test_cache.py
+"""
+AsyncTTLCache: eşzamanlı yüklemelerin birleştirilmesi (ilk çağıranın iptali diğerlerini etkilemeden),
+stale-while-revalidate, negatif önbellek, hata durumları ve sayaçlar. Saat `cache.time` yerine konan
+elle ilerletilen bir saatle yönetilir.
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from ticket_service import cache
+
+from .conftest import run
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+class Loader:
+    """Çağrıları sayan yükleyici; `gate` verilirse açılana kadar bekler."""
+
+    def __init__(self, *results, gate=None):
+        self.results = list(results)
+        self.gate = gate
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.gate is not None:
+            await self.gate.wait()
+        result = self.results.pop(0) if len(self.results) > 1 else self.results[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache, "time", SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+def _counters(ttl_cache, *names):
+    stats = ttl_cache.stats()
+    return {name: stats[name] for name in names}
+
+
+def test_concurrent_misses_share_one_load(clock):
+    ttl_cache = cache.AsyncTTLCache(max_entries=10, ttl=60)
+
+    async def scenario():
+        gate = asyncio.Event()
+        loader = Loader("değer", gate=gate)
+        waiters = [asyncio.create_task(ttl_cache.get_or_load("k", loader)) for _ in range(5)]
+        await asyncio.sleep(0)
+        gate.set()
+        values = await asyncio.gather(*waiters)
+        return loader.calls, values
+
+    calls, values = run(scenario())
+
+    assert calls == 1
+    assert values == ["değer"] * 5
+    assert _counters(ttl_cache, "misses", "coalesced", "size") == {"misses": 5, "coalesced": 4, "size": 1}
+
+
+def test_cancelling_the_first_caller_does_not_fail_coalesced_waiters(clock):
+    ttl_cache = cache.AsyncTTLCache(max_entries=10, ttl=60)
+
+    async def scenario():
+        gate = asyncio.Event()
+        loader = Loader("değer", gate=gate)
+        leader = asyncio.create_task(ttl_cache.get_or_load("k", loader))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(ttl_cache.get_or_load("k", loader))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        await asyncio.sleep(0)
+        gate.set()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return loader.calls, await follower
+
+    calls, value = run(scenario())
+
+    assert (calls, value) == (1, "değer")
+    # Yükleme iptalden etkilenmediği için sonuç önbellekte.
+    assert run(ttl_cache.get_or_load("k", Loader("yeni"))) == "değer"
+
+
+def test_load_completes_and_is_cached_when_every_waiter_is_cancelled(clock):
+    ttl_cache = cache.AsyncTTLCache(max_entries=10, ttl=60)
+
+    async def scenario():
+        gate = asyncio.Event()
+        waiter = asyncio.create_task(ttl_cache.get_or_load("k", Loader("değer", gate=gate)))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        gate.set()
+        for _ in range(3):
+            await asyncio.sleep(0)
+
+    run(scenario())
+
+    assert run(ttl_cache.get_or_load("k", Loader("yeni"))) == "değer"
+    assert _counters(ttl_cache, "hits") == {"hits": 1}
+
+
+def test_stale_value_is_served_while_revalidating_in_background(clock):
+    ttl_cache = cache.AsyncTTLCache(max_entries=10, ttl=10, stale_ttl=30)
+    loader = Loader("eski", "yeni")
+
+    async def scenario():
+        first = await ttl_cache.get_or_load("k", loader)
+        clock.now += 15
+        stale = await ttl_cache.get_or_load("k", loader)
+        # Arka plan yenilemesinin tamamlanmasını bekle.
+        await asyncio.gather(*ttl_cache._background_tasks)
+        fresh = await ttl_cache.get_or_load("k", loader)
+        return first, stale, fresh
+
+    assert run(scenario()) == ("eski", "eski", "yeni")
+    assert loader.calls == 2
+    assert _counters(ttl_cache, "misses", "stale_hits", "hits") == {"misses": 1, "stale_hits": 1, "hits": 1}
+
+
+def test_value_past_the_stale_window_is_reloaded_in_the_foreground(clock):
+    ttl_cache = cache.AsyncTTLCache(max_entries=10, ttl=10, stale_ttl=30)
+    loader = Loader("eski", "yeni")
+    assert run(ttl_cache.get_or_load("k", loader)) == "eski"
+
+    clock.now += 41
+
+    assert run(ttl_cache.get_or_load("k", loader)) == "yeni"
+    assert _counters(ttl_cache, "misses", "stale_hits") == {"misses": 2, "stale_hits": 0}
+
+
+def test_missing_record_is_cached_for_the_negative_ttl_only(clock):
+    ttl_cache = cache.AsyncTTLCache(max_entries=10, ttl=60, stale_ttl=60, negative_ttl=5)
+    loader = Loader(None, "oluştu")
+
+    assert run(ttl_cache.get_or_load("k", loader)) is None
+    assert run(ttl_cache.get_or_load("k", loader)) is None
+    assert loader.calls == 1
+
+    # Negatif sonuçlar bayat olarak sunulmaz: süresi geçince hemen yeniden yüklenir.
+    clock.now += 6
+    assert run(ttl_cache.get_or_load("k", loader)) == "oluştu"
+    assert _counters(ttl_cache, "misses", "negative_hits", "stale_hits") == {"misses": 2, "negative_hits": 1, "stale_hits": 0}
+
+
+def test_missing_record_is_not_cached_without_a_negative_ttl(clock):
+    ttl_cache = cache.AsyncTTLCache(max_entries=10, ttl=60)
+    loader = Loader(None)
+
+    run(ttl_cache.get_or_load("k", loader))
+    run(ttl_cache.get_or_load("k", loader))
+
+    assert loader.calls == 2
+    assert ttl_cache.stats()["size"] == 0
+
+
+def test_load_errors_are_not_cached_and_fall_back_to_an_expired_value(clock):
+    ttl_cache = cache.AsyncTTLCache(max_entries=10, ttl=10)
+    loader = Loader("eski", ConnectionError("user_service kapalı"), "yeni")
+
+    assert run(ttl_cache.get_or_load("k", loader)) == "eski"
+    clock.now += 11
+    assert run(ttl_cache.get_or_load("k", loader)) == "eski"
+    assert run(ttl_cache.get_or_load("k", loader)) == "yeni"
+    assert _counters(ttl_cache, "load_errors", "misses") == {"load_errors": 1, "misses": 3}
+
+    with pytest.raises(ConnectionError):
+        run(ttl_cache.get_or_load("başka", Loader(ConnectionError("user_service kapalı"))))
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    ttl_cache = cache.AsyncTTLCache(max_entries=2, ttl=60)
+    for key in ("a", "b"):
+        run(ttl_cache.get_or_load(key, Loader(key)))
+    run(ttl_cache.get_or_load("a", Loader("a")))
+
+    run(ttl_cache.get_or_load("c", Loader("c")))
+
+    reloaded = Loader("b2")
+    assert run(ttl_cache.get_or_load("b", reloaded)) == "b2"
+    assert _counters(ttl_cache, "evictions", "size") == {"evictions": 2, "size": 2}
@@ -0,0 +1,113 @@
+# tests/ticket_service/test_conditional_get.py
+"""
+Bilet detayı ve listesinde ETag / If-None-Match: 304 yanıtı user_service'e gitmeden, yalnızca sürüm
+sorgusuyla döner. Liste sürümü tetikleyicilerle tutulan kapsam sayacıdır; liste önbelleği bu testlerde kapalıdır.
+"""
+import uuid
+
+import pytest
+from sqlalchemy import delete, update
+
+from tests.statements import capture_statements
+from ticket_service import database, db_models, list_cache, user_service_client
+
+from .conftest import add_comment, make_ticket
+
+
+def test_matching_etag_returns_304_without_calling_user_service(client, user_service, monkeypatch):
+    ticket_id = make_ticket()
+    first = client.get(f"/api/tickets/{ticket_id}")
+    assert first.status_code == 200
+    assert first.json()["creator_details"]["full_name"] == "Test Kullanıcı"
+    assert len(user_service.user_detail_requests()) == 1
+
+    # Süreç içi kullanıcı önbelleği boşken bile 304 için user_service'e gidilmemeli.
+    monkeypatch.setattr(user_service_client, "_user_details_cache", None)
+    with capture_statements(database.async_engine.sync_engine) as log:
+        second = client.get(f"/api/tickets/{ticket_id}", headers={"If-None-Match": first.headers["ETag"]})
+
+    assert second.status_code == 304
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert len(user_service.user_detail_requests()) == 1
+    assert len(log) == 1
+
+
+def test_etag_changes_when_the_ticket_changes(client):
+    ticket_id = make_ticket()
+    first = client.get(f"/api/tickets/{ticket_id}")
+    assert client.post(f"/api/tickets/{ticket_id}/comments", json={"content": "Yeni yorum"}).status_code == 201
+
+    second = client.get(f"/api/tickets/{ticket_id}", headers={"If-None-Match": first.headers["ETag"]})
+
+    assert second.status_code == 200
+    assert second.headers["ETag"] != first.headers["ETag"]
+    assert [comment["content"] for comment in second.json()["comments"]] == ["Yeni yorum"]
+
+
+def test_etag_depends_on_selected_fields(client, user_service):
+    ticket_id = make_ticket()
+    full = client.get(f"/api/tickets/{ticket_id}")
+    sparse = client.get(f"/api/tickets/{ticket_id}", params={"fields": "id,title"})
+
+    assert sparse.status_code == 200
+    assert sparse.json() == {"id": str(ticket_id), "title": "Destek talebi"}
+    assert sparse.headers["ETag"] != full.headers["ETag"]
+    # creator_details istenmediğinde user_service'e gidilmez.
+    assert len(user_service.user_detail_requests()) == 1
+
+
+@pytest.fixture
+def no_list_cache():
+    list_cache.configure(list_cache.InMemoryListCacheBackend(max_entries=1000), ttl=0)
+
+
+def _execute(statement):
+    with database.SessionLocal() as session:
+        session.execute(statement)
+        session.commit()
+
+
+def test_list_304_reads_only_the_version_counter(client, no_list_cache):
+    make_ticket()
+    first = client.get("/api/tickets/")
+    assert first.status_code == 200
+
+    with capture_statements(database.async_engine.sync_engine) as log:
+        second = client.get("/api/tickets/", headers={"If-None-Match": first.headers["ETag"]})
+
+    assert second.status_code == 304
+    [version_query] = log.statements
+    assert "FROM tickets_schema.ticket_list_versions" in version_query
+    assert "count(" not in version_query.lower()
+
+
+@pytest.mark.parametrize("change", [
+    lambda ticket_id: make_ticket(title="Yeni bilet"),
+    lambda ticket_id: _execute(update(db_models.Ticket).where(db_models.Ticket.id == ticket_id).values(status="Kapalı")),
+    lambda ticket_id: add_comment(ticket_id, "Yeni yorum"),
+    lambda ticket_id: _execute(delete(db_models.Ticket).where(db_models.Ticket.id == ticket_id)),
+], ids=["insert", "update", "comment", "delete"])
+def test_list_etag_changes_on_every_ticket_write(client, no_list_cache, change):
+    ticket_id = make_ticket()
+    first = client.get("/api/tickets/")
+
+    change(ticket_id)
+    second = client.get("/api/tickets/", headers={"If-None-Match": first.headers["ETag"]})
+
+    assert second.status_code == 200
+    assert second.headers["ETag"] != first.headers["ETag"]
+
+
+def test_list_etag_of_a_creator_ignores_other_creators(client, current_user, no_list_cache):
+    current_user["realm_access"]["roles"] = ["employee"]
+    own_id = make_ticket(creator_id=uuid.UUID(current_user["sub"]))
+    first = client.get("/api/tickets/")
+
+    make_ticket(title="Başkasının bileti")
+    assert client.get("/api/tickets/", headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+
+    # Bilet başka birine aktarılınca eski sahibinin listesi de değişir.
+    _execute(update(db_models.Ticket).where(db_models.Ticket.id == own_id).values(creator_id=uuid.uuid4()))
+    second = client.get("/api/tickets/", headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 200
+    assert second.json()["items"] == []
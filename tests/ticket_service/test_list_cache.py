@@ -0,0 +1,180 @@
+# tests/ticket_service/test_list_cache.py
+"""
+Bilet listesi önbelleği: isabet/ıskalama, yazmalarla geçersiz kılma ve "staff" / "creator:<id>" kapsamları.
+Önbellek `list_cache.configure()` ile kayıt tutan yerel bir backend'e bağlanır.
+"""
+import uuid
+
+import pytest
+
+from tests.statements import capture_statements
+from ticket_service import database, list_cache
+
+from .conftest import make_ticket
+
+
+class RecordingBackend(list_cache.InMemoryListCacheBackend):
+    """Süreç içi backend; artırılan nesil sayaçlarını kaydeder."""
+
+    def __init__(self):
+        super().__init__(max_entries=1000)
+        self.bumped = []
+
+    async def bump_generations(self, names):
+        self.bumped.append(sorted(names))
+        await super().bump_generations(names)
+
+
+class FailingBackend:
+    async def get(self, key):
+        raise ConnectionError("redis kapalı")
+
+    async def set(self, key, value, ttl):
+        raise ConnectionError("redis kapalı")
+
+    async def get_generations(self, names):
+        raise ConnectionError("redis kapalı")
+
+    async def bump_generations(self, names):
+        raise ConnectionError("redis kapalı")
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def backend():
+    recording_backend = RecordingBackend()
+    list_cache.configure(recording_backend, ttl=60)
+    return recording_backend
+
+
+def _stats():
+    return list_cache.get_ticket_list_cache_stats()
+
+
+def _list_titles(client):
+    response = client.get("/api/tickets/")
+    assert response.status_code == 200, response.text
+    return sorted(item["title"] for item in response.json()["items"])
+
+
+def _as_staff(current_user):
+    current_user["realm_access"]["roles"] = ["agent"]
+
+
+def _as_customer(current_user, user_id):
+    current_user["sub"] = str(user_id)
+    current_user["realm_access"]["roles"] = ["customer-user"]
+
+
+def test_second_identical_request_is_served_from_cache(client, backend):
+    make_ticket(title="Yazıcı arızası")
+
+    assert _list_titles(client) == ["Yazıcı arızası"]
+    with capture_statements(database.async_engine.sync_engine) as log:
+        assert _list_titles(client) == ["Yazıcı arızası"]
+
+    assert len(log) == 0
+    assert (_stats()["misses"], _stats()["hits"]) == (1, 1)
+
+
+def test_cached_page_still_answers_if_none_match_with_304(client, backend):
+    make_ticket()
+    first = client.get("/api/tickets/")
+    second = client.get("/api/tickets/", headers={"If-None-Match": first.headers["ETag"]})
+
+    assert second.status_code == 304
+    assert _stats()["hits"] == 1
+
+
+def test_different_parameters_use_different_entries(client, backend):
+    make_ticket()
+    client.get("/api/tickets/")
+    client.get("/api/tickets/", params={"limit": 10})
+    client.get("/api/tickets/", params={"fields": "id,title"})
+
+    assert (_stats()["misses"], _stats()["hits"]) == (3, 0)
+
+
+def test_create_invalidates_staff_and_creator_scopes(client, backend, current_user):
+    _list_titles(client)
+
+    response = client.post("/api/tickets/", json={"title": "Yeni bilet", "description": "Yeni biletin açıklaması"})
+    assert response.status_code == 201, response.text
+
+    assert backend.bumped == [sorted(["staff", f"creator:{current_user['sub']}"])]
+    assert _list_titles(client) == ["Yeni bilet"]
+
+
+def test_update_and_comment_invalidate_the_ticket_owner_scope(client, backend, current_user):
+    owner_id = uuid.uuid4()
+    ticket_id = make_ticket(title="Yazıcı arızası", creator_id=owner_id)
+    assert _list_titles(client) == ["Yazıcı arızası"]
+
+    assert client.patch(f"/api/tickets/{ticket_id}", json={"title": "Tarayıcı arızası"}).status_code == 200
+    assert _list_titles(client) == ["Tarayıcı arızası"]
+
+    assert client.post(f"/api/tickets/{ticket_id}/comments", json={"content": "İnceleniyor"}).status_code == 201
+    assert client.get("/api/tickets/").json()["items"][0]["comment_count"] == 1
+
+    expected_scopes = sorted(["staff", f"creator:{owner_id}"])
+    assert backend.bumped == [expected_scopes, expected_scopes]
+    assert _stats()["hits"] == 0
+
+
+def test_bulk_operations_invalidate_every_scope(client, backend, current_user):
+    customer_id = uuid.uuid4()
+    ticket_id = make_ticket(title="Yazıcı arızası", creator_id=customer_id)
+    _as_customer(current_user, customer_id)
+    assert _list_titles(client) == ["Yazıcı arızası"]
+
+    _as_staff(current_user)
+    response = client.patch("/api/tickets/bulk", json={"ids": [str(ticket_id)], "changes": {"status": "Kapalı"}})
+    assert response.status_code == 200, response.text
+    assert backend.bumped == [["global"]]
+
+    _as_customer(current_user, customer_id)
+    assert client.get("/api/tickets/").json()["items"][0]["status"] == "Kapalı"
+
+    current_user["realm_access"]["roles"] = ["general-admin"]
+    response = client.request("DELETE", "/api/tickets/bulk", json={"ids": [str(ticket_id)]})
+    assert response.status_code == 200, response.text
+    _as_customer(current_user, customer_id)
+    assert _list_titles(client) == []
+
+
+def test_customers_only_see_and_invalidate_their_own_scope(client, backend, current_user):
+    first_customer, second_customer = uuid.uuid4(), uuid.uuid4()
+    make_ticket(title="Birinci müşteri", creator_id=first_customer)
+    second_ticket = make_ticket(title="İkinci müşteri", creator_id=second_customer)
+
+    _as_customer(current_user, first_customer)
+    assert _list_titles(client) == ["Birinci müşteri"]
+    _as_customer(current_user, second_customer)
+    assert _list_titles(client) == ["İkinci müşteri"]
+    _as_staff(current_user)
+    assert _list_titles(client) == ["Birinci müşteri", "İkinci müşteri"]
+    assert _stats()["misses"] == 3
+
+    # İkinci müşterinin biletindeki değişiklik birinci müşterinin önbelleğine dokunmaz.
+    assert client.patch(f"/api/tickets/{second_ticket}", json={"title": "İkinci müşteri (güncel)"}).status_code == 200
+
+    _as_customer(current_user, first_customer)
+    assert _list_titles(client) == ["Birinci müşteri"]
+    assert _stats()["hits"] == 1
+    _as_customer(current_user, second_customer)
+    assert _list_titles(client) == ["İkinci müşteri (güncel)"]
+    _as_staff(current_user)
+    assert _list_titles(client) == ["Birinci müşteri", "İkinci müşteri (güncel)"]
+    assert (_stats()["misses"], _stats()["hits"]) == (5, 1)
+
+
+def test_backend_errors_fall_back_to_the_database(client, current_user):
+    list_cache.configure(FailingBackend(), ttl=60)
+    ticket_id = make_ticket(title="Yazıcı arızası")
+
+    assert _list_titles(client) == ["Yazıcı arızası"]
+    assert client.patch(f"/api/tickets/{ticket_id}", json={"title": "Tarayıcı arızası"}).status_code == 200
+    assert _list_titles(client) == ["Tarayıcı arızası"]
+    assert _stats()["backend_errors"] == 3
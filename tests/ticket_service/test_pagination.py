@@ -0,0 +1,109 @@
+# tests/ticket_service/test_pagination.py
+"""
+Bilet listesi ile yorum/ek sayfalarında keyset (cursor) sayfalama: sayfaların tekrarsız ilerlemesi,
+`next_cursor`'ın son sayfada bitmesi ve bozuk cursor'ların 400 ile reddedilmesi.
+"""
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from ticket_service import database, db_models
+from ticket_service.pagination import encode_cursor
+
+from .conftest import make_ticket
+
+# Her biri çözülebilen ama geçersiz içerikli cursor'lar: base64 değil, JSON değil, yanlış uzunluk, yanlış tipler.
+MALFORMED_CURSORS = [
+    "bozuk",
+    encode_cursor({"created_at": "2026-01-01"}),
+    encode_cursor(["2026-01-01T00:00:00+00:00"]),
+    encode_cursor([1, 2]),
+    encode_cursor([["2026-01-01"], str(uuid.uuid4())]),
+    encode_cursor(["2026-01-01T00:00:00+00:00", 42]),
+    encode_cursor(["dün", str(uuid.uuid4())]),
+    encode_cursor(["2026-01-01T00:00:00+00:00", "bilet"]),
+]
+
+
+def _pages(client, path, limit):
+    pages, cursor = [], None
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        response = client.get(path, params=params)
+        assert response.status_code == 200, response.text
+        pages.append([item["id"] for item in response.json()["items"]])
+        cursor = response.json()["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def test_ticket_list_pages_newest_first_until_next_cursor_ends(client):
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    ticket_ids = [str(make_ticket(title=f"Bilet {index}", created_at=start + timedelta(minutes=index))) for index in range(5)]
+
+    pages = _pages(client, "/api/tickets/", limit=2)
+
+    assert pages == [ticket_ids[4:2:-1], ticket_ids[2:0:-1], ticket_ids[:1]]
+
+
+@pytest.mark.parametrize("cursor", MALFORMED_CURSORS)
+def test_malformed_ticket_list_cursor_is_rejected(client, cursor):
+    make_ticket()
+
+    response = client.get("/api/tickets/", params={"cursor": cursor})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Geçersiz sayfalama cursor'ı."
+
+
+def _add_children(ticket_id, model, timestamp_field, timestamps, **values):
+    with database.SessionLocal() as session:
+        rows = [model(ticket_id=ticket_id, **{timestamp_field: timestamp}, **values) for timestamp in timestamps]
+        session.add_all(rows)
+        session.commit()
+        # Eskiden yeniye, eşit zamanlarda id sırasıyla.
+        return [str(row.id) for row in sorted(rows, key=lambda row: (getattr(row, timestamp_field), str(row.id)))]
+
+
+CHILD_PAGES = {
+    "comments": (db_models.Comment, "created_at", {"content": "Yorum", "author_id": uuid.uuid4()}),
+    "attachments": (db_models.Attachment, "uploaded_at", {"file_name": "ek.txt", "file_path": "eski/ek.txt", "uploader_id": uuid.uuid4()}),
+}
+
+
+@pytest.mark.parametrize("children", CHILD_PAGES)
+def test_child_pages_run_oldest_first_until_next_cursor_ends(client, children):
+    model, timestamp_field, values = CHILD_PAGES[children]
+    ticket_id, other_ticket_id = make_ticket(), make_ticket()
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    # İki satır aynı zamanda: sıra id ile belirlenir, sayfa sınırında satır atlanmamalı ya da tekrarlanmamalı.
+    timestamps = [start, start + timedelta(minutes=1), start + timedelta(minutes=1), start + timedelta(minutes=2), start + timedelta(minutes=3)]
+    expected = _add_children(ticket_id, model, timestamp_field, timestamps, **values)
+    _add_children(other_ticket_id, model, timestamp_field, [start], **values)
+
+    pages = _pages(client, f"/api/tickets/{ticket_id}/{children}", limit=2)
+
+    assert pages == [expected[0:2], expected[2:4], expected[4:5]]
+
+
+@pytest.mark.parametrize("children", CHILD_PAGES)
+def test_exact_last_page_has_no_next_cursor(client, children):
+    model, timestamp_field, values = CHILD_PAGES[children]
+    ticket_id = make_ticket()
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    expected = _add_children(ticket_id, model, timestamp_field, [start, start + timedelta(minutes=1)], **values)
+
+    assert _pages(client, f"/api/tickets/{ticket_id}/{children}", limit=2) == [expected]
+    assert _pages(client, f"/api/tickets/{make_ticket()}/{children}", limit=2) == [[]]
+
+
+@pytest.mark.parametrize("children", CHILD_PAGES)
+@pytest.mark.parametrize("cursor", MALFORMED_CURSORS)
+def test_malformed_child_page_cursor_is_rejected(client, children, cursor):
+    ticket_id = make_ticket()
+
+    response = client.get(f"/api/tickets/{ticket_id}/{children}", params={"cursor": cursor})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Geçersiz sayfalama cursor'ı."
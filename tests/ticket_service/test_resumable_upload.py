@@ -0,0 +1,124 @@
+# tests/ticket_service/test_resumable_upload.py
+"""
+Devam ettirilebilir yükleme: parça ekleme ve tamamlama, tamamlanmakta olan oturumun offset sorgusu ve
+süresi geçen oturumların temizliğinin kullanımdaki oturumlara dokunmaması.
+"""
+import hashlib
+import json
+import os
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from ticket_service import resumable_upload
+from ticket_service.config import settings
+
+from .conftest import make_ticket
+
+CONTENT = b"parca parca yuklenen buyuk dosya"
+
+
+def _create_session(client, ticket_id, content=CONTENT):
+    response = client.post(
+        f"/api/tickets/{ticket_id}/uploads",
+        json={"file_name": "buyuk.bin", "size": len(content), "sha256": hashlib.sha256(content).hexdigest()},
+    )
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def _patch(client, upload_id, offset, chunk):
+    return client.patch(
+        f"/api/tickets/uploads/{upload_id}",
+        content=chunk,
+        headers={"Upload-Offset": str(offset), "Content-Type": "application/offset+octet-stream"},
+    )
+
+
+def _session_dir(upload_id):
+    return Path(settings.attachment_storage_dir) / "sessions" / uuid.UUID(upload_id).hex
+
+
+def _expire(session_dir):
+    meta_path = session_dir / "meta.json"
+    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    meta["expires_at"] = (datetime.now(timezone.utc) - timedelta(seconds=1)).isoformat()
+    meta_path.write_text(json.dumps(meta), encoding="utf-8")
+
+
+def _cleanup():
+    return resumable_upload._cleanup_expired_sessions(Path(settings.attachment_storage_dir) / "sessions")
+
+
+def test_chunks_resume_from_the_server_offset_and_finalize(client):
+    ticket_id = make_ticket()
+    upload_id = _create_session(client, ticket_id)
+
+    assert _patch(client, upload_id, 0, CONTENT[:10]).headers["Upload-Offset"] == "10"
+    conflict = _patch(client, upload_id, 0, CONTENT[:10])
+    assert conflict.status_code == 409
+    assert conflict.headers["Upload-Offset"] == "10"
+
+    head = client.head(f"/api/tickets/uploads/{upload_id}")
+    assert head.headers["Upload-Offset"] == "10"
+    assert _patch(client, upload_id, 10, CONTENT[10:]).status_code == 204
+
+    response = client.post(f"/api/tickets/uploads/{upload_id}/finalize")
+    assert response.status_code == 201, response.text
+    assert response.json()["sha256"] == hashlib.sha256(CONTENT).hexdigest()
+    assert not _session_dir(upload_id).exists()
+
+
+@pytest.mark.parametrize("method", ["GET", "HEAD"])
+def test_offset_of_a_finalizing_session_is_a_conflict(client, method):
+    ticket_id = make_ticket()
+    upload_id = _create_session(client, ticket_id)
+    assert _patch(client, upload_id, 0, CONTENT).status_code == 204
+    # finalize'ın ilk adımı: data.part yeniden adlandırılır, hash ve depoya taşıma sürerken offset yoktur.
+    resumable_upload._begin_finalize(_session_dir(upload_id))
+
+    response = client.request(method, f"/api/tickets/uploads/{upload_id}")
+
+    assert response.status_code == 409
+    assert "Upload-Offset" not in response.headers
+    assert client.post(f"/api/tickets/uploads/{upload_id}/finalize").status_code == 409
+
+
+def test_cleanup_removes_idle_expired_sessions_only(client):
+    ticket_id = make_ticket()
+    active_id, idle_id = _create_session(client, ticket_id), _create_session(client, ticket_id)
+    for upload_id in (active_id, idle_id):
+        _expire(_session_dir(upload_id))
+
+    # Süresi dolmadan hemen önce başlamış ve hâlâ yazılan bir parça: PATCH data.part üzerinde flock tutar.
+    data_file = resumable_upload._open_for_append(_session_dir(active_id) / "data.part", 0)
+    try:
+        assert _cleanup() == 1
+        assert _session_dir(active_id).exists()
+        assert not _session_dir(idle_id).exists()
+    finally:
+        data_file.close()
+
+    assert _cleanup() == 1
+    assert not _session_dir(active_id).exists()
+
+
+def test_cleanup_skips_expired_session_being_finalized(client):
+    ticket_id = make_ticket()
+    upload_id = _create_session(client, ticket_id)
+    session_dir = _session_dir(upload_id)
+    _expire(session_dir)
+    finalizing_path = resumable_upload._begin_finalize(session_dir)
+
+    assert _cleanup() == 0
+    assert finalizing_path.exists()
+
+    # Çöken bir finalize'dan kalan eski data.finalizing artık oturumu tutmaz.
+    stale = time.time() - resumable_upload._ABANDONED_AFTER - 1
+    os.utime(finalizing_path, (stale, stale))
+    assert _cleanup() == 1
+    assert not session_dir.exists()
+
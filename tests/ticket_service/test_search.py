@@ -0,0 +1,125 @@
+# tests/ticket_service/test_search.py
+"""Tam metin aramasının SQLite FTS5 yedeği: sıralama, (rank, id) cursor'ı ve FTS dizininin yazmalarla eşitlenmesi."""
+import uuid
+
+import pytest
+
+from ticket_service import crud, database, db_models
+from ticket_service.pagination import encode_cursor
+
+from .conftest import add_comment, make_ticket, run
+
+
+def _search_ids(client, q, **params):
+    response = client.get("/api/tickets/search", params={"q": q, **params})
+    assert response.status_code == 200, response.text
+    return [item["id"] for item in response.json()["items"]]
+
+
+def test_results_are_ranked_title_before_description_before_comments(client):
+    in_comments = make_ticket(title="Bağlantı sorunu", description="Ağ kablosu takılı değil")
+    add_comment(in_comments, "Yazıcı da yanıt vermiyor")
+    in_description = make_ticket(title="Ofis sorunu", description="Yazıcı kağıt sıkıştırıyor")
+    in_title = make_ticket(title="Yazıcı arızası", description="Toner bitmiş olabilir")
+    make_ticket(title="Parola sıfırlama", description="Hesap kilitlendi")
+
+    assert _search_ids(client, "yazıcı") == [str(in_title), str(in_description), str(in_comments)]
+
+
+def test_search_uses_turkish_case_folding(client):
+    ticket_id = make_ticket(title="Yazıcı arızası", description="İstanbul ofisi")
+
+    assert _search_ids(client, "YAZICI") == [str(ticket_id)]
+    assert _search_ids(client, "istanbul") == [str(ticket_id)]
+
+
+def test_cursor_continues_in_rank_order_without_duplicates(client):
+    for index in range(5):
+        make_ticket(title=f"Yazıcı {index}", description="Sıkışan kağıt " * (index + 1))
+    expected = _search_ids(client, "yazıcı kağıt", limit=10)
+    assert len(expected) == 5
+
+    seen, cursor = [], None
+    while True:
+        params = {"q": "yazıcı kağıt", "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get("/api/tickets/search", params=params).json()
+        seen.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == expected
+
+
+@pytest.mark.parametrize("cursor", [
+    "bozuk",
+    encode_cursor([[1, 2], str(uuid.uuid4())]),
+    encode_cursor([0.5, 42]),
+    encode_cursor([0.5]),
+])
+def test_invalid_cursor_is_rejected(client, cursor):
+    make_ticket(title="Yazıcı arızası")
+    response = client.get("/api/tickets/search", params={"q": "yazıcı", "cursor": cursor})
+    assert response.status_code == 400
+
+
+def test_customers_only_find_their_own_tickets(client, current_user):
+    own = make_ticket(title="Yazıcı arızası", creator_id=uuid.UUID(current_user["sub"]))
+    make_ticket(title="Yazıcı arızası")
+    current_user["realm_access"]["roles"] = ["customer-user"]
+
+    assert _search_ids(client, "yazıcı") == [str(own)]
+
+
+def test_index_follows_orm_update_and_delete():
+    ticket_id = make_ticket(title="Yazıcı arızası")
+    with database.SessionLocal() as session:
+        session.get(db_models.Ticket, ticket_id).title = "Monitör arızası"
+        session.commit()
+
+    async def search(q):
+        async with database.AsyncSessionLocal() as db:
+            tickets, _ = await crud.search_tickets(db, q)
+            return [ticket.id for ticket in tickets]
+
+    assert run(search("yazıcı")) == []
+    assert run(search("monitör")) == [ticket_id]
+
+    with database.SessionLocal() as session:
+        session.delete(session.get(db_models.Ticket, ticket_id))
+        session.commit()
+    assert run(search("monitör")) == []
+
+
+def test_index_follows_endpoint_update_comment_and_delete(client, current_user):
+    ticket_id = make_ticket(title="Yazıcı arızası")
+
+    assert client.patch(f"/api/tickets/{ticket_id}", json={"title": "Monitör arızası"}).status_code == 200
+    assert _search_ids(client, "yazıcı") == []
+    assert _search_ids(client, "monitör") == [str(ticket_id)]
+
+    assert client.post(f"/api/tickets/{ticket_id}/comments", json={"content": "Ekran kablosu değişti"}).status_code == 201
+    assert _search_ids(client, "kablosu") == [str(ticket_id)]
+
+    current_user["realm_access"]["roles"] = ["general-admin"]
+    assert client.delete(f"/api/tickets/{ticket_id}").status_code == 204
+    assert _search_ids(client, "monitör") == []
+    assert _search_ids(client, "kablosu") == []
+
+
+def test_index_follows_bulk_update_and_bulk_delete(client, current_user):
+    first = make_ticket(title="Yazıcı arızası")
+    second = make_ticket(title="Yazıcı toneri")
+    untouched = make_ticket(title="Yazıcı kağıdı")
+
+    response = client.patch("/api/tickets/bulk", json={"ids": [str(first), str(second)], "changes": {"title": "Tarayıcı"}})
+    assert response.status_code == 200, response.text
+    assert _search_ids(client, "yazıcı") == [str(untouched)]
+    assert sorted(_search_ids(client, "tarayıcı")) == sorted([str(first), str(second)])
+
+    current_user["realm_access"]["roles"] = ["general-admin"]
+    response = client.request("DELETE", "/api/tickets/bulk", json={"ids": [str(first), str(second)]})
+    assert response.status_code == 200, response.text
+    assert _search_ids(client, "tarayıcı") == []
+    assert _search_ids(client, "yazıcı") == [str(untouched)]
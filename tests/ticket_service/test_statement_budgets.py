@@ -0,0 +1,97 @@
+# tests/ticket_service/test_statement_budgets.py
+"""
+Yazma endpoint'lerinin veritabanı round-trip bütçeleri. İfadeler `before_cursor_execute` ile sayılır.
+SQLite FTS eşitlemesi (PostgreSQL'de tetikleyicilerin yaptığı iş) bütçeye dahil edilmez.
+"""
+import pytest
+from sqlalchemy import select
+
+from tests.statements import capture_statements
+from ticket_service import database, db_models, search
+from ticket_service.config import settings
+
+from .conftest import make_ticket
+
+
+@pytest.fixture
+def statements(monkeypatch):
+    monkeypatch.setattr(search, "reindex_sqlite_tickets", lambda connection, ticket_ids: None)
+    monkeypatch.setattr(search, "unindex_sqlite_tickets", lambda connection, ticket_ids: None)
+    with capture_statements(database.async_engine.sync_engine) as log:
+        yield log
+
+
+def _upload(client, ticket_id, *contents):
+    files = [("files", (f"dosya{index}.txt", content, "text/plain")) for index, content in enumerate(contents)]
+    response = client.post(f"/api/tickets/{ticket_id}/attachments", files=files)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_update_is_a_single_statement(client, statements):
+    ticket_id = make_ticket()
+    statements.statements.clear()
+
+    assert client.patch(f"/api/tickets/{ticket_id}", json={"status": "Kapalı"}).status_code == 200
+
+    assert len(statements) == 1
+    assert statements.statements[0].startswith("UPDATE tickets_schema.tickets")
+
+
+def test_comment_is_a_single_statement(client, statements):
+    ticket_id = make_ticket()
+    statements.statements.clear()
+
+    assert client.post(f"/api/tickets/{ticket_id}/comments", json={"content": "Kontrol edildi"}).status_code == 201
+
+    assert len(statements) == 1
+    assert statements.statements[0].startswith("INSERT INTO tickets_schema.comments")
+
+
+def test_comment_on_missing_ticket_is_404_in_one_statement(client, statements):
+    response = client.post("/api/tickets/00000000-0000-0000-0000-000000000001/comments", json={"content": "Kontrol edildi"})
+
+    assert response.status_code == 404
+    assert len(statements) == 1
+
+
+def test_attachment_upload_costs_one_check_and_two_statements_per_file(client, statements):
+    ticket_id = make_ticket()
+    statements.statements.clear()
+
+    _upload(client, ticket_id, b"birinci dosya", b"ikinci dosya")
+
+    assert len(statements.matching("SELECT")) == 1
+    assert len(statements.matching("INSERT INTO tickets_schema.attachment_blobs")) == 2
+    assert len(statements.matching("INSERT INTO tickets_schema.attachments")) == 2
+    assert len(statements) == 5
+
+
+def test_delete_is_one_statement_plus_background_blob_gc(client, current_user, statements, monkeypatch):
+    monkeypatch.setattr(settings, "attachment_blob_gc_grace", 0)
+    ticket_id = make_ticket()
+    _upload(client, ticket_id, b"tek referansli icerik")
+    current_user["realm_access"]["roles"] = ["general-admin"]
+    statements.statements.clear()
+
+    assert client.delete(f"/api/tickets/{ticket_id}").status_code == 204
+
+    # TestClient arka plan görevlerinin bitmesini bekler; temizlik ayrı oturumda tek bir DELETE'tir.
+    assert [statement.split(" ")[2] for statement in statements.statements] == [
+        "tickets_schema.tickets", "tickets_schema.attachment_blobs",
+    ]
+    with database.SessionLocal() as session:
+        assert session.scalars(select(db_models.AttachmentBlob)).all() == []
+
+
+def test_bulk_delete_is_one_statement_plus_background_blob_gc(client, current_user, statements):
+    ticket_ids = [str(make_ticket()), str(make_ticket())]
+    current_user["realm_access"]["roles"] = ["general-admin"]
+    statements.statements.clear()
+
+    response = client.request("DELETE", "/api/tickets/bulk", json={"ids": ticket_ids})
+    assert response.status_code == 200, response.text
+
+    assert len(statements.matching("DELETE FROM tickets_schema.tickets")) == 1
+    assert len(statements.matching("DELETE FROM tickets_schema.attachment_blobs")) == 1
+    assert len(statements) == 2
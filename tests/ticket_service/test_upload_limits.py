@@ -0,0 +1,154 @@
+# tests/ticket_service/test_upload_limits.py
+"""
+Akış halinde dosya eki yükleme: dosya başına, istek başına ve dosya sayısı sınırları ile hata halinde
+yarım kalan geçici dosyaların silinmesi. Gövdeler elle kurulur ve httpx.ASGITransport ile gönderilir
+(TestClient gövdeyi tek parça halinde iletir); böylece Content-Length'siz akış ve yarıda kesilen
+gövdeler de denenebilir.
+"""
+from pathlib import Path
+
+import httpx
+import pytest
+from sqlalchemy import func, select
+
+from ticket_service import database, db_models, main, upload_stream
+from ticket_service.config import settings
+
+from .conftest import make_ticket, run
+
+BOUNDARY = "ekSiniri"
+
+
+def _part(file_name, content, field="files"):
+    return (
+        f"--{BOUNDARY}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="{file_name}"\r\n'
+        "Content-Type: application/octet-stream\r\n\r\n"
+    ).encode() + content + b"\r\n"
+
+
+def _body(*contents, complete=True):
+    body = b"".join(_part(f"dosya{index}.bin", content) for index, content in enumerate(contents))
+    return body + f"--{BOUNDARY}--\r\n".encode() if complete else body
+
+
+def _post(client, ticket_id, body, chunk_size=None):
+    """
+    Gövdeyi gönderir; `chunk_size` verilirse Content-Length olmadan parça parça akıtır.
+    `client` fikstürü yalnızca kimlik doğrulama ve user_service taklitlerini kurmak için alınır.
+    """
+    async def chunks():
+        for offset in range(0, len(body), chunk_size):
+            yield body[offset:offset + chunk_size]
+
+    async def post():
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as http:
+                return await http.post(
+                    f"/api/tickets/{ticket_id}/attachments",
+                    content=body if chunk_size is None else chunks(),
+                    headers={"Content-Type": f"multipart/form-data; boundary={BOUNDARY}"},
+                )
+        finally:
+            await database.async_engine.dispose()
+
+    return run(post())
+
+
+def _temp_files():
+    temp_dir = Path(settings.attachment_storage_dir) / "tmp"
+    return sorted(temp_dir.iterdir()) if temp_dir.exists() else []
+
+
+def _attachment_count():
+    with database.SessionLocal() as session:
+        return session.scalar(select(func.count()).select_from(db_models.Attachment))
+
+
+@pytest.fixture
+def spool_to_disk(monkeypatch):
+    """Küçük test dosyalarının da bellekte değil geçici dosyada biriktirilmesini sağlar."""
+    monkeypatch.setattr(upload_stream, "_SPOOL_MAX_SIZE", 16)
+
+
+def test_files_within_limits_are_stored(client, monkeypatch, spool_to_disk):
+    monkeypatch.setattr(settings, "attachment_max_file_size", 64)
+    monkeypatch.setattr(settings, "attachment_max_files", 2)
+    ticket_id = make_ticket()
+
+    response = _post(client, ticket_id, _body(b"a" * 64, b"b" * 40), chunk_size=7)
+
+    assert response.status_code == 200, response.text
+    assert [attachment["size"] for attachment in response.json()] == [64, 40]
+    assert _temp_files() == []
+
+
+def test_file_over_the_per_file_limit_is_rejected(client, monkeypatch, spool_to_disk):
+    monkeypatch.setattr(settings, "attachment_max_file_size", 64)
+    ticket_id = make_ticket()
+
+    response = _post(client, ticket_id, _body(b"a" * 40, b"b" * 65), chunk_size=7)
+
+    assert response.status_code == 413
+    assert "dosya1.bin" in response.json()["detail"]
+    assert _attachment_count() == 0
+    assert _temp_files() == []
+
+
+def test_request_over_the_limit_is_rejected_from_content_length(client, monkeypatch):
+    monkeypatch.setattr(settings, "attachment_max_request_size", 100)
+    ticket_id = make_ticket()
+
+    response = _post(client, ticket_id, _body(b"a" * 200))
+
+    assert response.status_code == 413
+    assert _attachment_count() == 0
+
+
+def test_streamed_request_over_the_limit_is_rejected_while_reading(client, monkeypatch, spool_to_disk):
+    monkeypatch.setattr(settings, "attachment_max_request_size", 300)
+    ticket_id = make_ticket()
+
+    # Content-Length yok: sınır okunan bayt sayısı üzerinden, ilk dosya diske yazılmışken aşılır.
+    response = _post(client, ticket_id, _body(b"a" * 100, b"b" * 300), chunk_size=50)
+
+    assert response.status_code == 413
+    assert "İstek gövdesi" in response.json()["detail"]
+    assert _attachment_count() == 0
+    assert _temp_files() == []
+
+
+def test_too_many_files_are_rejected(client, monkeypatch):
+    monkeypatch.setattr(settings, "attachment_max_files", 2)
+    ticket_id = make_ticket()
+
+    response = _post(client, ticket_id, _body(b"bir", b"iki", b"uc"))
+
+    assert response.status_code == 400
+    assert "en fazla 2 dosya" in response.json()["detail"]
+    assert _attachment_count() == 0
+
+
+def test_truncated_body_removes_partial_temp_files(client, spool_to_disk):
+    ticket_id = make_ticket()
+
+    response = _post(client, ticket_id, _body(b"a" * 100, b"b" * 100, complete=False)[:-20], chunk_size=30)
+
+    assert response.status_code == 400
+    assert _attachment_count() == 0
+    assert _temp_files() == []
+
+
+def test_failure_while_storing_removes_temp_files(client, monkeypatch, spool_to_disk):
+    ticket_id = make_ticket()
+
+    def failing_materialize(upload, blob_path):
+        raise OSError("disk dolu")
+
+    monkeypatch.setattr(upload_stream.StagedUpload, "materialize", failing_materialize)
+
+    with pytest.raises(OSError, match="disk dolu"):
+        _post(client, ticket_id, _body(b"a" * 100, b"b" * 100))
+
+    assert _attachment_count() == 0
+    assert _temp_files() == []
@@ -0,0 +1,68 @@
+# tests/ticket_service/test_user_details_batch.py
+"""
+user_service_client.get_users_details: önbellekte olmayan kullanıcılar tek bir /internal/users/batch
+isteğiyle çözülür; bulunamayanlar None döner ve negatif olarak önbelleğe alınır.
+"""
+import json
+import uuid
+
+from ticket_service import user_service_client
+from ticket_service.config import settings
+
+from .conftest import run
+
+
+def _batch_requests(user_service):
+    return [request for request in user_service.requests if request.url.path.endswith("/users/batch")]
+
+
+def test_uncached_users_are_fetched_in_one_request(user_service):
+    user_ids = [uuid.uuid4() for _ in range(20)]
+    missing_id = uuid.uuid4()
+    user_service.missing_user_ids.add(str(missing_id))
+
+    users = run(user_service_client.get_users_details([*user_ids, missing_id, user_ids[0]], settings))
+
+    [request] = _batch_requests(user_service)
+    assert json.loads(request.content)["ids"] == [str(user_id) for user_id in [*user_ids, missing_id]]
+    assert request.headers["X-Internal-Secret"] == "test-secret"
+    assert list(users) == [*user_ids, missing_id]
+    assert users[user_ids[3]].id == user_ids[3]
+    assert users[missing_id] is None
+
+
+def test_cached_and_missing_users_are_not_fetched_again(user_service):
+    cached_id, missing_id, new_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    user_service.missing_user_ids.add(str(missing_id))
+    run(user_service_client.get_users_details([cached_id, missing_id], settings))
+
+    users = run(user_service_client.get_users_details([cached_id, missing_id, new_id], settings))
+
+    _, second = _batch_requests(user_service)
+    assert json.loads(second.content)["ids"] == [str(new_id)]
+    assert users[cached_id].id == cached_id
+    assert users[missing_id] is None
+    # Tekil arama da toplu aramanın doldurduğu önbelleği kullanır.
+    assert run(user_service_client.get_user_details(new_id, settings)).id == new_id
+    assert len(user_service.user_detail_requests()) == 2
+
+
+def test_fully_cached_lookup_makes_no_request(user_service):
+    user_id = uuid.uuid4()
+    run(user_service_client.get_user_details(user_id, settings))
+    user_service.requests.clear()
+
+    users = run(user_service_client.get_users_details([user_id], settings))
+
+    assert users[user_id].id == user_id
+    assert user_service.requests == []
+
+
+def test_large_lookups_are_split_at_the_endpoint_limit(user_service, monkeypatch):
+    monkeypatch.setattr(user_service_client, "_USER_BATCH_MAX_IDS", 3)
+    user_ids = [uuid.uuid4() for _ in range(7)]
+
+    users = run(user_service_client.get_users_details(user_ids, settings))
+
+    assert [len(json.loads(request.content)["ids"]) for request in _batch_requests(user_service)] == [3, 3, 1]
+    assert list(users) == user_ids
@@ -0,0 +1,233 @@
+# tests/user_service/conftest.py
+"""
+user_service testleri için ortak fikstürler.
+
+Ayarlar modül yüklenirken ortam değişkenlerinden okunduğu için ortam burada, user_service import
+edilmeden önce hazırlanır. Veritabanı geçici bir SQLite dosyasıdır; `users_schema` ve `public`
+şemaları her bağlantıya ayrı dosyalar olarak eklenir. Keycloak Admin API'si `StubKeycloak` ile
+(httpx.MockTransport üzerinden) bellekte taklit edilir.
+"""
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from urllib.parse import urlparse
+
+_TEST_DIR = tempfile.mkdtemp(prefix="user_service_tests_")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{_TEST_DIR}/users.db",
+    "KEYCLOAK_ISSUER_URI": "http://keycloak.test/realms/helpdesk",
+    "KEYCLOAK_JWKS_URI": "http://keycloak.test/realms/helpdesk/protocol/openid-connect/certs",
+    "KEYCLOAK_ADMIN_CLIENT_ID": "user-service",
+    "KEYCLOAK_ADMIN_CLIENT_SECRET": "test-secret",
+})
+for _name in ("ASYNC_DATABASE_URL", "VAULT_TOKEN", "KEYCLOAK_SYNC_MODE"):
+    os.environ.pop(_name, None)
+
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+# etag, create_all'dan önce import edilir: SQLite liste sürümü tetikleyicilerini metadata olayına bağlar.
+from user_service import crud, database, etag, keycloak_api_helpers, keycloak_sync, main, models  # noqa: E402
+from user_service.auth import get_current_user_payload  # noqa: E402
+from user_service.config import settings  # noqa: E402
+
+REALM_PATH = urlparse(settings.keycloak.admin_api_realm_url).path
+TOKEN_PATH = urlparse(settings.keycloak.admin_api_token_endpoint).path
+
+
+def _attach_schemas(dbapi_connection, connection_record):
+    dbapi_connection.execute(f"ATTACH DATABASE '{_TEST_DIR}/users_schema.db' AS users_schema")
+    dbapi_connection.execute(f"ATTACH DATABASE '{_TEST_DIR}/public.db' AS public")
+
+
+for _engine in (database.engine, database.async_engine.sync_engine):
+    event.listen(_engine, "connect", _attach_schemas)
+database.Base.metadata.create_all(database.engine)
+
+
+class StubKeycloak:
+    """
+    Keycloak'ın user_service'in kullandığı Admin API uçlarını bellekte taklit eder: token, kullanıcılar,
+    gruplar, rol/grup eşlemeleri ve admin event'leri. Gelen istekleri kaydeder; `faults` ile belirli
+    yollara sırayla hata döndürülebilir (durum kodu veya fırlatılacak exception).
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.users = {}
+        self.user_roles = {}
+        self.user_groups = {}
+        self.groups = {}
+        self.events = []
+        self.faults = {}
+        self.latency = 0.0
+        # Event zamanları gerçek saatten başlar; tam senkronizasyonun yazdığı watermark (şimdi - 60 sn) bunların gerisinde kalır.
+        self.clock_ms = int(time.time() * 1000)
+        self._issued_tokens = 0
+
+    # --- Realm durumu ---
+
+    def add_group(self, name):
+        group_id = str(uuid.uuid4())
+        self.groups[group_id] = {"id": group_id, "name": name, "path": f"/{name}", "subGroups": []}
+        return group_id
+
+    def add_user(self, email, first_name="Test", last_name="Kullanıcı", roles=(), group_ids=(), enabled=True):
+        user_id = str(uuid.uuid4())
+        self.users[user_id] = {
+            "id": user_id, "username": email.split("@")[0], "email": email,
+            "firstName": first_name, "lastName": last_name, "enabled": enabled,
+        }
+        self.user_roles[user_id] = list(roles)
+        self.user_groups[user_id] = list(group_ids)
+        return user_id
+
+    def delete_user(self, user_id):
+        del self.users[user_id]
+        self.user_roles.pop(user_id, None)
+        self.user_groups.pop(user_id, None)
+
+    def record_event(self, operation_type, resource_path, resource_type="USER"):
+        """Bir admin event'i ekler ve zamanını (epoch ms) döndürür; her event bir öncekinden sonradır."""
+        self.clock_ms += 1000
+        self.events.append({
+            "time": self.clock_ms, "operationType": operation_type,
+            "resourceType": resource_type, "resourcePath": resource_path,
+        })
+        return self.clock_ms
+
+    # --- İstek kayıtları ---
+
+    def token_requests(self):
+        return [request for request in self.requests if request.url.path == TOKEN_PATH]
+
+    def admin_requests(self, path_suffix=None):
+        return [
+            request for request in self.requests
+            if request.url.path.startswith(REALM_PATH)
+            and (path_suffix is None or request.url.path == f"{REALM_PATH}/{path_suffix}")
+        ]
+
+    # --- MockTransport ---
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        pending_faults = self.faults.get(request.url.path)
+        if pending_faults:
+            fault = pending_faults.pop(0)
+            if isinstance(fault, Exception):
+                raise fault
+            return httpx.Response(fault)
+
+        if request.url.path == TOKEN_PATH:
+            self._issued_tokens += 1
+            return httpx.Response(200, json={"access_token": f"token-{self._issued_tokens}", "expires_in": 300})
+        if not request.headers.get("Authorization", "").startswith("Bearer token-"):
+            return httpx.Response(401)
+        parts = request.url.path[len(REALM_PATH):].strip("/").split("/")
+        return self._admin_response(request, parts)
+
+    def _admin_response(self, request, parts):
+        if parts == ["users"]:
+            return httpx.Response(200, json=self._page(request, [self._user(user_id) for user_id in sorted(self.users)]))
+        if parts == ["groups"]:
+            return httpx.Response(200, json=self._page(request, [self.groups[group_id] for group_id in sorted(self.groups)]))
+        if parts == ["admin-events"]:
+            resource_types = set(request.url.params.get_list("resourceTypes"))
+            events = [event for event in self.events if not resource_types or event["resourceType"] in resource_types]
+            return httpx.Response(200, json=self._page(request, sorted(events, key=lambda event: -event["time"])))
+        if parts[0] == "users" and len(parts) >= 2:
+            user_id = parts[1]
+            if user_id not in self.users:
+                return httpx.Response(404)
+            if parts[2:] == []:
+                return httpx.Response(200, json=self._user(user_id))
+            if parts[2:] == ["role-mappings", "realm"]:
+                return httpx.Response(200, json=[{"name": role} for role in self.user_roles[user_id]])
+            if parts[2:] == ["groups"]:
+                return httpx.Response(200, json=[self.groups[group_id] for group_id in self.user_groups[user_id]])
+        if parts[0] == "groups" and len(parts) == 2:
+            group = self.groups.get(parts[1])
+            return httpx.Response(200, json=group) if group else httpx.Response(404)
+        return httpx.Response(404)
+
+    def _user(self, user_id):
+        return dict(self.users[user_id])
+
+    @staticmethod
+    def _page(request, items):
+        first = int(request.url.params.get("first", 0))
+        max_results = int(request.url.params.get("max", 100))
+        return items[first:first + max_results]
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _remove_test_dir():
+    yield
+    shutil.rmtree(_TEST_DIR, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def _clean_state(monkeypatch):
+    """Her test boş bir veritabanı, boş önbellekler ve hızlı (beklemesiz) yeniden deneme ayarlarıyla başlar."""
+    with database.engine.begin() as connection:
+        for table in reversed(database.Base.metadata.sorted_tables):
+            connection.execute(table.delete())
+    crud._recent_sync_fingerprints.clear()
+    monkeypatch.setattr(settings.keycloak, "admin_http_retry_backoff", 0.0)
+    monkeypatch.setattr(settings.keycloak, "sync_page_size", 2)
+    monkeypatch.setattr(settings.keycloak, "sync_mode", "incremental")
+    monkeypatch.setattr(keycloak_sync, "sync_progress", models.SyncProgress())
+    monkeypatch.setitem(keycloak_api_helpers._user_service_admin_token_cache, "token", None)
+    # Her test kendi event loop'unda çalışır; asyncio.Lock ilk beklemede o loop'a bağlanır.
+    monkeypatch.setattr(keycloak_api_helpers, "_admin_token_lock", asyncio.Lock())
+
+
+@pytest.fixture
+def keycloak():
+    stub = StubKeycloak()
+    keycloak_api_helpers._http_client = httpx.AsyncClient(transport=httpx.MockTransport(stub.handler))
+    yield stub
+    keycloak_api_helpers._http_client = None
+
+
+@pytest.fixture
+def current_user():
+    """İsteklerde kullanılacak token içeriği; testler rolleri değiştirebilir."""
+    return {"sub": str(uuid.uuid4()), "realm_access": {"roles": ["general-admin"]}, "email": "admin@example.com"}
+
+
+@pytest.fixture
+def client(current_user):
+    main.app.dependency_overrides[get_current_user_payload] = lambda: current_user
+    yield TestClient(main.app)
+    main.app.dependency_overrides.clear()
+
+
+def run(coroutine):
+    """
+    Async fonksiyonları testlerden çağırmak için. Her çağrı kendi event loop'unda çalıştığından async
+    motorun bağlantıları sonunda aynı loop içinde kapatılır (aiosqlite bağlantıları loop'lar arasında taşınamaz).
+    """
+    async def run_and_dispose():
+        try:
+            return await coroutine
+        finally:
+            await database.async_engine.dispose()
+
+    return asyncio.run(run_and_dispose())
+
+
+async def in_session(function, *args, **kwargs):
+    """`function(db, ...)`'i kendi AsyncSession'ında çalıştırır ve commit eder (commit'i çağırana bırakan crud'lar için)."""
+    async with database.AsyncSessionLocal() as db:
+        result = await function(db, *args, **kwargs)
+        await db.commit()
+        return result
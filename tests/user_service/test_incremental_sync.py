@@ -0,0 +1,171 @@
+# tests/user_service/test_incremental_sync.py
+"""Admin event'lerinden artımlı senkronizasyon: deltaların uygulanması, watermark ve yoklama döngüsü."""
+import asyncio
+
+import httpx
+import pytest
+from sqlalchemy import select
+
+from user_service import crud, database, db_models, keycloak_sync, models
+
+from .conftest import REALM_PATH, in_session, run, settings
+
+
+def _users_by_email():
+    with database.SessionLocal() as session:
+        return {user.email: user for user in session.scalars(select(db_models.User))}
+
+
+def _company_names_by_id():
+    with database.SessionLocal() as session:
+        return {company.id: company.name for company in session.scalars(select(db_models.Company))}
+
+
+def _watermark():
+    return run(in_session(crud.get_sync_watermark, keycloak_sync.ADMIN_EVENTS_WATERMARK))
+
+
+def _poll_once():
+    return run(in_session(keycloak_sync.sync_incremental_from_keycloak, settings))
+
+
+@pytest.fixture
+def synced_realm(keycloak):
+    """Acme tenant'ında bir kullanıcı olan, tam senkronizasyonu yapılmış ve watermark'ı yazılmış bir realm."""
+    acme = keycloak.add_group("Acme")
+    ayse = keycloak.add_user("ayse@example.com", first_name="Ayşe", group_ids=[acme])
+    run(keycloak_sync._run_initial_sync(settings))
+    keycloak.requests.clear()
+    return keycloak, acme, ayse
+
+
+def test_full_sync_records_a_watermark_behind_its_start(synced_realm):
+    keycloak, _, _ = synced_realm
+    watermark = _watermark()
+    assert watermark is not None
+    assert watermark < keycloak.clock_ms
+    assert set(_users_by_email()) == {"ayse@example.com"}
+
+
+def test_create_events_add_users_and_tenants(synced_realm):
+    keycloak, _, _ = synced_realm
+    globex = keycloak.add_group("Globex")
+    keycloak.record_event("CREATE", f"groups/{globex}", "GROUP")
+    mehmet = keycloak.add_user("mehmet@example.com", first_name="Mehmet", roles=["agent"], group_ids=[globex])
+    keycloak.record_event("CREATE", f"users/{mehmet}")
+    newest = keycloak.record_event("CREATE", f"users/{mehmet}/groups/{globex}", "GROUP_MEMBERSHIP")
+
+    assert _poll_once() == 3
+
+    user = _users_by_email()["mehmet@example.com"]
+    assert user.role == models.Role.AGENT
+    assert _company_names_by_id()[user.company_id] == "Globex"
+    assert _watermark() == newest
+    # Yalnızca değişen kaynaklar okunur; tam tarama yapılmaz.
+    assert keycloak.admin_requests("users") == []
+    assert keycloak.admin_requests("groups") == []
+
+
+def test_update_events_refresh_users_roles_and_tenant_names(synced_realm):
+    keycloak, acme, ayse = synced_realm
+    keycloak.users[ayse]["firstName"] = "Ayşe Nur"
+    keycloak.record_event("UPDATE", f"users/{ayse}")
+    keycloak.user_roles[ayse] = ["helpdesk-admin"]
+    keycloak.record_event("CREATE", f"users/{ayse}/role-mappings/realm", "REALM_ROLE_MAPPING")
+    keycloak.groups[acme].update(name="Acme Holding", path="/Acme Holding")
+    keycloak.record_event("UPDATE", f"groups/{acme}", "GROUP")
+
+    assert _poll_once() == 3
+
+    user = _users_by_email()["ayse@example.com"]
+    assert user.full_name == "Ayşe Nur Kullanıcı"
+    assert user.role == models.Role.HELPDESK_ADMIN
+    assert _company_names_by_id()[user.company_id] == "Acme Holding"
+
+
+def test_delete_events_remove_users_and_tenants(synced_realm):
+    keycloak, acme, ayse = synced_realm
+    keycloak.delete_user(ayse)
+    keycloak.record_event("DELETE", f"users/{ayse}")
+    del keycloak.groups[acme]
+    keycloak.record_event("DELETE", f"groups/{acme}", "GROUP")
+
+    assert _poll_once() == 2
+
+    assert _users_by_email() == {}
+    assert _company_names_by_id() == {}
+
+
+def test_poll_without_new_events_keeps_the_watermark(synced_realm):
+    before = _watermark()
+
+    assert _poll_once() == 0
+    assert _watermark() == before
+
+
+def test_failed_poll_does_not_advance_the_watermark(synced_realm):
+    keycloak, _, ayse = synced_realm
+    before = _watermark()
+    keycloak.users[ayse]["firstName"] = "Ayşe Nur"
+    keycloak.record_event("UPDATE", f"users/{ayse}")
+    keycloak.faults[f"{REALM_PATH}/users/{ayse}"] = [503] * (settings.keycloak.admin_http_max_retries + 1)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        _poll_once()
+    assert _watermark() == before
+    assert _users_by_email()["ayse@example.com"].full_name == "Ayşe Kullanıcı"
+
+    # Bir sonraki tur aynı event'i yeniden işler.
+    assert _poll_once() == 1
+    assert _users_by_email()["ayse@example.com"].full_name == "Ayşe Nur Kullanıcı"
+
+
+def test_restart_resumes_from_the_watermark_without_a_full_scan(synced_realm):
+    keycloak, _, ayse = synced_realm
+    # Servis kapalıyken biriken değişiklikler.
+    keycloak.users[ayse]["firstName"] = "Ayşe Nur"
+    keycloak.record_event("UPDATE", f"users/{ayse}")
+    mehmet = keycloak.add_user("mehmet@example.com", first_name="Mehmet")
+    newest = keycloak.record_event("CREATE", f"users/{mehmet}")
+
+    run(keycloak_sync._run_initial_sync(settings))
+
+    assert keycloak.admin_requests("users") == []
+    assert keycloak.admin_requests("groups") == []
+    assert set(_users_by_email()) == {"ayse@example.com", "mehmet@example.com"}
+    assert _watermark() == newest
+
+
+def test_poll_loop_applies_changes_each_interval(synced_realm, monkeypatch):
+    keycloak, _, ayse = synced_realm
+    real_sleep = asyncio.sleep
+    observed = []
+
+    def rename(first_name):
+        keycloak.users[ayse]["firstName"] = first_name
+        return keycloak.record_event("UPDATE", f"users/{ayse}")
+
+    async def scripted_sleep(delay):
+        # Yoklama aralığı beklemeleri (>= 1 sn) senaryonun bir sonraki adımına dönüşür.
+        if delay < 1:
+            return await real_sleep(delay)
+        watermark = await in_session(crud.get_sync_watermark, keycloak_sync.ADMIN_EVENTS_WATERMARK)
+        observed.append((watermark, _users_by_email()["ayse@example.com"].full_name))
+        if len(observed) == 1:
+            expected_watermarks.append(rename("Ayşe Nur"))
+        elif len(observed) == 2:
+            expected_watermarks.append(rename("Ayşe Naz"))
+        else:
+            raise asyncio.CancelledError
+
+    expected_watermarks = [_watermark()]
+    monkeypatch.setattr(asyncio, "sleep", scripted_sleep)
+    with pytest.raises(asyncio.CancelledError):
+        run(keycloak_sync._poll_admin_events(settings))
+
+    assert observed == [
+        (expected_watermarks[0], "Ayşe Kullanıcı"),
+        (expected_watermarks[1], "Ayşe Nur Kullanıcı"),
+        (expected_watermarks[2], "Ayşe Naz Kullanıcı"),
+    ]
+    assert keycloak_sync.sync_progress.last_error is None
@@ -0,0 +1,94 @@
+# tests/user_service/test_internal_users_batch.py
+"""
+/internal/users/batch: kullanıcılar şirketleriyle birlikte tek sorguda, ID'ye göre anahtarlanmış döner;
+bulunamayan ID'ler `missing` listesindedir.
+"""
+import uuid
+
+import pytest
+
+from tests.statements import capture_statements
+from user_service import database, db_models
+from user_service.config import settings
+
+SECRET = "test-secret"
+
+
+@pytest.fixture(autouse=True)
+def internal_secret(monkeypatch):
+    monkeypatch.setattr(settings, "internal_service_secret", SECRET)
+
+
+def _add_users(count, company_name=None):
+    with database.SessionLocal() as session:
+        company = None
+        if company_name:
+            company = db_models.Company(name=company_name, keycloak_group_id=uuid.uuid4())
+            session.add(company)
+        users = [
+            db_models.User(email=f"{company_name or 'bagimsiz'}{index}@example.com".lower(), full_name=f"Kullanıcı {index}", company=company)
+            for index in range(count)
+        ]
+        session.add_all(users)
+        session.commit()
+        return [user.id for user in users]
+
+
+def _batch(client, ids, secret=SECRET):
+    return client.post(
+        "/api/users/internal/users/batch",
+        json={"ids": [str(user_id) for user_id in ids]},
+        headers={"X-Internal-Secret": secret} if secret else {},
+    )
+
+
+def test_users_are_returned_by_id_with_missing_ids_listed(client):
+    acme_ids = _add_users(3, company_name="Acme")
+    globex_ids = _add_users(2, company_name="Globex")
+    loose_ids = _add_users(1)
+    missing_ids = [uuid.uuid4(), uuid.uuid4()]
+    requested = [acme_ids[0], missing_ids[0], *globex_ids, acme_ids[0], loose_ids[0], missing_ids[1]]
+
+    response = _batch(client, requested)
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert set(body["users"]) == {str(user_id) for user_id in [acme_ids[0], *globex_ids, loose_ids[0]]}
+    # Sıra korunur, tekrarlar atılır.
+    assert body["missing"] == [str(user_id) for user_id in missing_ids]
+    acme_user = body["users"][str(acme_ids[0])]
+    assert (acme_user["id"], acme_user["full_name"], acme_user["company"]["name"]) == (str(acme_ids[0]), "Kullanıcı 0", "Acme")
+    assert body["users"][str(globex_ids[1])]["company"]["name"] == "Globex"
+    assert body["users"][str(loose_ids[0])]["company"] is None
+
+
+@pytest.mark.parametrize("count", [1, 50])
+def test_any_number_of_ids_is_one_query(client, count):
+    user_ids = _add_users(count, company_name="Acme")
+
+    with capture_statements(database.async_engine.sync_engine) as log:
+        response = _batch(client, [*user_ids, uuid.uuid4()])
+
+    assert len(response.json()["users"]) == count
+    # Şirketler aynı sorguda (JOIN) yüklenir.
+    [query] = log.statements
+    assert "FROM users_schema.users" in query
+    assert "JOIN public.companies" in query
+
+
+def test_all_missing_ids(client):
+    missing_id = uuid.uuid4()
+
+    response = _batch(client, [missing_id])
+
+    assert response.json() == {"users": {}, "missing": [str(missing_id)]}
+
+
+@pytest.mark.parametrize("ids, status_code", [([], 422), ([uuid.uuid4()] * 5001, 422)])
+def test_batch_size_is_validated(client, ids, status_code):
+    assert _batch(client, ids).status_code == status_code
+
+
+@pytest.mark.parametrize("secret, status_code", [(None, 401), ("yanlis", 403)])
+def test_internal_secret_is_required(client, secret, status_code):
+    assert _batch(client, [uuid.uuid4()], secret=secret).status_code == status_code
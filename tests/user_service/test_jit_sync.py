@@ -0,0 +1,56 @@
+# tests/user_service/test_jit_sync.py
+"""Token verisiyle JIT kullanıcı senkronizasyonu (get_or_create_user) ve parmak izi önbelleği."""
+import uuid
+
+from tests.statements import capture_statements
+from user_service import crud, database, db_models, models
+
+from .conftest import in_session, run
+
+
+def _token_user(user_id, full_name="Ayşe Yılmaz", roles=("agent",)):
+    return models.UserCreateInternal(
+        id=user_id, email="ayse@example.com", full_name=full_name, roles=list(roles), keycloak_groups=["/Acme"],
+    )
+
+
+def _stored_user(user_id):
+    with database.SessionLocal() as session:
+        return session.get(db_models.User, user_id)
+
+
+def test_unchanged_token_data_does_not_write():
+    user_id = uuid.uuid4()
+    run(in_session(crud.get_or_create_user, _token_user(user_id)))
+
+    with capture_statements(database.async_engine.sync_engine) as log:
+        run(in_session(crud.get_or_create_user, _token_user(user_id)))
+    assert log.matching("UPDATE") == []
+    assert len(log.matching("SELECT")) == 1
+
+
+def test_token_data_is_reapplied_after_a_bulk_write_changed_the_row():
+    user_id = uuid.uuid4()
+    run(in_session(crud.get_or_create_user, _token_user(user_id)))
+    assert crud.was_recently_synced(_token_user(user_id))
+
+    # Toplu senkronizasyon satırı parmak izinden habersiz değiştirir.
+    run(in_session(crud.bulk_upsert_users, [_token_user(user_id, full_name="Eski Ad", roles=("customer-user",))]))
+    assert _stored_user(user_id).full_name == "Eski Ad"
+
+    db_user = run(in_session(crud.get_or_create_user, _token_user(user_id)))
+
+    assert db_user.full_name == "Ayşe Yılmaz"
+    stored = _stored_user(user_id)
+    assert stored.full_name == "Ayşe Yılmaz"
+    assert stored.role == models.Role.AGENT
+
+
+def test_deleted_user_is_recreated_from_token_data():
+    user_id = uuid.uuid4()
+    run(in_session(crud.get_or_create_user, _token_user(user_id)))
+    run(in_session(crud.delete_users_by_keycloak_ids, [user_id]))
+    assert not crud.was_recently_synced(_token_user(user_id))
+
+    run(in_session(crud.get_or_create_user, _token_user(user_id)))
+    assert _stored_user(user_id) is not None
@@ -0,0 +1,77 @@
+# tests/user_service/test_keycloak_api_helpers.py
+"""Paylaşılan Admin API istemcisi: tek istemci, single-flight token yenileme ve geçici hatalarda yeniden deneme."""
+import asyncio
+
+import httpx
+import pytest
+
+from user_service import keycloak_api_helpers
+
+from .conftest import REALM_PATH, TOKEN_PATH, run, settings
+
+
+def test_shared_client_is_reused_and_closed():
+    async def scenario():
+        await keycloak_api_helpers.start_http_client(settings)
+        client = keycloak_api_helpers._get_http_client(settings)
+        await keycloak_api_helpers.start_http_client(settings)
+        assert keycloak_api_helpers._get_http_client(settings) is client
+        await keycloak_api_helpers.close_http_client()
+        assert client.is_closed
+        assert keycloak_api_helpers._http_client is None
+
+    run(scenario())
+
+
+def test_concurrent_callers_share_one_token_request(keycloak):
+    keycloak.latency = 0.05
+
+    async def scenario():
+        return await asyncio.gather(*(keycloak_api_helpers.get_admin_api_token(settings) for _ in range(10)))
+
+    assert run(scenario()) == ["token-1"] * 10
+    assert len(keycloak.token_requests()) == 1
+
+
+def test_cached_token_is_reused_until_it_nears_expiry(keycloak, monkeypatch):
+    assert run(keycloak_api_helpers.get_admin_api_token(settings)) == "token-1"
+    assert run(keycloak_api_helpers.get_admin_api_token(settings)) == "token-1"
+    assert len(keycloak.token_requests()) == 1
+
+    cache = keycloak_api_helpers._user_service_admin_token_cache
+    monkeypatch.setitem(cache, "expires_at", cache["expires_at"].replace(year=2000))
+    assert run(keycloak_api_helpers.get_admin_api_token(settings)) == "token-2"
+
+
+def test_idempotent_request_is_retried_on_transient_errors(keycloak):
+    user_id = keycloak.add_user("ayse@example.com")
+    keycloak.faults[f"{REALM_PATH}/users/{user_id}"] = [503, httpx.ConnectError("bağlantı reddedildi")]
+
+    user = run(keycloak_api_helpers.fetch_keycloak_user(user_id, settings))
+
+    assert user["email"] == "ayse@example.com"
+    assert len(keycloak.admin_requests(f"users/{user_id}")) == 3
+
+
+def test_retries_stop_after_max_retries(keycloak, monkeypatch):
+    monkeypatch.setattr(settings.keycloak, "admin_http_max_retries", 2)
+    user_id = keycloak.add_user("ayse@example.com")
+    keycloak.faults[f"{REALM_PATH}/users/{user_id}"] = [503, 503, 503, 503]
+
+    with pytest.raises(httpx.HTTPStatusError):
+        run(keycloak_api_helpers.fetch_keycloak_user(user_id, settings))
+    assert len(keycloak.admin_requests(f"users/{user_id}")) == 3
+
+
+def test_non_idempotent_request_is_not_retried_after_reaching_the_server(keycloak):
+    keycloak.faults[f"{REALM_PATH}/groups"] = [503]
+
+    assert run(keycloak_api_helpers.create_keycloak_group("Acme", settings)) is None
+    assert len(keycloak.admin_requests("groups")) == 1
+
+
+def test_non_idempotent_request_is_retried_when_connection_fails(keycloak):
+    keycloak.faults[TOKEN_PATH] = [httpx.ConnectError("bağlantı reddedildi")]
+
+    assert run(keycloak_api_helpers.get_admin_api_token(settings)) == "token-1"
+    assert len(keycloak.token_requests()) == 2
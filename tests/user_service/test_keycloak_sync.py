@@ -0,0 +1,95 @@
+# tests/user_service/test_keycloak_sync.py
+"""Keycloak -> yerel veritabanı senkronizasyonu: sayfalı tam senkronizasyon ve toplu yazmalar."""
+import uuid
+
+from sqlalchemy import select
+
+from tests.statements import capture_statements
+from user_service import company_crud, crud, database, db_models, keycloak_sync, models
+
+from .conftest import in_session, run, settings
+
+
+def _users_by_email():
+    with database.SessionLocal() as session:
+        return {user.email: user for user in session.scalars(select(db_models.User))}
+
+
+def _companies_by_name():
+    with database.SessionLocal() as session:
+        return {company.name: company for company in session.scalars(select(db_models.Company))}
+
+
+async def _full_sync():
+    async with database.AsyncSessionLocal() as db:
+        await keycloak_sync.sync_all_tenants_from_keycloak(db, settings)
+        await keycloak_sync.sync_all_users_from_keycloak(db, settings)
+
+
+def test_full_sync_pages_through_users_and_groups(keycloak):
+    for name in ("Acme", "Globex", "Initech"):
+        keycloak.add_group(name)
+    for index in range(5):
+        keycloak.add_user(f"kullanici{index}@example.com")
+
+    run(_full_sync())
+
+    assert set(_companies_by_name()) == {"Acme", "Globex", "Initech"}
+    assert len(_users_by_email()) == 5
+    # sync_page_size=2: 3 dolu sayfa ve listenin sonunu gösteren kısa sayfa.
+    assert keycloak_sync.sync_progress.users_synced == 5
+    assert keycloak_sync.sync_progress.tenants_synced == 3
+
+
+def test_resync_without_changes_writes_nothing(keycloak):
+    keycloak.add_group("Acme")
+    changed_id = keycloak.add_user("ayse@example.com", first_name="Ayşe")
+    keycloak.add_user("mehmet@example.com", first_name="Mehmet")
+    run(_full_sync())
+    updated_at_before = {email: user.updated_at for email, user in _users_by_email().items()}
+
+    keycloak.users[changed_id]["firstName"] = "Ayşe Nur"
+    run(_full_sync())
+
+    # Sayaçlar işlenen değil, gerçekten yazılan satırları gösterir.
+    assert keycloak_sync.sync_progress.tenants_synced == 0
+    assert keycloak_sync.sync_progress.users_synced == 1
+    users = _users_by_email()
+    assert users["ayse@example.com"].full_name == "Ayşe Nur Kullanıcı"
+    assert users["mehmet@example.com"].updated_at == updated_at_before["mehmet@example.com"]
+
+
+def test_set_user_companies_is_a_single_statement():
+    run(in_session(company_crud.bulk_upsert_companies, [
+        models.CompanyCreate(name=name, keycloak_group_id=uuid.uuid4()) for name in ("Acme", "Globex")
+    ]))
+    users = [
+        models.UserCreateInternal(id=uuid.uuid4(), email=f"kullanici{index}@example.com", full_name=f"Kullanıcı {index}")
+        for index in range(20)
+    ]
+    run(in_session(crud.bulk_upsert_users, users))
+    companies = _companies_by_name()
+    company_by_user = {
+        user.id: companies["Acme"].id if index % 2 else companies["Globex"].id for index, user in enumerate(users)
+    }
+
+    with capture_statements(database.async_engine.sync_engine) as log:
+        run(in_session(crud.set_user_companies, company_by_user))
+    assert len(log.matching("UPDATE users_schema.users")) == 1
+
+    by_email = _users_by_email()
+    assert {user.email: user.company_id for user in by_email.values()} == {
+        user.email: company_by_user[user.id] for user in users
+    }
+
+
+def test_bulk_upsert_users_returns_written_rows():
+    users = [
+        models.UserCreateInternal(id=uuid.uuid4(), email=f"kullanici{index}@example.com", full_name=f"Kullanıcı {index}")
+        for index in range(3)
+    ]
+    assert run(in_session(crud.bulk_upsert_users, users)) == 3
+    assert run(in_session(crud.bulk_upsert_users, users)) == 0
+
+    users[0] = users[0].model_copy(update={"full_name": "Yeni Ad"})
+    assert run(in_session(crud.bulk_upsert_users, users)) == 1
@@ -0,0 +1,82 @@
+# tests/user_service/test_list_etags.py
+"""
+Kullanıcı ve tenant listelerinde ETag / If-None-Match: sürüm tetikleyicilerle tutulan `list_versions`
+sayaçlarıdır; 304 yalnızca sayaç sorgusuyla döner, toplam sayı ancak gövde üretilirken okunur.
+"""
+import uuid
+
+import pytest
+from sqlalchemy import delete, update
+
+from tests.statements import capture_statements
+from user_service import database, db_models
+
+
+def _add_company(name="Acme"):
+    with database.SessionLocal() as session:
+        company = db_models.Company(name=name, keycloak_group_id=uuid.uuid4())
+        session.add(company)
+        session.commit()
+        return company.id
+
+
+def _add_user(email="kullanici@example.com", company_id=None):
+    with database.SessionLocal() as session:
+        user = db_models.User(email=email, full_name="Test Kullanıcı", company_id=company_id)
+        session.add(user)
+        session.commit()
+        return user.id
+
+
+def _execute(statement):
+    with database.SessionLocal() as session:
+        session.execute(statement)
+        session.commit()
+
+
+@pytest.mark.parametrize("path", ["/api/users/admin/users", "/api/users/admin/tenants"])
+def test_list_304_reads_only_the_version_counters(client, path):
+    _add_user(company_id=_add_company())
+    first = client.get(path)
+    assert first.status_code == 200, first.text
+    assert first.json()["total"] == 1
+
+    with capture_statements(database.async_engine.sync_engine) as log:
+        second = client.get(path, headers={"If-None-Match": first.headers["ETag"]})
+
+    assert second.status_code == 304
+    [version_query] = log.statements
+    assert "list_versions" in version_query
+    assert "count(" not in version_query.lower()
+
+
+@pytest.mark.parametrize("change", [
+    lambda user_id, company_id: _add_user(email="yeni@example.com"),
+    lambda user_id, company_id: _execute(update(db_models.User).where(db_models.User.id == user_id).values(full_name="Yeni Ad")),
+    lambda user_id, company_id: _execute(delete(db_models.User).where(db_models.User.id == user_id)),
+    # Liste şirket bilgisini de taşır.
+    lambda user_id, company_id: _execute(update(db_models.Company).where(db_models.Company.id == company_id).values(name="Yeni")),
+], ids=["insert", "update", "delete", "company-update"])
+def test_users_etag_changes_on_user_and_company_writes(client, change):
+    company_id = _add_company()
+    user_id = _add_user(company_id=company_id)
+    first = client.get("/api/users/admin/users")
+
+    change(user_id, company_id)
+    second = client.get("/api/users/admin/users", headers={"If-None-Match": first.headers["ETag"]})
+
+    assert second.status_code == 200
+    assert second.headers["ETag"] != first.headers["ETag"]
+
+
+def test_tenants_etag_ignores_user_writes(client):
+    _add_company()
+    first = client.get("/api/users/admin/tenants")
+
+    _add_user()
+    assert client.get("/api/users/admin/tenants", headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+
+    _add_company(name="Globex")
+    second = client.get("/api/users/admin/tenants", headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 200
+    assert second.json()["total"] == 2
@@ -0,0 +1,30 @@
+"""add ticket keyset pagination indexes
+
+Revision ID: 3abafa4ae912
+Revises: 03b10ba1c55f
+Create Date: 2026-10-16 09:12:41.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3abafa4ae912'
+down_revision: Union[str, None] = '03b10ba1c55f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_tickets_created_at_id', 'tickets', ['created_at', 'id'], unique=False, schema='tickets_schema')
+    op.create_index('ix_tickets_creator_id_created_at_id', 'tickets', ['creator_id', 'created_at', 'id'], unique=False, schema='tickets_schema')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tickets_creator_id_created_at_id', table_name='tickets', schema='tickets_schema')
+    op.drop_index('ix_tickets_created_at_id', table_name='tickets', schema='tickets_schema')
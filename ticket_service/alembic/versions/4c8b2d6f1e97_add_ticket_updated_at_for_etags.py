@@ -0,0 +1,66 @@
+"""add ticket updated_at for etags
+
+Revision ID: 4c8b2d6f1e97
+Revises: e41f07b6d3a2
+Create Date: 2026-10-16 12:41:19.604127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c8b2d6f1e97'
+down_revision: Union[str, None] = 'e41f07b6d3a2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('tickets', sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False), schema='tickets_schema')
+    op.execute("UPDATE tickets_schema.tickets SET updated_at = created_at WHERE created_at IS NOT NULL;")
+    op.create_index('ix_tickets_updated_at', 'tickets', ['updated_at'], unique=False, schema='tickets_schema')
+
+    # Biletin herhangi bir güncellemesi (yorum tetikleyicisinin search_vector güncellemesi dahil) updated_at'i ilerletir.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION tickets_schema.tickets_touch_updated_at() RETURNS trigger AS $$
+        BEGIN
+            NEW.updated_at := now();
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER tickets_touch_updated_at
+        BEFORE UPDATE ON tickets_schema.tickets
+        FOR EACH ROW EXECUTE FUNCTION tickets_schema.tickets_touch_updated_at();
+    """)
+
+    # Ek eklenip silindiğinde de biletin sürümü değişir (yorumlar bunu search_vector tetikleyicisiyle zaten yapıyor).
+    op.execute("""
+        CREATE OR REPLACE FUNCTION tickets_schema.attachments_touch_ticket() RETURNS trigger AS $$
+        BEGIN
+            UPDATE tickets_schema.tickets SET updated_at = now()
+             WHERE id = CASE WHEN TG_OP = 'DELETE' THEN OLD.ticket_id ELSE NEW.ticket_id END;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER attachments_touch_ticket
+        AFTER INSERT OR DELETE ON tickets_schema.attachments
+        FOR EACH ROW EXECUTE FUNCTION tickets_schema.attachments_touch_ticket();
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS attachments_touch_ticket ON tickets_schema.attachments;")
+    op.execute("DROP TRIGGER IF EXISTS tickets_touch_updated_at ON tickets_schema.tickets;")
+    op.execute("DROP FUNCTION IF EXISTS tickets_schema.attachments_touch_ticket();")
+    op.execute("DROP FUNCTION IF EXISTS tickets_schema.tickets_touch_updated_at();")
+    op.drop_index('ix_tickets_updated_at', table_name='tickets', schema='tickets_schema')
+    op.drop_column('tickets', 'updated_at', schema='tickets_schema')
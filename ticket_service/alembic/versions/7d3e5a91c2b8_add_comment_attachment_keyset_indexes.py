@@ -0,0 +1,30 @@
+"""add comment and attachment keyset indexes
+
+Revision ID: 7d3e5a91c2b8
+Revises: cae0841ed5cc
+Create Date: 2026-10-16 11:24:08.317402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d3e5a91c2b8'
+down_revision: Union[str, None] = 'cae0841ed5cc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_comments_ticket_id_created_at_id', 'comments', ['ticket_id', 'created_at', 'id'], unique=False, schema='tickets_schema')
+    op.create_index('ix_attachments_ticket_id_uploaded_at_id', 'attachments', ['ticket_id', 'uploaded_at', 'id'], unique=False, schema='tickets_schema')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_attachments_ticket_id_uploaded_at_id', table_name='attachments', schema='tickets_schema')
+    op.drop_index('ix_comments_ticket_id_created_at_id', table_name='comments', schema='tickets_schema')
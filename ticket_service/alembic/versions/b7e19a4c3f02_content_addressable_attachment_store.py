@@ -0,0 +1,80 @@
+"""content addressable attachment store
+
+Revision ID: b7e19a4c3f02
+Revises: 4c8b2d6f1e97
+Create Date: 2026-10-17 00:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e19a4c3f02'
+down_revision: Union[str, None] = '4c8b2d6f1e97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('attachment_blobs',
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('storage_key', sa.String(length=255), nullable=False, comment='Depo köküne göre dosya yolu (sha256/ab/cd/<sha256>)'),
+    sa.Column('ref_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('sha256'),
+    sa.UniqueConstraint('storage_key'),
+    schema='tickets_schema'
+    )
+    op.create_index(op.f('ix_tickets_schema_attachment_blobs_ref_count'), 'attachment_blobs', ['ref_count'], unique=False, schema='tickets_schema')
+
+    # Aynı blob birden çok eke ait olabildiği için file_path artık benzersiz ve zorunlu değil (eski ekler için kalıyor).
+    op.drop_constraint('attachments_file_path_key', 'attachments', type_='unique', schema='tickets_schema')
+    op.alter_column('attachments', 'file_path', existing_type=sa.String(length=1024), nullable=True, schema='tickets_schema')
+    op.add_column('attachments', sa.Column('size', sa.BigInteger(), nullable=True), schema='tickets_schema')
+    op.add_column('attachments', sa.Column('sha256', sa.String(length=64), nullable=True), schema='tickets_schema')
+    op.add_column('attachments', sa.Column('storage_key', sa.String(length=255), nullable=True), schema='tickets_schema')
+    op.create_index(op.f('ix_tickets_schema_attachments_sha256'), 'attachments', ['sha256'], unique=False, schema='tickets_schema')
+    op.create_foreign_key(
+        'attachments_sha256_fkey', 'attachments', 'attachment_blobs', ['sha256'], ['sha256'],
+        source_schema='tickets_schema', referent_schema='tickets_schema',
+    )
+
+    # Referans sayımı veritabanında tutulur; böylece bilet silinirken cascade ile giden ekler de sayılır.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION tickets_schema.attachments_blob_refcount() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE tickets_schema.attachment_blobs SET ref_count = ref_count + 1 WHERE sha256 = NEW.sha256;
+            ELSE
+                UPDATE tickets_schema.attachment_blobs SET ref_count = ref_count - 1 WHERE sha256 = OLD.sha256;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER attachments_blob_refcount
+        AFTER INSERT OR DELETE ON tickets_schema.attachments
+        FOR EACH ROW EXECUTE FUNCTION tickets_schema.attachments_blob_refcount();
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS attachments_blob_refcount ON tickets_schema.attachments;")
+    op.execute("DROP FUNCTION IF EXISTS tickets_schema.attachments_blob_refcount();")
+    op.drop_constraint('attachments_sha256_fkey', 'attachments', type_='foreignkey', schema='tickets_schema')
+    op.drop_index(op.f('ix_tickets_schema_attachments_sha256'), table_name='attachments', schema='tickets_schema')
+    op.drop_column('attachments', 'storage_key', schema='tickets_schema')
+    op.drop_column('attachments', 'sha256', schema='tickets_schema')
+    op.drop_column('attachments', 'size', schema='tickets_schema')
+    # İçerik adresli depoya yazılmış eklerin file_path'i boştur; geri dönüşten önce silinmeleri/taşınmaları gerekir.
+    op.alter_column('attachments', 'file_path', existing_type=sa.String(length=1024), nullable=False, schema='tickets_schema')
+    op.create_unique_constraint('attachments_file_path_key', 'attachments', ['file_path'], schema='tickets_schema')
+    op.drop_index(op.f('ix_tickets_schema_attachment_blobs_ref_count'), table_name='attachment_blobs', schema='tickets_schema')
+    op.drop_table('attachment_blobs', schema='tickets_schema')
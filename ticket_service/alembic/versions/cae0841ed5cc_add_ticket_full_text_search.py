@@ -0,0 +1,106 @@
+"""add ticket full text search
+
+Revision ID: cae0841ed5cc
+Revises: 3abafa4ae912
+Create Date: 2026-10-16 10:03:17.552940
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'cae0841ed5cc'
+down_revision: Union[str, None] = '3abafa4ae912'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('tickets', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True), schema='tickets_schema')
+
+    # Türkçe büyük/küçük harf dönüşümü: lower() 'I' harfini 'i'ye çevirir, Türkçe'de 'ı' olmalıdır.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION tickets_schema.tr_search_normalize(value text) RETURNS text AS $$
+            SELECT lower(translate(coalesce(value, ''), 'Iİ', 'ıi'))
+        $$ LANGUAGE sql IMMUTABLE;
+    """)
+
+    # Bir biletin arama dokümanı: başlık (A), açıklama (B) ve tüm yorumlar (C) ağırlıklarıyla.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION tickets_schema.ticket_search_document(t_id uuid, t_title text, t_description text) RETURNS tsvector AS $$
+            SELECT setweight(to_tsvector('turkish', tickets_schema.tr_search_normalize(t_title)), 'A')
+                || setweight(to_tsvector('turkish', tickets_schema.tr_search_normalize(t_description)), 'B')
+                || setweight(to_tsvector('turkish', tickets_schema.tr_search_normalize(
+                       (SELECT string_agg(c.content, ' ') FROM tickets_schema.comments c WHERE c.ticket_id = t_id)
+                   )), 'C')
+        $$ LANGUAGE sql STABLE;
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION tickets_schema.tickets_search_vector_trigger() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := tickets_schema.ticket_search_document(NEW.id, NEW.title, NEW.description);
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER tickets_search_vector_update
+        BEFORE INSERT OR UPDATE OF title, description ON tickets_schema.tickets
+        FOR EACH ROW EXECUTE FUNCTION tickets_schema.tickets_search_vector_trigger();
+    """)
+
+    # Yeni yorumlar mevcut vektöre eklenir; güncelleme/silmede doküman yeniden hesaplanır.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION tickets_schema.comments_search_vector_trigger() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE tickets_schema.tickets t
+                   SET search_vector = coalesce(t.search_vector, ''::tsvector)
+                       || setweight(to_tsvector('turkish', tickets_schema.tr_search_normalize(NEW.content)), 'C')
+                 WHERE t.id = NEW.ticket_id;
+                RETURN NULL;
+            END IF;
+
+            UPDATE tickets_schema.tickets t
+               SET search_vector = tickets_schema.ticket_search_document(t.id, t.title, t.description)
+             WHERE t.id = OLD.ticket_id;
+            IF TG_OP = 'UPDATE' AND NEW.ticket_id <> OLD.ticket_id THEN
+                UPDATE tickets_schema.tickets t
+                   SET search_vector = tickets_schema.ticket_search_document(t.id, t.title, t.description)
+                 WHERE t.id = NEW.ticket_id;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER comments_search_vector_update
+        AFTER INSERT OR UPDATE OF content, ticket_id OR DELETE ON tickets_schema.comments
+        FOR EACH ROW EXECUTE FUNCTION tickets_schema.comments_search_vector_trigger();
+    """)
+
+    # Mevcut biletler için vektörü doldur.
+    op.execute("""
+        UPDATE tickets_schema.tickets t
+           SET search_vector = tickets_schema.ticket_search_document(t.id, t.title, t.description);
+    """)
+
+    op.create_index('ix_tickets_search_vector', 'tickets', ['search_vector'], unique=False, schema='tickets_schema', postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tickets_search_vector', table_name='tickets', schema='tickets_schema', postgresql_using='gin')
+    op.execute("DROP TRIGGER IF EXISTS comments_search_vector_update ON tickets_schema.comments;")
+    op.execute("DROP TRIGGER IF EXISTS tickets_search_vector_update ON tickets_schema.tickets;")
+    op.execute("DROP FUNCTION IF EXISTS tickets_schema.comments_search_vector_trigger();")
+    op.execute("DROP FUNCTION IF EXISTS tickets_schema.tickets_search_vector_trigger();")
+    op.execute("DROP FUNCTION IF EXISTS tickets_schema.ticket_search_document(uuid, text, text);")
+    op.execute("DROP FUNCTION IF EXISTS tickets_schema.tr_search_normalize(text);")
+    op.drop_column('tickets', 'search_vector', schema='tickets_schema')
@@ -0,0 +1,96 @@
+"""ticket list version counters for etags
+
+Revision ID: d2a6c8e4f1b3
+Revises: b7e19a4c3f02
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2a6c8e4f1b3'
+down_revision: Union[str, None] = 'b7e19a4c3f02'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _touch_functions(now_function: str) -> None:
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION tickets_schema.tickets_touch_updated_at() RETURNS trigger AS $$
+        BEGIN
+            NEW.updated_at := {now_function};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION tickets_schema.attachments_touch_ticket() RETURNS trigger AS $$
+        BEGIN
+            UPDATE tickets_schema.tickets SET updated_at = {now_function}
+             WHERE id = CASE WHEN TG_OP = 'DELETE' THEN OLD.ticket_id ELSE NEW.ticket_id END;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('ticket_list_versions',
+    sa.Column('creator_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('version', sa.BigInteger(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('creator_id'),
+    schema='tickets_schema'
+    )
+
+    # Sayaçlar commit anında (ertelenmiş constraint trigger), transaction başına kapsam başına bir kez
+    # artırılır: sayaç satırının kilidi yalnızca commit sırasında tutulur ve toplu yazmalar satır başına
+    # değil bir kez artırır. Kapsamlar sabit sırayla (önce "tüm biletler") kilitlenir.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION tickets_schema.bump_ticket_list_versions() RETURNS trigger AS $$
+        DECLARE
+            scope_id uuid;
+            bumped_flag text;
+        BEGIN
+            FOREACH scope_id IN ARRAY ARRAY[
+                '00000000-0000-0000-0000-000000000000'::uuid,
+                CASE WHEN TG_OP = 'DELETE' THEN OLD.creator_id ELSE NEW.creator_id END,
+                CASE WHEN TG_OP = 'UPDATE' AND OLD.creator_id <> NEW.creator_id THEN OLD.creator_id END
+            ] LOOP
+                CONTINUE WHEN scope_id IS NULL;
+                bumped_flag := 'ticket_list_versions.bumped_' || replace(scope_id::text, '-', '');
+                CONTINUE WHEN current_setting(bumped_flag, true) = 'on';
+                INSERT INTO tickets_schema.ticket_list_versions AS v (creator_id, version) VALUES (scope_id, 1)
+                ON CONFLICT (creator_id) DO UPDATE SET version = v.version + 1;
+                PERFORM set_config(bumped_flag, 'on', true);
+            END LOOP;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE CONSTRAINT TRIGGER tickets_bump_list_versions
+        AFTER INSERT OR UPDATE OR DELETE ON tickets_schema.tickets
+        DEFERRABLE INITIALLY DEFERRED
+        FOR EACH ROW EXECUTE FUNCTION tickets_schema.bump_ticket_list_versions();
+    """)
+
+    # Detay ETag'inin updated_at'i: transaction başlangıcı (now()) yerine değişikliğin gerçek zamanı.
+    _touch_functions("clock_timestamp()")
+
+    # Liste ETag'i artık max(updated_at) kullanmıyor.
+    op.drop_index('ix_tickets_updated_at', table_name='tickets', schema='tickets_schema')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_tickets_updated_at', 'tickets', ['updated_at'], unique=False, schema='tickets_schema')
+    _touch_functions("now()")
+    op.execute("DROP TRIGGER IF EXISTS tickets_bump_list_versions ON tickets_schema.tickets;")
+    op.execute("DROP FUNCTION IF EXISTS tickets_schema.bump_ticket_list_versions();")
+    op.drop_table('ticket_list_versions', schema='tickets_schema')
@@ -0,0 +1,47 @@
+"""cascade ticket child deletes
+
+Revision ID: e41f07b6d3a2
+Revises: 7d3e5a91c2b8
+Create Date: 2026-10-16 12:02:45.918230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e41f07b6d3a2'
+down_revision: Union[str, None] = '7d3e5a91c2b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Bilet silme tek bir DELETE ... RETURNING ile yapılabilsin diye yorum ve ekler veritabanında silinir.
+    op.drop_constraint('comments_ticket_id_fkey', 'comments', type_='foreignkey', schema='tickets_schema')
+    op.create_foreign_key(
+        'comments_ticket_id_fkey', 'comments', 'tickets', ['ticket_id'], ['id'],
+        source_schema='tickets_schema', referent_schema='tickets_schema', ondelete='CASCADE',
+    )
+    op.drop_constraint('attachments_ticket_id_fkey', 'attachments', type_='foreignkey', schema='tickets_schema')
+    op.create_foreign_key(
+        'attachments_ticket_id_fkey', 'attachments', 'tickets', ['ticket_id'], ['id'],
+        source_schema='tickets_schema', referent_schema='tickets_schema', ondelete='CASCADE',
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('attachments_ticket_id_fkey', 'attachments', type_='foreignkey', schema='tickets_schema')
+    op.create_foreign_key(
+        'attachments_ticket_id_fkey', 'attachments', 'tickets', ['ticket_id'], ['id'],
+        source_schema='tickets_schema', referent_schema='tickets_schema',
+    )
+    op.drop_constraint('comments_ticket_id_fkey', 'comments', type_='foreignkey', schema='tickets_schema')
+    op.create_foreign_key(
+        'comments_ticket_id_fkey', 'comments', 'tickets', ['ticket_id'], ['id'],
+        source_schema='tickets_schema', referent_schema='tickets_schema',
+    )
@@ -0,0 +1,163 @@
+# ticket_service/attachment_store.py
+"""
+İçerik adresli (SHA-256), tekilleştirilmiş dosya eki deposu.
+
+- Her içerik diskte bir kez, `<kök>/sha256/ab/cd/<sha256>` yolunda durur (ilk iki bayt ile iki seviyeli
+  parçalama; tek bir dizin sınırsız büyümez). Dosya adı ve türü ek kaydında tutulur.
+- Dosyalar upload_stream ile akış halinde alınırken hash'lenir; aynı içerik depoda varsa blob diske
+  yeniden yazılmaz. Yeni blob'lar geçici dosya + os.replace ile atomik olarak yerine konur.
+- `attachment_blobs.ref_count` ekler tablosundaki tetikleyicilerle tutulur (PostgreSQL'de migration,
+  SQLite'ta aşağıdaki after_create dinleyicisi); bilet silinirken cascade ile giden ekler de sayılır.
+  Referansı kalmayan blob'lar delete_unreferenced_blobs ile (silme endpoint'lerinde yanıttan sonra,
+  arka planda) silinir; `attachment_blob_gc_grace` süresinden yeni blob'lar bir sonraki temizliğe kalır.
+- Eski ekler (`storage_key` boş) `file_path` üzerinden sunulmaya devam eder.
+"""
+import asyncio
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from . import crud, db_models, upload_stream
+from .config import Settings
+from .database import AsyncSessionLocal, Base
+from .upload_stream import StagedUpload
+
+
+def storage_key_for(sha256: str) -> str:
+    return f"sha256/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+def resolve_path(attachment: db_models.Attachment, settings: Settings) -> Path:
+    """Ekin diskteki dosya yolunu döndürür (içerik adresli depo veya eski `file_path`)."""
+    if attachment.storage_key:
+        return Path(settings.attachment_storage_dir) / attachment.storage_key
+    return Path(attachment.file_path)
+
+
+def _materialize_if_missing(upload: StagedUpload, blob_path: Path) -> bool:
+    if blob_path.exists():
+        return False
+    upload.materialize(blob_path)
+    return True
+
+
+async def store_uploads(
+    db: AsyncSession,
+    uploads: List[StagedUpload],
+    ticket_id: uuid.UUID,
+    uploader_id: uuid.UUID,
+    settings: Settings,
+) -> List[db_models.Attachment]:
+    """
+    Akış halinde alınmış dosyaları depoya (gerekirse, eşzamanlı olarak) koyar ve ek kayıtlarını oluşturur.
+    Geçici dosyaların silinmesi çağırana bırakılır.
+    """
+    root = Path(settings.attachment_storage_dir)
+    blob_paths = [root / storage_key_for(upload.sha256) for upload in uploads]
+    loop = asyncio.get_running_loop()
+    executor = upload_stream.get_upload_executor(settings)
+    blobs_written = await asyncio.gather(*(
+        loop.run_in_executor(executor, _materialize_if_missing, upload, blob_path)
+        for upload, blob_path in zip(uploads, blob_paths)
+    ))
+
+    db_attachments = []
+    for upload in uploads:
+        db_attachments.append(await crud.create_attachment(
+            db=db, file_name=upload.file_name, file_type=upload.content_type, ticket_id=ticket_id,
+            uploader_id=uploader_id, size=upload.size, sha256=upload.sha256, storage_key=storage_key_for(upload.sha256),
+        ))
+
+    # Dosya varken yazmayı atladık ama araya referansı sıfırlanmış blob'un temizliği girdiyse içeriği geri koy.
+    for upload, blob_path, blob_written in zip(uploads, blob_paths, blobs_written):
+        if not blob_written:
+            await loop.run_in_executor(executor, _materialize_if_missing, upload, blob_path)
+    return db_attachments
+
+
+def _move_if_missing(source_path: Path, blob_path: Path) -> bool:
+    if blob_path.exists():
+        return False
+    blob_path.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(source_path, blob_path)
+    return True
+
+
+async def store_file(
+    db: AsyncSession,
+    source_path: Path,
+    sha256: str,
+    size: int,
+    file_name: str,
+    file_type: Optional[str],
+    ticket_id: uuid.UUID,
+    uploader_id: uuid.UUID,
+    settings: Settings,
+) -> db_models.Attachment:
+    """
+    Depo ile aynı dosya sistemindeki hazır bir dosyayı (örn. tamamlanmış yükleme oturumu) kopyalamadan,
+    os.replace ile depoya taşır ve ek kaydını oluşturur. İçerik depoda zaten varsa kaynak dosya silinir.
+    """
+    storage_key = storage_key_for(sha256)
+    blob_path = Path(settings.attachment_storage_dir) / storage_key
+    loop = asyncio.get_running_loop()
+    executor = upload_stream.get_upload_executor(settings)
+    blob_moved = await loop.run_in_executor(executor, _move_if_missing, source_path, blob_path)
+
+    db_attachment = await crud.create_attachment(
+        db=db, file_name=file_name, file_type=file_type, ticket_id=ticket_id,
+        uploader_id=uploader_id, size=size, sha256=sha256, storage_key=storage_key,
+    )
+    if not blob_moved:
+        # store_uploads'taki gibi: araya blob temizliği girdiyse kaynak dosyayı yine de yerine koy.
+        if not await loop.run_in_executor(executor, _move_if_missing, source_path, blob_path):
+            await run_in_threadpool(source_path.unlink, missing_ok=True)
+    return db_attachment
+
+
+async def delete_unreferenced_blobs(db: AsyncSession, settings: Settings) -> int:
+    """
+    Hiçbir eke ait olmayan ve bekleme süresini doldurmuş blob'ları veritabanından ve diskten siler;
+    silinen blob sayısını döndürür.
+    """
+    created_before = datetime.now(timezone.utc) - timedelta(seconds=settings.attachment_blob_gc_grace)
+    storage_keys = await crud.delete_unreferenced_attachment_blobs(db, created_before)
+    root = Path(settings.attachment_storage_dir)
+    for storage_key in storage_keys:
+        try:
+            await run_in_threadpool((root / storage_key).unlink, missing_ok=True)
+        except OSError as e:
+            print(f"UYARI (AttachmentStore): Blob dosyası silinemedi ({storage_key}): {e}")
+    return len(storage_keys)
+
+
+async def collect_unreferenced_blobs(settings: Settings) -> None:
+    """
+    delete_unreferenced_blobs'un arka plan görevi sürümü (silme endpoint'leri yanıttan sonra çalıştırır):
+    kendi oturumunu açar, hataları yalnızca loglar. Kaçan blob'lar bir sonraki silmede toplanır.
+    """
+    try:
+        async with AsyncSessionLocal() as db:
+            await delete_unreferenced_blobs(db, settings)
+    except Exception as e:
+        print(f"UYARI (AttachmentStore): Referanssız blob temizliği başarısız: {e}")
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_sqlite_refcount_triggers(target, connection, **kw):
+    if connection.dialect.name != "sqlite":
+        return
+    attachments_table = db_models.Attachment.__table__
+    schema_prefix = f"{attachments_table.schema}." if attachments_table.schema else ""
+    for operation, row, delta in (("INSERT", "NEW", "+ 1"), ("DELETE", "OLD", "- 1")):
+        connection.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {schema_prefix}attachments_blob_refcount_{operation.lower()} "
+            f"AFTER {operation} ON attachments BEGIN "
+            f"UPDATE attachment_blobs SET ref_count = ref_count {delta} WHERE sha256 = {row}.sha256; END"
+        ))
@@ -0,0 +1,289 @@
+# ticket_service/bulk_import.py
+"""
+Eski helpdesk sistemlerinden toplu bilet/yorum içe aktarımı.
+
+- Girdi CSV (başlık satırlı) veya JSONL olabilir; satırlar bir worker thread'de okunup
+  Pydantic modelleriyle doğrulanır, hatalı satırlar satır numarasıyla raporlanır.
+- Geçerli satırlar `batch_size`'lık parçalar hâlinde yazılır. PostgreSQL'de her parça
+  COPY ile geçici bir staging tablosuna aktarılır ve tek bir INSERT ... SELECT ile hedef
+  tabloya taşınır; her parça kendi transaction'ında commit edilir.
+- SQLite'ta (çevrimdışı testler) aynı akış toplu INSERT ile yapılır.
+
+Komut satırından kullanım:
+    python -m ticket_service.bulk_import tickets legacy_tickets.csv
+    python -m ticket_service.bulk_import comments legacy_comments.jsonl --batch-size 10000
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import time
+from datetime import datetime, timezone
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import iterate_in_threadpool
+
+from . import db_models, models, search
+from .database import AsyncSessionLocal
+
+MAX_REPORTED_ERRORS = 1000
+
+_ROW_MODELS: Dict[str, Type[BaseModel]] = {
+    "tickets": models.TicketImportRow,
+    "comments": models.CommentImportRow,
+}
+
+# Staging tablosu kolonları (line_no hariç) ve PostgreSQL tipleri; COPY bu sırayla yapılır.
+_STAGING_COLUMNS: Dict[str, List[Tuple[str, str]]] = {
+    "tickets": [
+        ("id", "uuid"), ("title", "varchar"), ("description", "varchar"), ("status", "varchar"),
+        ("created_at", "timestamptz"), ("creator_id", "uuid"), ("tenant_id", "uuid"),
+    ],
+    "comments": [
+        ("id", "uuid"), ("ticket_id", "uuid"), ("author_id", "uuid"), ("content", "text"),
+        ("created_at", "timestamptz"),
+    ],
+}
+
+ValidRow = Tuple[int, BaseModel]
+
+
+def detect_format(filename: Optional[str]) -> Optional[str]:
+    """Dosya uzantısından formatı tahmin eder (.csv -> csv, .jsonl/.ndjson -> jsonl)."""
+    suffix = (filename or "").rsplit(".", 1)[-1].lower()
+    if suffix == "csv":
+        return "csv"
+    if suffix in ("jsonl", "ndjson"):
+        return "jsonl"
+    return None
+
+
+def _iter_raw_records(binary_stream: BinaryIO, input_format: str) -> Iterator[Tuple[int, Any]]:
+    text_stream = io.TextIOWrapper(binary_stream, encoding="utf-8-sig", newline="")
+    try:
+        if input_format == "csv":
+            reader = csv.DictReader(text_stream)
+            for record in reader:
+                yield reader.line_num, record
+        else:
+            for line_no, line in enumerate(text_stream, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_no, json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_no, e
+    finally:
+        # Alttaki dosyayı çağıran kapatır.
+        text_stream.detach()
+
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(loc) for loc in item['loc'])}: {item['msg']}" for item in error.errors())
+
+
+def _iter_validated_batches(
+    binary_stream: BinaryIO, input_format: str, kind: str, batch_size: int
+) -> Iterator[Tuple[List[ValidRow], List[models.ImportRowError], int]]:
+    """(geçerli satırlar, hatalar, okunan satır sayısı) parçaları üretir. Worker thread'de çalışır."""
+    row_model = _ROW_MODELS[kind]
+    valid_rows: List[ValidRow] = []
+    errors: List[models.ImportRowError] = []
+    seen_ids = set()
+    read_count = 0
+
+    for line_no, record in _iter_raw_records(binary_stream, input_format):
+        read_count += 1
+        if isinstance(record, Exception):
+            errors.append(models.ImportRowError(line=line_no, error=f"Geçersiz JSON: {record}"))
+        elif not isinstance(record, dict):
+            errors.append(models.ImportRowError(line=line_no, error="Satır bir nesne olmalıdır."))
+        else:
+            # CSV'de boş hücreler "verilmedi" anlamına gelir (id ve created_at varsayılanları için).
+            cleaned = {key: value for key, value in record.items() if key and value not in ("", None)}
+            try:
+                row = row_model.model_validate(cleaned)
+            except ValidationError as e:
+                errors.append(models.ImportRowError(line=line_no, error=_format_validation_error(e)))
+            else:
+                if row.id in seen_ids:
+                    errors.append(models.ImportRowError(line=line_no, error=f"ID {row.id} bu parçada tekrar ediyor."))
+                else:
+                    seen_ids.add(row.id)
+                    valid_rows.append((line_no, row))
+
+        if read_count >= batch_size:
+            yield valid_rows, errors, read_count
+            valid_rows, errors, seen_ids, read_count = [], [], set(), 0
+
+    if read_count:
+        yield valid_rows, errors, read_count
+
+
+async def _write_batch_postgres(db: AsyncSession, kind: str, valid_rows: List[ValidRow]) -> Tuple[int, List[models.ImportRowError]]:
+    staging_table = f"{kind}_import_staging"
+    columns = _STAGING_COLUMNS[kind]
+    column_names = [name for name, _ in columns]
+
+    # CREATE ile transaction SQLAlchemy üzerinden başlar; COPY aynı bağlantı ve transaction'da çalışır.
+    column_ddl = ", ".join(f"{name} {pg_type}" for name, pg_type in columns)
+    await db.execute(text(f"CREATE TEMP TABLE {staging_table} (line_no integer, {column_ddl}) ON COMMIT DROP"))
+    connection = await db.connection()
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(
+        staging_table,
+        records=[(line_no, *(getattr(row, name) for name in column_names)) for line_no, row in valid_rows],
+        columns=["line_no", *column_names],
+    )
+
+    if kind == "tickets":
+        result = await db.execute(text(f"""
+            WITH inserted AS (
+                INSERT INTO tickets_schema.tickets (id, title, description, status, created_at, creator_id, tenant_id)
+                SELECT s.id, s.title, s.description, s.status, coalesce(s.created_at, now()), s.creator_id, s.tenant_id
+                FROM {staging_table} s
+                ON CONFLICT (id) DO NOTHING
+                RETURNING id
+            )
+            SELECT s.line_no, s.id, false AS missing_ticket
+            FROM {staging_table} s LEFT JOIN inserted i ON i.id = s.id
+            WHERE i.id IS NULL
+        """))
+    else:
+        result = await db.execute(text(f"""
+            WITH inserted AS (
+                INSERT INTO tickets_schema.comments (id, content, created_at, ticket_id, author_id)
+                SELECT s.id, s.content, coalesce(s.created_at, now()), s.ticket_id, s.author_id
+                FROM {staging_table} s JOIN tickets_schema.tickets t ON t.id = s.ticket_id
+                ON CONFLICT (id) DO NOTHING
+                RETURNING id
+            )
+            SELECT s.line_no, s.id, t.id IS NULL AS missing_ticket
+            FROM {staging_table} s
+            LEFT JOIN tickets_schema.tickets t ON t.id = s.ticket_id
+            LEFT JOIN inserted i ON i.id = s.id
+            WHERE i.id IS NULL
+        """))
+    rejected = result.all()
+    await db.commit()
+
+    errors = [
+        models.ImportRowError(
+            line=line_no,
+            error="Bağlı olduğu bilet bulunamadı." if missing_ticket else f"ID {row_id} zaten mevcut.",
+        )
+        for line_no, row_id, missing_ticket in rejected
+    ]
+    return len(valid_rows) - len(rejected), errors
+
+
+async def _write_batch_sqlite(db: AsyncSession, kind: str, valid_rows: List[ValidRow]) -> Tuple[int, List[models.ImportRowError]]:
+    model = db_models.Ticket if kind == "tickets" else db_models.Comment
+    batch_ids = [row.id for _, row in valid_rows]
+    existing_ids = set((await db.execute(select(model.id).where(model.id.in_(batch_ids)))).scalars())
+    existing_ticket_ids = set()
+    if kind == "comments":
+        ticket_ids = {row.ticket_id for _, row in valid_rows}
+        existing_ticket_ids = set(
+            (await db.execute(select(db_models.Ticket.id).where(db_models.Ticket.id.in_(ticket_ids)))).scalars()
+        )
+
+    errors: List[models.ImportRowError] = []
+    values = []
+    imported_at = datetime.now(timezone.utc)
+    for line_no, row in valid_rows:
+        if row.id in existing_ids:
+            errors.append(models.ImportRowError(line=line_no, error=f"ID {row.id} zaten mevcut."))
+        elif kind == "comments" and row.ticket_id not in existing_ticket_ids:
+            errors.append(models.ImportRowError(line=line_no, error="Bağlı olduğu bilet bulunamadı."))
+        else:
+            value = row.model_dump()
+            value["created_at"] = value["created_at"] or imported_at
+            values.append(value)
+
+    if values:
+        await db.execute(sqlite_insert(model).on_conflict_do_nothing(), values)
+        # ORM olayları çalışmadığı için SQLite FTS dizini burada güncellenir.
+        indexed_ticket_ids = [value["id"] if kind == "tickets" else value["ticket_id"] for value in values]
+        connection = await db.connection()
+        await connection.run_sync(search.reindex_sqlite_tickets, indexed_ticket_ids)
+    await db.commit()
+    return len(values), errors
+
+
+async def import_stream(
+    kind: str,
+    binary_stream: BinaryIO,
+    input_format: str,
+    batch_size: int = 5000,
+    max_reported_errors: int = MAX_REPORTED_ERRORS,
+) -> models.ImportResult:
+    """
+    Bir CSV/JSONL akışını `kind` ("tickets" | "comments") tablosuna aktarır ve özet döndürür.
+    Kendi oturumunu açar; her parça ayrı commit edilir, bu yüzden yarıda kalan bir içe aktarım
+    o ana kadarki parçaları kalıcı bırakır (aynı dosya tekrar verilirse mevcut ID'ler atlanır).
+    """
+    if kind not in _ROW_MODELS:
+        raise ValueError(f"Geçersiz içe aktarım türü: {kind}")
+    if input_format not in ("csv", "jsonl"):
+        raise ValueError(f"Geçersiz içe aktarım formatı: {input_format}")
+
+    started_at = time.monotonic()
+    total_rows = imported = failed = 0
+    reported_errors: List[models.ImportRowError] = []
+
+    async with AsyncSessionLocal() as db:
+        write_batch = _write_batch_postgres if db.bind.dialect.name == "postgresql" else _write_batch_sqlite
+        batches = iterate_in_threadpool(_iter_validated_batches(binary_stream, input_format, kind, batch_size))
+        async for valid_rows, batch_errors, read_count in batches:
+            total_rows += read_count
+            if valid_rows:
+                batch_imported, write_errors = await write_batch(db, kind, valid_rows)
+                imported += batch_imported
+                batch_errors = batch_errors + write_errors
+            failed += len(batch_errors)
+            reported_errors.extend(batch_errors[: max(0, max_reported_errors - len(reported_errors))])
+            print(f"IMPORT ({kind}): {total_rows} satır işlendi, {imported} aktarıldı, {failed} hatalı.")
+
+    reported_errors.sort(key=lambda error: error.line)
+    elapsed = time.monotonic() - started_at
+    print(f"IMPORT ({kind}): Tamamlandı. {imported}/{total_rows} satır {elapsed:.1f} sn'de aktarıldı ({imported / elapsed if elapsed else 0:.0f} satır/sn).")
+    return models.ImportResult(
+        kind=kind,
+        total_rows=total_rows,
+        imported=imported,
+        failed=failed,
+        errors=reported_errors,
+        errors_truncated=failed > len(reported_errors),
+        elapsed_seconds=round(elapsed, 3),
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="CSV/JSONL dosyasından toplu bilet veya yorum içe aktarır.")
+    parser.add_argument("kind", choices=sorted(_ROW_MODELS), help="İçe aktarılacak kayıt türü")
+    parser.add_argument("path", help="CSV veya JSONL dosyası")
+    parser.add_argument("--format", dest="input_format", choices=["csv", "jsonl"], help="Verilmezse uzantıdan çıkarılır")
+    parser.add_argument("--batch-size", type=int, default=None, help="Tek transaction'da yazılacak satır sayısı")
+    args = parser.parse_args(argv)
+
+    from .config import get_settings
+
+    input_format = args.input_format or detect_format(args.path)
+    if input_format is None:
+        parser.error("Dosya formatı uzantıdan anlaşılamadı; --format csv|jsonl verin.")
+    batch_size = args.batch_size or get_settings().import_batch_size
+
+    with open(args.path, "rb") as binary_stream:
+        result = asyncio.run(import_stream(args.kind, binary_stream, input_format, batch_size=batch_size))
+    print(result.model_dump_json(indent=2))
+    return 0 if result.failed == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,152 @@
+# ticket_service/cache.py
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, Optional, Set, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+class _Entry(Generic[V]):
+    __slots__ = ("value", "fresh_until", "stale_until")
+
+    def __init__(self, value: Optional[V], fresh_until: float, stale_until: float):
+        self.value = value
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+
+
+def _retrieve_exception(task: asyncio.Task) -> None:
+    # Bekleyenlerin hepsi iptal edildiyse "Task exception was never retrieved" uyarısını bastır.
+    if not task.cancelled():
+        task.exception()
+
+
+class AsyncTTLCache(Generic[V]):
+    """
+    Süreç içi, boyutu sınırlı (LRU) ve TTL'li async önbellek.
+
+    - Aynı anahtar için eşzamanlı istekler tek bir yükleme çağrısında birleştirilir (coalescing).
+    - Süresi dolmuş ama `stale_ttl` içindeki değer hemen döndürülür, yenilemesi arka planda yapılır
+      (stale-while-revalidate).
+    - Yükleyici None döndürürse (kayıt yok) sonuç `negative_ttl` süresince önbellekte tutulur.
+    - Yükleyici exception fırlatırsa sonuç önbelleğe alınmaz; elde bayat değer varsa o döndürülür.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, stale_ttl: float = 0.0, negative_ttl: float = 0.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+        self._entries: "OrderedDict[Hashable, _Entry[V]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._background_tasks: Set[asyncio.Task] = set()
+        self._counters = {
+            "hits": 0,
+            "stale_hits": 0,
+            "negative_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "load_errors": 0,
+            "evictions": 0,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._counters, "size": len(self._entries), "max_entries": self.max_entries}
+
+    def peek(self, key: Hashable) -> Tuple[bool, Optional[V]]:
+        """
+        Yükleme yapmadan taze değeri döndürür: (bulundu mu, değer). Toplu yükleme yapan çağıranlar
+        eksik anahtarları kendileri getirip `put` ile yazar.
+        """
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() >= entry.fresh_until:
+            self._counters["misses"] += 1
+            return False, None
+        self._entries.move_to_end(key)
+        self._counters["negative_hits" if entry.value is None else "hits"] += 1
+        return True, entry.value
+
+    def put(self, key: Hashable, value: Optional[V]) -> None:
+        self._store(key, value)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def _store(self, key: Hashable, value: Optional[V]) -> None:
+        now = time.monotonic()
+        ttl = self.ttl if value is not None else self.negative_ttl
+        if ttl <= 0:
+            self._entries.pop(key, None)
+            return
+        # Negatif sonuçlar bayat olarak sunulmaz; kayıt bu arada oluşmuş olabilir.
+        stale_until = now + ttl + (self.stale_ttl if value is not None else 0.0)
+        self._entries[key] = _Entry(value, now + ttl, stale_until)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Optional[V]]]) -> Optional[V]:
+        task = self._inflight.get(key)
+        if task is not None:
+            self._counters["coalesced"] += 1
+        else:
+            task = asyncio.create_task(self._run_loader(key, loader))
+            task.add_done_callback(_retrieve_exception)
+            self._inflight[key] = task
+        # Yükleme kendi görevinde çalışır: ilk çağıran dahil bekleyenlerden birinin iptali yüklemeyi ve
+        # diğer bekleyenleri etkilemez; herkes iptal edilse bile sonuç önbelleğe yazılır.
+        return await asyncio.shield(task)
+
+    async def _run_loader(self, key: Hashable, loader: Callable[[], Awaitable[Optional[V]]]) -> Optional[V]:
+        try:
+            value = await loader()
+        except Exception:
+            self._counters["load_errors"] += 1
+            raise
+        else:
+            self._store(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def _revalidate_in_background(self, key: Hashable, loader: Callable[[], Awaitable[Optional[V]]]) -> None:
+        if key in self._inflight:
+            return
+
+        async def refresh():
+            try:
+                await self._load(key, loader)
+            except Exception as e:
+                print(f"UYARI (Cache): '{key}' arka planda yenilenemedi, bayat değer kullanılmaya devam ediyor: {e}")
+
+        task = asyncio.create_task(refresh())
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Optional[V]]]) -> Optional[V]:
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is not None:
+            if now < entry.fresh_until:
+                self._entries.move_to_end(key)
+                self._counters["negative_hits" if entry.value is None else "hits"] += 1
+                return entry.value
+            if now < entry.stale_until:
+                self._entries.move_to_end(key)
+                self._counters["stale_hits"] += 1
+                self._revalidate_in_background(key, loader)
+                return entry.value
+
+        self._counters["misses"] += 1
+        try:
+            return await self._load(key, loader)
+        except Exception:
+            # Yenileme başarısızsa ve elde (süresi tamamen geçmiş olsa da) bir değer varsa onu kullan.
+            if entry is not None and entry.value is not None:
+                return entry.value
+            raise
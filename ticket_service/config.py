@@ -8,6 +8,15 @@ import hvac
 class DatabaseSettings(BaseModel):
     """Veritabanı bağlantı ayarları."""
     url: str
+    # Async (asyncpg) motoru için URL; verilmezse `url`'den otomatik türetilir.
+    async_url: Optional[str] = None
+    # Bağlantı havuzu ve zaman aşımı ayarları
+    pool_size: int = 10
+    max_overflow: int = 20
+    pool_timeout: float = 30.0
+    pool_recycle: int = 1800
+    connect_timeout: float = 10.0
+    statement_timeout_ms: Optional[int] = None
 
 class KeycloakSettings(BaseModel):
     """Keycloak ile ilgili tüm ayarlar."""
@@ -37,6 +46,39 @@ class Settings(BaseModel):
     # --- YENİ EKLENEN ALAN ---
     # Bu alan, ticket_service'in user_service ile konuşması için gereklidir.
     user_service_url: str
+    # Tenant dizini önbelleğinin yenilenme süresi (sn) ve arka plan kullanıcı senkronizasyon kuyruğu boyutu
+    tenant_directory_ttl: float = 300.0
+    user_sync_queue_size: int = 10000
+    # Bilet detaylarındaki kullanıcı bilgisi önbelleği: taze süre, bayat sunulabilecek ek süre,
+    # "kullanıcı yok" sonuçlarının tutulma süresi (sn) ve en fazla kayıt sayısı
+    user_cache_ttl: float = 60.0
+    user_cache_stale_ttl: float = 600.0
+    user_cache_negative_ttl: float = 30.0
+    user_cache_max_entries: int = 5000
+    # Dışa aktarımda server-side cursor'dan tek seferde okunan satır sayısı
+    export_batch_size: int = 1000
+    # Toplu içe aktarımda tek transaction'da COPY ile yazılan satır sayısı
+    import_batch_size: int = 5000
+    # Tek bir toplu güncelleme/silme çağrısında işlenebilecek en fazla bilet sayısı
+    bulk_max_tickets: int = 1000
+    # Bilet listesi yanıt önbelleği: TTL (sn, 0 = kapalı), süreç içi backend'de en fazla kayıt sayısı ve
+    # pod'lar arasında paylaşılacaksa Redis adresi
+    list_cache_ttl: float = 5.0
+    list_cache_max_entries: int = 10000
+    list_cache_redis_url: Optional[str] = None
+    # İçerik adresli dosya eki deposunun kök dizini
+    attachment_storage_dir: str = "uploads"
+    # Dosya eki yükleme sınırları (bayt / adet) ve disk yazmaları için thread havuzu boyutu
+    attachment_max_file_size: int = 50 * 1024 * 1024
+    attachment_max_request_size: int = 200 * 1024 * 1024
+    attachment_max_files: int = 20
+    attachment_upload_workers: int = 4
+    # Referansı kalmayan blob'ların silinmeden önce en az ne kadar süredir var olması gerektiği (sn);
+    # dosyası henüz yerine konmakta olan eşzamanlı yüklemelerle yarışı önler
+    attachment_blob_gc_grace: int = 3600
+    # Devam ettirilebilir yüklemelerde en büyük dosya boyutu (bayt) ve oturumun geçerlilik süresi (sn)
+    resumable_upload_max_size: int = 10 * 1024 * 1024 * 1024
+    resumable_upload_ttl: int = 86400
 
 
 # --- Ayarları Başlatma ve Zenginleştirme ---
@@ -45,7 +87,16 @@ class Settings(BaseModel):
 # Tüm değerler, Kubernetes tarafından pod'a enjekte edilen ortam değişkenlerinden okunur.
 try:
     settings = Settings(
-        database=DatabaseSettings(url=os.environ["DATABASE_URL"]),
+        database=DatabaseSettings(
+            url=os.environ["DATABASE_URL"],
+            async_url=os.getenv("ASYNC_DATABASE_URL"),
+            pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "20")),
+            pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+            pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+            connect_timeout=float(os.getenv("DB_CONNECT_TIMEOUT", "10")),
+            statement_timeout_ms=int(os.environ["DB_STATEMENT_TIMEOUT_MS"]) if os.getenv("DB_STATEMENT_TIMEOUT_MS") else None,
+        ),
         keycloak=KeycloakSettings(
             issuer_uri=os.environ["KEYCLOAK_ISSUER_URI"],
             jwks_uri=os.environ["KEYCLOAK_JWKS_URI"],
@@ -61,7 +112,27 @@ try:
         # --- DEĞİŞİKLİK BURADA ---
         # USER_SERVICE_URL ortam değişkenini okuyup settings nesnesine ekliyoruz.
         # Eğer bu değişken bulunamazsa, varsayılan olarak cluster içi servis adını kullanır.
-        user_service_url=os.getenv("USER_SERVICE_URL", "http://user-service:80")
+        user_service_url=os.getenv("USER_SERVICE_URL", "http://user-service:80"),
+        tenant_directory_ttl=float(os.getenv("TENANT_DIRECTORY_TTL", "300")),
+        user_sync_queue_size=int(os.getenv("USER_SYNC_QUEUE_SIZE", "10000")),
+        user_cache_ttl=float(os.getenv("USER_CACHE_TTL", "60")),
+        user_cache_stale_ttl=float(os.getenv("USER_CACHE_STALE_TTL", "600")),
+        user_cache_negative_ttl=float(os.getenv("USER_CACHE_NEGATIVE_TTL", "30")),
+        user_cache_max_entries=int(os.getenv("USER_CACHE_MAX_ENTRIES", "5000")),
+        export_batch_size=int(os.getenv("EXPORT_BATCH_SIZE", "1000")),
+        import_batch_size=int(os.getenv("IMPORT_BATCH_SIZE", "5000")),
+        bulk_max_tickets=int(os.getenv("BULK_MAX_TICKETS", "1000")),
+        list_cache_ttl=float(os.getenv("LIST_CACHE_TTL", "5")),
+        list_cache_max_entries=int(os.getenv("LIST_CACHE_MAX_ENTRIES", "10000")),
+        list_cache_redis_url=os.getenv("LIST_CACHE_REDIS_URL"),
+        attachment_storage_dir=os.getenv("ATTACHMENT_STORAGE_DIR", "uploads"),
+        attachment_max_file_size=int(os.getenv("ATTACHMENT_MAX_FILE_SIZE", str(50 * 1024 * 1024))),
+        attachment_max_request_size=int(os.getenv("ATTACHMENT_MAX_REQUEST_SIZE", str(200 * 1024 * 1024))),
+        attachment_max_files=int(os.getenv("ATTACHMENT_MAX_FILES", "20")),
+        attachment_upload_workers=int(os.getenv("ATTACHMENT_UPLOAD_WORKERS", "4")),
+        attachment_blob_gc_grace=int(os.getenv("ATTACHMENT_BLOB_GC_GRACE", "3600")),
+        resumable_upload_max_size=int(os.getenv("RESUMABLE_UPLOAD_MAX_SIZE", str(10 * 1024 * 1024 * 1024))),
+        resumable_upload_ttl=int(os.getenv("RESUMABLE_UPLOAD_TTL", "86400")),
     )
 except KeyError as e:
     # Eğer zorunlu bir ortam değişkeni ayarlanmamışsa, uygulama başlamadan hata verir.
@@ -70,6 +141,18 @@ except KeyError as e:
     raise SystemExit(f"Configuration Error: Missing environment variable {e}") from e
 
 
+# Async veritabanı URL'sini senkron URL'den türet (psycopg2 -> asyncpg, sqlite -> aiosqlite)
+if not settings.database.async_url:
+    sync_url = settings.database.url
+    if sync_url.startswith("postgresql+psycopg2://"):
+        settings.database.async_url = sync_url.replace("postgresql+psycopg2://", "postgresql+asyncpg://", 1)
+    elif sync_url.startswith("postgresql://"):
+        settings.database.async_url = sync_url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    elif sync_url.startswith("sqlite://"):
+        settings.database.async_url = sync_url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    else:
+        settings.database.async_url = sync_url
+
 # Keycloak Admin API URL'lerini issuer_uri'den otomatik olarak türet
 if settings.keycloak.issuer_uri:
     try:
@@ -109,6 +192,7 @@ else:
 print("-" * 50)
 print("Ticket Service - Konfigürasyon Yüklendi")
 print(f"  Veritabanı URL'si Yüklendi: {'Evet' if settings.database.url else 'Hayır'}")
+print(f"  Veritabanı Havuzu: pool_size={settings.database.pool_size}, max_overflow={settings.database.max_overflow}, pool_timeout={settings.database.pool_timeout}s")
 print(f"  Keycloak Issuer: {settings.keycloak.issuer_uri}")
 # --- DEĞİŞİKLİK BURADA ---
 # Yeni eklenen ayarı loglara yazdırıyoruz.
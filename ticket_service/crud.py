@@ -1,13 +1,20 @@
 # ticket_service/crud.py
-from sqlalchemy.orm import Session, joinedload
-from typing import List, Optional
+from sqlalchemy import Integer, Row, delete, func, insert, literal, select, tuple_, union_all, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, selectinload
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+from datetime import datetime
 import uuid
 
 # Kendi servisimize ait SQLAlchemy ve Pydantic modellerini import ediyoruz
 from . import db_models
 from . import models
+from .pagination import encode_cursor, decode_cursor
+from . import search
 
-def create_ticket(db: Session, ticket: models.TicketCreate, creator_id: uuid.UUID, tenant_id: uuid.UUID) -> db_models.Ticket: # tenant_id parametresi eklendi
+async def create_ticket(db: AsyncSession, ticket: models.TicketCreate, creator_id: uuid.UUID, tenant_id: uuid.UUID) -> db_models.Ticket: # tenant_id parametresi eklendi
     db_ticket = db_models.Ticket(
         title=ticket.title,
         description=ticket.description,
@@ -15,85 +22,503 @@ def create_ticket(db: Session, ticket: models.TicketCreate, creator_id: uuid.UUI
         tenant_id=tenant_id  # Yeni eklenen tenant_id alanı
     )
     db.add(db_ticket)
-    db.commit()
-    db.refresh(db_ticket)
+    await db.commit()
+    await db.refresh(db_ticket)
     return db_ticket
 
-def get_ticket(db: Session, ticket_id: uuid.UUID) -> db_models.Ticket | None:
-    return db.query(db_models.Ticket).filter(db_models.Ticket.id == ticket_id).first()
+async def get_ticket(db: AsyncSession, ticket_id: uuid.UUID) -> db_models.Ticket | None:
+    result = await db.execute(select(db_models.Ticket).filter(db_models.Ticket.id == ticket_id))
+    return result.scalars().first()
 
-def get_tickets(db: Session, skip: int = 0, limit: int = 100) -> List[db_models.Ticket]:
-    return db.query(db_models.Ticket).offset(skip).limit(limit).all()
+async def get_tickets(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[db_models.Ticket]:
+    result = await db.execute(select(db_models.Ticket).offset(skip).limit(limit))
+    return list(result.scalars().all())
 
-def update_ticket(db: Session, ticket_id: uuid.UUID, ticket_update: models.TicketUpdate) -> db_models.Ticket | None:
-    db_ticket = get_ticket(db, ticket_id)
-    if db_ticket is None:
-        return None
-    update_data = ticket_update.dict(exclude_unset=True)
+def _apply_ticket_list_filters(query, creator_id: Optional[uuid.UUID], cursor: Optional[str]):
+    # Bilet listesinin ortak filtreleri: isteğe bağlı oluşturan filtresi ve (created_at, id) keyset koşulu.
+    if creator_id is not None:
+        query = query.filter(db_models.Ticket.creator_id == creator_id)
+
+    if cursor:
+        last_created_at, last_id = decode_cursor(cursor, datetime.fromisoformat, uuid.UUID)
+        query = query.filter(
+            tuple_(db_models.Ticket.created_at, db_models.Ticket.id) < tuple_(last_created_at, last_id)
+        )
+    return query
+
+def _ticket_list_next_cursor(rows: list, limit: int) -> Tuple[list, Optional[str]]:
+    # Bir fazla satır çekerek sonraki sayfanın olup olmadığını anlıyoruz.
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_row = rows[-1]
+        next_cursor = encode_cursor([last_row.created_at.isoformat(), str(last_row.id)])
+    return rows, next_cursor
+
+async def get_tickets_page(
+    db: AsyncSession,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    creator_id: Optional[uuid.UUID] = None,
+) -> Tuple[List[db_models.Ticket], Optional[str]]:
+    """
+    Biletleri (created_at, id) üzerinden keyset sayfalama ile, en yeniden eskiye listeler.
+    OFFSET kullanılmadığı için N. sayfanın maliyeti ilk sayfa ile aynıdır.
+    Bir sonraki sayfa için cursor döndürür; son sayfada None döner.
+    Cursor geçersizse ValueError fırlatır.
+    """
+    query = _apply_ticket_list_filters(select(db_models.Ticket), creator_id, cursor)
+    result = await db.execute(
+        query.order_by(db_models.Ticket.created_at.desc(), db_models.Ticket.id.desc())
+        .limit(limit + 1)
+    )
+    return _ticket_list_next_cursor(list(result.scalars().all()), limit)
+
+TICKET_SUMMARY_COLUMNS = ("id", "title", "status", "created_at", "creator_id", "tenant_id")
+TICKET_COUNT_FIELDS = ("comment_count", "attachment_count")
+
+async def get_ticket_summaries_page(
+    db: AsyncSession,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    creator_id: Optional[uuid.UUID] = None,
+    fields: Optional[Sequence[str]] = None,
+) -> Tuple[List[Row], Optional[str]]:
+    """
+    Liste görünümü için biletlerin özetini get_tickets_page ile aynı sıralama ve cursor ile döndürür.
+    ORM nesnesi yerine yalnızca listede gereken kolonlar seçilir (description yüklenmez);
+    yorum ve ek sayıları, sadece bu sayfadaki biletlerle sınırlı tek bir gruplanmış alt sorgudan
+    aynı sorguda gelir.
+    `fields` verilirse yalnızca o kolonlar seçilir (cursor için id ve created_at her zaman seçilir)
+    ve sayılar istenmediyse sayım alt sorgusu hiç eklenmez.
+    Cursor geçersizse ValueError fırlatır.
+    """
+    requested = set(fields) if fields is not None else set(TICKET_SUMMARY_COLUMNS + TICKET_COUNT_FIELDS)
+    column_names = [name for name in TICKET_SUMMARY_COLUMNS if name in requested or name in ("id", "created_at")]
+    page_query = _apply_ticket_list_filters(
+        select(*(getattr(db_models.Ticket, name) for name in column_names)),
+        creator_id,
+        cursor,
+    )
+    page = (
+        page_query.order_by(db_models.Ticket.created_at.desc(), db_models.Ticket.id.desc())
+        .limit(limit + 1)
+        .subquery("ticket_page")
+    )
+    if not requested.intersection(TICKET_COUNT_FIELDS):
+        result = await db.execute(select(page).order_by(page.c.created_at.desc(), page.c.id.desc()))
+        return _ticket_list_next_cursor(list(result.all()), limit)
+    page_ids = select(page.c.id)
+
+    children = union_all(
+        select(
+            db_models.Comment.ticket_id.label("ticket_id"),
+            literal(1, Integer).label("is_comment"),
+            literal(0, Integer).label("is_attachment"),
+        ).where(db_models.Comment.ticket_id.in_(page_ids)),
+        select(
+            db_models.Attachment.ticket_id.label("ticket_id"),
+            literal(0, Integer).label("is_comment"),
+            literal(1, Integer).label("is_attachment"),
+        ).where(db_models.Attachment.ticket_id.in_(page_ids)),
+    ).subquery("ticket_children")
+    counts = (
+        select(
+            children.c.ticket_id,
+            func.sum(children.c.is_comment).label("comment_count"),
+            func.sum(children.c.is_attachment).label("attachment_count"),
+        )
+        .group_by(children.c.ticket_id)
+        .subquery("ticket_child_counts")
+    )
+
+    result = await db.execute(
+        select(
+            page,
+            func.coalesce(counts.c.comment_count, 0).label("comment_count"),
+            func.coalesce(counts.c.attachment_count, 0).label("attachment_count"),
+        )
+        .outerjoin(counts, counts.c.ticket_id == page.c.id)
+        .order_by(page.c.created_at.desc(), page.c.id.desc())
+    )
+    return _ticket_list_next_cursor(list(result.all()), limit)
+
+async def get_tickets_list_version(db: AsyncSession, creator_id: Optional[uuid.UUID] = None) -> int:
+    """
+    Bilet listesinin ETag'i için kapsamın sürüm sayacı (creator_id verilmezse tüm biletler). Sayaç
+    tetikleyicilerle tutulur; okuma, tablo boyutundan bağımsız tek bir birincil anahtar sorgusudur.
+    """
+    scope_id = creator_id if creator_id is not None else db_models.ALL_TICKETS_SCOPE
+    result = await db.execute(
+        select(db_models.TicketListVersion.version).where(db_models.TicketListVersion.creator_id == scope_id)
+    )
+    return result.scalar_one_or_none() or 0
+
+async def get_ticket_version(db: AsyncSession, ticket_id: uuid.UUID) -> Optional[Row]:
+    """Biletin ETag'i ve yetki kontrolü için yalnızca (updated_at, creator_id) döndürür; bilet yoksa None."""
+    result = await db.execute(
+        select(db_models.Ticket.updated_at, db_models.Ticket.creator_id).filter(db_models.Ticket.id == ticket_id)
+    )
+    return result.first()
+
+def _ticket_filter_conditions(
+    tenant_id: Optional[uuid.UUID] = None,
+    status: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    creator_id: Optional[uuid.UUID] = None,
+) -> list:
+    # Dışa aktarım ve toplu işlemlerin ortak filtreleri; `created_from` dahil, `created_to` hariç.
+    conditions = []
+    if tenant_id is not None:
+        conditions.append(db_models.Ticket.tenant_id == tenant_id)
+    if status is not None:
+        conditions.append(db_models.Ticket.status == status)
+    if created_from is not None:
+        conditions.append(db_models.Ticket.created_at >= created_from)
+    if created_to is not None:
+        conditions.append(db_models.Ticket.created_at < created_to)
+    if creator_id is not None:
+        conditions.append(db_models.Ticket.creator_id == creator_id)
+    return conditions
+
+TICKET_EXPORT_COLUMNS = ("id", "title", "description", "status", "created_at", "creator_id", "tenant_id")
+
+async def stream_tickets_for_export(
+    db: AsyncSession,
+    tenant_id: Optional[uuid.UUID] = None,
+    status: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    creator_id: Optional[uuid.UUID] = None,
+    batch_size: int = 1000,
+) -> AsyncIterator[List[Row]]:
+    """
+    Filtrelere uyan biletleri (created_at, id) sırasıyla, `batch_size` satırlık parçalar hâlinde üretir.
+    Sorgu server-side cursor ile (yield_per) akıtılır; sonuç kümesi hiçbir zaman tamamen belleğe alınmaz.
+    `created_from` dahil, `created_to` hariçtir.
+    """
+    query = select(*(getattr(db_models.Ticket, name) for name in TICKET_EXPORT_COLUMNS)).filter(
+        *_ticket_filter_conditions(tenant_id, status, created_from, created_to, creator_id)
+    )
+
+    result = await db.stream(
+        query.order_by(db_models.Ticket.created_at.asc(), db_models.Ticket.id.asc())
+        .execution_options(yield_per=batch_size)
+    )
+    async for partition in result.partitions():
+        yield partition
+
+async def search_tickets(
+    db: AsyncSession,
+    query_text: str,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    creator_id: Optional[uuid.UUID] = None,
+) -> Tuple[List[db_models.Ticket], Optional[str]]:
+    """
+    Bilet başlığı, açıklaması ve yorum içeriklerinde tam metin araması yapar.
+    Sonuçlar alaka puanına göre sıralanır ve (puan, id) üzerinden keyset sayfalanır.
+    PostgreSQL'de GIN indeksli tsvector, SQLite'ta FTS5 kullanılır.
+    Cursor geçersizse ValueError fırlatır.
+    """
+    if db.bind.dialect.name == "sqlite":
+        match_expression = search.sqlite_match_expression(query_text)
+        if not match_expression:
+            return [], None
+        rank_expr, match = search.sqlite_rank_and_match(match_expression)
+        query = (
+            select(db_models.Ticket, rank_expr.label("rank"))
+            .join(search.tickets_fts, search.tickets_fts.c.ticket_id == db_models.Ticket.id)
+            .filter(match)
+        )
+    else:
+        rank_expr, match = search.pg_rank_and_match(query_text)
+        query = select(db_models.Ticket, rank_expr.label("rank")).filter(match)
+
+    if creator_id is not None:
+        query = query.filter(db_models.Ticket.creator_id == creator_id)
+
+    if cursor:
+        last_rank, last_id = decode_cursor(cursor, float, uuid.UUID)
+        query = query.filter(tuple_(rank_expr, db_models.Ticket.id) < tuple_(last_rank, last_id))
+
+    result = await db.execute(query.order_by(rank_expr.desc(), db_models.Ticket.id.desc()).limit(limit + 1))
+    rows = list(result.all())
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_ticket, last_rank = rows[-1]
+        next_cursor = encode_cursor([last_rank, str(last_ticket.id)])
+    return [ticket for ticket, _ in rows], next_cursor
+
+async def update_ticket(db: AsyncSession, ticket_id: uuid.UUID, ticket_update: models.TicketUpdate) -> db_models.Ticket | None:
+    """
+    Bileti tek bir `UPDATE ... RETURNING` ile günceller (önce SELECT, sonra REFRESH yapılmaz).
+    Bilet yoksa None döner.
+    """
+    update_data = ticket_update.model_dump(exclude_unset=True)
     if not update_data:
-        return db_ticket
-    for key, value in update_data.items():
-        setattr(db_ticket, key, value)
-    db.add(db_ticket)
-    db.commit()
-    db.refresh(db_ticket)
+        return await get_ticket(db, ticket_id)
+    result = await db.execute(
+        update(db_models.Ticket)
+        .where(db_models.Ticket.id == ticket_id)
+        .values(**update_data)
+        .returning(db_models.Ticket)
+    )
+    db_ticket = result.scalars().first()
+    if db_ticket is not None and {"title", "description"}.intersection(update_data):
+        # ORM olayları çalışmadığı için SQLite FTS dizini burada güncellenir (PostgreSQL'de tetikleyici var).
+        connection = await db.connection()
+        await connection.run_sync(search.reindex_sqlite_tickets, [ticket_id])
+    await db.commit()
     return db_ticket
 
-def delete_ticket(db: Session, ticket_id: uuid.UUID) -> db_models.Ticket | None:
-    db_ticket = get_ticket(db, ticket_id)
-    if db_ticket is None:
-        return None
-    db.delete(db_ticket)
-    db.commit()
-    return db_ticket
+async def delete_ticket(db: AsyncSession, ticket_id: uuid.UUID) -> Optional[uuid.UUID]:
+    """
+    Bileti tek bir `DELETE ... RETURNING` ile siler; yorum ve ekler veritabanında ON DELETE CASCADE ile silinir.
+    Bilet bulunup silindiyse oluşturanın ID'sini (liste önbelleğinin geçersiz kılınması için), yoksa None döner.
+    """
+    deleted_rows = await _delete_tickets_returning(db, [ticket_id], db_models.Ticket.creator_id)
+    return deleted_rows[0].creator_id if deleted_rows else None
+
+TICKET_DETAIL_RELATIONSHIPS = ("comments", "attachments")
 
-def get_ticket_with_details(db: Session, ticket_id: uuid.UUID) -> Optional[db_models.Ticket]:
+async def find_ticket_ids(
+    db: AsyncSession,
+    limit: int,
+    tenant_id: Optional[uuid.UUID] = None,
+    status: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    creator_id: Optional[uuid.UUID] = None,
+) -> List[uuid.UUID]:
+    """Filtrelere uyan en fazla `limit` biletin ID'sini döndürür (toplu işlemler için)."""
+    result = await db.execute(
+        select(db_models.Ticket.id)
+        .filter(*_ticket_filter_conditions(tenant_id, status, created_from, created_to, creator_id))
+        .order_by(db_models.Ticket.created_at.asc(), db_models.Ticket.id.asc())
+        .limit(limit)
+    )
+    return list(result.scalars().all())
+
+async def bulk_update_tickets(db: AsyncSession, ticket_ids: Sequence[uuid.UUID], changes: Dict[str, Any]) -> List[uuid.UUID]:
+    """
+    Verilen biletleri tek bir `UPDATE ... RETURNING id` ile günceller ve güncellenen ID'leri döndürür.
+    Var olmayan ID'ler sonuçta yer almaz.
+    """
+    if not ticket_ids or not changes:
+        return []
+    result = await db.execute(
+        update(db_models.Ticket)
+        .where(db_models.Ticket.id.in_(ticket_ids))
+        .values(**changes)
+        .returning(db_models.Ticket.id)
+        .execution_options(synchronize_session=False)
+    )
+    updated_ids = list(result.scalars().all())
+    if {"title", "description"}.intersection(changes):
+        # ORM olayları çalışmadığı için SQLite FTS dizini burada güncellenir (PostgreSQL'de tetikleyici var).
+        connection = await db.connection()
+        await connection.run_sync(search.reindex_sqlite_tickets, updated_ids)
+    await db.commit()
+    return updated_ids
+
+async def bulk_delete_tickets(db: AsyncSession, ticket_ids: Sequence[uuid.UUID]) -> List[uuid.UUID]:
+    """
+    Verilen biletleri tek bir `DELETE ... RETURNING id` ile siler (yorum ve ekler cascade ile gider)
+    ve silinen bilet ID'lerini döndürür. Var olmayan ID'ler sonuçta yer almaz.
+    """
+    return [row.id for row in await _delete_tickets_returning(db, ticket_ids)]
+
+async def _delete_tickets_returning(db: AsyncSession, ticket_ids: Sequence[uuid.UUID], *extra_columns) -> List[Row]:
+    if not ticket_ids:
+        return []
+    # Yorum ve ekler ON DELETE CASCADE ile veritabanında silinir.
+    result = await db.execute(
+        delete(db_models.Ticket)
+        .where(db_models.Ticket.id.in_(ticket_ids))
+        .returning(db_models.Ticket.id, *extra_columns)
+        .execution_options(synchronize_session=False)
+    )
+    deleted_rows = list(result.all())
+    connection = await db.connection()
+    await connection.run_sync(search.unindex_sqlite_tickets, [row.id for row in deleted_rows])
+    await db.commit()
+    return deleted_rows
+
+async def get_ticket_with_details(
+    db: AsyncSession,
+    ticket_id: uuid.UUID,
+    fields: Optional[Sequence[str]] = None,
+) -> Optional[db_models.Ticket]:
     """
     Verilen ID'ye sahip bir bileti, ilişkili olduğu yorumlar ve eklerle
     birlikte veritabanından çeker.
+    Yorumlar ve ekler selectinload ile ayrı sorgularda yüklenir; tek sorguda iki joinedload
+    yorum x ek sayısı kadar satır (kartezyen çarpım) döndürüyordu.
+    `fields` verilirse yalnızca istenen kolonlar (load_only) ve ilişkiler yüklenir; diğer
+    alanlara erişilmemelidir.
+    Çok uzun yazışmalar için get_ticket_comments_page / get_ticket_attachments_page kullanılmalı.
     """
-    return (
-        db.query(db_models.Ticket)
-        .options(
-            joinedload(db_models.Ticket.comments),
-            joinedload(db_models.Ticket.attachments)
-        )
+    options = []
+    for relationship_name in TICKET_DETAIL_RELATIONSHIPS:
+        if fields is None or relationship_name in fields:
+            options.append(selectinload(getattr(db_models.Ticket, relationship_name)))
+    if fields is not None:
+        column_names = [name for name in TICKET_SUMMARY_COLUMNS + ("description",) if name in fields]
+        options.append(load_only(*(getattr(db_models.Ticket, name) for name in column_names)))
+
+    result = await db.execute(
+        select(db_models.Ticket)
+        .options(*options)
         .filter(db_models.Ticket.id == ticket_id)
-        .first()
     )
+    return result.scalars().first()
 
-def create_comment(db: Session, comment: models.CommentCreate, ticket_id: uuid.UUID, author_id: uuid.UUID) -> db_models.Comment:
+async def _get_ticket_children_page(
+    db: AsyncSession,
+    model,
+    timestamp_column,
+    ticket_id: uuid.UUID,
+    limit: int,
+    cursor: Optional[str],
+) -> Tuple[List[Any], Optional[str]]:
+    # Bir biletin yorum/eklerini (zaman, id) üzerinden eskiden yeniye keyset sayfalar.
+    query = select(model).filter(model.ticket_id == ticket_id)
+    if cursor:
+        last_timestamp, last_id = decode_cursor(cursor, datetime.fromisoformat, uuid.UUID)
+        query = query.filter(tuple_(timestamp_column, model.id) > tuple_(last_timestamp, last_id))
+
+    result = await db.execute(query.order_by(timestamp_column.asc(), model.id.asc()).limit(limit + 1))
+    rows = list(result.scalars().all())
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_row = rows[-1]
+        next_cursor = encode_cursor([getattr(last_row, timestamp_column.key).isoformat(), str(last_row.id)])
+    return rows, next_cursor
+
+async def get_ticket_comments_page(
+    db: AsyncSession,
+    ticket_id: uuid.UUID,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+) -> Tuple[List[db_models.Comment], Optional[str]]:
+    """
+    Bir biletin yorumlarını (created_at, id) üzerinden keyset sayfalama ile, eskiden yeniye listeler.
+    Cursor geçersizse ValueError fırlatır.
+    """
+    return await _get_ticket_children_page(
+        db, db_models.Comment, db_models.Comment.created_at, ticket_id, limit, cursor
+    )
+
+async def get_ticket_attachments_page(
+    db: AsyncSession,
+    ticket_id: uuid.UUID,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+) -> Tuple[List[db_models.Attachment], Optional[str]]:
+    """
+    Bir biletin eklerini (uploaded_at, id) üzerinden keyset sayfalama ile, eskiden yeniye listeler.
+    Cursor geçersizse ValueError fırlatır.
+    """
+    return await _get_ticket_children_page(
+        db, db_models.Attachment, db_models.Attachment.uploaded_at, ticket_id, limit, cursor
+    )
+
+async def create_comment(
+    db: AsyncSession, comment: models.CommentCreate, ticket_id: uuid.UUID, author_id: uuid.UUID
+) -> Optional[Tuple[db_models.Comment, uuid.UUID]]:
     """
     Belirli bir bilete yeni bir yorum ekler.
+    Bilet varlık kontrolü ve ekleme tek bir `INSERT ... SELECT ... RETURNING` ile yapılır; RETURNING
+    biletin oluşturanını da (liste önbelleğinin geçersiz kılınması için) döndürür.
+    (yorum, biletin creator_id'si) döner; bilet yoksa hiçbir satır eklenmez ve None döner.
     """
-    db_comment = db_models.Comment(
-        content=comment.content,
-        ticket_id=ticket_id,
-        author_id=author_id
+    ticket_creator_id = select(db_models.Ticket.creator_id).where(db_models.Ticket.id == ticket_id).scalar_subquery()
+    result = await db.execute(
+        insert(db_models.Comment)
+        .from_select(
+            ["content", "ticket_id", "author_id"],
+            select(
+                literal(comment.content, db_models.Comment.content.type),
+                db_models.Ticket.id,
+                literal(author_id, db_models.Comment.author_id.type),
+            ).where(db_models.Ticket.id == ticket_id),
+        )
+        .returning(db_models.Comment, ticket_creator_id)
     )
-    db.add(db_comment)
-    db.commit()
-    db.refresh(db_comment)
-    return db_comment
+    row = result.first()
+    if row is not None:
+        connection = await db.connection()
+        await connection.run_sync(search.reindex_sqlite_tickets, [ticket_id])
+    await db.commit()
+    return (row[0], row[1]) if row is not None else None
 
-def create_attachment(db: Session, file_name: str, file_path: str, file_type: str, ticket_id: uuid.UUID, uploader_id: uuid.UUID) -> db_models.Attachment:
+async def create_attachment(
+    db: AsyncSession,
+    file_name: str,
+    file_type: Optional[str],
+    ticket_id: uuid.UUID,
+    uploader_id: uuid.UUID,
+    size: int,
+    sha256: str,
+    storage_key: str,
+) -> db_models.Attachment:
     """
-    Bir bilet için yeni bir dosya eki kaydı oluşturur.
+    Bir bilet için yeni bir dosya eki kaydını oluşturur. İçeriğin blob kaydı yoksa aynı transaction'da
+    eklenir; blob'un referans sayısını ekler tablosundaki tetikleyici artırır.
+
+    Blob zaten varsa `DO NOTHING` yerine (değeri değiştirmeyen) `DO UPDATE` kullanılır: satır kilitlenir ve
+    referansı sıfırlanmış blob'u aynı anda silmeye çalışan temizlik bu transaction bitene kadar bekler,
+    ardından ref_count artık sıfır olmadığı için satırı silmez (aksi halde ek INSERT'i FK hatası alırdı).
     """
-    db_attachment = db_models.Attachment(
-        file_name=file_name,
-        file_path=file_path,
-        file_type=file_type,
-        ticket_id=ticket_id,
-        uploader_id=uploader_id
+    blob_insert = pg_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+    blob_stmt = blob_insert(db_models.AttachmentBlob).values(sha256=sha256, size=size, storage_key=storage_key)
+    await db.execute(
+        blob_stmt.on_conflict_do_update(
+            index_elements=[db_models.AttachmentBlob.sha256],
+            set_={"size": blob_stmt.excluded.size},
+        )
+    )
+    result = await db.execute(
+        insert(db_models.Attachment)
+        .values(
+            file_name=file_name,
+            file_type=file_type,
+            size=size,
+            sha256=sha256,
+            storage_key=storage_key,
+            ticket_id=ticket_id,
+            uploader_id=uploader_id,
+        )
+        .returning(db_models.Attachment)
     )
-    db.add(db_attachment)
-    db.commit()
-    db.refresh(db_attachment)
+    db_attachment = result.scalars().one()
+    await db.commit()
     return db_attachment
 
-def get_attachment(db: Session, attachment_id: uuid.UUID) -> Optional[db_models.Attachment]:
+async def delete_unreferenced_attachment_blobs(db: AsyncSession, created_before: datetime) -> List[str]:
+    """
+    Referans sayısı sıfıra inmiş ve `created_before`'dan önce oluşturulmuş blob kayıtlarını siler, dosyaları
+    silinmek üzere storage_key'lerini döndürür. Yeni blob'lar, dosyası henüz yerine konmakta olan
+    yüklemelerle yarışmamak için bekleme süresi dolana kadar tutulur.
+    """
+    result = await db.execute(
+        delete(db_models.AttachmentBlob)
+        .where(db_models.AttachmentBlob.ref_count <= 0, db_models.AttachmentBlob.created_at < created_before)
+        .returning(db_models.AttachmentBlob.storage_key)
+    )
+    storage_keys = list(result.scalars().all())
+    await db.commit()
+    return storage_keys
+
+async def get_attachment(db: AsyncSession, attachment_id: uuid.UUID) -> Optional[db_models.Attachment]:
     """
     Verilen ID'ye sahip tek bir attachment kaydını getirir.
     """
-    return db.query(db_models.Attachment).filter(db_models.Attachment.id == attachment_id).first()
\ No newline at end of file
+    result = await db.execute(select(db_models.Attachment).filter(db_models.Attachment.id == attachment_id))
+    return result.scalars().first()
\ No newline at end of file
@@ -4,14 +4,16 @@ from sqlalchemy import (
     Column,
     String,
     Boolean,
+    BigInteger,
+    Integer,
     DateTime,
     Enum as SQLAlchemyEnum,
     ForeignKey,
     Index,
     Text,
 )
-from sqlalchemy.dialects.postgresql import UUID as SQLAlchemyUUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import UUID as SQLAlchemyUUID, TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 from .database import Base
 
@@ -19,6 +21,10 @@ class Ticket(Base):
     __tablename__ = "tickets"
     __table_args__ = (
         Index('ix_tickets_tenant_id', 'tenant_id'),
+        # Keyset sayfalama (ORDER BY created_at DESC, id DESC) için bileşik indeksler
+        Index('ix_tickets_created_at_id', 'created_at', 'id'),
+        Index('ix_tickets_creator_id_created_at_id', 'creator_id', 'created_at', 'id'),
+        Index('ix_tickets_search_vector', 'search_vector', postgresql_using='gin'),
         {'schema': 'tickets_schema'}
     )
     
@@ -27,43 +33,91 @@ class Ticket(Base):
     description = Column(String, nullable=False)
     status = Column(String, index=True, nullable=False, default='Açık')
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Biletin sürümü (ETag): PostgreSQL'de yorum/ek değişikliklerinde tetikleyicilerle de ilerletilir.
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     
     # DÜZELTME: ForeignKey('users_schema.users.id') kaldırıldı.
     creator_id = Column(SQLAlchemyUUID(as_uuid=True), nullable=False)
     
     tenant_id = Column(SQLAlchemyUUID(as_uuid=True), nullable=False, index=True)
 
-    comments = relationship("Comment", back_populates="ticket", cascade="all, delete-orphan")
-    attachments = relationship("Attachment", back_populates="ticket", cascade="all, delete-orphan")
+    # Başlık, açıklama ve yorumlardan oluşan arama dokümanı. Veritabanı tetikleyicileri
+    # tarafından güncel tutulur; listelerde gereksiz yere yüklenmemesi için deferred.
+    search_vector = deferred(Column(TSVECTOR().with_variant(Text(), "sqlite"), nullable=True))
+
+    # Alt kayıtlar veritabanında ON DELETE CASCADE ile silinir; ORM silmeden önce onları yüklemez.
+    comments = relationship("Comment", back_populates="ticket", cascade="all, delete-orphan", passive_deletes=True)
+    attachments = relationship("Attachment", back_populates="ticket", cascade="all, delete-orphan", passive_deletes=True)
 
 
 class Comment(Base):
     __tablename__ = "comments"
-    __table_args__ = {'schema': 'tickets_schema'}
+    __table_args__ = (
+        # Bilet yorumlarının keyset sayfalaması (ticket_id, created_at, id) için
+        Index('ix_comments_ticket_id_created_at_id', 'ticket_id', 'created_at', 'id'),
+        {'schema': 'tickets_schema'}
+    )
 
     id = Column(SQLAlchemyUUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     content = Column(Text, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
-    ticket_id = Column(SQLAlchemyUUID(as_uuid=True), ForeignKey('tickets_schema.tickets.id'), nullable=False)
+    ticket_id = Column(SQLAlchemyUUID(as_uuid=True), ForeignKey('tickets_schema.tickets.id', ondelete='CASCADE'), nullable=False)
     
     # DÜZELTME: ForeignKey('users_schema.users.id') kaldırıldı.
     author_id = Column(SQLAlchemyUUID(as_uuid=True), nullable=False)
     
     ticket = relationship("Ticket", back_populates="comments")
 
+class TicketListVersion(Base):
+    """
+    Bilet listesi ETag'lerinin sürüm sayacı. Kapsamdaki (`creator_id`; ALL_TICKETS_SCOPE = tüm biletler,
+    personelin listesi) bir bilet eklendiğinde, değiştiğinde (yorum/ek dahil) veya silindiğinde
+    tetikleyicilerle artırılır (bkz. etag). Satırı olmayan kapsamın sürümü 0'dır.
+    """
+    __tablename__ = "ticket_list_versions"
+    __table_args__ = {'schema': 'tickets_schema'}
+
+    creator_id = Column(SQLAlchemyUUID(as_uuid=True), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0, server_default="0")
+
+# Personelin gördüğü "tüm biletler" kapsamının TicketListVersion anahtarı
+ALL_TICKETS_SCOPE = uuid.UUID(int=0)
+
+class AttachmentBlob(Base):
+    """
+    İçerik adresli (SHA-256) depodaki bir dosya. Aynı içerik kaç ekte kullanılırsa kullanılsın diskte
+    bir kez durur; `ref_count` ekler tablosundaki tetikleyicilerle güncel tutulur (bkz. attachment_store).
+    """
+    __tablename__ = "attachment_blobs"
+    __table_args__ = {'schema': 'tickets_schema'}
+
+    sha256 = Column(String(64), primary_key=True)
+    size = Column(BigInteger, nullable=False)
+    storage_key = Column(String(255), nullable=False, unique=True, comment="Depo köküne göre dosya yolu (sha256/ab/cd/<sha256>)")
+    ref_count = Column(Integer, nullable=False, default=0, server_default="0", index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
 class Attachment(Base):
     __tablename__ = "attachments"
-    __table_args__ = {'schema': 'tickets_schema'}
+    __table_args__ = (
+        # Bilet eklerinin keyset sayfalaması (ticket_id, uploaded_at, id) için
+        Index('ix_attachments_ticket_id_uploaded_at_id', 'ticket_id', 'uploaded_at', 'id'),
+        {'schema': 'tickets_schema'}
+    )
     
     id = Column(SQLAlchemyUUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     file_name = Column(String(255), nullable=False)
-    file_path = Column(String(1024), nullable=False, unique=True)
+    # Yalnızca içerik adresli depodan önceki (eski) ekler için; yeni ekler storage_key kullanır.
+    file_path = Column(String(1024), nullable=True)
     file_type = Column(String(100), nullable=True)
+    size = Column(BigInteger, nullable=True)
+    sha256 = Column(String(64), ForeignKey('tickets_schema.attachment_blobs.sha256'), nullable=True, index=True)
+    storage_key = Column(String(255), nullable=True)
     uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
     
-    ticket_id = Column(SQLAlchemyUUID(as_uuid=True), ForeignKey('tickets_schema.tickets.id'), nullable=False)
+    ticket_id = Column(SQLAlchemyUUID(as_uuid=True), ForeignKey('tickets_schema.tickets.id', ondelete='CASCADE'), nullable=False)
     
     # DÜZELTME: ForeignKey('users_schema.users.id') kaldırıldı.
     uploader_id = Column(SQLAlchemyUUID(as_uuid=True), nullable=False)
@@ -0,0 +1,126 @@
+# ticket_service/etag.py
+"""
+Koşullu GET (ETag / If-None-Match) yardımcıları.
+
+ETag'ler tam yanıt üretilmeden, yalnızca sürüm bilgisi okunarak hesaplanır:
+
+- Bilet detayı: biletin `updated_at`'i. PostgreSQL'de tetikleyicilerle yorum/ek değişikliklerinde de
+  ilerletilir (clock_timestamp(); transaction başlangıcı değil).
+- Bilet listesi: kapsamın `ticket_list_versions` sayacı. Biletlerdeki her değişiklik, satır başına
+  ertelenmiş (commit anında çalışan) bir tetikleyiciyle "tüm biletler" ve biletin sahibinin sayacını
+  transaction başına bir kez artırır. Sayaç satırı commit sırasında kilitlendiği için değerler commit
+  sırasıyla artar; max(updated_at) watermark'ının aksine uzun süren bir transaction'ın değişikliği
+  gözden kaçmaz ve sayım için tablo taranmaz.
+
+SQLite'ta (çevrimdışı testler) aynı tetikleyicilerin satır düzeyindeki karşılıkları aşağıda oluşturulur.
+
+ETag'ler güçlü (strong) üretilir; If-None-Match için RFC 9110 §13.1.2 gereği zayıf karşılaştırma yapılır.
+"""
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+
+from fastapi import Response, status
+from sqlalchemy import event, text
+
+from . import db_models
+from .database import Base
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    """Verilen sürüm ve gösterim parametrelerinden güçlü (strong) bir ETag üretir."""
+    raw = json.dumps(parts, default=str, separators=(",", ":"), sort_keys=True)
+    return '"' + hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def is_not_modified(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match başlığı verilen ETag ile eşleşiyor mu (RFC 9110: zayıf karşılaştırma)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = {candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")}
+    return etag in candidates
+
+
+def is_not_modified_since(if_modified_since: Optional[str], last_modified: Optional[datetime]) -> bool:
+    """If-Modified-Since başlığı kaynağın son değişme zamanından yeni mi (saniye hassasiyetinde)."""
+    if not if_modified_since or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0) <= since
+
+
+def http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def not_modified_response(etag: Optional[str], cache_control: str = CACHE_CONTROL, last_modified: Optional[str] = None) -> Response:
+    headers = {"Cache-Control": cache_control}
+    if etag:
+        headers["ETag"] = etag
+    if last_modified:
+        headers["Last-Modified"] = last_modified
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+
+def set_etag_headers(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_sqlite_touch_triggers(target, connection, **kw):
+    if connection.dialect.name != "sqlite":
+        return
+    tickets_table = db_models.Ticket.__table__
+    schema_prefix = f"{tickets_table.schema}." if tickets_table.schema else ""
+    now_expr = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+    for child_table, operation, row in (
+        ("comments", "INSERT", "NEW"),
+        ("comments", "UPDATE", "NEW"),
+        ("comments", "DELETE", "OLD"),
+        ("attachments", "INSERT", "NEW"),
+        ("attachments", "DELETE", "OLD"),
+    ):
+        connection.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {schema_prefix}{child_table}_touch_ticket_{operation.lower()} "
+            f"AFTER {operation} ON {child_table} BEGIN "
+            f"UPDATE tickets SET updated_at = {now_expr} WHERE id = {row}.ticket_id; END"
+        ))
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_sqlite_list_version_triggers(target, connection, **kw):
+    if connection.dialect.name != "sqlite":
+        return
+    tickets_table = db_models.Ticket.__table__
+    schema_prefix = f"{tickets_table.schema}." if tickets_table.schema else ""
+    # Sabit, bağlanan uuid.UUID ile aynı biçimde (SQLite'ta tire olmadan hex) yazılır.
+    all_tickets_scope = f"'{db_models.ALL_TICKETS_SCOPE.hex}'"
+    bump = "ON CONFLICT (creator_id) DO UPDATE SET version = version + 1;"
+    for operation, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+        statements = f"INSERT INTO ticket_list_versions (creator_id, version) VALUES ({all_tickets_scope}, 1), ({row}.creator_id, 1) {bump}"
+        if operation == "UPDATE":
+            # Bilet başka bir kullanıcıya taşındıysa eski sahibin listesi de değişmiştir.
+            statements += (
+                " INSERT INTO ticket_list_versions (creator_id, version) SELECT OLD.creator_id, 1"
+                f" WHERE OLD.creator_id <> NEW.creator_id {bump}"
+            )
+        connection.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {schema_prefix}tickets_bump_list_versions_{operation.lower()} "
+            f"AFTER {operation} ON tickets BEGIN {statements} END"
+        ))
@@ -0,0 +1,63 @@
+# ticket_service/export.py
+"""
+Bilet dışa aktarımı (NDJSON / CSV).
+
+Satırlar veritabanından server-side cursor ile parça parça (partition) okunur ve her parça
+tek bir metin bloğuna çevrilip hemen gönderilir; bellek kullanımı toplam satır sayısından
+bağımsızdır.
+"""
+import csv
+import io
+import json
+from typing import Any, AsyncIterator, Dict, Sequence
+
+from sqlalchemy import Row, text
+
+from . import crud
+from .database import AsyncSessionLocal
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+def _ndjson_chunk(rows: Sequence[Row]) -> str:
+    return "".join(
+        json.dumps(dict(row._mapping), default=str, ensure_ascii=False, separators=(",", ":")) + "\n"
+        for row in rows
+    )
+
+
+def _csv_chunk(rows: Sequence[Row], header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(crud.TICKET_EXPORT_COLUMNS)
+    writer.writerows(
+        ["" if value is None else (value.isoformat() if hasattr(value, "isoformat") else value) for value in row]
+        for row in rows
+    )
+    return buffer.getvalue()
+
+
+async def stream_ticket_export(export_format: str, filters: Dict[str, Any], batch_size: int) -> AsyncIterator[str]:
+    """
+    Filtrelere uyan biletleri istenen formatta parça parça üretir.
+    İstek dependency'sindeki oturum yanıt gönderilmeden kapandığı için dışa aktarım kendi
+    oturumunu açar ve akış bitene kadar açık tutar.
+    """
+    async with AsyncSessionLocal() as db:
+        if db.bind.dialect.name == "postgresql":
+            # Uzun süren dışa aktarımı genel statement_timeout kesmesin (yalnızca bu transaction için).
+            await db.execute(text("SET LOCAL statement_timeout = 0"))
+
+        if export_format == "csv":
+            yield _csv_chunk([], header=True)
+        row_count = 0
+        try:
+            async for rows in crud.stream_tickets_for_export(db, batch_size=batch_size, **filters):
+                row_count += len(rows)
+                yield _ndjson_chunk(rows) if export_format == "ndjson" else _csv_chunk(rows)
+        except Exception as e:
+            # Yanıt başlıkları gönderildiği için durum kodu değiştirilemez; bağlantı yarıda kesilir.
+            print(f"HATA (Export): Bilet dışa aktarımı {row_count} satırdan sonra kesildi: {e}")
+            raise
+        print(f"EXPORT: {row_count} bilet {export_format} olarak dışa aktarıldı.")
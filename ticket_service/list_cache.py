@@ -0,0 +1,202 @@
+# ticket_service/list_cache.py
+"""
+Bilet listesi (`GET /api/tickets/`) yanıt önbelleği.
+
+- Anahtar: (rol kapsamı, oluşturan filtresi, cursor, limit, fields). Personel (agent/admin) tüm
+  biletleri gördüğü için tek bir "staff" kapsamını paylaşır; diğer kullanıcılar kendi
+  "creator:<id>" kapsamındadır.
+- Geçersiz kılma kapsam "nesil" (generation) sayaçlarıyla yapılır: bir biletin yazılması, "staff"
+  ve biletin sahibinin kapsamının sayacını artırır; eski anahtarlar bir daha okunmaz ve TTL ile düşer.
+  Sayaç sorgudan ÖNCE okunduğu için, sorgu sırasında gelen bir yazma eski sonucu yeni nesle yazdıramaz.
+- Depolama takılabilir bir backend üzerindedir: süreç içi (InMemoryListCacheBackend) veya birden çok
+  pod arasında paylaşılan Redis (RedisListCacheBackend, `redis` paketi gerekir). Testlerde `configure()`
+  ile aynı arayüzü uygulayan yerel bir backend verilebilir.
+- Backend hataları isteği bozmaz; önbellek atlanır.
+"""
+import hashlib
+import json
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Protocol, Sequence, Tuple
+
+from .config import Settings
+
+_KEY_PREFIX = "ticket_service:tickets_list"
+_GLOBAL_SCOPE = "global"
+STAFF_SCOPE = "staff"
+
+
+class ListCacheBackend(Protocol):
+    """Bilet listesi önbelleğinin depolama arayüzü."""
+
+    async def get(self, key: str) -> Optional[str]: ...
+
+    async def set(self, key: str, value: str, ttl: float) -> None: ...
+
+    async def get_generations(self, names: Sequence[str]) -> List[int]: ...
+
+    async def bump_generations(self, names: Sequence[str]) -> None: ...
+
+    async def close(self) -> None: ...
+
+
+class InMemoryListCacheBackend:
+    """Süreç içi, boyutu sınırlı (LRU) backend. Yalnızca tek süreçli dağıtımlarda tutarlıdır."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_generations(self, names: Sequence[str]) -> List[int]:
+        return [self._generations.get(name, 0) for name in names]
+
+    async def bump_generations(self, names: Sequence[str]) -> None:
+        for name in names:
+            self._generations[name] = self._generations.get(name, 0) + 1
+
+    async def close(self) -> None:
+        self._entries.clear()
+
+
+class RedisListCacheBackend:
+    """Pod'lar arasında paylaşılan Redis backend'i (`redis` paketi gerekir)."""
+
+    def __init__(self, url: str):
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as e:
+            raise RuntimeError("LIST_CACHE_REDIS_URL ayarlı ancak 'redis' paketi kurulu değil.") from e
+        self._redis = redis_asyncio.from_url(url, decode_responses=True)
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self._redis.get(key)
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        await self._redis.set(key, value, px=max(1, int(ttl * 1000)))
+
+    async def get_generations(self, names: Sequence[str]) -> List[int]:
+        values = await self._redis.mget([f"{_KEY_PREFIX}:gen:{name}" for name in names])
+        return [int(value) if value is not None else 0 for value in values]
+
+    async def bump_generations(self, names: Sequence[str]) -> None:
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for name in names:
+                pipe.incr(f"{_KEY_PREFIX}:gen:{name}")
+            await pipe.execute()
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+class TicketListCache:
+    """Bilet listesi yanıtlarını (gövde + ETag) kapsam nesilleriyle birlikte saklar."""
+
+    def __init__(self, backend: ListCacheBackend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self._counters = {"hits": 0, "misses": 0, "invalidations": 0, "backend_errors": 0}
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._counters, "backend": type(self.backend).__name__, "ttl": self.ttl}
+
+    async def lookup(self, scope: str, params: Dict[str, Any]) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """
+        (anahtar, değer) döndürür. Değer None ise ıskalamadır ve sonuç aynı anahtarla `store` edilmelidir;
+        anahtar None ise önbellek kullanılamıyordur (kapalı veya backend hatası).
+        """
+        if self.ttl <= 0:
+            return None, None
+        try:
+            global_generation, scope_generation = await self.backend.get_generations([_GLOBAL_SCOPE, scope])
+            params_hash = hashlib.sha256(json.dumps(params, default=str, sort_keys=True).encode("utf-8")).hexdigest()[:32]
+            key = f"{_KEY_PREFIX}:{global_generation}:{scope}:{scope_generation}:{params_hash}"
+            raw_value = await self.backend.get(key)
+        except Exception as e:
+            self._counters["backend_errors"] += 1
+            print(f"UYARI (ListCache): Önbellek okunamadı, sorgu doğrudan çalıştırılıyor: {e}")
+            return None, None
+        if raw_value is None:
+            self._counters["misses"] += 1
+            return key, None
+        self._counters["hits"] += 1
+        return key, json.loads(raw_value)
+
+    async def store(self, key: Optional[str], value: Dict[str, Any]) -> None:
+        if key is None:
+            return
+        try:
+            await self.backend.set(key, json.dumps(value, separators=(",", ":")), self.ttl)
+        except Exception as e:
+            self._counters["backend_errors"] += 1
+            print(f"UYARI (ListCache): Önbelleğe yazılamadı: {e}")
+
+    async def _bump(self, names: Sequence[str]) -> None:
+        self._counters["invalidations"] += 1
+        try:
+            await self.backend.bump_generations(names)
+        except Exception as e:
+            self._counters["backend_errors"] += 1
+            print(f"HATA (ListCache): Önbellek geçersiz kılınamadı (kayıtlar TTL ile düşecek): {e}")
+
+    async def invalidate_creators(self, creator_ids: Sequence[uuid.UUID]) -> None:
+        """Verilen kullanıcıların biletleri değiştiğinde: personel kapsamını ve sahiplerin kapsamını geçersiz kılar."""
+        await self._bump([STAFF_SCOPE, *(creator_scope(creator_id) for creator_id in set(creator_ids))])
+
+    async def invalidate_all(self) -> None:
+        """Etkilenen sahiplerin bilinmediği toplu işlemler için tüm kapsamları geçersiz kılar."""
+        await self._bump([_GLOBAL_SCOPE])
+
+
+def creator_scope(creator_id: uuid.UUID) -> str:
+    return f"creator:{creator_id}"
+
+
+_ticket_list_cache: Optional[TicketListCache] = None
+
+
+def configure(backend: ListCacheBackend, ttl: float) -> TicketListCache:
+    """Önbelleği verilen backend ile (yeniden) kurar; testlerde yerel bir backend vermek için de kullanılır."""
+    global _ticket_list_cache
+    _ticket_list_cache = TicketListCache(backend, ttl)
+    return _ticket_list_cache
+
+
+def get_ticket_list_cache(settings: Settings) -> TicketListCache:
+    """Önbelleği ilk kullanımda ayarlardan oluşturur (LIST_CACHE_REDIS_URL varsa Redis, yoksa süreç içi)."""
+    if _ticket_list_cache is None:
+        if settings.list_cache_redis_url:
+            backend: ListCacheBackend = RedisListCacheBackend(settings.list_cache_redis_url)
+        else:
+            backend = InMemoryListCacheBackend(max_entries=settings.list_cache_max_entries)
+        configure(backend, settings.list_cache_ttl)
+    return _ticket_list_cache
+
+
+async def close() -> None:
+    global _ticket_list_cache
+    if _ticket_list_cache is not None:
+        await _ticket_list_cache.backend.close()
+    _ticket_list_cache = None
+
+
+def get_ticket_list_cache_stats() -> Dict[str, Any]:
+    return _ticket_list_cache.stats() if _ticket_list_cache is not None else {}
@@ -1,26 +1,38 @@
 # ticket_service/main.py
-from typing import Annotated, Dict, Any, List, Optional
+from typing import Annotated, Dict, Any, List, Literal, Optional
 import uuid
 import os
-import shutil
-from pathlib import Path
+from contextlib import asynccontextmanager
+from datetime import datetime
 import httpx
-from fastapi import Depends, FastAPI, HTTPException, status, UploadFile, File, Response
+from fastapi import BackgroundTasks, Depends, FastAPI, HTTPException, status, UploadFile, File, Request, Response, Query, Header
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from fastapi.responses import FileResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 
-from . import crud, models
+from . import attachment_store, bulk_import, crud, etag, export, fieldsets, list_cache, models, resumable_upload, upload_stream, user_service_client
 from .config import Settings, get_settings
-from .database import get_db
+from .database import get_async_db
 from .auth import get_current_user_payload
 
 API_PREFIX = "/api/tickets"
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Uygulama yaşam döngüsü: user_service istemcisi ve arka plan senkronizasyon kuyruğu."""
+    await user_service_client.start(get_settings())
+    yield
+    await user_service_client.stop()
+    await list_cache.close()
+    upload_stream.shutdown()
+
 app = FastAPI(
     title="Ticket Service API",
     description="Helpdesk uygulaması için bilet (ticket) yönetim servisi.",
     version="1.5.0", # Versiyon güncellendi
+    lifespan=lifespan,
 )
 
 # CORS Ayarları
@@ -30,6 +42,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],    
+    expose_headers=["ETag", "Last-Modified", "Content-Range", "Accept-Ranges", "Content-Disposition", "Upload-Offset"],
 )
 
 # --- ENDPOINT YOLLARI Ingress rewrite'e uygun olarak DÜZELTİLDİ ---
@@ -39,108 +52,335 @@ app.add_middleware(
 def health_check():
     return {"status": "healthy"}
 
+@app.get(f"{API_PREFIX}/healthz/cache", tags=["Health Check"])
+def cache_stats():
+    """Kullanıcı detay ve bilet listesi önbelleklerinin isabet/ıskalama sayaçları."""
+    return {
+        "user_details": user_service_client.get_user_details_cache_stats(),
+        "tickets_list": list_cache.get_ticket_list_cache_stats(),
+    }
+
 @app.post(f"{API_PREFIX}/", response_model=models.Ticket, status_code=status.HTTP_201_CREATED, tags=["Tickets"])
 async def create_ticket(
     ticket: models.TicketCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user_payload: dict = Depends(get_current_user_payload),
     settings: Settings = Depends(get_settings),
 ):
-    """Yeni bir destek bileti oluşturur."""
+    """
+    Yeni bir destek bileti oluşturur.
+    creator_id token'daki `sub`, tenant_id ise token'daki `groups` üzerinden önbellekteki tenant
+    dizininden çözülür; kullanıcının user_service'e senkronizasyonu arka planda yapılır.
+    """
     user_sub_str = current_user_payload.get("sub")
+    user_groups = current_user_payload.get("groups", [])
     
     sync_payload = {
         "id": user_sub_str,
         "email": current_user_payload.get("email"),
         "full_name": current_user_payload.get("name", "Unknown User"),
         "roles": current_user_payload.get("realm_access", {}).get("roles", []),
-        "keycloak_groups": current_user_payload.get("groups", [])
+        "keycloak_groups": user_groups
     }
     
-    # user_service ile iletişim, config dosyasından alınan URL ile yapılacak.
-    # Bu ayarın `ticket-service-chart/values.yaml` içinde tanımlı olması gerekir.
-    sync_url = f"{settings.user_service_url}/api/users/internal/users/sync" # Bu user-service yolu doğru
-    headers = {"X-Internal-Secret": settings.internal_service_secret}
-    
     try:
-        async with httpx.AsyncClient(verify=False) as client:
-            response = await client.post(sync_url, json=sync_payload, headers=headers)
-            response.raise_for_status()
-            synced_user_data = response.json()
-            
-            creator_id = uuid.UUID(synced_user_data.get("id"))
-            company_info = synced_user_data.get("company")
-            
-            if not company_info or not company_info.get("id"):
-                raise HTTPException(status_code=400, detail="Bilet oluşturmak için kullanıcının bir tenant'a atanmış olması gerekir.")
-            
-            tenant_id = uuid.UUID(company_info.get("id"))
-
-    except httpx.RequestError as exc:
-        raise HTTPException(status_code=503, detail=f"user_service'e ulaşılamıyor: {exc}")
-    except httpx.HTTPStatusError as exc:
-        raise HTTPException(status_code=exc.response.status_code, detail=f"user_service senkronizasyon hatası: {exc.response.text}")
-
-    db_ticket = crud.create_ticket(db=db, ticket=ticket, creator_id=creator_id, tenant_id=tenant_id)
+        creator_id = uuid.UUID(user_sub_str)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Token içinde geçerli bir kullanıcı ID'si (sub) yok.")
+
+    try:
+        tenant_id = await user_service_client.resolve_tenant_id(user_groups, settings)
+    except httpx.HTTPError as exc:
+        raise HTTPException(status_code=503, detail=f"Tenant dizini user_service'ten alınamadı: {exc}")
+
+    if tenant_id is None:
+        raise HTTPException(status_code=400, detail="Bilet oluşturmak için kullanıcının bir tenant'a atanmış olması gerekir.")
+
+    user_service_client.enqueue_user_sync(sync_payload)
+
+    db_ticket = await crud.create_ticket(db=db, ticket=ticket, creator_id=creator_id, tenant_id=tenant_id)
+    await list_cache.get_ticket_list_cache(settings).invalidate_creators([creator_id])
     return db_ticket
 
-@app.get(f"{API_PREFIX}/", response_model=List[models.Ticket], tags=["Tickets"])
+@app.get(f"{API_PREFIX}/", response_model=models.TicketSummaryPage, tags=["Tickets"])
 async def read_tickets_list(
     current_user_payload: Annotated[Dict[str, Any], Depends(get_current_user_payload)],
-    db: Session = Depends(get_db),
-    skip: int = 0,
-    limit: int = 100,
+    db: AsyncSession = Depends(get_async_db),
+    settings: Settings = Depends(get_settings),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    fields: Optional[str] = Query(None, description=fieldsets.FIELDS_QUERY_DESCRIPTION),
+    if_none_match: Optional[str] = Header(None),
 ):
-    """Kullanıcının rolüne göre biletleri listeler."""
+    """
+    Kullanıcının rolüne göre biletleri listeler.
+    Sayfalama keyset (cursor) tabanlıdır; sonraki sayfa için yanıttaki `next_cursor` gönderilir.
+    Yanıt bilet özetlerinden oluşur (açıklama yok, yorum/ek sayıları var); tam içerik için /{ticket_id}.
+    `fields` ile yalnızca istenen alanlar seçilir ve döndürülür.
+    Yanıt ETag taşır; If-None-Match eşleşirse sayfa sorgusu çalıştırılmadan 304 döner.
+    Sayfalar (rol kapsamı, oluşturan filtresi, cursor, limit, fields) anahtarıyla kısa süreli önbelleğe
+    alınır; bilet yazmaları ilgili kapsamları geçersiz kılar (bkz. list_cache).
+    """
+    selected_fields = fieldsets.parse_fields(fields, models.TicketSummary.model_fields)
     user_sub = uuid.UUID(current_user_payload.get('sub'))
     user_roles = current_user_payload.get("realm_access", {}).get("roles", [])
 
-    query = db.query(crud.db_models.Ticket)
+    creator_filter: Optional[uuid.UUID] = None
+    if not ("agent" in user_roles or "helpdesk_admin" in user_roles or "general-admin" in user_roles):
+        creator_filter = user_sub
+
+    ticket_list_cache = list_cache.get_ticket_list_cache(settings)
+    cache_scope = list_cache.creator_scope(creator_filter) if creator_filter else list_cache.STAFF_SCOPE
+    cache_key, cached_page = await ticket_list_cache.lookup(
+        cache_scope, {"cursor": cursor, "limit": limit, "fields": selected_fields}
+    )
+    if cached_page is not None:
+        if etag.is_not_modified(if_none_match, cached_page["etag"]):
+            return etag.not_modified_response(cached_page["etag"])
+        json_response = JSONResponse(content=cached_page["body"])
+        etag.set_etag_headers(json_response, cached_page["etag"])
+        return json_response
+
+    list_version = await crud.get_tickets_list_version(db, creator_id=creator_filter)
+    current_etag = etag.make_etag(
+        "tickets", str(creator_filter) if creator_filter else None, list_version, cursor, limit, selected_fields,
+    )
+    if etag.is_not_modified(if_none_match, current_etag):
+        return etag.not_modified_response(current_etag)
 
-    if "agent" in user_roles or "helpdesk_admin" in user_roles or "general-admin" in user_roles:
-        pass
+    try:
+        ticket_rows, next_cursor = await crud.get_ticket_summaries_page(
+            db, limit=limit, cursor=cursor, creator_id=creator_filter, fields=selected_fields
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Geçersiz sayfalama cursor'ı.")
+    if selected_fields is not None:
+        items = [fieldsets.prune(row._mapping, selected_fields) for row in ticket_rows]
+        body = jsonable_encoder({"items": items, "next_cursor": next_cursor})
     else:
-        query = query.filter(crud.db_models.Ticket.creator_id == user_sub)
+        body = jsonable_encoder(models.TicketSummaryPage(items=ticket_rows, next_cursor=next_cursor))
+    await ticket_list_cache.store(cache_key, {"etag": current_etag, "body": body})
+    json_response = JSONResponse(content=body)
+    etag.set_etag_headers(json_response, current_etag)
+    return json_response
+
+@app.get(f"{API_PREFIX}/search", response_model=models.TicketPage, tags=["Tickets"])
+async def search_tickets(
+    current_user_payload: Annotated[Dict[str, Any], Depends(get_current_user_payload)],
+    q: str = Query(..., min_length=2, max_length=200, description="Aranacak ifade"),
+    db: AsyncSession = Depends(get_async_db),
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+):
+    """
+    Bilet başlığı, açıklaması ve yorumlarında tam metin araması yapar.
+    Sonuçlar alaka sırasına göre döner; sonraki sayfa için `next_cursor` gönderilir.
+    """
+    user_sub = uuid.UUID(current_user_payload.get('sub'))
+    user_roles = current_user_payload.get("realm_access", {}).get("roles", [])
+
+    creator_filter: Optional[uuid.UUID] = None
+    if not ("agent" in user_roles or "helpdesk_admin" in user_roles or "general-admin" in user_roles):
+        creator_filter = user_sub
+
+    try:
+        db_tickets, next_cursor = await crud.search_tickets(db, query_text=q, limit=limit, cursor=cursor, creator_id=creator_filter)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Geçersiz sayfalama cursor'ı.")
+    return models.TicketPage(items=db_tickets, next_cursor=next_cursor)
+
+@app.get(f"{API_PREFIX}/export", tags=["Tickets"])
+async def export_tickets(
+    current_user_payload: Annotated[Dict[str, Any], Depends(get_current_user_payload)],
+    settings: Settings = Depends(get_settings),
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    tenant_id: Optional[uuid.UUID] = None,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    created_from: Optional[datetime] = Query(None, description="Bu andan (dahil) sonra oluşturulan biletler"),
+    created_to: Optional[datetime] = Query(None, description="Bu andan (hariç) önce oluşturulan biletler"),
+):
+    """
+    Biletleri NDJSON veya CSV olarak tek istekte, akış hâlinde dışa aktarır.
+    Satırlar server-side cursor ile okunduğu için bellek kullanımı sabittir.
+    Personel dışındaki kullanıcılar yalnızca kendi biletlerini dışa aktarabilir.
+    """
+    user_sub = uuid.UUID(current_user_payload.get('sub'))
+    user_roles = current_user_payload.get("realm_access", {}).get("roles", [])
 
-    db_tickets = query.order_by(crud.db_models.Ticket.created_at.desc()).offset(skip).limit(limit).all()
-    return db_tickets
+    creator_filter: Optional[uuid.UUID] = None
+    if not ("agent" in user_roles or "helpdesk_admin" in user_roles or "general-admin" in user_roles):
+        creator_filter = user_sub
+
+    filters = {
+        "tenant_id": tenant_id,
+        "status": status_filter,
+        "created_from": created_from,
+        "created_to": created_to,
+        "creator_id": creator_filter,
+    }
+    return StreamingResponse(
+        export.stream_ticket_export(export_format, filters, batch_size=settings.export_batch_size),
+        media_type=export.MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="tickets-export.{export_format}"'},
+    )
+
+async def _resolve_bulk_targets(
+    db: AsyncSession, selection: models.TicketBulkSelection, settings: Settings
+) -> List[uuid.UUID]:
+    """Toplu işlemin hedef ID'lerini çözer; boyut sınırını aşan istekleri 400 ile reddeder."""
+    max_tickets = settings.bulk_max_tickets
+    if selection.ids is not None:
+        ticket_ids = list(dict.fromkeys(selection.ids))
+        if len(ticket_ids) > max_tickets:
+            raise HTTPException(status_code=400, detail=f"Tek çağrıda en fazla {max_tickets} bilet işlenebilir.")
+        return ticket_ids
+
+    ticket_ids = await crud.find_ticket_ids(db, limit=max_tickets + 1, **selection.filter.model_dump())
+    if len(ticket_ids) > max_tickets:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Filtre {max_tickets} biletten fazlasıyla eşleşiyor; filtreyi daraltın veya ID listesi gönderin.",
+        )
+    return ticket_ids
+
+def _bulk_result(ticket_ids: List[uuid.UUID], affected_ids: List[uuid.UUID], result: str) -> models.TicketBulkResult:
+    affected = set(affected_ids)
+    return models.TicketBulkResult(
+        requested=len(ticket_ids),
+        succeeded=len(affected),
+        results=[
+            models.TicketBulkItemResult(id=ticket_id, result=result if ticket_id in affected else "not_found")
+            for ticket_id in ticket_ids
+        ],
+    )
+
+@app.patch(f"{API_PREFIX}/bulk", response_model=models.TicketBulkResult, tags=["Tickets"])
+async def bulk_update_tickets(
+    bulk_request: models.TicketBulkUpdateRequest,
+    db: AsyncSession = Depends(get_async_db),
+    settings: Settings = Depends(get_settings),
+    current_user_payload: dict = Depends(get_current_user_payload),
+):
+    """
+    Birden çok bileti tek bir `UPDATE ... RETURNING` ile günceller (örn. spam biletleri kapatma).
+    Hedef `ids` listesi veya `filter` ile verilir; sonuçta her bilet için durum döner.
+    """
+    user_roles = current_user_payload.get("realm_access", {}).get("roles", [])
+    if "customer-user" in user_roles:
+        raise HTTPException(status_code=403, detail="Biletleri sadece yetkili personel güncelleyebilir.")
+    changes = bulk_request.changes.model_dump(exclude_unset=True)
+    if not changes:
+        raise HTTPException(status_code=400, detail="Güncellenecek alan belirtilmedi.")
+
+    ticket_ids = await _resolve_bulk_targets(db, bulk_request, settings)
+    updated_ids = await crud.bulk_update_tickets(db, ticket_ids, changes)
+    if updated_ids:
+        await list_cache.get_ticket_list_cache(settings).invalidate_all()
+    return _bulk_result(ticket_ids, updated_ids, "updated")
+
+@app.delete(f"{API_PREFIX}/bulk", response_model=models.TicketBulkResult, tags=["Tickets"])
+async def bulk_delete_tickets(
+    bulk_request: models.TicketBulkSelection,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+    settings: Settings = Depends(get_settings),
+    current_user_payload: dict = Depends(get_current_user_payload),
+):
+    """
+    Birden çok bileti yorum ve ekleriyle birlikte set tabanlı DELETE'lerle siler.
+    Hedef `ids` listesi veya `filter` ile verilir; sonuçta her bilet için durum döner.
+    Referansı kalmayan ek blob'ları yanıt gönderildikten sonra arka planda temizlenir.
+    """
+    user_roles = current_user_payload.get("realm_access", {}).get("roles", [])
+    if "agent" in user_roles or "customer-user" in user_roles:
+        raise HTTPException(status_code=403, detail="Bilet silme yetkisi sadece adminlere aittir.")
+
+    ticket_ids = await _resolve_bulk_targets(db, bulk_request, settings)
+    deleted_ids = await crud.bulk_delete_tickets(db, ticket_ids)
+    if deleted_ids:
+        await list_cache.get_ticket_list_cache(settings).invalidate_all()
+        background_tasks.add_task(attachment_store.collect_unreferenced_blobs, settings)
+    return _bulk_result(ticket_ids, deleted_ids, "deleted")
+
+async def _get_creator_info(user_id: uuid.UUID, settings: Settings) -> models.UserInTicketResponse:
+    try:
+        creator_info = await user_service_client.get_user_details(user_id, settings)
+        if creator_info is None:
+            creator_info = models.UserInTicketResponse(id=user_id, full_name="Bilinmeyen Kullanıcı", email="-")
+    except httpx.HTTPStatusError:
+        creator_info = models.UserInTicketResponse(id=user_id, full_name="Bilinmeyen Kullanıcı", email="-")
+    except httpx.RequestError:
+        creator_info = models.UserInTicketResponse(id=user_id, full_name="Kullanıcı Servisine Ulaşılamadı", email="-")
+    return creator_info
 
 @app.get(f"{API_PREFIX}/{{ticket_id}}", response_model=models.TicketWithDetails, tags=["Tickets"])
 async def read_ticket_details(
     ticket_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     settings: Settings = Depends(get_settings),
-    current_user_payload: dict = Depends(get_current_user_payload)
+    current_user_payload: dict = Depends(get_current_user_payload),
+    fields: Optional[str] = Query(None, description=fieldsets.FIELDS_QUERY_DESCRIPTION),
+    if_none_match: Optional[str] = Header(None),
 ):
-    db_ticket = crud.get_ticket_with_details(db, ticket_id=ticket_id)
-    if db_ticket is None:
+    """
+    Bileti yorumları, ekleri ve oluşturan kullanıcının bilgisiyle döndürür.
+    `fields` verilirse yalnızca istenen kolonlar/ilişkiler yüklenir; `creator_details` istenmezse
+    user_service'e hiç gidilmez.
+    Yanıt ETag taşır; If-None-Match eşleşirse yalnızca sürüm sorgusu çalıştırılıp 304 döner
+    (user_service'e gidilmez).
+    """
+    selected_fields = fieldsets.parse_fields(fields, models.TicketWithDetails.model_fields)
+    load_fields = selected_fields
+    if selected_fields is not None and "creator_details" in selected_fields:
+        load_fields = [*selected_fields, "creator_id"]
+
+    ticket_version = await crud.get_ticket_version(db, ticket_id=ticket_id)
+    if ticket_version is None:
         raise HTTPException(status_code=404, detail="Bilet bulunamadı")
+    # ETag yalnızca biletin sürümünden hesaplanır; oluşturanın ad/e-posta değişiklikleri bilet değişene
+    # kadar istemcide önbellekte kalabilir, karşılığında 304 yanıtı user_service'e hiç gitmez.
+    current_etag = etag.make_etag(
+        "ticket", str(ticket_id), ticket_version.updated_at, str(ticket_version.creator_id), selected_fields,
+    )
+    if etag.is_not_modified(if_none_match, current_etag):
+        return etag.not_modified_response(current_etag)
 
-    creator_info: Optional[models.UserInTicketResponse] = None
-    user_id = db_ticket.creator_id
-    internal_url = f"{settings.user_service_url}/internal/users/{user_id}"
-    headers = {"X-Internal-Secret": settings.internal_service_secret}
+    # Oluşturan kullanıcının bilgisi user_service'ten (önbellek üzerinden) yalnızca 200 yanıtı için alınır.
+    creator_info = None
+    if selected_fields is None or "creator_details" in selected_fields:
+        creator_info = await _get_creator_info(ticket_version.creator_id, settings)
 
-    try:
-        async with httpx.AsyncClient(verify=False) as client:
-            response = await client.get(internal_url, headers=headers)
-            if response.status_code == 200:
-                user_data = response.json()
-                creator_info = models.UserInTicketResponse(**user_data)
-            else:
-                creator_info = models.UserInTicketResponse(id=user_id, full_name="Bilinmeyen Kullanıcı", email="-")
-    except httpx.RequestError:
-        creator_info = models.UserInTicketResponse(id=user_id, full_name="Kullanıcı Servisine Ulaşılamadı", email="-")
+    db_ticket = await crud.get_ticket_with_details(db, ticket_id=ticket_id, fields=load_fields)
+    if db_ticket is None:
+        raise HTTPException(status_code=404, detail="Bilet bulunamadı")
+
+    if selected_fields is None:
+        ticket_response = models.TicketWithDetails.model_validate(db_ticket)
+        ticket_response.creator_details = creator_info
+        etag.set_etag_headers(response, current_etag)
+        return ticket_response
 
-    ticket_response = models.TicketWithDetails.from_orm(db_ticket)
-    ticket_response.creator_details = creator_info
-    return ticket_response
+    response_data: Dict[str, Any] = {}
+    for name in selected_fields:
+        if name == "comments":
+            response_data[name] = [models.Comment.model_validate(comment) for comment in db_ticket.comments]
+        elif name == "attachments":
+            response_data[name] = [models.Attachment.model_validate(attachment) for attachment in db_ticket.attachments]
+        elif name == "creator_details":
+            response_data[name] = creator_info
+        else:
+            response_data[name] = getattr(db_ticket, name)
+    json_response = JSONResponse(content=jsonable_encoder(response_data))
+    etag.set_etag_headers(json_response, current_etag)
+    return json_response
 
 @app.patch(f"{API_PREFIX}/{{ticket_id}}", response_model=models.Ticket, tags=["Tickets"])
 async def update_ticket(
     ticket_id: uuid.UUID,
     ticket_update: models.TicketUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
+    settings: Settings = Depends(get_settings),
     current_user_payload: dict = Depends(get_current_user_payload),
 ):
     """Bir biletin durumunu veya diğer alanlarını günceller."""
@@ -148,27 +388,31 @@ async def update_ticket(
     user_roles = current_user_payload.get("realm_access", {}).get("roles", [])
     if "customer-user" in user_roles:
         raise HTTPException(status_code=403, detail="Biletleri sadece yetkili personel güncelleyebilir.")
-    db_ticket = crud.get_ticket(db, ticket_id)
+    db_ticket = await crud.update_ticket(db=db, ticket_id=ticket_id, ticket_update=ticket_update)
     if not db_ticket:
         raise HTTPException(status_code=404, detail="Güncellenecek bilet bulunamadı.")
-    return crud.update_ticket(db=db, ticket_id=ticket_id, ticket_update=ticket_update)
+    await list_cache.get_ticket_list_cache(settings).invalidate_creators([db_ticket.creator_id])
+    return db_ticket
 
 
 @app.delete(f"{API_PREFIX}/{{ticket_id}}", status_code=status.HTTP_204_NO_CONTENT, tags=["Tickets"])
 async def delete_ticket(
     ticket_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+    settings: Settings = Depends(get_settings),
     current_user_payload: dict = Depends(get_current_user_payload),
 ):
-    """Bir bileti siler."""
+    """Bir bileti siler. Referansı kalmayan ek blob'ları yanıt gönderildikten sonra arka planda temizlenir."""
     # ... (Bu fonksiyonun içeriği aynı kalabilir) ...
     user_roles = current_user_payload.get("realm_access", {}).get("roles", [])
     if "agent" in user_roles or "customer-user" in user_roles:
         raise HTTPException(status_code=403, detail="Bilet silme yetkisi sadece adminlere aittir.")
-    db_ticket = crud.get_ticket(db, ticket_id)
-    if not db_ticket:
-        return Response(status_code=status.HTTP_204_NO_CONTENT)
-    crud.delete_ticket(db=db, ticket_id=ticket_id)
+    # Bilet yoksa da 204 döner (silme idempotent).
+    deleted_creator_id = await crud.delete_ticket(db=db, ticket_id=ticket_id)
+    if deleted_creator_id is not None:
+        await list_cache.get_ticket_list_cache(settings).invalidate_creators([deleted_creator_id])
+        background_tasks.add_task(attachment_store.collect_unreferenced_blobs, settings)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
@@ -176,73 +420,300 @@ async def delete_ticket(
 async def create_ticket_comment(
     ticket_id: uuid.UUID,
     comment: models.CommentCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
+    settings: Settings = Depends(get_settings),
     current_user_payload: dict = Depends(get_current_user_payload)
 ):
     """Belirli bir bilete yeni bir yorum ekler."""
     author_id = uuid.UUID(current_user_payload.get("sub"))
-    db_ticket = crud.get_ticket(db, ticket_id=ticket_id)
-    if not db_ticket:
+    created = await crud.create_comment(db=db, comment=comment, ticket_id=ticket_id, author_id=author_id)
+    if created is None:
         raise HTTPException(status_code=404, detail="Yorum yapılacak bilet bulunamadı.")
-    new_comment = crud.create_comment(db=db, comment=comment, ticket_id=ticket_id, author_id=author_id)
+    new_comment, ticket_creator_id = created
+    # Listede yorum sayısı gösterildiği için biletin sahibinin kapsamı da geçersiz kılınır.
+    await list_cache.get_ticket_list_cache(settings).invalidate_creators([ticket_creator_id])
     return new_comment
 
-@app.post(f"{API_PREFIX}/{{ticket_id}}/attachments", response_model=List[models.Attachment], tags=["Attachments"])
+@app.get(f"{API_PREFIX}/{{ticket_id}}/comments", response_model=models.CommentPage, tags=["Comments"])
+async def read_ticket_comments(
+    ticket_id: uuid.UUID,
+    db: AsyncSession = Depends(get_async_db),
+    current_user_payload: dict = Depends(get_current_user_payload),
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+):
+    """
+    Bir biletin yorumlarını eskiden yeniye, sayfa sayfa listeler.
+    Sonraki sayfa için yanıttaki `next_cursor` gönderilir.
+    """
+    if not await crud.get_ticket(db, ticket_id=ticket_id):
+        raise HTTPException(status_code=404, detail="Bilet bulunamadı")
+    try:
+        db_comments, next_cursor = await crud.get_ticket_comments_page(db, ticket_id=ticket_id, limit=limit, cursor=cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Geçersiz sayfalama cursor'ı.")
+    return models.CommentPage(items=db_comments, next_cursor=next_cursor)
+
+@app.get(f"{API_PREFIX}/{{ticket_id}}/attachments", response_model=models.AttachmentPage, tags=["Attachments"])
+async def read_ticket_attachments(
+    ticket_id: uuid.UUID,
+    db: AsyncSession = Depends(get_async_db),
+    current_user_payload: dict = Depends(get_current_user_payload),
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+):
+    """
+    Bir biletin dosya eklerini eskiden yeniye, sayfa sayfa listeler.
+    Sonraki sayfa için yanıttaki `next_cursor` gönderilir.
+    """
+    if not await crud.get_ticket(db, ticket_id=ticket_id):
+        raise HTTPException(status_code=404, detail="Bilet bulunamadı")
+    try:
+        db_attachments, next_cursor = await crud.get_ticket_attachments_page(db, ticket_id=ticket_id, limit=limit, cursor=cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Geçersiz sayfalama cursor'ı.")
+    return models.AttachmentPage(items=db_attachments, next_cursor=next_cursor)
+
+_UPLOAD_REQUEST_BODY = {
+    "content": {
+        "multipart/form-data": {
+            "schema": {
+                "type": "object",
+                "properties": {"files": {"type": "array", "items": {"type": "string", "format": "binary"}}},
+                "required": ["files"],
+            }
+        }
+    },
+    "required": True,
+}
+
+@app.post(
+    f"{API_PREFIX}/{{ticket_id}}/attachments",
+    response_model=List[models.Attachment],
+    tags=["Attachments"],
+    openapi_extra={"requestBody": _UPLOAD_REQUEST_BODY},
+)
 async def upload_ticket_attachments(
     ticket_id: uuid.UUID,
-    files: List[UploadFile] = File(...),
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    settings: Settings = Depends(get_settings),
     current_user_payload: dict = Depends(get_current_user_payload),
 ):
-    """Belirli bir bilete bir veya daha fazla dosya ekler."""
+    """
+    Belirli bir bilete bir veya daha fazla dosya (`files` alanı) ekler.
+    Gövde akış halinde okunur; dosya/istek boyut sınırı aşıldığı anda 413 döner. Dosyalar içerik
+    adresli depoya yazılır; depoda zaten bulunan içerik yeniden yazılmaz.
+    """
     uploader_id = uuid.UUID(current_user_payload.get("sub"))
-    db_ticket = crud.get_ticket(db, ticket_id=ticket_id)
+    db_ticket = await crud.get_ticket(db, ticket_id=ticket_id)
     if not db_ticket:
         raise HTTPException(status_code=404, detail="Dosya eklenecek bilet bulunamadı.")
-    
-    UPLOAD_DIRECTORY = Path("uploads") / str(ticket_id)
-    UPLOAD_DIRECTORY.mkdir(parents=True, exist_ok=True)
-    
-    saved_attachments = []
-    for file in files:
-        unique_suffix = uuid.uuid4().hex
-        file_extension = Path(file.filename).suffix
-        unique_filename = f"{unique_suffix}{file_extension}"
-        file_location = UPLOAD_DIRECTORY / unique_filename
-
-        try:
-            with open(file_location, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-        finally:
-            file.file.close()
-
-        db_attachment = crud.create_attachment(
-            db=db, file_name=file.filename, file_path=str(file_location),
-            file_type=file.content_type, ticket_id=ticket_id, uploader_id=uploader_id
-        )
-        saved_attachments.append(db_attachment)
+    ticket_creator_id = db_ticket.creator_id
+    # Yükleme uzun sürebilir; bu sürede veritabanı bağlantısı açık transaction'da beklemesin.
+    await db.rollback()
 
+    upload_reader = upload_stream.AttachmentUploadReader(request, settings)
+    try:
+        staged_uploads = await upload_reader.read()
+    except upload_stream.UploadTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except upload_stream.InvalidUpload as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        saved_attachments = await attachment_store.store_uploads(db, staged_uploads, ticket_id, uploader_id, settings)
+    finally:
+        await upload_reader.discard_all()
+
+    await list_cache.get_ticket_list_cache(settings).invalidate_creators([ticket_creator_id])
     return saved_attachments
 
-@app.get(f"{API_PREFIX}/attachments/{{attachment_id}}", tags=["Attachments"])
+@app.post(f"{API_PREFIX}/{{ticket_id}}/uploads", response_model=models.UploadSession, status_code=status.HTTP_201_CREATED, tags=["Attachments"])
+async def create_upload_session(
+    ticket_id: uuid.UUID,
+    session_in: models.UploadSessionCreate,
+    db: AsyncSession = Depends(get_async_db),
+    settings: Settings = Depends(get_settings),
+    current_user_payload: dict = Depends(get_current_user_payload),
+):
+    """
+    Büyük dosyalar için devam ettirilebilir yükleme oturumu açar. Ardından içerik
+    `PATCH /uploads/{upload_id}` ile parça parça gönderilip `POST /uploads/{upload_id}/finalize` ile tamamlanır.
+    """
+    uploader_id = uuid.UUID(current_user_payload.get("sub"))
+    if not await crud.get_ticket_version(db, ticket_id=ticket_id):
+        raise HTTPException(status_code=404, detail="Dosya eklenecek bilet bulunamadı.")
+    try:
+        return await resumable_upload.create_session(ticket_id, uploader_id, session_in, settings)
+    except upload_stream.UploadTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+
+async def _get_upload_session(upload_id: uuid.UUID, current_user_payload: dict, settings: Settings) -> Dict[str, Any]:
+    upload_session = await resumable_upload.get_session(upload_id, uuid.UUID(current_user_payload.get("sub")), settings)
+    if upload_session is None:
+        raise HTTPException(status_code=404, detail="Yükleme oturumu bulunamadı veya süresi doldu.")
+    return upload_session
+
+@app.api_route(f"{API_PREFIX}/uploads/{{upload_id}}", methods=["GET", "HEAD"], response_model=models.UploadSession, tags=["Attachments"])
+async def read_upload_session(
+    upload_id: uuid.UUID,
+    response: Response,
+    settings: Settings = Depends(get_settings),
+    current_user_payload: dict = Depends(get_current_user_payload),
+):
+    """
+    Oturumun durumunu ve sunucuya ulaşmış bayt sayısını (`Upload-Offset`) döndürür; kopan yükleme buradan
+    devam eder. Oturum o anda tamamlanıyorsa offset yoktur ve 409 döner.
+    """
+    upload_session = await _get_upload_session(upload_id, current_user_payload, settings)
+    try:
+        offset = await resumable_upload.get_offset(upload_id, settings)
+    except resumable_upload.UploadConflict as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e), headers={"Cache-Control": "no-store"})
+    response.headers["Upload-Offset"] = str(offset)
+    response.headers["Cache-Control"] = "no-store"
+    return resumable_upload.to_model(upload_session, offset)
+
+@app.patch(f"{API_PREFIX}/uploads/{{upload_id}}", status_code=status.HTTP_204_NO_CONTENT, tags=["Attachments"])
+async def upload_session_chunk(
+    upload_id: uuid.UUID,
+    request: Request,
+    upload_offset: int = Header(..., ge=0, description="Parçanın dosyadaki başlangıç konumu (bayt)"),
+    settings: Settings = Depends(get_settings),
+    current_user_payload: dict = Depends(get_current_user_payload),
+):
+    """Ham parça baytlarını (`Content-Type: application/offset+octet-stream`) `Upload-Offset` konumundan itibaren ekler."""
+    upload_session = await _get_upload_session(upload_id, current_user_payload, settings)
+    try:
+        new_offset = await resumable_upload.append_chunk(request, upload_id, upload_session, upload_offset, settings)
+    except resumable_upload.UploadConflict as e:
+        headers = {"Upload-Offset": str(e.offset)} if e.offset is not None else None
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e), headers=headers)
+    except upload_stream.UploadTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    return Response(status_code=status.HTTP_204_NO_CONTENT, headers={"Upload-Offset": str(new_offset)})
+
+@app.post(f"{API_PREFIX}/uploads/{{upload_id}}/finalize", response_model=models.Attachment, status_code=status.HTTP_201_CREATED, tags=["Attachments"])
+async def finalize_upload_session(
+    upload_id: uuid.UUID,
+    db: AsyncSession = Depends(get_async_db),
+    settings: Settings = Depends(get_settings),
+    current_user_payload: dict = Depends(get_current_user_payload),
+):
+    """Tüm parçalar geldiyse dosyayı doğrulayıp (kopyalamadan) depoya taşır ve bilete ek olarak kaydeder."""
+    upload_session = await _get_upload_session(upload_id, current_user_payload, settings)
+    try:
+        db_attachment = await resumable_upload.finalize(db, upload_id, upload_session, settings)
+    except resumable_upload.UploadConflict as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except upload_stream.InvalidUpload as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except IntegrityError:
+        # Oturum açıldıktan sonra bilet silinmiş (ticket_id FK).
+        await resumable_upload.delete_session(upload_id, settings)
+        raise HTTPException(status_code=404, detail="Dosya eklenecek bilet bulunamadı.")
+
+    ticket_version = await crud.get_ticket_version(db, ticket_id=db_attachment.ticket_id)
+    if ticket_version is not None:
+        await list_cache.get_ticket_list_cache(settings).invalidate_creators([ticket_version.creator_id])
+    return db_attachment
+
+@app.delete(f"{API_PREFIX}/uploads/{{upload_id}}", status_code=status.HTTP_204_NO_CONTENT, tags=["Attachments"])
+async def delete_upload_session(
+    upload_id: uuid.UUID,
+    settings: Settings = Depends(get_settings),
+    current_user_payload: dict = Depends(get_current_user_payload),
+):
+    """Yarım kalan bir yükleme oturumunu ve diskteki parçalarını siler."""
+    await _get_upload_session(upload_id, current_user_payload, settings)
+    await resumable_upload.delete_session(upload_id, settings)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+@app.post(f"{API_PREFIX}/admin/import", response_model=models.ImportResult, tags=["Admin - Import"])
+async def import_tickets_bulk(
+    kind: Literal["tickets", "comments"] = Query(..., description="İçe aktarılacak kayıt türü"),
+    file: UploadFile = File(...),
+    import_format: Optional[Literal["csv", "jsonl"]] = Query(None, alias="format", description="Verilmezse dosya uzantısından çıkarılır"),
+    settings: Settings = Depends(get_settings),
+    current_user_payload: dict = Depends(get_current_user_payload),
+):
+    """
+    (Admin) Eski helpdesk sistemlerinden CSV/JSONL ile toplu bilet veya yorum içe aktarır.
+    Satırlar doğrulanır; PostgreSQL'de geçerli satırlar COPY ile staging tablosuna, oradan hedef
+    tabloya parça parça yazılır. Hatalı satırlar satır numarasıyla yanıtta listelenir.
+    """
+    user_roles = current_user_payload.get("realm_access", {}).get("roles", [])
+    if not ("helpdesk_admin" in user_roles or "general-admin" in user_roles):
+        raise HTTPException(status_code=403, detail="Toplu içe aktarım yetkisi sadece adminlere aittir.")
+
+    input_format = import_format or bulk_import.detect_format(file.filename)
+    if input_format is None:
+        raise HTTPException(status_code=400, detail="Dosya formatı anlaşılamadı; format=csv veya format=jsonl gönderin.")
+
+    try:
+        import_result = await bulk_import.import_stream(kind, file.file, input_format, batch_size=settings.import_batch_size)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Dosya UTF-8 olarak okunamadı.")
+    finally:
+        await file.close()
+    if import_result.imported:
+        await list_cache.get_ticket_list_cache(settings).invalidate_all()
+    return import_result
+
+# İçerik adresli depodaki bir ekin içeriği asla değişmez; istemci tekrar sormadan önbellekten kullanabilir.
+_IMMUTABLE_ATTACHMENT_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+@app.api_route(f"{API_PREFIX}/attachments/{{attachment_id}}", methods=["GET", "HEAD"], tags=["Attachments"])
 async def download_attachment(
     attachment_id: uuid.UUID,
-    db: Session = Depends(get_db),
-    current_user_payload: dict = Depends(get_current_user_payload)
+    db: AsyncSession = Depends(get_async_db),
+    settings: Settings = Depends(get_settings),
+    current_user_payload: dict = Depends(get_current_user_payload),
+    inline: bool = Query(False, description="Tarayıcıda önizleme için Content-Disposition: inline"),
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None),
 ):
-    """ID'si verilen bir dosyayı indirilebilir olarak sunar."""
-    attachment = crud.get_attachment(db, attachment_id=attachment_id)
+    """
+    ID'si verilen bir dosyayı kayıtlı içerik türüyle sunar.
+    `Range` ile kısmi indirme (206) ve `If-Range` desteklenir. ETag içeriğin SHA-256'sından,
+    Last-Modified yükleme zamanından gelir; If-None-Match / If-Modified-Since eşleşirse dosyaya
+    dokunulmadan 304 döner.
+    """
+    attachment = await crud.get_attachment(db, attachment_id=attachment_id)
     if not attachment:
         raise HTTPException(status_code=404, detail="Dosya eki bulunamadı.")
 
     # ... (Yetki kontrol mantığı aynı kalabilir) ...
 
-    file_path = attachment.file_path
+    # Eski (içerik adresli depodan önceki) eklerde checksum yok; ETag'i FileResponse dosya bilgisinden üretir.
+    attachment_etag = f'"{attachment.sha256}"' if attachment.sha256 else None
+    cache_control = _IMMUTABLE_ATTACHMENT_CACHE_CONTROL if attachment.sha256 else etag.CACHE_CONTROL
+    last_modified = etag.http_date(attachment.uploaded_at) if attachment.uploaded_at else None
+    if attachment_etag and if_none_match is not None:
+        not_modified = etag.is_not_modified(if_none_match, attachment_etag)
+    else:
+        # RFC 9110: If-None-Match varsa If-Modified-Since yok sayılır.
+        not_modified = if_none_match is None and etag.is_not_modified_since(if_modified_since, attachment.uploaded_at)
+    if not_modified:
+        return etag.not_modified_response(attachment_etag, cache_control=cache_control, last_modified=last_modified)
+
+    file_path = attachment_store.resolve_path(attachment, settings)
     if not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="Dosya sunucuda bulunamadı.")
 
+    response_headers = {"Cache-Control": cache_control, "X-Content-Type-Options": "nosniff"}
+    if attachment_etag:
+        response_headers["ETag"] = attachment_etag
+    if last_modified:
+        response_headers["Last-Modified"] = last_modified
+    if inline:
+        # Kullanıcının yüklediği içerik (örn. HTML) tarayıcıda betik çalıştıramasın.
+        response_headers["Content-Security-Policy"] = "sandbox"
     return FileResponse(
-        path=file_path, 
-        media_type='application/octet-stream',
-        filename=attachment.file_name
+        path=file_path,
+        media_type=attachment.file_type or "application/octet-stream",
+        filename=attachment.file_name,
+        headers=response_headers,
+        content_disposition_type="inline" if inline else "attachment",
     )
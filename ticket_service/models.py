@@ -1,6 +1,6 @@
 # ticket_service/models.py
-from pydantic import BaseModel, Field
-from typing import Optional, List # List'i import ettiğinizden emin olun
+from pydantic import BaseModel, Field, model_validator
+from typing import Literal, Optional, List # List'i import ettiğinizden emin olun
 import uuid
 from datetime import datetime
 
@@ -30,6 +30,8 @@ class Attachment(BaseModel):
     id: uuid.UUID
     file_name: str
     file_type: Optional[str] = None
+    size: Optional[int] = None
+    sha256: Optional[str] = None
     uploaded_at: datetime
     uploader_id: uuid.UUID
 
@@ -53,6 +55,56 @@ class Ticket(TicketBase):
     class Config:
         from_attributes = True
 
+class TicketPage(BaseModel):
+    """Keyset sayfalamalı bilet listesi yanıtı."""
+    items: List[Ticket]
+    next_cursor: Optional[str] = Field(None, description="Sonraki sayfa için opak cursor. Son sayfada null döner.")
+
+class CommentPage(BaseModel):
+    """Keyset sayfalamalı yorum listesi yanıtı."""
+    items: List[Comment]
+    next_cursor: Optional[str] = Field(None, description="Sonraki sayfa için opak cursor. Son sayfada null döner.")
+
+class AttachmentPage(BaseModel):
+    """Keyset sayfalamalı dosya eki listesi yanıtı."""
+    items: List[Attachment]
+    next_cursor: Optional[str] = Field(None, description="Sonraki sayfa için opak cursor. Son sayfada null döner.")
+
+class UploadSessionCreate(BaseModel):
+    """Devam ettirilebilir (parça parça) dosya yükleme oturumu başlatma isteği."""
+    file_name: str = Field(..., min_length=1, max_length=255)
+    file_type: Optional[str] = Field(None, max_length=100)
+    size: int = Field(..., ge=1, description="Dosyanın toplam boyutu (bayt)")
+    sha256: Optional[str] = Field(None, pattern="^[0-9a-f]{64}$", description="Verilirse tamamlamada içerik doğrulanır")
+
+class UploadSession(BaseModel):
+    id: uuid.UUID
+    ticket_id: uuid.UUID
+    file_name: str
+    file_type: Optional[str] = None
+    size: int
+    offset: int = Field(..., description="Sunucuya ulaşmış bayt sayısı; sonraki PATCH bu offset'ten başlamalı")
+    expires_at: datetime
+
+class TicketSummary(BaseModel):
+    """Bilet listesinde gösterilen özet; açıklama içermez."""
+    id: uuid.UUID
+    title: str
+    status: str
+    created_at: datetime
+    creator_id: uuid.UUID
+    tenant_id: uuid.UUID
+    comment_count: int = 0
+    attachment_count: int = 0
+
+    class Config:
+        from_attributes = True
+
+class TicketSummaryPage(BaseModel):
+    """Keyset sayfalamalı bilet özeti listesi yanıtı."""
+    items: List[TicketSummary]
+    next_cursor: Optional[str] = Field(None, description="Sonraki sayfa için opak cursor. Son sayfada null döner.")
+
 # --- YENİ: Tüm detayları içeren Pydantic modeli ---
 class TicketWithDetails(Ticket):
     comments: List[Comment] = []
@@ -68,6 +120,69 @@ class TicketUpdate(BaseModel):
     class Config:
         from_attributes = True
 
+# --- Toplu güncelleme / silme ---
+class TicketBulkFilter(BaseModel):
+    """Toplu işlemde ID listesi yerine kullanılabilecek filtre; `created_from` dahil, `created_to` hariç."""
+    tenant_id: Optional[uuid.UUID] = None
+    status: Optional[str] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+
+class TicketBulkSelection(BaseModel):
+    """Toplu işlemin hedefi: ya `ids` ya da `filter` verilmelidir."""
+    ids: Optional[List[uuid.UUID]] = Field(None, min_length=1)
+    filter: Optional[TicketBulkFilter] = None
+
+    @model_validator(mode="after")
+    def _exactly_one_target(self):
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError("'ids' veya 'filter' alanlarından yalnızca biri verilmelidir.")
+        return self
+
+class TicketBulkUpdateRequest(TicketBulkSelection):
+    changes: TicketUpdate
+
+class TicketBulkItemResult(BaseModel):
+    id: uuid.UUID
+    result: Literal["updated", "deleted", "not_found"]
+
+class TicketBulkResult(BaseModel):
+    requested: int = Field(..., description="İşlenmesi istenen bilet sayısı (filtrede eşleşen sayı)")
+    succeeded: int
+    results: List[TicketBulkItemResult]
+
 # --- YENİ EKLENDİ: Yorum oluşturma için Pydantic modeli ---
 class CommentCreate(BaseModel):
-    content: str = Field(..., min_length=1, description="Yorumun içeriği")
\ No newline at end of file
+    content: str = Field(..., min_length=1, description="Yorumun içeriği")
+
+# --- Toplu içe aktarım (legacy helpdesk taşımaları) ---
+class TicketImportRow(BaseModel):
+    """İçe aktarılan bilet satırı. id verilmezse üretilir, created_at verilmezse içe aktarım anı kullanılır."""
+    id: uuid.UUID = Field(default_factory=uuid.uuid4)
+    title: str = Field(..., min_length=3, max_length=100)
+    description: str = Field(..., min_length=10)
+    status: str = Field("Açık", min_length=1)
+    created_at: Optional[datetime] = None
+    creator_id: uuid.UUID
+    tenant_id: uuid.UUID
+
+class CommentImportRow(BaseModel):
+    """İçe aktarılan yorum satırı. Bağlı olduğu bilet veritabanında mevcut olmalıdır."""
+    id: uuid.UUID = Field(default_factory=uuid.uuid4)
+    ticket_id: uuid.UUID
+    author_id: uuid.UUID
+    content: str = Field(..., min_length=1)
+    created_at: Optional[datetime] = None
+
+class ImportRowError(BaseModel):
+    line: int = Field(..., description="Kaynak dosyadaki satır numarası (CSV'de başlık satırı 1'dir)")
+    error: str
+
+class ImportResult(BaseModel):
+    kind: str
+    total_rows: int
+    imported: int
+    failed: int
+    errors: List[ImportRowError] = []
+    errors_truncated: bool = Field(False, description="Hata listesi sınıra ulaştığı için kısaltıldıysa true")
+    elapsed_seconds: float
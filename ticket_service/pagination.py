@@ -0,0 +1,33 @@
+# ticket_service/pagination.py
+import base64
+import json
+from typing import Any, Callable, List
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """
+    Keyset sayfalama için son satırın sıralama değerlerini opak bir cursor'a çevirir.
+    Değerler JSON'a (datetime/UUID -> str) çevrilip URL-safe base64 ile kodlanır.
+    """
+    raw = json.dumps(values, default=str, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, *parsers: Callable[[Any], Any]) -> List[Any]:
+    """
+    encode_cursor ile üretilmiş cursor'ı çözer; her değer sırasıyla verilen dönüştürücüden geçirilir
+    (örn. datetime.fromisoformat, uuid.UUID). Cursor bozuksa, beklenen sayıda değer içermiyorsa veya bir
+    değer dönüştürülemiyorsa (örn. metin yerine sayı ya da liste) ValueError fırlatır.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f"Geçersiz cursor: {e}") from e
+
+    if not isinstance(values, list) or len(values) != len(parsers):
+        raise ValueError("Geçersiz cursor: beklenmeyen içerik.")
+    try:
+        return [parse(value) for parse, value in zip(parsers, values)]
+    except (ValueError, TypeError, AttributeError) as e:
+        raise ValueError(f"Geçersiz cursor: {e}") from e
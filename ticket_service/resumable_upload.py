@@ -0,0 +1,297 @@
+# ticket_service/resumable_upload.py
+"""
+Büyük dosya ekleri için devam ettirilebilir (parça parça) yükleme protokolü.
+
+1. `POST /{ticket_id}/uploads`        -> oturum açılır (dosya adı, türü, toplam boyut).
+2. `PATCH /uploads/{upload_id}`       -> `Upload-Offset` başlığındaki konumdan itibaren ham bayt eklenir.
+   Bağlantı koparsa `HEAD /uploads/{upload_id}` ile sunucudaki offset öğrenilip oradan devam edilir.
+3. `POST /uploads/{upload_id}/finalize` -> içerik hash'lenir, (verildiyse) checksum doğrulanır ve
+   birleştirilmiş dosya kopyalanmadan içerik adresli depoya taşınıp ek kaydı oluşturulur.
+
+Oturumlar yerel diskte, depo kökündeki `sessions/<upload_id>/` altında `meta.json` ve `data.part`
+olarak tutulur; süreç yeniden başlasa da kaybolmaz. Offset'in tek doğruluk kaynağı `data.part`'ın
+boyutudur. Aynı oturuma eşzamanlı PATCH'ler dosya kilidiyle (flock) engellenir; tamamlanmakta olan
+oturumun (data.part yeniden adlandırılmış) offset'i sorulursa 409 döner. Süresi geçen oturumlar yeni
+oturum açılırken temizlenir; o anda parça yazılan veya tamamlanan oturumlar bir sonraki temizliğe kalır.
+"""
+import asyncio
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import ClientDisconnect, Request
+
+from . import attachment_store, db_models, models, upload_stream
+from .config import Settings
+from .upload_stream import InvalidUpload, UploadTooLarge
+
+_META_FILE = "meta.json"
+_DATA_FILE = "data.part"
+_FINALIZING_FILE = "data.finalizing"
+_CHUNK_SIZE = 1024 * 1024
+# Meta verisi okunamayan (yarım oluşturulmuş) oturum dizinleri ve çöken bir finalize'dan kalan
+# data.finalizing dosyaları bu süreden (sn) eskiyse sahipsiz sayılır.
+_ABANDONED_AFTER = 3600
+
+
+class UploadConflict(Exception):
+    """İstemcinin gönderdiği offset sunucudakiyle uyuşmuyor veya oturum başka bir istek tarafından kullanılıyor (409)."""
+
+    def __init__(self, message: str, offset: Optional[int] = None):
+        super().__init__(message)
+        self.offset = offset
+
+
+def _sessions_root(settings: Settings) -> Path:
+    return Path(settings.attachment_storage_dir) / "sessions"
+
+
+def _session_dir(upload_id: uuid.UUID, settings: Settings) -> Path:
+    return _sessions_root(settings) / upload_id.hex
+
+
+def _current_offset(session_dir: Path) -> int:
+    try:
+        return (session_dir / _DATA_FILE).stat().st_size
+    except FileNotFoundError:
+        raise UploadConflict("Yükleme oturumu tamamlanıyor.")
+
+
+def to_model(meta: Dict[str, Any], offset: int) -> models.UploadSession:
+    return models.UploadSession(**{name: meta[name] for name in ("id", "ticket_id", "file_name", "file_type", "size", "expires_at")}, offset=offset)
+
+
+async def _run(settings: Settings, func, *args):
+    return await asyncio.get_running_loop().run_in_executor(upload_stream.get_upload_executor(settings), func, *args)
+
+
+# --- Oturum yaşam döngüsü ---
+
+def _write_session(session_dir: Path, meta: Dict[str, Any]) -> None:
+    session_dir.mkdir(parents=True, exist_ok=False)
+    (session_dir / _DATA_FILE).touch()
+    temp_meta = session_dir / f".{_META_FILE}.tmp"
+    temp_meta.write_text(json.dumps(meta), encoding="utf-8")
+    os.replace(temp_meta, session_dir / _META_FILE)
+
+
+def _remove_if_idle(session_dir: Path) -> bool:
+    """
+    Oturum dizinini, üzerinde PATCH veya finalize sürmüyorsa siler. PATCH'in tuttuğu flock'u almaya çalışır
+    (alamazsa atlar) ve kilidi silme bitene kadar tutar; böylece aynı anda yeni bir parça da yazılamaz.
+    """
+    try:
+        if time.time() - (session_dir / _FINALIZING_FILE).stat().st_mtime <= _ABANDONED_AFTER:
+            return False
+    except FileNotFoundError:
+        pass
+    try:
+        data_file = open(session_dir / _DATA_FILE, "rb")
+    except FileNotFoundError:
+        data_file = None
+    try:
+        if data_file is not None:
+            try:
+                fcntl.flock(data_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+        shutil.rmtree(session_dir, ignore_errors=True)
+        return True
+    finally:
+        if data_file is not None:
+            data_file.close()
+
+
+def _cleanup_expired_sessions(sessions_root: Path) -> int:
+    if not sessions_root.is_dir():
+        return 0
+    now = datetime.now(timezone.utc)
+    removed = 0
+    for session_dir in sessions_root.iterdir():
+        try:
+            meta = json.loads((session_dir / _META_FILE).read_text(encoding="utf-8"))
+            expired = datetime.fromisoformat(meta["expires_at"]) <= now
+        except (OSError, ValueError, KeyError):
+            # Yarım oluşturulmuş oturum dizini: yeterince eskiyse sil.
+            try:
+                expired = (now.timestamp() - session_dir.stat().st_mtime) > _ABANDONED_AFTER
+            except OSError:
+                continue
+        if expired and _remove_if_idle(session_dir):
+            removed += 1
+    return removed
+
+
+async def create_session(
+    ticket_id: uuid.UUID,
+    uploader_id: uuid.UUID,
+    session_in: models.UploadSessionCreate,
+    settings: Settings,
+) -> models.UploadSession:
+    if session_in.size > settings.resumable_upload_max_size:
+        raise UploadTooLarge(f"Dosya {settings.resumable_upload_max_size} bayt sınırını aşıyor.")
+    removed = await _run(settings, _cleanup_expired_sessions, _sessions_root(settings))
+    if removed:
+        print(f"INFO (ResumableUpload): Süresi geçmiş {removed} yükleme oturumu temizlendi.")
+
+    upload_id = uuid.uuid4()
+    meta = {
+        "id": str(upload_id),
+        "ticket_id": str(ticket_id),
+        "uploader_id": str(uploader_id),
+        "file_name": session_in.file_name,
+        "file_type": session_in.file_type,
+        "size": session_in.size,
+        "sha256": session_in.sha256,
+        "expires_at": (datetime.now(timezone.utc) + timedelta(seconds=settings.resumable_upload_ttl)).isoformat(),
+    }
+    await _run(settings, _write_session, _session_dir(upload_id, settings), meta)
+    return to_model(meta, 0)
+
+
+def _read_session(session_dir: Path) -> Optional[Dict[str, Any]]:
+    try:
+        meta = json.loads((session_dir / _META_FILE).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if datetime.fromisoformat(meta["expires_at"]) <= datetime.now(timezone.utc):
+        return None
+    return meta
+
+
+async def get_session(upload_id: uuid.UUID, uploader_id: uuid.UUID, settings: Settings) -> Optional[Dict[str, Any]]:
+    """Oturumun meta verisini döndürür; oturum yoksa, süresi geçtiyse veya başka kullanıcıya aitse None."""
+    meta = await _run(settings, _read_session, _session_dir(upload_id, settings))
+    if meta is None or meta["uploader_id"] != str(uploader_id):
+        return None
+    return meta
+
+
+async def get_offset(upload_id: uuid.UUID, settings: Settings) -> int:
+    """Sunucudaki offset'i döndürür; oturum tamamlanıyorsa UploadConflict fırlatır."""
+    return await _run(settings, _current_offset, _session_dir(upload_id, settings))
+
+
+async def delete_session(upload_id: uuid.UUID, settings: Settings) -> None:
+    await _run(settings, shutil.rmtree, _session_dir(upload_id, settings), True)
+
+
+# --- Parça ekleme ---
+
+def _open_for_append(data_path: Path, offset: int):
+    try:
+        data_file = open(data_path, "r+b")
+    except FileNotFoundError:
+        raise UploadConflict("Yükleme oturumu tamamlanıyor veya silinmiş.")
+    try:
+        fcntl.flock(data_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        data_file.close()
+        raise UploadConflict("Bu oturuma başka bir parça yazılıyor.")
+    current_offset = os.fstat(data_file.fileno()).st_size
+    if current_offset != offset:
+        data_file.close()
+        raise UploadConflict(f"Upload-Offset {offset} sunucudaki offset ({current_offset}) ile uyuşmuyor.", current_offset)
+    data_file.seek(offset)
+    return data_file
+
+
+def _close_append(data_file, truncate_to: Optional[int]) -> int:
+    try:
+        if truncate_to is not None:
+            data_file.truncate(truncate_to)
+        data_file.flush()
+        os.fsync(data_file.fileno())
+        return os.fstat(data_file.fileno()).st_size
+    finally:
+        data_file.close()  # flock dosya kapanınca bırakılır.
+
+
+async def append_chunk(request: Request, upload_id: uuid.UUID, meta: Dict[str, Any], offset: int, settings: Settings) -> int:
+    """
+    İstek gövdesini `offset`'ten itibaren oturum dosyasına akış halinde yazar ve yeni offset'i döndürür.
+    Toplam boyut aşılırsa parça tamamen geri alınır (UploadTooLarge); bağlantı koparsa o ana kadar
+    yazılan baytlar korunur, istemci HEAD ile öğrendiği offset'ten devam eder.
+    """
+    remaining = meta["size"] - offset
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > remaining:
+        raise UploadTooLarge(f"Parça, bildirilen dosya boyutunu ({meta['size']} bayt) aşıyor.")
+
+    data_file = await _run(settings, _open_for_append, _session_dir(upload_id, settings) / _DATA_FILE, offset)
+    written = 0
+    truncate_to: Optional[int] = None
+    try:
+        async for chunk in request.stream():
+            written += len(chunk)
+            if written > remaining:
+                truncate_to = offset
+                raise UploadTooLarge(f"Parça, bildirilen dosya boyutunu ({meta['size']} bayt) aşıyor.")
+            await _run(settings, data_file.write, chunk)
+    except ClientDisconnect:
+        print(f"UYARI (ResumableUpload): {upload_id} oturumunda parça yarıda kaldı; {written} bayt yazıldı.")
+    finally:
+        new_offset = await _run(settings, _close_append, data_file, truncate_to)
+    return new_offset
+
+
+# --- Tamamlama ---
+
+def _hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as data_file:
+        while chunk := data_file.read(_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _begin_finalize(session_dir: Path) -> Path:
+    # data.part'ı atomik olarak yeniden adlandırmak oturumu "kilitler": eşzamanlı finalize/PATCH çakışır.
+    finalizing_path = session_dir / _FINALIZING_FILE
+    try:
+        os.rename(session_dir / _DATA_FILE, finalizing_path)
+    except FileNotFoundError:
+        raise UploadConflict("Yükleme oturumu zaten tamamlanıyor.")
+    # Değişiklik zamanı finalize'ın başladığı an olur; temizlik buna bakarak sürmekte olan finalize'ı atlar.
+    os.utime(finalizing_path)
+    return finalizing_path
+
+
+async def finalize(
+    db: AsyncSession,
+    upload_id: uuid.UUID,
+    meta: Dict[str, Any],
+    settings: Settings,
+) -> db_models.Attachment:
+    """Tüm baytlar geldiyse dosyayı doğrular, depoya taşır ve ek kaydını oluşturur; oturum silinir."""
+    session_dir = _session_dir(upload_id, settings)
+    offset = await _run(settings, _current_offset, session_dir)
+    if offset != meta["size"]:
+        raise InvalidUpload(f"Yükleme tamamlanmadı: {offset}/{meta['size']} bayt alındı.")
+
+    finalizing_path = await _run(settings, _begin_finalize, session_dir)
+    try:
+        sha256 = await _run(settings, _hash_file, finalizing_path)
+        if meta.get("sha256") and meta["sha256"] != sha256:
+            await delete_session(upload_id, settings)
+            raise InvalidUpload("Dosyanın SHA-256 değeri oturumda bildirilenle uyuşmuyor; yükleme silindi.")
+        db_attachment = await attachment_store.store_file(
+            db, finalizing_path, sha256=sha256, size=meta["size"], file_name=meta["file_name"],
+            file_type=meta["file_type"], ticket_id=uuid.UUID(meta["ticket_id"]),
+            uploader_id=uuid.UUID(meta["uploader_id"]), settings=settings,
+        )
+    except BaseException:
+        # Başarısız tamamlama (örn. veritabanı hatası) tekrar denenebilsin.
+        if finalizing_path.exists():
+            await _run(settings, os.rename, finalizing_path, session_dir / _DATA_FILE)
+        raise
+    await delete_session(upload_id, settings)
+    return db_attachment
@@ -0,0 +1,139 @@
+# ticket_service/search.py
+"""
+Bilet tam metin araması için veritabanına özgü yardımcılar.
+
+PostgreSQL'de `tickets.search_vector` (tsvector) kolonu tetikleyicilerle güncel tutulur
+ve GIN indeksi üzerinden sorgulanır. Testlerin çevrimdışı çalışabilmesi için SQLite'ta
+aynı arama bir FTS5 sanal tablosu (`tickets_fts`) üzerinden yapılır.
+"""
+import re
+import uuid
+from typing import Tuple
+
+from sqlalchemy import column, event, func, literal_column, select, table, text
+from sqlalchemy.sql.elements import ColumnElement
+
+from . import db_models
+from .database import Base
+
+SEARCH_CONFIG = "turkish"
+
+# Türkçe'de "I" -> "ı", "İ" -> "i" olarak küçültülmelidir; str.lower() bunu yapmaz.
+_TR_LOWER_MAP = str.maketrans({"I": "ı", "İ": "i"})
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+tickets_fts = table(
+    "tickets_fts",
+    column("ticket_id"),
+    column("title"),
+    column("description"),
+    column("comments"),
+)
+
+
+def normalize_search_text(value: str) -> str:
+    """Metni Türkçe büyük/küçük harf kurallarına göre küçültür."""
+    return (value or "").translate(_TR_LOWER_MAP).lower()
+
+
+# --- PostgreSQL ---
+
+def pg_rank_and_match(query_text: str) -> Tuple[ColumnElement, ColumnElement]:
+    """tsvector kolonu için (sıralama ifadesi, eşleşme koşulu) çiftini döndürür."""
+    ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, normalize_search_text(query_text))
+    rank = func.ts_rank_cd(db_models.Ticket.search_vector, ts_query)
+    match = db_models.Ticket.search_vector.op("@@")(ts_query)
+    return rank, match
+
+
+# --- SQLite FTS5 (çevrimdışı testler için) ---
+
+def sqlite_match_expression(query_text: str) -> str:
+    """Kullanıcı girdisini güvenli bir FTS5 MATCH ifadesine çevirir (terimler AND ile bağlanır)."""
+    tokens = _TOKEN_RE.findall(normalize_search_text(query_text))
+    return " ".join(f'"{token}"' for token in tokens)
+
+
+def sqlite_rank_and_match(match_expression: str) -> Tuple[ColumnElement, ColumnElement]:
+    """FTS5 tablosu için (sıralama ifadesi, eşleşme koşulu) çiftini döndürür."""
+    fts_table = literal_column("tickets_fts")
+    # bm25 küçük değerde daha iyidir; PostgreSQL ile aynı yönde sıralamak için işaretini çeviriyoruz.
+    rank = -func.bm25(fts_table, 10.0, 5.0, 1.0)
+    match = fts_table.op("MATCH")(match_expression)
+    return rank, match
+
+
+def _sqlite_fts_key(ticket_id: uuid.UUID) -> str:
+    # SQLite'ta UUID kolonları tiresiz hex olarak saklanır; join için aynı biçimi kullanıyoruz.
+    return ticket_id.hex
+
+
+def _refresh_sqlite_fts_row(connection, ticket_id: uuid.UUID) -> None:
+    key = _sqlite_fts_key(ticket_id)
+    connection.execute(text("DELETE FROM tickets_fts WHERE ticket_id = :key"), {"key": key})
+
+    ticket_row = connection.execute(
+        select(db_models.Ticket.title, db_models.Ticket.description).where(db_models.Ticket.id == ticket_id)
+    ).first()
+    if ticket_row is None:
+        return
+    comment_contents = connection.execute(
+        select(db_models.Comment.content).where(db_models.Comment.ticket_id == ticket_id)
+    ).scalars().all()
+
+    connection.execute(
+        text("INSERT INTO tickets_fts (ticket_id, title, description, comments) VALUES (:key, :title, :description, :comments)"),
+        {
+            "key": key,
+            "title": normalize_search_text(ticket_row.title),
+            "description": normalize_search_text(ticket_row.description),
+            "comments": normalize_search_text(" ".join(comment_contents)),
+        },
+    )
+
+
+def reindex_sqlite_tickets(connection, ticket_ids) -> None:
+    """ORM olayları dışında (örn. toplu içe aktarım) yazılan biletlerin FTS satırlarını yeniler."""
+    if connection.dialect.name != "sqlite":
+        return
+    for ticket_id in set(ticket_ids):
+        _refresh_sqlite_fts_row(connection, ticket_id)
+
+
+def unindex_sqlite_tickets(connection, ticket_ids) -> None:
+    """Toplu silinen biletlerin FTS satırlarını kaldırır."""
+    if connection.dialect.name != "sqlite":
+        return
+    for ticket_id in set(ticket_ids):
+        connection.execute(text("DELETE FROM tickets_fts WHERE ticket_id = :key"), {"key": _sqlite_fts_key(ticket_id)})
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_sqlite_fts_table(target, connection, **kw):
+    if connection.dialect.name != "sqlite":
+        return
+    connection.execute(text(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS tickets_fts "
+        "USING fts5(ticket_id UNINDEXED, title, description, comments, tokenize='unicode61 remove_diacritics 0')"
+    ))
+
+
+@event.listens_for(db_models.Ticket, "after_insert")
+@event.listens_for(db_models.Ticket, "after_update")
+def _index_ticket_sqlite(mapper, connection, target):
+    if connection.dialect.name == "sqlite":
+        _refresh_sqlite_fts_row(connection, target.id)
+
+
+@event.listens_for(db_models.Ticket, "after_delete")
+def _unindex_ticket_sqlite(mapper, connection, target):
+    if connection.dialect.name == "sqlite":
+        connection.execute(text("DELETE FROM tickets_fts WHERE ticket_id = :key"), {"key": _sqlite_fts_key(target.id)})
+
+
+@event.listens_for(db_models.Comment, "after_insert")
+@event.listens_for(db_models.Comment, "after_update")
+@event.listens_for(db_models.Comment, "after_delete")
+def _index_comment_sqlite(mapper, connection, target):
+    if connection.dialect.name == "sqlite":
+        _refresh_sqlite_fts_row(connection, target.ticket_id)
@@ -30,6 +30,8 @@ setup(
         'uvicorn[standard]==0.29.0',
         'SQLAlchemy==2.0.30',
         'psycopg2-binary==2.9.9',
+        'asyncpg==0.29.0',
+        'aiosqlite==0.20.0',
         'alembic==1.13.1',
         'python-jose[cryptography]==3.3.0',
         'pyjwt==2.8.0',
@@ -38,10 +40,14 @@ setup(
         'pydantic==2.7.1',
         'pydantic-settings==2.2.1',
         'hvac==1.2.0',
+        # upload_stream doğrudan python_multipart'ın ayrıştırıcısını kullanır (`python_multipart` modül adı
+        # ve MultipartParser geri çağırımları); 0.x içinde bu API'nin bozulmadığı aralıkla sınırlı.
+        'python-multipart>=0.0.20,<0.1',
     ],
     entry_points={
         'console_scripts': [
             'ticket_service_app=ticket_service.main:app',
+            'ticket_service_import=ticket_service.bulk_import:main',
         ],
     },
     author='Umut Celik',
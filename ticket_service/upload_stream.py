@@ -0,0 +1,272 @@
+# ticket_service/upload_stream.py
+"""
+Dosya eki yüklemelerinin akış (streaming) halinde işlenmesi.
+
+Starlette'in form ayrıştırıcısı tüm gövdeyi geçici dosyalara biriktirdikten sonra endpoint'i çağırır;
+boyut sınırı ancak her şey okunduktan sonra uygulanabilir. Burada multipart gövde `request.stream()`
+üzerinden parça parça ayrıştırılır:
+
+- Her dosyanın baytları geldikçe sayılır ve SHA-256'sı hesaplanır; dosya başına ve istek başına sınır
+  aşıldığı anda (Content-Length zaten büyükse gövde hiç okunmadan) 413 döner.
+- Küçük dosyalar bellekte tutulur (içerik depoda varsa diske hiç yazılmaz); `_SPOOL_MAX_SIZE`'ı aşan
+  dosyalar depo kökündeki `tmp/` altına yazılır (os.replace ile aynı dosya sistemi içinde taşınabilsin).
+- Disk yazma, hash ve fsync işlemleri sınırlı bir thread havuzunda yapılır; bir dosyanın yazması
+  sürerken ağdan sonraki parça okunur ve biten dosyaların kapatılması sonraki dosyalarla eşzamanlı yürür.
+- Hata veya iptal durumunda yarım kalan geçici dosyalar silinir.
+"""
+import asyncio
+import hashlib
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+import python_multipart
+from python_multipart.multipart import parse_options_header
+from starlette.requests import ClientDisconnect, Request
+
+from .config import Settings
+
+# Bu boyuta kadar olan dosyalar bellekte tutulur (Starlette'in SpooledTemporaryFile sınırıyla aynı).
+_SPOOL_MAX_SIZE = 1024 * 1024
+
+_upload_executor: Optional[ThreadPoolExecutor] = None
+
+
+class UploadTooLarge(Exception):
+    """Dosya veya istek boyut sınırı aşıldı (413)."""
+
+
+class InvalidUpload(Exception):
+    """Multipart gövde geçersiz veya dosya sayısı sınırı aşıldı (400)."""
+
+
+def get_upload_executor(settings: Settings) -> ThreadPoolExecutor:
+    global _upload_executor
+    if _upload_executor is None:
+        _upload_executor = ThreadPoolExecutor(
+            max_workers=settings.attachment_upload_workers, thread_name_prefix="attachment-upload"
+        )
+    return _upload_executor
+
+
+def shutdown() -> None:
+    global _upload_executor
+    if _upload_executor is not None:
+        _upload_executor.shutdown(wait=True)
+    _upload_executor = None
+
+
+class StagedUpload:
+    """
+    Akış halinde alınmış bir dosya: hash'i, boyutu ve içeriği (bellekte veya geçici dosyada).
+    `write`, `finish`, `materialize` ve `discard` thread havuzunda çağrılır.
+    """
+
+    def __init__(self, file_name: str, content_type: Optional[str], temp_dir: Path):
+        self.file_name = file_name
+        self.content_type = content_type
+        self.size = 0
+        self.sha256: Optional[str] = None
+        self._digest = hashlib.sha256()
+        self._buffer = bytearray()
+        self._temp_dir = temp_dir
+        self._temp_path: Optional[Path] = None
+        self._temp_file = None
+
+    def write(self, data: bytes) -> None:
+        self._digest.update(data)
+        if self._temp_file is None and len(self._buffer) + len(data) <= _SPOOL_MAX_SIZE:
+            self._buffer.extend(data)
+            return
+        if self._temp_file is None:
+            self._temp_dir.mkdir(parents=True, exist_ok=True)
+            self._temp_path = self._temp_dir / f"{uuid.uuid4().hex}.part"
+            self._temp_file = open(self._temp_path, "wb")
+            self._temp_file.write(self._buffer)
+            self._buffer = bytearray()
+        self._temp_file.write(data)
+
+    def finish(self) -> None:
+        if self._temp_file is not None:
+            self._temp_file.flush()
+            os.fsync(self._temp_file.fileno())
+            self._temp_file.close()
+            self._temp_file = None
+        self.sha256 = self._digest.hexdigest()
+
+    def materialize(self, blob_path: Path) -> None:
+        """İçeriği atomik olarak `blob_path`'e koyar (geçici dosya varsa taşınır, yoksa yazılır)."""
+        blob_path.parent.mkdir(parents=True, exist_ok=True)
+        if self._temp_path is not None:
+            os.replace(self._temp_path, blob_path)
+            self._temp_path = None
+            return
+        temp_path = blob_path.with_name(f".{blob_path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            with open(temp_path, "wb") as buffer:
+                buffer.write(self._buffer)
+                buffer.flush()
+                os.fsync(buffer.fileno())
+            os.replace(temp_path, blob_path)
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+
+    def discard(self) -> None:
+        if self._temp_file is not None:
+            self._temp_file.close()
+            self._temp_file = None
+        if self._temp_path is not None:
+            self._temp_path.unlink(missing_ok=True)
+            self._temp_path = None
+        self._buffer = bytearray()
+
+
+class AttachmentUploadReader:
+    """`files` alanındaki dosyaları multipart gövdeden akış halinde okuyup StagedUpload olarak hazırlar."""
+
+    def __init__(self, request: Request, settings: Settings):
+        self.request = request
+        self.settings = settings
+        self.executor = get_upload_executor(settings)
+        self.temp_dir = Path(settings.attachment_storage_dir) / "tmp"
+        self.uploads: List[StagedUpload] = []
+        self._received = 0
+        # Ayrıştırıcı geri çağırımları senkron; yazılacak veriler burada toplanıp her ağ parçasından sonra işlenir.
+        self._current: Optional[StagedUpload] = None
+        self._current_is_file = False
+        self._header_name = b""
+        self._header_value = b""
+        self._headers: dict = {}
+        self._pending_data: List[tuple] = []
+        self._finished: List[StagedUpload] = []
+        # Dosya başına en fazla bir yazma işi havada olur (sıra korunur).
+        self._inflight: dict = {}
+        self._finish_tasks: List[asyncio.Future] = []
+
+    # --- python-multipart geri çağırımları ---
+
+    def _on_part_begin(self) -> None:
+        self._headers = {}
+        self._current = None
+        self._current_is_file = False
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers[self._header_name.lower()] = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        if options.get(b"name") != b"files" or b"filename" not in options:
+            return  # Diğer alanlar yok sayılır.
+        if len(self.uploads) >= self.settings.attachment_max_files:
+            raise InvalidUpload(f"Tek istekte en fazla {self.settings.attachment_max_files} dosya yüklenebilir.")
+        content_type = self._headers.get(b"content-type")
+        self._current = StagedUpload(
+            file_name=options[b"filename"].decode("utf-8", errors="replace"),
+            content_type=content_type.decode("latin-1") if content_type else None,
+            temp_dir=self.temp_dir,
+        )
+        self._current_is_file = True
+        self.uploads.append(self._current)
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if not self._current_is_file:
+            return
+        chunk = data[start:end]
+        self._current.size += len(chunk)
+        if self._current.size > self.settings.attachment_max_file_size:
+            raise UploadTooLarge(
+                f"'{self._current.file_name}' dosyası {self.settings.attachment_max_file_size} bayt sınırını aşıyor."
+            )
+        self._pending_data.append((self._current, chunk))
+
+    def _on_part_end(self) -> None:
+        if self._current_is_file:
+            self._finished.append(self._current)
+        self._current = None
+        self._current_is_file = False
+
+    # --- Akış ---
+
+    async def _submit(self, upload: StagedUpload, func, *args) -> None:
+        previous = self._inflight.get(id(upload))
+        if previous is not None:
+            await previous
+        loop = asyncio.get_running_loop()
+        self._inflight[id(upload)] = loop.run_in_executor(self.executor, func, *args)
+
+    async def _drain(self) -> None:
+        for upload, chunk in self._pending_data:
+            await self._submit(upload, upload.write, chunk)
+        self._pending_data.clear()
+        for upload in self._finished:
+            await self._submit(upload, upload.finish)
+            self._finish_tasks.append(self._inflight.pop(id(upload)))
+        self._finished.clear()
+
+    async def read(self) -> List[StagedUpload]:
+        """Gövdeyi okur; sınır aşımında UploadTooLarge, bozuk gövdede InvalidUpload fırlatır (yarım dosyalar silinir)."""
+        max_request_size = self.settings.attachment_max_request_size
+        content_length = self.request.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > max_request_size:
+            raise UploadTooLarge(f"İstek gövdesi {max_request_size} bayt sınırını aşıyor.")
+
+        content_type, params = parse_options_header(self.request.headers.get("content-type", ""))
+        boundary = params.get(b"boundary")
+        if content_type != b"multipart/form-data" or not boundary:
+            raise InvalidUpload("Dosyalar multipart/form-data olarak gönderilmelidir.")
+
+        parser = python_multipart.MultipartParser(boundary, {
+            "on_part_begin": self._on_part_begin,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+        })
+        try:
+            async for chunk in self.request.stream():
+                self._received += len(chunk)
+                if self._received > max_request_size:
+                    raise UploadTooLarge(f"İstek gövdesi {max_request_size} bayt sınırını aşıyor.")
+                try:
+                    parser.write(chunk)
+                except python_multipart.exceptions.MultipartParseError as e:
+                    raise InvalidUpload(f"Multipart gövde ayrıştırılamadı: {e}") from e
+                await self._drain()
+            parser.finalize()
+            await self._drain()
+            await asyncio.gather(*self._finish_tasks)
+            if any(upload.sha256 is None for upload in self.uploads):
+                raise InvalidUpload("Multipart gövde eksik (son dosya tamamlanmadı).")
+        except BaseException as e:
+            await self.discard_all()
+            if isinstance(e, ClientDisconnect):
+                raise InvalidUpload("İstemci yükleme tamamlanmadan bağlantıyı kapattı.") from e
+            raise
+        if not self.uploads:
+            raise InvalidUpload("Yüklenecek dosya bulunamadı ('files' alanı boş).")
+        return self.uploads
+
+    async def discard_all(self) -> None:
+        """Havadaki yazmaların bitmesini bekleyip tüm geçici dosyaları siler."""
+        pending = [*self._inflight.values(), *self._finish_tasks]
+        self._inflight.clear()
+        self._finish_tasks.clear()
+        await asyncio.gather(*pending, return_exceptions=True)
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(loop.run_in_executor(self.executor, upload.discard) for upload in self.uploads),
+            return_exceptions=True,
+        )
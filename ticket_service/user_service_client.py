@@ -0,0 +1,264 @@
+# ticket_service/user_service_client.py
+"""
+user_service ile dahili iletişim.
+
+- Tüm çağrılar lifespan'de açılıp kapanan tek bir httpx.AsyncClient üzerinden yapılır.
+- Tenant dizini (grup adı -> tenant ID) önbelleğe alınır; bilet oluştururken token'daki `groups`
+  yerel olarak çözülür ve user_service'e istek atılmaz.
+- Kullanıcı senkronizasyonu (JIT) istek yolundan çıkarılıp arka plan kuyruğuna bırakılır.
+- Bilet detaylarında gösterilen kullanıcı bilgileri TTL/LRU önbellekten sunulur; çok sayıda kullanıcı
+  (örn. yorum yazarları) önbellekte olmayanlar için tek bir toplu istekle çözülür.
+"""
+import asyncio
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from . import models
+from .cache import AsyncTTLCache
+from .config import Settings
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+# --- Tenant dizini önbelleği ---
+_tenant_id_by_name: Dict[str, uuid.UUID] = {}
+_tenant_directory_loaded_at: float = 0.0  # time.monotonic(); 0 = hiç yüklenmedi
+_tenant_directory_lock = asyncio.Lock()
+# Dizinde bulunamayan bir grup için (yeni tenant olabilir) en sık bu aralıkla zorunlu yenileme yapılır.
+_TENANT_DIRECTORY_MISS_REFRESH_SECONDS = 10.0
+
+# --- Kullanıcı senkronizasyon kuyruğu ---
+_user_sync_queue: Optional[asyncio.Queue] = None
+_pending_user_syncs: Dict[str, Dict[str, Any]] = {}  # user id -> en güncel payload
+_user_sync_worker: Optional[asyncio.Task] = None
+_USER_SYNC_MAX_ATTEMPTS = 3
+
+# --- Kullanıcı detay önbelleği (ilk kullanımda ayarlardan oluşturulur) ---
+_user_details_cache: Optional[AsyncTTLCache[models.UserInTicketResponse]] = None
+# user_service'ten yalnızca bilet yanıtlarında gösterilen alanlar istenir.
+_USER_DETAILS_FIELDS = ",".join(models.UserInTicketResponse.model_fields)
+# /internal/users/batch'in tek istekte kabul ettiği en fazla ID sayısı.
+_USER_BATCH_MAX_IDS = 5000
+
+
+def _internal_headers(settings: Settings) -> Dict[str, str]:
+    return {"X-Internal-Secret": settings.internal_service_secret or ""}
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    # Lifespan dışında (örn. testlerde) ilk kullanımda oluşturulur.
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(verify=False, timeout=httpx.Timeout(10.0))
+    return _http_client
+
+
+async def start(settings: Settings) -> None:
+    """Paylaşılan HTTP istemcisini ve kullanıcı senkronizasyon işçisini başlatır (lifespan başlangıcı)."""
+    global _user_sync_queue, _user_sync_worker
+    _get_http_client()
+    if _user_sync_worker is None or _user_sync_worker.done():
+        _user_sync_queue = asyncio.Queue(maxsize=settings.user_sync_queue_size)
+        _user_sync_worker = asyncio.create_task(_run_user_sync_worker(settings), name="user-sync-worker")
+    print("USER_SVC_CLIENT: user_service istemcisi ve senkronizasyon kuyruğu başlatıldı.")
+
+
+async def stop(drain_timeout: float = 5.0) -> None:
+    """Kuyruktaki senkronizasyonları kısa bir süre boşaltmaya çalışır, ardından işçiyi ve istemciyi kapatır."""
+    global _http_client, _user_sync_worker, _user_sync_queue
+    if _user_sync_queue is not None and _user_sync_worker is not None and not _user_sync_worker.done():
+        try:
+            await asyncio.wait_for(_user_sync_queue.join(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            print(f"UYARI (USER_SVC_CLIENT): Kapanışta {len(_pending_user_syncs)} kullanıcı senkronizasyonu işlenemedi.")
+        _user_sync_worker.cancel()
+        try:
+            await _user_sync_worker
+        except asyncio.CancelledError:
+            pass
+    _user_sync_worker = None
+    _user_sync_queue = None
+    _pending_user_syncs.clear()
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+    _http_client = None
+
+
+# --- Tenant dizini ---
+
+async def _refresh_tenant_directory(settings: Settings) -> None:
+    global _tenant_id_by_name, _tenant_directory_loaded_at
+    response = await _get_http_client().get(
+        f"{settings.user_service_url}/api/users/internal/tenants", headers=_internal_headers(settings)
+    )
+    response.raise_for_status()
+    _tenant_id_by_name = {entry["name"]: uuid.UUID(entry["id"]) for entry in response.json()}
+    _tenant_directory_loaded_at = time.monotonic()
+    print(f"USER_SVC_CLIENT: Tenant dizini yenilendi ({len(_tenant_id_by_name)} tenant).")
+
+
+async def _ensure_tenant_directory(settings: Settings, max_age: float) -> None:
+    """Dizin `max_age` saniyeden eskiyse tek bir istekle yeniler (eşzamanlı çağıranlar aynı yenilemeyi bekler)."""
+    if _tenant_directory_loaded_at and time.monotonic() - _tenant_directory_loaded_at < max_age:
+        return
+    async with _tenant_directory_lock:
+        if _tenant_directory_loaded_at and time.monotonic() - _tenant_directory_loaded_at < max_age:
+            return
+        try:
+            await _refresh_tenant_directory(settings)
+        except (httpx.HTTPError, ValueError, KeyError) as e:
+            if not _tenant_directory_loaded_at:
+                raise
+            # Elimizde eski bir dizin varsa onunla hizmet vermeye devam ediyoruz.
+            print(f"UYARI (USER_SVC_CLIENT): Tenant dizini yenilenemedi, önbellekteki sürüm kullanılıyor: {e}")
+
+
+def _match_tenant(group_paths: List[str]) -> Optional[uuid.UUID]:
+    # user_service ile aynı kural: grup yolunun son parçası şirket adıdır ("/Acme" -> "Acme").
+    for group_path in group_paths or []:
+        tenant_id = _tenant_id_by_name.get(group_path.strip("/").split("/")[-1])
+        if tenant_id:
+            return tenant_id
+    return None
+
+
+async def resolve_tenant_id(group_paths: List[str], settings: Settings) -> Optional[uuid.UUID]:
+    """
+    Token'daki grup yollarını önbellekteki tenant dizini üzerinden yerel tenant ID'sine çözer.
+    Eşleşme yoksa (yeni oluşturulmuş bir tenant olabilir) dizin sınırlı sıklıkta yeniden yüklenir.
+    Dizin hiç yüklenemediyse httpx.HTTPError fırlatır.
+    """
+    await _ensure_tenant_directory(settings, max_age=settings.tenant_directory_ttl)
+    tenant_id = _match_tenant(group_paths)
+    if tenant_id is None and group_paths:
+        await _ensure_tenant_directory(settings, max_age=_TENANT_DIRECTORY_MISS_REFRESH_SECONDS)
+        tenant_id = _match_tenant(group_paths)
+    return tenant_id
+
+
+# --- Kullanıcı senkronizasyon kuyruğu ---
+
+def enqueue_user_sync(sync_payload: Dict[str, Any]) -> None:
+    """
+    Kullanıcının user_service'e senkronizasyonunu arka plana bırakır. Aynı kullanıcı için
+    bekleyen bir iş varsa yalnızca payload güncellenir. Kuyruk doluysa iş düşürülür;
+    kullanıcı bir sonraki girişinde (/users/me) zaten senkronize edilir.
+    """
+    user_id = sync_payload.get("id")
+    if not user_id or _user_sync_queue is None:
+        return
+    if user_id in _pending_user_syncs:
+        _pending_user_syncs[user_id] = sync_payload
+        return
+    try:
+        _user_sync_queue.put_nowait(user_id)
+    except asyncio.QueueFull:
+        print(f"UYARI (USER_SVC_CLIENT): Senkronizasyon kuyruğu dolu, kullanıcı {user_id} için iş düşürüldü.")
+        return
+    _pending_user_syncs[user_id] = sync_payload
+
+
+async def _sync_user(sync_payload: Dict[str, Any], settings: Settings) -> None:
+    sync_url = f"{settings.user_service_url}/api/users/internal/users/sync"
+    for attempt in range(1, _USER_SYNC_MAX_ATTEMPTS + 1):
+        try:
+            response = await _get_http_client().post(sync_url, json=sync_payload, headers=_internal_headers(settings))
+            if response.status_code < 500:
+                if response.status_code >= 400:
+                    print(f"HATA (USER_SVC_CLIENT): Kullanıcı {sync_payload.get('id')} senkronize edilemedi: {response.status_code} - {response.text[:200]}")
+                return
+        except httpx.RequestError as e:
+            print(f"UYARI (USER_SVC_CLIENT): user_service'e ulaşılamadı ({attempt}/{_USER_SYNC_MAX_ATTEMPTS}): {e}")
+        await asyncio.sleep(0.5 * (2 ** (attempt - 1)))
+    print(f"HATA (USER_SVC_CLIENT): Kullanıcı {sync_payload.get('id')} {_USER_SYNC_MAX_ATTEMPTS} denemede senkronize edilemedi.")
+
+
+async def _run_user_sync_worker(settings: Settings) -> None:
+    queue = _user_sync_queue
+    while True:
+        user_id = await queue.get()
+        try:
+            sync_payload = _pending_user_syncs.pop(user_id, None)
+            if sync_payload is not None:
+                await _sync_user(sync_payload, settings)
+        except Exception as e:
+            print(f"HATA (USER_SVC_CLIENT): Senkronizasyon işçisinde beklenmedik hata: {e}")
+        finally:
+            queue.task_done()
+
+
+# --- Kullanıcı detayları ---
+
+def _get_user_details_cache(settings: Settings) -> AsyncTTLCache[models.UserInTicketResponse]:
+    global _user_details_cache
+    if _user_details_cache is None:
+        _user_details_cache = AsyncTTLCache(
+            max_entries=settings.user_cache_max_entries,
+            ttl=settings.user_cache_ttl,
+            stale_ttl=settings.user_cache_stale_ttl,
+            negative_ttl=settings.user_cache_negative_ttl,
+        )
+    return _user_details_cache
+
+
+async def _fetch_user_details(user_id: uuid.UUID, settings: Settings) -> Optional[models.UserInTicketResponse]:
+    response = await _get_http_client().get(
+        f"{settings.user_service_url}/api/users/internal/users/{user_id}",
+        params={"fields": _USER_DETAILS_FIELDS},
+        headers=_internal_headers(settings),
+    )
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return models.UserInTicketResponse(**response.json())
+
+
+async def get_user_details(user_id: uuid.UUID, settings: Settings) -> Optional[models.UserInTicketResponse]:
+    """
+    Kullanıcının bilet yanıtlarında gösterilecek bilgilerini önbellek üzerinden getirir.
+    Kullanıcı yoksa None döner; user_service'e ulaşılamazsa (ve önbellekte değer yoksa) httpx.HTTPError fırlatır.
+    """
+    cache = _get_user_details_cache(settings)
+    return await cache.get_or_load(user_id, lambda: _fetch_user_details(user_id, settings))
+
+
+async def get_users_details(
+    user_ids: List[uuid.UUID], settings: Settings
+) -> Dict[uuid.UUID, Optional[models.UserInTicketResponse]]:
+    """
+    Birden çok kullanıcının bilgilerini getirir; önbellekte taze olanlar oradan, kalanlar
+    /internal/users/batch ile tek istekte (en fazla _USER_BATCH_MAX_IDS ID'lik parçalarla) çözülür.
+    Bulunamayan kullanıcılar None döner ve negatif olarak önbelleğe alınır.
+    user_service'e ulaşılamazsa httpx.HTTPError fırlatır.
+    """
+    cache = _get_user_details_cache(settings)
+    users: Dict[uuid.UUID, Optional[models.UserInTicketResponse]] = {}
+    to_fetch: List[uuid.UUID] = []
+    for user_id in dict.fromkeys(user_ids):
+        found, user = cache.peek(user_id)
+        if found:
+            users[user_id] = user
+        else:
+            to_fetch.append(user_id)
+
+    for start in range(0, len(to_fetch), _USER_BATCH_MAX_IDS):
+        chunk = to_fetch[start:start + _USER_BATCH_MAX_IDS]
+        response = await _get_http_client().post(
+            f"{settings.user_service_url}/api/users/internal/users/batch",
+            json={"ids": [str(user_id) for user_id in chunk]},
+            headers=_internal_headers(settings),
+        )
+        response.raise_for_status()
+        body = response.json()
+        fetched = {uuid.UUID(user_id): models.UserInTicketResponse(**user) for user_id, user in body["users"].items()}
+        for user_id in chunk:
+            user = fetched.get(user_id)
+            cache.put(user_id, user)
+            users[user_id] = user
+    return users
+
+
+def get_user_details_cache_stats() -> Dict[str, Any]:
+    return _user_details_cache.stats() if _user_details_cache is not None else {}
@@ -0,0 +1,34 @@
+"""add keycloak sync state table
+
+Revision ID: 5b1d7c2e9a40
+Revises: 94d68e7833d9
+Create Date: 2026-10-16 23:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b1d7c2e9a40'
+down_revision: Union[str, None] = '94d68e7833d9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('keycloak_sync_state',
+    sa.Column('name', sa.String(length=64), nullable=False, comment='Senkronizasyon akışının adı (örn: admin_events)'),
+    sa.Column('last_event_time', sa.BigInteger(), nullable=False, comment="İşlenmiş son admin event'in zamanı (epoch ms)"),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('name'),
+    schema='users_schema'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('keycloak_sync_state', schema='users_schema')
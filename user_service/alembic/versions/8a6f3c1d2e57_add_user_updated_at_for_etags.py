@@ -0,0 +1,31 @@
+"""add user updated_at for etags
+
+Revision ID: 8a6f3c1d2e57
+Revises: 5b1d7c2e9a40
+Create Date: 2026-10-16 23:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a6f3c1d2e57'
+down_revision: Union[str, None] = '5b1d7c2e9a40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True), schema='users_schema')
+    op.execute("UPDATE users_schema.users SET updated_at = created_at WHERE created_at IS NOT NULL;")
+    op.create_index('ix_users_updated_at', 'users', ['updated_at'], unique=False, schema='users_schema')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_updated_at', table_name='users', schema='users_schema')
+    op.drop_column('users', 'updated_at', schema='users_schema')
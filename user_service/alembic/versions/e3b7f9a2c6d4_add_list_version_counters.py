@@ -0,0 +1,76 @@
+"""add list version counters for etags
+
+Revision ID: e3b7f9a2c6d4
+Revises: 8a6f3c1d2e57
+Create Date: 2026-10-17 10:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3b7f9a2c6d4'
+down_revision: Union[str, None] = '8a6f3c1d2e57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (tablo şeması, tablo, sayaç adı)
+_COUNTED_TABLES = (
+    ('users_schema', 'users', 'users'),
+    ('public', 'companies', 'companies'),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for schema, _, _ in _COUNTED_TABLES:
+        op.create_table('list_versions',
+        sa.Column('name', sa.String(length=64), nullable=False, comment='Sayacı tutulan liste (örn: users)'),
+        sa.Column('version', sa.BigInteger(), server_default='0', nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+        schema=schema
+        )
+
+    # Sayaç commit anında (ertelenmiş constraint trigger) ve transaction başına bir kez artırılır: satırın
+    # kilidi yalnızca commit sırasında tutulur, değerler commit sırasıyla artar ve toplu yazmalar
+    # (örn. Keycloak senkronizasyonu) satır başına değil bir kez artırır.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION public.bump_list_version() RETURNS trigger AS $$
+        DECLARE
+            bumped_flag text := 'list_versions.bumped_' || TG_TABLE_SCHEMA || '_' || TG_ARGV[0];
+        BEGIN
+            IF current_setting(bumped_flag, true) IS DISTINCT FROM 'on' THEN
+                EXECUTE format(
+                    'INSERT INTO %I.list_versions AS v (name, version) VALUES ($1, 1) '
+                    'ON CONFLICT (name) DO UPDATE SET version = v.version + 1',
+                    TG_TABLE_SCHEMA
+                ) USING TG_ARGV[0];
+                PERFORM set_config(bumped_flag, 'on', true);
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+    for schema, table, list_name in _COUNTED_TABLES:
+        op.execute(f"""
+            CREATE CONSTRAINT TRIGGER {table}_bump_list_version
+            AFTER INSERT OR UPDATE OR DELETE ON {schema}.{table}
+            DEFERRABLE INITIALLY DEFERRED
+            FOR EACH ROW EXECUTE FUNCTION public.bump_list_version('{list_name}');
+        """)
+
+    # Liste ETag'i artık max(updated_at) kullanmıyor.
+    op.drop_index('ix_users_updated_at', table_name='users', schema='users_schema')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_users_updated_at', 'users', ['updated_at'], unique=False, schema='users_schema')
+    for schema, table, _ in _COUNTED_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_bump_list_version ON {schema}.{table};")
+    op.execute("DROP FUNCTION IF EXISTS public.bump_list_version();")
+    for schema, _, _ in _COUNTED_TABLES:
+        op.drop_table('list_versions', schema=schema)
@@ -1,13 +1,16 @@
 # user_service/company_crud.py
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy import select, func, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 import uuid
 
 # Kendi servisimize ait modelleri import ediyoruz
 from . import db_models  # SQLAlchemy modelleri (Company, User)
 from . import models as schemas # Pydantic modelleri (CompanyCreate, vb.) artık kendi models.py dosyamızda
 
-def create_company(db: Session, company: schemas.CompanyCreate) -> db_models.Company:
+async def create_company(db: AsyncSession, company: schemas.CompanyCreate) -> db_models.Company:
     """
     Veritabanında yeni bir şirket (tenant) kaydı oluşturur.
     """
@@ -17,66 +20,150 @@ def create_company(db: Session, company: schemas.CompanyCreate) -> db_models.Com
         status=company.status if company.status else "active" # Pydantic modelinde default var ama burada da kontrol
     )
     db.add(db_company)
-    db.commit()
-    db.refresh(db_company)
+    await db.commit()
+    await db.refresh(db_company)
     print(f"CRUD: Company created: {db_company.name} (ID: {db_company.id}, Keycloak Group ID: {db_company.keycloak_group_id})")
     return db_company
 
-def get_company(db: Session, company_id: uuid.UUID) -> Optional[db_models.Company]:
+async def bulk_upsert_companies(db: AsyncSession, companies: Sequence[schemas.CompanyCreate]) -> int:
+    """
+    Şirketleri `keycloak_group_id` üzerinden tek bir `INSERT ... ON CONFLICT DO UPDATE` ile ekler
+    veya adlarını günceller. Mevcut kayıtların durumu (status) değiştirilmez. Commit çağırana bırakılır.
+    Gerçekten yazılan (eklenen veya adı değişen) şirket sayısını döndürür.
+    """
+    if not companies:
+        return 0
+
+    insert = pg_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+    table = db_models.Company.__table__
+    stmt = insert(table).values([
+        {
+            "id": uuid.uuid4(),
+            "name": company.name,
+            "keycloak_group_id": company.keycloak_group_id,
+            "status": company.status or "active",
+        }
+        for company in companies
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.keycloak_group_id],
+        set_={"name": stmt.excluded.name, "updated_at": func.now()},
+        # Adı değişmeyen şirketlere dokunma (gereksiz satır yazımı ve updated_at değişimi olmasın).
+        where=table.c.name != stmt.excluded.name,
+    )
+    result = await db.execute(stmt)
+    return result.rowcount or 0
+
+async def get_company(db: AsyncSession, company_id: uuid.UUID) -> Optional[db_models.Company]:
     """
     Verilen ID'ye sahip şirketi veritabanından getirir.
     """
-    return db.query(db_models.Company).filter(db_models.Company.id == company_id).first()
+    result = await db.execute(select(db_models.Company).filter(db_models.Company.id == company_id))
+    return result.scalars().first()
 
-def get_company_by_name(db: Session, name: str) -> Optional[db_models.Company]:
+async def get_company_by_name(db: AsyncSession, name: str) -> Optional[db_models.Company]:
     """
     Verilen isme sahip şirketi veritabanından getirir.
     """
-    return db.query(db_models.Company).filter(db_models.Company.name == name).first()
+    result = await db.execute(select(db_models.Company).filter(db_models.Company.name == name))
+    return result.scalars().first()
 
-def get_company_by_keycloak_group_id(db: Session, keycloak_group_id: uuid.UUID) -> Optional[db_models.Company]:
+async def get_company_by_keycloak_group_id(db: AsyncSession, keycloak_group_id: uuid.UUID) -> Optional[db_models.Company]:
     """
     Verilen Keycloak grup ID'sine sahip şirketi veritabanından getirir.
     """
-    return db.query(db_models.Company).filter(db_models.Company.keycloak_group_id == keycloak_group_id).first()
+    result = await db.execute(select(db_models.Company).filter(db_models.Company.keycloak_group_id == keycloak_group_id))
+    return result.scalars().first()
 
-def get_companies(db: Session, skip: int = 0, limit: int = 100) -> List[db_models.Company]:
+async def get_companies(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[db_models.Company]:
     """
     Veritabanındaki şirketleri sayfalama yaparak listeler.
     """
-    return db.query(db_models.Company).offset(skip).limit(limit).all()
+    result = await db.execute(select(db_models.Company).offset(skip).limit(limit))
+    return list(result.scalars().all())
 
-def count_companies(db: Session) -> int:
+async def get_tenant_directory(db: AsyncSession) -> List[db_models.Company]:
+    """
+    Tüm şirketleri tenant dizini için (yalnızca gerekli kolonlarla, ada göre sıralı) döndürür.
+    """
+    result = await db.execute(
+        select(db_models.Company.id, db_models.Company.name, db_models.Company.keycloak_group_id, db_models.Company.status)
+        .order_by(db_models.Company.name)
+    )
+    return list(result.all())
+
+async def count_companies(db: AsyncSession) -> int:
     """
     Veritabanındaki toplam şirket (tenant) sayısını döndürür.
     """
-    return db.query(db_models.Company).count()
+    result = await db.execute(select(func.count()).select_from(db_models.Company))
+    return result.scalar_one()
+
+async def get_companies_version(db: AsyncSession) -> int:
+    """Tenant listesinin ETag'i için tetikleyicilerle tutulan şirket sayacı (tek birincil anahtar sorgusu)."""
+    result = await db.execute(
+        select(db_models.CompanyListVersion.version).where(db_models.CompanyListVersion.name == "companies")
+    )
+    return result.scalar_one_or_none() or 0
 
-def update_company(db: Session, company_db: db_models.Company, company_in: schemas.CompanyUpdate) -> db_models.Company:
+async def update_company(db: AsyncSession, company_id: uuid.UUID, company_in: schemas.CompanyUpdate) -> Optional[db_models.Company]:
     """
-    Mevcut bir şirketin bilgilerini günceller.
-    company_db: Güncellenecek SQLAlchemy Company nesnesi.
+    Mevcut bir şirketin bilgilerini tek bir `UPDATE ... RETURNING` ile günceller.
+    company_id: Güncellenecek şirketin ID'si.
     company_in: Pydantic CompanyUpdate modeli (güncellenecek alanları içerir).
+    Şirket yoksa None döner.
     """
     update_data = company_in.model_dump(exclude_unset=True) # Pydantic V2 için .model_dump()
-    for key, value in update_data.items():
-        setattr(company_db, key, value)
-
-    db.add(company_db) # Zaten session'da olduğu için db.add() gerekmeyebilir ama zararı olmaz.
-    db.commit()
-    db.refresh(company_db)
-    print(f"CRUD: Company updated: {company_db.name} (ID: {company_db.id})")
+    if not update_data:
+        return await get_company(db, company_id=company_id)
+    result = await db.execute(
+        update(db_models.Company)
+        .where(db_models.Company.id == company_id)
+        .values(**update_data)
+        .returning(db_models.Company)
+        .execution_options(populate_existing=True)
+    )
+    company_db = result.scalars().first()
+    await db.commit()
+    if company_db is not None:
+        print(f"CRUD: Company updated: {company_db.name} (ID: {company_db.id})")
     return company_db
 
-def delete_company(db: Session, company_id: uuid.UUID) -> Optional[db_models.Company]:
+async def delete_company(db: AsyncSession, company_id: uuid.UUID) -> Optional[db_models.Company]:
     """
     Verilen ID'ye sahip şirketi veritabanından siler (hard delete).
     Alternatif olarak status='deleted' olarak işaretlenebilir (soft delete).
     """
-    company_db = db.query(db_models.Company).filter(db_models.Company.id == company_id).first()
+    company_db = await get_company(db, company_id=company_id)
     if company_db:
         print(f"CRUD: Deleting company: {company_db.name} (ID: {company_db.id})")
-        db.delete(company_db)
-        db.commit()
+        await db.delete(company_db)
+        await db.commit()
         return company_db # Silinen nesne, commit sonrası session'dan çıkarılmış olabilir.
-    return None
\ No newline at end of file
+    return None
+
+async def get_company_ids_by_keycloak_group_ids(db: AsyncSession, keycloak_group_ids: Sequence[uuid.UUID]) -> Dict[uuid.UUID, uuid.UUID]:
+    """Keycloak grup ID'lerini yerel şirket ID'lerine eşler (tek sorgu)."""
+    if not keycloak_group_ids:
+        return {}
+    result = await db.execute(
+        select(db_models.Company.keycloak_group_id, db_models.Company.id)
+        .where(db_models.Company.keycloak_group_id.in_(keycloak_group_ids))
+    )
+    return {row.keycloak_group_id: row.id for row in result}
+
+async def delete_companies_by_keycloak_group_ids(db: AsyncSession, keycloak_group_ids: Sequence[uuid.UUID]) -> int:
+    """
+    Keycloak'ta silinmiş gruplara karşılık gelen şirketleri siler. Önce bu şirketlere bağlı
+    kullanıcıların bağlantısı kaldırılır (FK). Commit çağırana bırakılır.
+    """
+    if not keycloak_group_ids:
+        return 0
+    company_ids = select(db_models.Company.id).where(db_models.Company.keycloak_group_id.in_(keycloak_group_ids))
+    await db.execute(
+        update(db_models.User).where(db_models.User.company_id.in_(company_ids)).values(company_id=None)
+    )
+    result = await db.execute(
+        delete(db_models.Company).where(db_models.Company.keycloak_group_id.in_(keycloak_group_ids))
+    )
+    return result.rowcount or 0
@@ -28,6 +28,13 @@ if dotenv_path.exists():
 class DatabaseSettings(BaseModel):
     """Veritabanı bağlantı ayarları."""
     url: str = Field(default=os.getenv("DATABASE_URL", ""), description="PostgreSQL bağlantı adresi")
+    async_url: Optional[str] = Field(default=os.getenv("ASYNC_DATABASE_URL"), description="Async (asyncpg) bağlantı adresi; boşsa `url`'den türetilir")
+    pool_size: int = Field(default=int(os.getenv("DB_POOL_SIZE", "10")), description="Bağlantı havuzu boyutu")
+    max_overflow: int = Field(default=int(os.getenv("DB_MAX_OVERFLOW", "20")), description="Havuz dolduğunda açılabilecek ek bağlantı sayısı")
+    pool_timeout: float = Field(default=float(os.getenv("DB_POOL_TIMEOUT", "30")), description="Havuzdan bağlantı beklerken zaman aşımı (sn)")
+    pool_recycle: int = Field(default=int(os.getenv("DB_POOL_RECYCLE", "1800")), description="Bağlantıların yenilenme süresi (sn)")
+    connect_timeout: float = Field(default=float(os.getenv("DB_CONNECT_TIMEOUT", "10")), description="Bağlantı kurma zaman aşımı (sn)")
+    statement_timeout_ms: Optional[int] = Field(default=int(os.environ["DB_STATEMENT_TIMEOUT_MS"]) if os.getenv("DB_STATEMENT_TIMEOUT_MS") else None, description="Sorgu zaman aşımı (ms)")
 
 class KeycloakSettings(BaseModel):
     """Keycloak ile ilgili tüm ayarlar."""
@@ -44,6 +51,23 @@ class KeycloakSettings(BaseModel):
     admin_api_realm_url: Optional[str] = None 
     admin_api_token_endpoint: Optional[str] = None
 
+    # Admin API HTTP istemcisi: bağlantı havuzu, zaman aşımı ve yeniden deneme ayarları
+    admin_http_max_connections: int = Field(default=int(os.getenv("KEYCLOAK_HTTP_MAX_CONNECTIONS", "20")), description="Admin API için en fazla eşzamanlı bağlantı")
+    admin_http_max_keepalive: int = Field(default=int(os.getenv("KEYCLOAK_HTTP_MAX_KEEPALIVE", "10")), description="Havuzda açık tutulacak en fazla boşta bağlantı")
+    admin_http_timeout: float = Field(default=float(os.getenv("KEYCLOAK_HTTP_TIMEOUT", "10")), description="Admin API istek zaman aşımı (sn)")
+    admin_http_max_retries: int = Field(default=int(os.getenv("KEYCLOAK_HTTP_MAX_RETRIES", "3")), description="Geçici hatalarda en fazla yeniden deneme sayısı")
+    admin_http_retry_backoff: float = Field(default=float(os.getenv("KEYCLOAK_HTTP_RETRY_BACKOFF", "0.2")), description="Üstel geri çekilmenin başlangıç süresi (sn)")
+
+    # Başlangıç senkronizasyonu: Admin API sayfa boyutu ve aynı anda çekilecek sayfa sayısı
+    sync_page_size: int = Field(default=int(os.getenv("KEYCLOAK_SYNC_PAGE_SIZE", "500")), description="Senkronizasyonda Admin API'den tek seferde çekilecek kayıt sayısı")
+    sync_concurrency: int = Field(default=int(os.getenv("KEYCLOAK_SYNC_CONCURRENCY", "4")), description="Senkronizasyonda aynı anda çekilecek en fazla sayfa sayısı")
+    sync_max_attempts: int = Field(default=int(os.getenv("KEYCLOAK_SYNC_MAX_ATTEMPTS", "5")), description="Arka plan senkronizasyonu için en fazla deneme sayısı")
+    sync_retry_delay: float = Field(default=float(os.getenv("KEYCLOAK_SYNC_RETRY_DELAY", "5")), description="Başarısız senkronizasyon denemeleri arasındaki ilk bekleme (sn); her denemede iki katına çıkar")
+    # "full": her başlangıçta tam tarama. "incremental": watermark varsa yalnızca admin event'lerinden gelen
+    # değişiklikler uygulanır ve periyodik olarak yenileri çekilir (realm'de admin event kaydı açık olmalı).
+    sync_mode: str = Field(default=os.getenv("KEYCLOAK_SYNC_MODE", "full"), description="Senkronizasyon modu: full | incremental")
+    incremental_sync_interval: float = Field(default=float(os.getenv("KEYCLOAK_INCREMENTAL_SYNC_INTERVAL", "60")), description="Artımlı modda admin event'lerinin yoklanma aralığı (sn)")
+
 class VaultSettings(BaseModel):
     """HashiCorp Vault ile ilgili ayarlar."""
     addr: str = Field(default=os.getenv("VAULT_ADDR", "https://vault.cloudpro.com.tr"), description="Vault sunucu adresi")
@@ -61,6 +85,18 @@ class Settings(BaseModel):
 
 settings = Settings()
 
+# Async veritabanı URL'sini senkron URL'den türet (psycopg2 -> asyncpg, sqlite -> aiosqlite)
+if not settings.database.async_url:
+    sync_url = settings.database.url
+    if sync_url.startswith("postgresql+psycopg2://"):
+        settings.database.async_url = sync_url.replace("postgresql+psycopg2://", "postgresql+asyncpg://", 1)
+    elif sync_url.startswith("postgresql://"):
+        settings.database.async_url = sync_url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    elif sync_url.startswith("sqlite://"):
+        settings.database.async_url = sync_url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    else:
+        settings.database.async_url = sync_url
+
 # Keycloak Admin API URL'lerini issuer_uri'den otomatik olarak türet
 if settings.keycloak.issuer_uri:
     try:
@@ -99,6 +135,7 @@ else:
 print("-" * 50)
 print("User Service - Konfigürasyon Yüklendi")
 print(f"  Veritabanı URL'si Yüklendi: {'Evet' if settings.database.url else 'Hayır'}")
+print(f"  Veritabanı Havuzu: pool_size={settings.database.pool_size}, max_overflow={settings.database.max_overflow}, pool_timeout={settings.database.pool_timeout}s")
 print(f"  Keycloak Issuer: {settings.keycloak.issuer_uri}")
 print(f"  Keycloak Admin Client ID Yüklendi: {'Evet' if settings.keycloak.admin_client_id else 'Hayır'}")
 print(f"  Keycloak Admin Client Secret Yüklendi: {'Evet' if settings.keycloak.admin_client_secret else 'Hayır'}")
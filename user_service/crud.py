@@ -1,73 +1,161 @@
 # user_service/crud.py
-from sqlalchemy.orm import Session
+from sqlalchemy import select, func, update, delete, any_, bindparam, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy.dialects.postgresql import insert as pg_insert, ARRAY, UUID as PG_UUID
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+import hashlib
+import json
+import time
 import uuid
-from typing import Optional, List
+from collections import OrderedDict
+from typing import Any, Optional, List, Sequence, Dict, Tuple
 
 # Kendi servisimize ait modelleri import ediyoruz
 from . import db_models
 from . import models
 from .models import Role as RoleEnum
 
-def get_user_by_keycloak_id(db: Session, keycloak_id: uuid.UUID) -> Optional[db_models.User]:
-    return db.query(db_models.User).filter(db_models.User.id == keycloak_id).first()
+async def get_user_by_keycloak_id(db: AsyncSession, keycloak_id: uuid.UUID) -> Optional[db_models.User]:
+    # Async session'da lazy load yapılamadığı için şirket ilişkisi aynı sorguda yüklenir.
+    result = await db.execute(
+        select(db_models.User).options(joinedload(db_models.User.company)).filter(db_models.User.id == keycloak_id)
+    )
+    return result.scalars().first()
 
-def get_user_by_email(db: Session, email: str) -> Optional[db_models.User]: # Bu hala faydalı olabilir
-    return db.query(db_models.User).filter(db_models.User.email == email).first()
+async def get_users_by_keycloak_ids(db: AsyncSession, keycloak_ids: Sequence[uuid.UUID]) -> List[db_models.User]:
+    """
+    Verilen ID'lere sahip kullanıcıları şirketleriyle birlikte tek sorguda getirir.
+    PostgreSQL'de ID listesi tek bir dizi parametresi olarak gönderilir (`id = ANY(:ids)`);
+    binlerce ID için binlerce bind parametresi üretilmez.
+    """
+    if not keycloak_ids:
+        return []
+    if db.bind.dialect.name == "postgresql":
+        id_filter = db_models.User.id == any_(
+            bindparam("keycloak_ids", value=list(keycloak_ids), type_=ARRAY(PG_UUID(as_uuid=True)))
+        )
+    else:
+        id_filter = db_models.User.id.in_(keycloak_ids)
+    result = await db.execute(
+        select(db_models.User).options(joinedload(db_models.User.company)).where(id_filter)
+    )
+    return list(result.scalars().unique().all())
+
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[db_models.User]: # Bu hala faydalı olabilir
+    result = await db.execute(select(db_models.User).filter(db_models.User.email == email))
+    return result.scalars().first()
 
-def delete_user_by_keycloak_id(db: Session, keycloak_id: uuid.UUID) -> Optional[db_models.User]:
+async def delete_user_by_keycloak_id(db: AsyncSession, keycloak_id: uuid.UUID) -> Optional[db_models.User]:
     """
-    Verilen Keycloak ID'sine sahip kullanıcıyı lokal veritabanından siler.
+    Verilen Keycloak ID'sine sahip kullanıcıyı lokal veritabanından tek bir
+    `DELETE ... RETURNING` ile siler (önce SELECT yapılmaz).
     Kullanıcı bulunup silinirse, silinen kullanıcı nesnesini döndürür.
     Kullanıcı bulunamazsa None döndürür.
     """
-    db_user = db.query(db_models.User).filter(db_models.User.id == keycloak_id).first()
+    forget_synced(keycloak_id)
+    result = await db.execute(
+        delete(db_models.User).where(db_models.User.id == keycloak_id).returning(db_models.User)
+    )
+    db_user = result.scalars().first()
+    await db.commit()
     if db_user:
-        print(f"USER_SERVICE_CRUD: Deleting user {db_user.email} (ID: {keycloak_id}) from local DB.")
-        db.delete(db_user)
-        db.commit()
-        # db.commit() sonrası db_user session'dan expire olmuş olabilir,
-        # ancak silme işlemi öncesi bilgileri hala tutar.
-        # Silme onayı için bu objeyi döndürebiliriz.
-        return db_user
+        print(f"USER_SERVICE_CRUD: Deleted user {db_user.email} (ID: {keycloak_id}) from local DB.")
     else:
         print(f"USER_SERVICE_CRUD: User with ID {keycloak_id} not found in local DB for deletion.")
+    return db_user
+
+def resolve_role_from_keycloak(roles: Optional[List[str]]) -> Optional[RoleEnum]:
+    """
+    Keycloak realm rollerinden DB'deki tek role karşılığını bulur (en yetkili rol kazanır).
+    Eşleşen rol yoksa None döner; çağıran mevcut rolü korur veya varsayılanı kullanır.
+    """
+    if not roles:
         return None
+    if RoleEnum.GENERAL_ADMIN.value in roles:
+        return RoleEnum.GENERAL_ADMIN
+    if RoleEnum.HELPDESK_ADMIN.value in roles:
+        return RoleEnum.HELPDESK_ADMIN
+    if RoleEnum.AGENT.value in roles:
+        return RoleEnum.AGENT
+    if RoleEnum.EMPLOYEE.value in roles: # employee bizim customer-user için genel tabirimizdi
+        return RoleEnum.EMPLOYEE
+    return None
 
-def get_or_create_user(db: Session, user_data: models.UserCreateInternal) -> db_models.User:
-    db_user = get_user_by_keycloak_id(db, keycloak_id=user_data.id)
-    if db_user:
-        # Kullanıcı zaten var, bilgilerini güncelle (opsiyonel)
-        print(f"USER_SERVICE_CRUD: User {user_data.id} found, updating info.")
-        db_user.email = user_data.email
-        db_user.full_name = user_data.full_name
-        db_user.is_active = user_data.is_active
-        # Rolleri güncelleme mantığı eklenebilir.
-        # Örneğin, ilk gelen Keycloak rolünü DB'ye yazabiliriz (eğer DB'de tek bir rol tutuyorsak)
-        # Veya rolleri ayrı bir tabloda yönetebiliriz. Şimdilik basit tutalım.
-        # Eğer DB'deki 'role' enum ise ve Keycloak'tan gelen string listesi varsa eşleştirme gerekir.
-        # Şimdilik Keycloak'tan gelen ilk rolü (varsa ve enum'da varsa) atayalım:
-        if user_data.roles:
-            if "general-admin" in user_data.roles and hasattr(RoleEnum, "GENERAL_ADMIN"): # RoleEnum'da GENERAL_ADMIN varsa
-                 db_user.role = RoleEnum.GENERAL_ADMIN
-            elif "helpdesk-admin" in user_data.roles and hasattr(RoleEnum, "HELPDESK_ADMIN"): # RoleEnum'da HELPDESK_ADMIN varsa
-                 db_user.role = RoleEnum.HELPDESK_ADMIN
-            elif RoleEnum.AGENT.value in user_data.roles:
-                db_user.role = RoleEnum.AGENT
-            elif RoleEnum.EMPLOYEE.value in user_data.roles: # employee bizim customer-user için genel tabirimizdi
-                db_user.role = RoleEnum.EMPLOYEE
+# --- JIT senkronizasyon parmak izi önbelleği ---
+# Internal sync her istekte aynı token verisini gönderir. Aynı verinin kısa süre önce uygulandığı
+# biliniyorsa tenant çözümlemesi (şirket adına göre arama) atlanır. Kullanıcı alanları her zaman DB'deki
+# satırla karşılaştırılır: toplu senkronizasyon yolları satırı parmak izinden habersiz değiştirebilir.
+# Süreç içidir; her replika kendi önbelleğini tutar, bu yüzden yalnızca gereksiz işi azaltır.
+_SYNC_FINGERPRINT_TTL_SECONDS = 300
+_SYNC_FINGERPRINT_MAX_ENTRIES = 10_000
+_recent_sync_fingerprints: "OrderedDict[uuid.UUID, Tuple[str, float]]" = OrderedDict()
 
+def sync_fingerprint(user_data: models.UserCreateInternal) -> str:
+    """Senkronizasyonda DB'ye yansıyan alanların (ve tenant gruplarının) özetini üretir."""
+    resolved_role = resolve_role_from_keycloak(user_data.roles)
+    payload = [
+        str(user_data.id),
+        user_data.email,
+        user_data.full_name,
+        user_data.is_active,
+        resolved_role.value if resolved_role else None,
+        sorted(user_data.keycloak_groups or []),
+    ]
+    return hashlib.sha1(json.dumps(payload).encode("utf-8")).hexdigest()
+
+def was_recently_synced(user_data: models.UserCreateInternal) -> bool:
+    entry = _recent_sync_fingerprints.get(user_data.id)
+    if entry is None:
+        return False
+    fingerprint, expires_at = entry
+    if expires_at < time.monotonic():
+        _recent_sync_fingerprints.pop(user_data.id, None)
+        return False
+    return fingerprint == sync_fingerprint(user_data)
+
+def remember_synced(user_data: models.UserCreateInternal) -> None:
+    _recent_sync_fingerprints[user_data.id] = (sync_fingerprint(user_data), time.monotonic() + _SYNC_FINGERPRINT_TTL_SECONDS)
+    _recent_sync_fingerprints.move_to_end(user_data.id)
+    while len(_recent_sync_fingerprints) > _SYNC_FINGERPRINT_MAX_ENTRIES:
+        _recent_sync_fingerprints.popitem(last=False)
+
+def forget_synced(user_id: uuid.UUID) -> None:
+    _recent_sync_fingerprints.pop(user_id, None)
+
+def _apply_user_changes(db_user: db_models.User, user_data: models.UserCreateInternal) -> bool:
+    """Yalnızca farklı olan alanları atar; en az bir alan değiştiyse True döner."""
+    changes = {
+        "email": user_data.email,
+        "full_name": user_data.full_name,
+        "is_active": user_data.is_active,
+    }
+    # Keycloak rolü DB rolüne eşlenemiyorsa mevcut rol korunur.
+    resolved_role = resolve_role_from_keycloak(user_data.roles)
+    if resolved_role:
+        changes["role"] = resolved_role
+
+    changed = False
+    for field, value in changes.items():
+        if getattr(db_user, field) != value:
+            setattr(db_user, field, value)
+            changed = True
+    return changed
+
+async def get_or_create_user(db: AsyncSession, user_data: models.UserCreateInternal) -> db_models.User:
+    """
+    Kullanıcıyı oluşturur veya Keycloak/token verisiyle günceller. Kayıt zaten güncelse
+    commit/refresh yapılmaz; okuma ağırlıklı JIT akışları yazma transaction'ı üretmez.
+    """
+    db_user = await get_user_by_keycloak_id(db, keycloak_id=user_data.id)
+    if db_user:
+        if not _apply_user_changes(db_user, user_data):
+            remember_synced(user_data)
+            return db_user
+        print(f"USER_SERVICE_CRUD: User {user_data.id} found, updating changed info.")
     else:
         print(f"USER_SERVICE_CRUD: User {user_data.id} not found, creating new user.")
-        determined_role = RoleEnum.EMPLOYEE 
-        if user_data.roles:
-            if "general-admin" in user_data.roles and hasattr(RoleEnum, "GENERAL_ADMIN"):
-                 determined_role = RoleEnum.GENERAL_ADMIN
-            elif "helpdesk-admin" in user_data.roles and hasattr(RoleEnum, "HELPDESK_ADMIN"):
-                 determined_role = RoleEnum.HELPDESK_ADMIN
-            elif RoleEnum.AGENT.value in user_data.roles:
-                determined_role = RoleEnum.AGENT
-            # EMPLOYEE zaten varsayılan olduğu için ayrıca kontrol etmeye gerek yok.
-            
+        determined_role = resolve_role_from_keycloak(user_data.roles) or RoleEnum.EMPLOYEE
         db_user = db_models.User(
             id=user_data.id,
             email=user_data.email,
@@ -76,20 +164,163 @@ def get_or_create_user(db: Session, user_data: models.UserCreateInternal) -> db_
             is_active=user_data.is_active
         )
         db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    remember_synced(user_data)
     return db_user
 
-def get_users(db: Session, skip: int = 0, limit: int = 100) -> List[db_models.User]:
+async def bulk_upsert_users(db: AsyncSession, users: Sequence[models.UserCreateInternal]) -> int:
+    """
+    Kullanıcıları tek bir `INSERT ... ON CONFLICT (id) DO UPDATE` ile ekler/günceller.
+    Keycloak rolü DB rolüne eşlenemeyen kullanıcılarda mevcut rol korunur (get_or_create_user ile aynı davranış).
+    Commit çağırana bırakılır. Gerçekten yazılan (eklenen veya değişen) kullanıcı sayısını döndürür;
+    değişmeyen kullanıcılar sayılmaz.
+    """
+    if not users:
+        return 0
+
+    insert = pg_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+    table = db_models.User.__table__
+
+    written = 0
+    with_role, without_role = [], []
+    for user_data in users:
+        resolved_role = resolve_role_from_keycloak(user_data.roles)
+        row = {
+            "id": user_data.id,
+            "email": user_data.email,
+            "full_name": user_data.full_name,
+            "role": resolved_role or RoleEnum.EMPLOYEE,
+            "is_active": user_data.is_active,
+        }
+        (with_role if resolved_role else without_role).append(row)
+
+    for rows, update_role in ((with_role, True), (without_role, False)):
+        if not rows:
+            continue
+        stmt = insert(table).values(rows)
+        update_columns = {
+            "email": stmt.excluded.email,
+            "full_name": stmt.excluded.full_name,
+            "is_active": stmt.excluded.is_active,
+        }
+        if update_role:
+            update_columns["role"] = stmt.excluded.role
+        # Değişmeyen kullanıcılara dokunma (her senkronizasyonda updated_at ve liste ETag'i değişmesin).
+        changed = or_(*(table.c[name].is_distinct_from(value) for name, value in update_columns.items()))
+        update_columns["updated_at"] = func.now()
+        result = await db.execute(stmt.on_conflict_do_update(index_elements=[table.c.id], set_=update_columns, where=changed))
+        written += result.rowcount or 0
+    return written
+
+async def set_user_companies(db: AsyncSession, company_by_user: Dict[uuid.UUID, Optional[uuid.UUID]]) -> None:
+    """
+    Kullanıcıların şirket (tenant) bağlantısını tek bir parametreli UPDATE (executemany) ile günceller;
+    şirketi zaten doğru olan kullanıcılara dokunulmaz. Commit çağırana bırakılır.
+    """
+    if not company_by_user:
+        return
+    table = db_models.User.__table__
+    stmt = (
+        update(table)
+        .where(table.c.id == bindparam("user_id"), table.c.company_id.is_distinct_from(bindparam("new_company_id")))
+        .values(company_id=bindparam("new_company_id"))
+    )
+    await db.execute(stmt, [
+        {"user_id": user_id, "new_company_id": company_id} for user_id, company_id in company_by_user.items()
+    ])
+
+async def delete_users_by_keycloak_ids(db: AsyncSession, keycloak_ids: Sequence[uuid.UUID]) -> int:
+    """Verilen Keycloak ID'lerine sahip kullanıcıları tek sorguda siler. Commit çağırana bırakılır."""
+    if not keycloak_ids:
+        return 0
+    for keycloak_id in keycloak_ids:
+        forget_synced(keycloak_id)
+    result = await db.execute(delete(db_models.User).where(db_models.User.id.in_(keycloak_ids)))
+    return result.rowcount or 0
+
+async def get_sync_watermark(db: AsyncSession, name: str) -> Optional[int]:
+    """Artımlı senkronizasyonun en son işlediği event zamanını (epoch ms) döndürür; hiç çalışmadıysa None."""
+    result = await db.execute(
+        select(db_models.KeycloakSyncState.last_event_time).where(db_models.KeycloakSyncState.name == name)
+    )
+    return result.scalar_one_or_none()
+
+async def set_sync_watermark(db: AsyncSession, name: str, last_event_time: int) -> None:
+    """Watermark'ı ekler veya günceller. Commit çağırana bırakılır (deltalarla aynı transaction'da yazılmalı)."""
+    insert = pg_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+    stmt = insert(db_models.KeycloakSyncState.__table__).values(name=name, last_event_time=last_event_time)
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=["name"],
+        set_={"last_event_time": stmt.excluded.last_event_time, "updated_at": func.now()},
+    ))
+
+async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[db_models.User]:
     """
     Veritabanındaki tüm kullanıcıları sayfalama yaparak listeler.
     """
-    return db.query(db_models.User).order_by(db_models.User.created_at.desc()).offset(skip).limit(limit).all()
+    result = await db.execute(select(db_models.User).order_by(db_models.User.created_at.desc()).offset(skip).limit(limit))
+    return list(result.scalars().all())
+
+USER_PROJECTION_COLUMNS = ("id", "email", "full_name", "is_active", "created_at")
+
+def _user_projection_query(fields: Sequence[str]):
+    # Yalnızca istenen kolonları seçer; şirket sadece istenirse aynı sorguda LEFT JOIN ile gelir.
+    columns = [getattr(db_models.User, name) for name in USER_PROJECTION_COLUMNS if name in fields or name == "id"]
+    if "roles" in fields:
+        columns.append(db_models.User.role)
+    query = select(*columns)
+    if "company" in fields:
+        query = query.add_columns(
+            db_models.Company.id.label("company_id"), db_models.Company.name.label("company_name")
+        ).outerjoin(db_models.Company, db_models.User.company_id == db_models.Company.id)
+    return query
+
+def user_projection_to_dict(row, fields: Sequence[str]) -> Dict[str, Any]:
+    """_user_projection_query satırını `models.User` ile aynı şekle (yalnızca seçili alanlarla) çevirir."""
+    mapping = row._mapping
+    data: Dict[str, Any] = {}
+    for name in fields:
+        if name == "roles":
+            data[name] = [mapping["role"].value] if mapping["role"] else []
+        elif name == "company":
+            data[name] = {"id": mapping["company_id"], "name": mapping["company_name"]} if mapping["company_id"] else None
+        else:
+            data[name] = mapping[name]
+    return data
+
+async def get_user_projection(db: AsyncSession, keycloak_id: uuid.UUID, fields: Sequence[str]) -> Optional[Dict[str, Any]]:
+    """Tek bir kullanıcının yalnızca istenen alanlarını getirir; kullanıcı yoksa None döner."""
+    result = await db.execute(_user_projection_query(fields).filter(db_models.User.id == keycloak_id))
+    row = result.first()
+    return user_projection_to_dict(row, fields) if row is not None else None
 
-def count_users(db: Session) -> int:
+async def get_users_projection(db: AsyncSession, fields: Sequence[str], skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+    """get_users ile aynı sıralama ve sayfalamayla, kullanıcıların yalnızca istenen alanlarını getirir."""
+    result = await db.execute(
+        _user_projection_query(fields).order_by(db_models.User.created_at.desc()).offset(skip).limit(limit)
+    )
+    return [user_projection_to_dict(row, fields) for row in result.all()]
+
+async def count_users(db: AsyncSession) -> int:
     """
     Veritabanındaki toplam kullanıcı sayısını döndürür.
     """
-    return db.query(db_models.User).count()
+    result = await db.execute(select(func.count()).select_from(db_models.User))
+    return result.scalar_one()
+
+async def get_users_version(db: AsyncSession) -> Tuple[int, int]:
+    """
+    Kullanıcı listesinin ETag'i için sürüm bilgisi: kullanıcıların ve (listede şirket bilgisi de döndüğü
+    için) şirketlerin tetikleyicilerle tutulan sayaçları. Tabloyu taramayan tek bir birincil anahtar sorgusudur.
+    """
+    result = await db.execute(
+        select(
+            select(db_models.UserListVersion.version).where(db_models.UserListVersion.name == "users").scalar_subquery(),
+            select(db_models.CompanyListVersion.version).where(db_models.CompanyListVersion.name == "companies").scalar_subquery(),
+        )
+    )
+    users_version, companies_version = result.one()
+    return users_version or 0, companies_version or 0
 
     
\ No newline at end of file
@@ -1,5 +1,6 @@
 # user_service/database.py veya ticket_service/database.py
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 import os
 from .config import get_settings # Kendi config dosyasından okumak için
@@ -9,13 +10,44 @@ settings = get_settings()
 # Artık her servis kendi DATABASE_URL'ini kendi config'inden alacak
 DATABASE_URL = settings.database.url 
 
+# Senkron motor: Alembic migration'ları ve senkron araçlar için.
 engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Async motor: API endpoint'leri event loop'u bloklamadan bu motoru kullanır.
+ASYNC_DATABASE_URL = settings.database.async_url
+
+def _async_engine_options() -> dict:
+    """Async motor için havuz ve zaman aşımı ayarlarını config'den oluşturur."""
+    if ASYNC_DATABASE_URL.startswith("sqlite"):
+        # aiosqlite havuz boyutu parametrelerini desteklemez.
+        return {}
+
+    connect_args = {"timeout": settings.database.connect_timeout}
+    if settings.database.statement_timeout_ms:
+        connect_args["server_settings"] = {"statement_timeout": str(settings.database.statement_timeout_ms)}
+
+    return {
+        "pool_size": settings.database.pool_size,
+        "max_overflow": settings.database.max_overflow,
+        "pool_timeout": settings.database.pool_timeout,
+        "pool_recycle": settings.database.pool_recycle,
+        "pool_pre_ping": True,
+        "connect_args": connect_args,
+    }
+
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **_async_engine_options())
+# expire_on_commit=False: commit sonrası nesnelere erişim async ortamda tekrar sorgu tetiklemesin.
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -4,6 +4,7 @@ from sqlalchemy import (
     Column,
     String,
     Boolean,
+    BigInteger,
     DateTime,
     Enum as SQLAlchemyEnum,
     ForeignKey,
@@ -42,6 +43,7 @@ class User(Base):
     role = Column(SQLAlchemyEnum(user_pydantic_models.Role), nullable=False, default=user_pydantic_models.Role.EMPLOYEE)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     company_id = Column(SQLAlchemyUUID(as_uuid=True), ForeignKey('public.companies.id'), nullable=True)
 
     # Bu ilişki aynı veritabanı içinde olduğu için DOĞRU ve KALMALIDIR.
@@ -50,4 +52,32 @@ class User(Base):
     # BU İLİŞKİLER ARTIK FARKLI VERİTABANLARINDA OLDUĞU İÇİN SİLİNMELİDİR:
     # tickets = relationship("Ticket", back_populates="creator")
     # comments = relationship("Comment", back_populates="author")
-    # attachments = relationship("Attachment", back_populates="uploader")
\ No newline at end of file
+    # attachments = relationship("Attachment", back_populates="uploader")
+
+class UserListVersion(Base):
+    """
+    Kullanıcı listesi ETag'inin sürüm sayacı. `users` tablosundaki her değişiklikte tetikleyicilerle
+    artırılır (bkz. etag). Satırı olmayan listenin sürümü 0'dır.
+    """
+    __tablename__ = "list_versions"
+    __table_args__ = {'schema': 'users_schema'}
+
+    name = Column(String(64), primary_key=True, comment="Sayacı tutulan liste (örn: users)")
+    version = Column(BigInteger, nullable=False, default=0, server_default="0")
+
+class CompanyListVersion(Base):
+    """Tenant listesi ETag'inin sürüm sayacı; `companies` tablosundaki her değişiklikte artırılır."""
+    __tablename__ = "list_versions"
+    __table_args__ = {'schema': 'public'}
+
+    name = Column(String(64), primary_key=True, comment="Sayacı tutulan liste (örn: companies)")
+    version = Column(BigInteger, nullable=False, default=0, server_default="0")
+
+class KeycloakSyncState(Base):
+    """Artımlı Keycloak senkronizasyonunun kaldığı yer (admin event watermark'ı)."""
+    __tablename__ = "keycloak_sync_state"
+    __table_args__ = {'schema': 'users_schema'}
+
+    name = Column(String(64), primary_key=True, comment="Senkronizasyon akışının adı (örn: admin_events)")
+    last_event_time = Column(BigInteger, nullable=False, comment="İşlenmiş son admin event'in zamanı (epoch ms)")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,67 @@
+# user_service/etag.py
+"""
+Koşullu GET (ETag / If-None-Match) yardımcıları.
+
+ETag'ler tam yanıt üretilmeden, yalnızca sürüm bilgisi okunarak hesaplanır. Liste sürümleri
+`list_versions` sayaçlarıdır (kullanıcılar `users_schema`, şirketler `public` şemasında): tablodaki her
+değişiklik, satır başına ertelenmiş (commit anında çalışan) bir tetikleyiciyle sayacı transaction başına
+bir kez artırır. max(updated_at) watermark'ının aksine uzun süren bir transaction'ın (örn. Keycloak
+çağrıları arasında kalan kullanıcı güncellemesi) değişikliği gözden kaçmaz ve sayım için tablo taranmaz.
+SQLite'ta (çevrimdışı testler) tetikleyicilerin satır düzeyindeki karşılıkları aşağıda oluşturulur.
+
+ETag'ler güçlü (strong) üretilir; If-None-Match için RFC 9110 §13.1.2 gereği zayıf karşılaştırma yapılır.
+"""
+import hashlib
+import json
+from typing import Any, Optional
+
+from fastapi import Response, status
+from sqlalchemy import event, text
+
+from . import db_models
+from .database import Base
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    """Verilen sürüm ve gösterim parametrelerinden güçlü (strong) bir ETag üretir."""
+    raw = json.dumps(parts, default=str, separators=(",", ":"), sort_keys=True)
+    return '"' + hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def is_not_modified(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match başlığı verilen ETag ile eşleşiyor mu (RFC 9110: zayıf karşılaştırma)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = {candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")}
+    return etag in candidates
+
+
+def not_modified_response(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+def set_etag_headers(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_sqlite_list_version_triggers(target, connection, **kw):
+    if connection.dialect.name != "sqlite":
+        return
+    # SQLite tetikleyicileri yalnızca kendi veritabanındaki tablolara yazabildiği için her şemanın kendi sayaç tablosu var.
+    for model, list_name in ((db_models.User, "users"), (db_models.Company, "companies")):
+        table = model.__table__
+        schema_prefix = f"{table.schema}." if table.schema else ""
+        for operation in ("INSERT", "UPDATE", "DELETE"):
+            connection.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {schema_prefix}{table.name}_bump_list_version_{operation.lower()} "
+                f"AFTER {operation} ON {table.name} BEGIN "
+                f"INSERT INTO list_versions (name, version) VALUES ('{list_name}', 1) "
+                "ON CONFLICT (name) DO UPDATE SET version = version + 1; END"
+            ))
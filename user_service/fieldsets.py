@@ -0,0 +1,36 @@
+# user_service/fieldsets.py
+# ticket_service/fieldsets.py ile bilerek aynı: her servis imajı yalnızca kendi dizinini paketler; değişiklik iki kopyaya da yapılmalı (tests/test_fieldsets_copies.py).
+"""
+Seyrek alan seçimi (`?fields=id,email,full_name`).
+
+İstemcinin istediği alanlar doğrulanır; çağıran taraf bu listeyi hem sorguda seçilecek
+kolonları/yüklenecek ilişkileri belirlemek hem de yanıtı budamak için kullanır.
+"""
+from typing import Any, Collection, Dict, Iterable, List, Mapping, Optional
+
+from fastapi import HTTPException
+
+FIELDS_QUERY_DESCRIPTION = "Virgülle ayrılmış alan listesi (örn. `id,email,full_name`). Verilmezse tüm alanlar döner."
+
+
+def parse_fields(fields: Optional[str], allowed: Collection[str], always: Iterable[str] = ("id",)) -> Optional[List[str]]:
+    """
+    `fields` parametresini doğrulayıp sıralı, tekrarsız bir alan listesine çevirir.
+    Parametre verilmemişse None döner (tüm alanlar). `always` içindeki alanlar her zaman eklenir.
+    Bilinmeyen bir alan istenirse 400 döner.
+    """
+    if fields is None or not fields.strip():
+        return None
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Bilinmeyen alan(lar): {', '.join(unknown)}. Geçerli alanlar: {', '.join(allowed)}",
+        )
+    return list(dict.fromkeys([*always, *requested]))
+
+
+def prune(data: Mapping[str, Any], selected: Iterable[str]) -> Dict[str, Any]:
+    """Yalnızca seçilen alanları içeren bir sözlük döndürür."""
+    return {name: data[name] for name in selected if name in data}
@@ -1,6 +1,9 @@
 # user_service/keycloak_api_helpers.py
+import asyncio
+import random
 import httpx
-from typing import Optional, Dict, Any, List
+from collections import deque
+from typing import Optional, Dict, Any, List, AsyncIterator
 from datetime import datetime, timedelta
 
 from .config import Settings # user_service'in kendi config'ini kullanacak
@@ -9,15 +12,104 @@ _user_service_admin_token_cache: Dict[str, Any] = {
     "token": None,
     "expires_at": datetime.utcnow()
 }
+# Token süresi dolduğunda eşzamanlı isteklerin tek bir yenileme isteğinde buluşması için (single-flight).
+_admin_token_lock = asyncio.Lock()
+
+# Tüm Admin API çağrılarının paylaştığı, uzun ömürlü HTTP istemcisi.
+# Lifespan içinde başlatılır/kapatılır; böylece her çağrıda yeni TCP+TLS el sıkışması yapılmaz.
+_http_client: Optional[httpx.AsyncClient] = None
+
+# Bu durum kodları geçici kabul edilir ve idempotent isteklerde yeniden denenir.
+_RETRYABLE_STATUS_CODES = {502, 503, 504}
+_IDEMPOTENT_METHODS = {"GET", "PUT", "DELETE", "HEAD", "OPTIONS"}
+
+
+def _create_http_client(settings: Settings) -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.keycloak.admin_http_max_connections,
+        max_keepalive_connections=settings.keycloak.admin_http_max_keepalive,
+        keepalive_expiry=60.0,
+    )
+    # DEĞİŞİKLİK: SSL doğrulamasını atlamak için verify=False eklendi.
+    return httpx.AsyncClient(
+        verify=False,
+        http2=True,
+        limits=limits,
+        timeout=httpx.Timeout(settings.keycloak.admin_http_timeout),
+    )
+
+
+async def start_http_client(settings: Settings) -> None:
+    """Paylaşılan Admin API HTTP istemcisini oluşturur (lifespan başlangıcında çağrılır)."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = _create_http_client(settings)
+        print("USER_SVC_KC_HELPER: Shared Keycloak HTTP client started.")
+
+
+async def close_http_client() -> None:
+    """Paylaşılan HTTP istemcisini ve havuzdaki bağlantıları kapatır (lifespan sonunda çağrılır)."""
+    global _http_client
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+        print("USER_SVC_KC_HELPER: Shared Keycloak HTTP client closed.")
+    _http_client = None
+
+
+def _get_http_client(settings: Settings) -> httpx.AsyncClient:
+    global _http_client
+    # Lifespan dışında (örn. script) çağrılırsa istemci ilk kullanımda oluşturulur.
+    if _http_client is None or _http_client.is_closed:
+        _http_client = _create_http_client(settings)
+    return _http_client
+
+
+async def _send(method: str, url: str, settings: Settings, **kwargs) -> httpx.Response:
+    """
+    Paylaşılan istemci üzerinden istek gönderir. Bağlantı hatalarında ve (idempotent isteklerde)
+    geçici sunucu hatalarında üstel geri çekilme + jitter ile yeniden dener.
+    """
+    client = _get_http_client(settings)
+    max_retries = settings.keycloak.admin_http_max_retries
+    is_idempotent = method.upper() in _IDEMPOTENT_METHODS
+
+    attempt = 0
+    while True:
+        try:
+            response = await client.request(method, url, **kwargs)
+            if not (is_idempotent and response.status_code in _RETRYABLE_STATUS_CODES and attempt < max_retries):
+                return response
+            print(f"UYARI (USER_SVC_KC_HELPER): {method} {url} -> {response.status_code}, yeniden denenecek ({attempt + 1}/{max_retries}).")
+        except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+            # İstek sunucuya ulaşmadığı için her metotta yeniden denemek güvenlidir.
+            if attempt >= max_retries:
+                raise
+            print(f"UYARI (USER_SVC_KC_HELPER): {method} {url} bağlantı hatası ({type(e).__name__}), yeniden denenecek ({attempt + 1}/{max_retries}).")
+        except (httpx.ReadTimeout, httpx.RemoteProtocolError) as e:
+            if not is_idempotent or attempt >= max_retries:
+                raise
+            print(f"UYARI (USER_SVC_KC_HELPER): {method} {url} yanıt hatası ({type(e).__name__}), yeniden denenecek ({attempt + 1}/{max_retries}).")
+
+        delay = settings.keycloak.admin_http_retry_backoff * (2 ** attempt)
+        await asyncio.sleep(delay + random.uniform(0, delay))
+        attempt += 1
+
+
+def _cached_admin_token() -> Optional[str]:
+    if _user_service_admin_token_cache["token"] and \
+       _user_service_admin_token_cache["expires_at"] > datetime.utcnow() + timedelta(seconds=30):
+        return _user_service_admin_token_cache["token"]
+    return None
+
 
 async def get_admin_api_token(settings: Settings) -> Optional[str]:
     """Keycloak Admin API için (user_service adına) token alır."""
     global _user_service_admin_token_cache
 
-    if _user_service_admin_token_cache["token"] and \
-       _user_service_admin_token_cache["expires_at"] > datetime.utcnow() + timedelta(seconds=30):
+    cached_token = _cached_admin_token()
+    if cached_token:
         print("USER_SVC_KC_HELPER: Using cached admin token.")
-        return _user_service_admin_token_cache["token"]
+        return cached_token
 
     if not all([settings.keycloak.admin_api_token_endpoint, 
                 settings.keycloak.admin_client_id, 
@@ -25,18 +117,22 @@ async def get_admin_api_token(settings: Settings) -> Optional[str]:
         print("HATA (USER_SVC_KC_HELPER): Admin API token endpoint, client ID veya secret yapılandırılmamış.")
         return None
 
-    payload = {
-        "grant_type": "client_credentials",
-        "client_id": settings.keycloak.admin_client_id,
-        "client_secret": settings.keycloak.admin_client_secret,
-    }
-    headers = {"Content-Type": "application/x-www-form-urlencoded"}
-
-    print(f"USER_SVC_KC_HELPER: Requesting new admin token from {settings.keycloak.admin_api_token_endpoint}")
-    try:
-        # DEĞİŞİKLİK: SSL doğrulamasını atlamak için verify=False eklendi.
-        async with httpx.AsyncClient(verify=False) as client:
-            response = await client.post(settings.keycloak.admin_api_token_endpoint, data=payload, headers=headers)
+    async with _admin_token_lock:
+        # Kilidi beklerken başka bir istek token'ı yenilemiş olabilir.
+        cached_token = _cached_admin_token()
+        if cached_token:
+            return cached_token
+
+        payload = {
+            "grant_type": "client_credentials",
+            "client_id": settings.keycloak.admin_client_id,
+            "client_secret": settings.keycloak.admin_client_secret,
+        }
+        headers = {"Content-Type": "application/x-www-form-urlencoded"}
+
+        print(f"USER_SVC_KC_HELPER: Requesting new admin token from {settings.keycloak.admin_api_token_endpoint}")
+        try:
+            response = await _send("POST", settings.keycloak.admin_api_token_endpoint, settings, data=payload, headers=headers)
             response.raise_for_status()
             token_data = response.json()
 
@@ -48,13 +144,13 @@ async def get_admin_api_token(settings: Settings) -> Optional[str]:
 
             print("USER_SVC_KC_HELPER: New admin token obtained and cached.")
             return access_token
-    except httpx.HTTPStatusError as e:
-        print(f"HATA (USER_SVC_KC_HELPER): Admin token alırken HTTP hatası: {e.response.status_code} - {e.response.text}")
-    except Exception as e:
-        print(f"HATA (USER_SVC_KC_HELPER): Admin token alırken beklenmedik hata: {e}")
+        except httpx.HTTPStatusError as e:
+            print(f"HATA (USER_SVC_KC_HELPER): Admin token alırken HTTP hatası: {e.response.status_code} - {e.response.text}")
+        except Exception as e:
+            print(f"HATA (USER_SVC_KC_HELPER): Admin token alırken beklenmedik hata: {e}")
 
-    _user_service_admin_token_cache["token"] = None
-    return None
+        _user_service_admin_token_cache["token"] = None
+        return None
 
 async def create_keycloak_group(group_name: str, settings: Settings) -> Optional[str]:
     """Keycloak'ta verilen isimle yeni bir ana grup (tenant) oluşturur."""
@@ -69,20 +165,18 @@ async def create_keycloak_group(group_name: str, settings: Settings) -> Optional
 
     print(f"USER_SVC_KC_HELPER: Creating Keycloak group '{group_name}' at {create_group_url}")
     try:
-        # DEĞİŞİKLİK: SSL doğrulamasını atlamak için verify=False eklendi.
-        async with httpx.AsyncClient(verify=False) as client:
-            response = await client.post(create_group_url, json=group_payload, headers=headers)
-            if response.status_code == 201:
-                location_header = response.headers.get("Location")
-                if location_header:
-                    created_group_id = location_header.split("/")[-1]
-                    print(f"USER_SVC_KC_HELPER: Keycloak group '{group_name}' created successfully. ID: {created_group_id}")
-                    return created_group_id
-                else:
-                    print(f"HATA (USER_SVC_KC_HELPER): Grup '{group_name}' oluşturuldu (201) ancak Location header bulunamadı.")
-                    return None
+        response = await _send("POST", create_group_url, settings, json=group_payload, headers=headers)
+        if response.status_code == 201:
+            location_header = response.headers.get("Location")
+            if location_header:
+                created_group_id = location_header.split("/")[-1]
+                print(f"USER_SVC_KC_HELPER: Keycloak group '{group_name}' created successfully. ID: {created_group_id}")
+                return created_group_id
             else:
-                response.raise_for_status()
+                print(f"HATA (USER_SVC_KC_HELPER): Grup '{group_name}' oluşturuldu (201) ancak Location header bulunamadı.")
+                return None
+        else:
+            response.raise_for_status()
     except httpx.HTTPStatusError as e:
         if e.response.status_code == 409:
             print(f"UYARI (USER_SVC_KC_HELPER): Keycloak group '{group_name}' zaten mevcut (409 Conflict).")
@@ -104,19 +198,17 @@ async def create_keycloak_user(user_representation: Dict[str, Any], settings: Se
 
     print(f"USER_SVC_KC_HELPER: Creating Keycloak user '{user_representation.get('username')}'")
     try:
-        # DEĞİŞİKLİK: SSL doğrulamasını atlamak için verify=False eklendi.
-        async with httpx.AsyncClient(verify=False) as client:
-            response = await client.post(create_user_url, json=user_representation, headers=headers)
-            if response.status_code == 201:
-                location_header = response.headers.get("Location")
-                if location_header:
-                    return location_header.split("/")[-1]
-                return None 
-            elif response.status_code == 409:
-                print(f"HATA (USER_SVC_KC_HELPER): User '{user_representation.get('username')}' zaten mevcut (409 Conflict).")
-                return "EXISTS"
-            else:
-                response.raise_for_status()
+        response = await _send("POST", create_user_url, settings, json=user_representation, headers=headers)
+        if response.status_code == 201:
+            location_header = response.headers.get("Location")
+            if location_header:
+                return location_header.split("/")[-1]
+            return None 
+        elif response.status_code == 409:
+            print(f"HATA (USER_SVC_KC_HELPER): User '{user_representation.get('username')}' zaten mevcut (409 Conflict).")
+            return "EXISTS"
+        else:
+            response.raise_for_status()
     except httpx.HTTPStatusError as e:
         print(f"HATA (USER_SVC_KC_HELPER): HTTP hatası (kullanıcı oluşturma): {e.response.status_code} - {e.response.text[:200]}")
     except Exception as e:
@@ -135,11 +227,9 @@ async def set_keycloak_user_password(user_id: str, password: str, temporary: boo
 
     print(f"USER_SVC_KC_HELPER: Setting password for user ID '{user_id}'")
     try:
-        # DEĞİŞİKLİK: SSL doğrulamasını atlamak için verify=False eklendi.
-        async with httpx.AsyncClient(verify=False) as client:
-            response = await client.put(set_password_url, json=password_payload, headers=headers)
-            response.raise_for_status()
-            return True
+        response = await _send("PUT", set_password_url, settings, json=password_payload, headers=headers)
+        response.raise_for_status()
+        return True
     except httpx.HTTPStatusError as e:
         print(f"HATA (USER_SVC_KC_HELPER): HTTP hatası (şifre atama): {e.response.status_code} - {e.response.text[:200]}")
     except Exception as e:
@@ -154,11 +244,9 @@ async def get_keycloak_realm_role_representation(role_name: str, settings: Setti
     role_url = f"{settings.keycloak.admin_api_realm_url}/roles/{role_name}"
     headers = {"Authorization": f"Bearer {admin_token}"}
     try:
-        # DEĞİŞİKLİK: SSL doğrulamasını atlamak için verify=False eklendi.
-        async with httpx.AsyncClient(verify=False) as client:
-            response = await client.get(role_url, headers=headers)
-            response.raise_for_status()
-            return response.json()
+        response = await _send("GET", role_url, settings, headers=headers)
+        response.raise_for_status()
+        return response.json()
     except Exception:
         print(f"HATA (USER_SVC_KC_HELPER): Rol temsili alınamadı: '{role_name}'.")
         return None
@@ -185,11 +273,9 @@ async def assign_realm_roles_to_user(user_id: str, role_names: List[str], settin
 
     print(f"USER_SVC_KC_HELPER: Assigning roles {role_names} to user '{user_id}'")
     try:
-        # DEĞİŞİKLİK: SSL doğrulamasını atlamak için verify=False eklendi.
-        async with httpx.AsyncClient(verify=False) as client:
-            response = await client.post(assign_roles_url, json=roles_to_assign, headers=headers)
-            response.raise_for_status()
-            return True
+        response = await _send("POST", assign_roles_url, settings, json=roles_to_assign, headers=headers)
+        response.raise_for_status()
+        return True
     except httpx.HTTPStatusError as e:
         print(f"HATA (USER_SVC_KC_HELPER): HTTP hatası (rol atama): {e.response.status_code} - {e.response.text[:200]}")
     except Exception as e:
@@ -207,11 +293,9 @@ async def add_user_to_group(user_id: str, group_id: str, settings: Settings) ->
 
     print(f"USER_SVC_KC_HELPER: Adding user '{user_id}' to group '{group_id}'")
     try:
-        # DEĞİŞİKLİK: SSL doğrulamasını atlamak için verify=False eklendi.
-        async with httpx.AsyncClient(verify=False) as client:
-            response = await client.put(add_to_group_url, headers=headers)
-            response.raise_for_status()
-            return True
+        response = await _send("PUT", add_to_group_url, settings, headers=headers)
+        response.raise_for_status()
+        return True
     except httpx.HTTPStatusError as e:
         print(f"HATA (USER_SVC_KC_HELPER): HTTP hatası (gruba ekleme): {e.response.status_code} - {e.response.text[:200]}")
     except Exception as e:
@@ -229,12 +313,10 @@ async def get_keycloak_user(user_id: str, settings: Settings) -> Optional[Dict[s
 
     print(f"USER_SVC_KC_HELPER: Fetching user details for ID '{user_id}'")
     try:
-        # DEĞİŞİKLİK: SSL doğrulamasını atlamak için verify=False eklendi.
-        async with httpx.AsyncClient(verify=False) as client:
-            response = await client.get(user_url, headers=headers)
-            if response.status_code == 404:
-                return None
-            response.raise_for_status()
+        response = await _send("GET", user_url, settings, headers=headers)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
         return response.json()
     except Exception as e:
         print(f"HATA: Keycloak'tan kullanıcı detayı alınırken hata: {e}")
@@ -251,11 +333,9 @@ async def update_keycloak_user_attributes(user_id: str, user_representation_upda
 
     print(f"USER_SVC_KC_HELPER: Updating Keycloak user ID '{user_id}'")
     try:
-        # DEĞİŞİKLİK: SSL doğrulamasını atlamak için verify=False eklendi.
-        async with httpx.AsyncClient(verify=False) as client:
-            response = await client.put(update_user_url, json=user_representation_update, headers=headers)
-            response.raise_for_status()
-            return True
+        response = await _send("PUT", update_user_url, settings, json=user_representation_update, headers=headers)
+        response.raise_for_status()
+        return True
     except httpx.HTTPStatusError as e:
         print(f"HATA (USER_SVC_KC_HELPER): HTTP hatası (kullanıcı güncelleme): {e.response.status_code} - {e.response.text[:200]}")
     except Exception as e:
@@ -273,10 +353,8 @@ async def get_user_keycloak_groups(user_id: str, settings: Settings) -> Optional
 
     print(f"USER_SVC_KC_HELPER: Fetching groups for user ID '{user_id}'")
     try:
-        # DEĞİŞİKLİK: SSL doğrulamasını atlamak için verify=False eklendi.
-        async with httpx.AsyncClient(verify=False) as client:
-            response = await client.get(groups_url, headers=headers)
-            response.raise_for_status()
+        response = await _send("GET", groups_url, settings, headers=headers)
+        response.raise_for_status()
         return response.json()
     except httpx.HTTPStatusError as e:
         print(f"HATA (USER_SVC_KC_HELPER): HTTP hatası (grup getirme): {e.response.status_code} - {e.response.text[:200]}")
@@ -295,11 +373,9 @@ async def remove_user_from_keycloak_group(user_id: str, group_id: str, settings:
 
     print(f"USER_SVC_KC_HELPER: Removing user '{user_id}' from group '{group_id}'")
     try:
-        # DEĞİŞİKLİK: SSL doğrulamasını atlamak için verify=False eklendi.
-        async with httpx.AsyncClient(verify=False) as client:
-            response = await client.delete(remove_from_group_url, headers=headers)
-            response.raise_for_status()
-            return True
+        response = await _send("DELETE", remove_from_group_url, settings, headers=headers)
+        response.raise_for_status()
+        return True
     except httpx.HTTPStatusError as e:
         print(f"HATA (USER_SVC_KC_HELPER): HTTP hatası (gruptan çıkarma): {e.response.status_code} - {e.response.text[:200]}")
     except Exception as e:
@@ -315,37 +391,35 @@ async def set_user_realm_roles(user_id: str, new_role_names: List[str], settings
     headers = {"Authorization": f"Bearer {admin_token}", "Content-Type": "application/json"}
     
     try:
-        # DEĞİŞİKLİK: Tüm httpx istemcileri için verify=False eklendi.
-        async with httpx.AsyncClient(verify=False) as client:
-            # Mevcut tüm rolleri al
-            all_roles_url = f"{settings.keycloak.admin_api_realm_url}/roles"
-            roles_response = await client.get(all_roles_url, headers=headers)
-            roles_response.raise_for_status()
-            available_roles_map = {role['name']: role for role in roles_response.json()}
-
-            # Mevcut kullanıcı rollerini al
-            user_roles_url = f"{settings.keycloak.admin_api_realm_url}/users/{user_id}/role-mappings/realm"
-            user_roles_response = await client.get(user_roles_url, headers=headers)
-            user_roles_response.raise_for_status()
-            current_user_roles_set = {role['name'] for role in user_roles_response.json()}
-
-            new_roles_set = set(new_role_names)
-            roles_to_add = new_roles_set - current_user_roles_set
-            roles_to_remove = current_user_roles_set - new_roles_set
-
-            # Rolleri sil
-            if roles_to_remove:
-                roles_to_remove_reps = [available_roles_map[name] for name in roles_to_remove if name in available_roles_map]
-                if roles_to_remove_reps:
-                    delete_response = await client.request("DELETE", user_roles_url, headers=headers, json=roles_to_remove_reps)
-                    delete_response.raise_for_status()
-
-            # Rolleri ekle
-            if roles_to_add:
-                roles_to_add_reps = [available_roles_map[name] for name in roles_to_add if name in available_roles_map]
-                if roles_to_add_reps:
-                    add_response = await client.post(user_roles_url, headers=headers, json=roles_to_add_reps)
-                    add_response.raise_for_status()
+        # Mevcut tüm rolleri al
+        all_roles_url = f"{settings.keycloak.admin_api_realm_url}/roles"
+        roles_response = await _send("GET", all_roles_url, settings, headers=headers)
+        roles_response.raise_for_status()
+        available_roles_map = {role['name']: role for role in roles_response.json()}
+
+        # Mevcut kullanıcı rollerini al
+        user_roles_url = f"{settings.keycloak.admin_api_realm_url}/users/{user_id}/role-mappings/realm"
+        user_roles_response = await _send("GET", user_roles_url, settings, headers=headers)
+        user_roles_response.raise_for_status()
+        current_user_roles_set = {role['name'] for role in user_roles_response.json()}
+
+        new_roles_set = set(new_role_names)
+        roles_to_add = new_roles_set - current_user_roles_set
+        roles_to_remove = current_user_roles_set - new_roles_set
+
+        # Rolleri sil
+        if roles_to_remove:
+            roles_to_remove_reps = [available_roles_map[name] for name in roles_to_remove if name in available_roles_map]
+            if roles_to_remove_reps:
+                delete_response = await _send("DELETE", user_roles_url, settings, headers=headers, json=roles_to_remove_reps)
+                delete_response.raise_for_status()
+
+        # Rolleri ekle
+        if roles_to_add:
+            roles_to_add_reps = [available_roles_map[name] for name in roles_to_add if name in available_roles_map]
+            if roles_to_add_reps:
+                add_response = await _send("POST", user_roles_url, settings, headers=headers, json=roles_to_add_reps)
+                add_response.raise_for_status()
         return True
     except Exception as e:
         print(f"HATA (set_user_realm_roles): {e}")
@@ -361,17 +435,15 @@ async def update_keycloak_group(group_id: str, new_name: str, settings: Settings
     headers = {"Authorization": f"Bearer {admin_token}", "Content-Type": "application/json"}
 
     try:
-        # DEĞİŞİKLİK: SSL doğrulamasını atlamak için verify=False eklendi.
-        async with httpx.AsyncClient(verify=False) as client:
-            response_get = await client.get(group_url, headers={"Authorization": f"Bearer {admin_token}"})
-            response_get.raise_for_status()
-            current_group_representation = response_get.json()
+        response_get = await _send("GET", group_url, settings, headers={"Authorization": f"Bearer {admin_token}"})
+        response_get.raise_for_status()
+        current_group_representation = response_get.json()
             
-            updated_group_representation = current_group_representation.copy()
-            updated_group_representation["name"] = new_name
+        updated_group_representation = current_group_representation.copy()
+        updated_group_representation["name"] = new_name
             
-            response_put = await client.put(group_url, json=updated_group_representation, headers=headers)
-            response_put.raise_for_status()
+        response_put = await _send("PUT", group_url, settings, json=updated_group_representation, headers=headers)
+        response_put.raise_for_status()
         return True
     except httpx.HTTPStatusError as e:
         print(f"HATA (update_keycloak_group): {e.response.status_code} - {e.response.text[:200]}")
@@ -390,12 +462,10 @@ async def delete_keycloak_group(group_id: str, settings: Settings) -> bool:
 
     print(f"USER_SVC_KC_HELPER: Deleting Keycloak group ID '{group_id}'")
     try:
-        # DEĞİŞİKLİK: SSL doğrulamasını atlamak için verify=False eklendi.
-        async with httpx.AsyncClient(verify=False) as client:
-            response = await client.delete(delete_group_url, headers=headers)
-            if response.status_code in [204, 404]: # Başarılı veya zaten yok
-                return True
-            response.raise_for_status()
+        response = await _send("DELETE", delete_group_url, settings, headers=headers)
+        if response.status_code in [204, 404]: # Başarılı veya zaten yok
+            return True
+        response.raise_for_status()
     except httpx.HTTPStatusError as e:
         print(f"HATA (delete_keycloak_group): {e.response.status_code} - {e.response.text[:200]}")
     except Exception as e:
@@ -413,12 +483,10 @@ async def delete_keycloak_user(user_id: str, settings: Settings) -> bool:
 
     print(f"USER_SVC_KC_HELPER: Deleting Keycloak user ID '{user_id}'")
     try:
-        # DEĞİŞİKLİK: SSL doğrulamasını atlamak için verify=False eklendi.
-        async with httpx.AsyncClient(verify=False) as client:
-            response = await client.delete(delete_user_url, headers=headers)
-            if response.status_code in [204, 404]:
-                return True
-            response.raise_for_status()
+        response = await _send("DELETE", delete_user_url, settings, headers=headers)
+        if response.status_code in [204, 404]:
+            return True
+        response.raise_for_status()
     except httpx.HTTPStatusError as e:
         print(f"HATA (delete_keycloak_user): {e.response.status_code} - {e.response.text[:200]}")
     except Exception as e:
@@ -434,17 +502,15 @@ async def get_all_keycloak_users_paginated(settings: Settings) -> Optional[List[
     users_url = f"{settings.keycloak.admin_api_realm_url}/users"
     headers = {"Authorization": f"Bearer {admin_token}"}
 
-    # DEĞİŞİKLİK: SSL doğrulamasını atlamak için verify=False eklendi.
-    async with httpx.AsyncClient(verify=False) as client:
-        while True:
-            response = await client.get(users_url, headers=headers, params={"first": first, "max": max_results})
-            if response.status_code != 200:
-                return None
-            users_page = response.json()
-            if not users_page:
-                break
-            all_users.extend(users_page)
-            first += max_results
+    while True:
+        response = await _send("GET", users_url, settings, headers=headers, params={"first": first, "max": max_results})
+        if response.status_code != 200:
+            return None
+        users_page = response.json()
+        if not users_page:
+            break
+        all_users.extend(users_page)
+        first += max_results
     return all_users
 
 async def get_all_keycloak_groups_paginated(settings: Settings) -> Optional[List[Dict[str, Any]]]:
@@ -456,16 +522,124 @@ async def get_all_keycloak_groups_paginated(settings: Settings) -> Optional[List
     groups_url = f"{settings.keycloak.admin_api_realm_url}/groups"
     headers = {"Authorization": f"Bearer {admin_token}"}
 
-    # DEĞİŞİKLİK: SSL doğrulamasını atlamak için verify=False eklendi.
-    async with httpx.AsyncClient(verify=False) as client:
-        while True:
-            params = {"first": first, "max": max_results, "briefRepresentation": "false"}
-            response = await client.get(groups_url, headers=headers, params=params)
-            if response.status_code != 200:
-                return None
-            groups_page = response.json()
-            if not groups_page:
-                break
-            all_groups.extend(groups_page)
-            first += max_results
-    return all_groups
\ No newline at end of file
+    while True:
+        params = {"first": first, "max": max_results, "briefRepresentation": "false"}
+        response = await _send("GET", groups_url, settings, headers=headers, params=params)
+        if response.status_code != 200:
+            return None
+        groups_page = response.json()
+        if not groups_page:
+            break
+        all_groups.extend(groups_page)
+        first += max_results
+    return all_groups
+
+
+async def _fetch_admin_page(url: str, first: int, max_results: int, settings: Settings, extra_params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    # Token her sayfada yeniden alınır (önbellekten); uzun senkronizasyonlarda süresi dolarsa yenilenir.
+    admin_token = await get_admin_api_token(settings)
+    if not admin_token:
+        raise RuntimeError("Admin token alınamadı.")
+    params = {"first": first, "max": max_results, **(extra_params or {})}
+    response = await _send("GET", url, settings, headers={"Authorization": f"Bearer {admin_token}"}, params=params)
+    response.raise_for_status()
+    return response.json()
+
+
+async def _iter_admin_pages(url: str, settings: Settings, extra_params: Optional[Dict[str, Any]] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Admin API listesini sayfa sayfa döndürür. En fazla `sync_concurrency` sayfa aynı anda
+    çekilir; sayfalar sırayla verilir ve tüketici yazarken sonraki sayfalar indirilmeye devam eder.
+    Kısa (veya boş) bir sayfa listenin sonu kabul edilir.
+    """
+    page_size = max(1, settings.keycloak.sync_page_size)
+    concurrency = max(1, settings.keycloak.sync_concurrency)
+    pending: deque = deque()
+    next_first = 0
+
+    def schedule_next():
+        nonlocal next_first
+        pending.append(asyncio.create_task(_fetch_admin_page(url, next_first, page_size, settings, extra_params)))
+        next_first += page_size
+
+    try:
+        for _ in range(concurrency):
+            schedule_next()
+        while pending:
+            page = await pending.popleft()
+            if len(page) < page_size:
+                if page:
+                    yield page
+                return
+            schedule_next()
+            yield page
+    finally:
+        # Son sayfadan sonrasını çekmek için başlatılmış (veya yarıda kalan) istekleri iptal et.
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+def iter_keycloak_users_pages(settings: Settings) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Tüm Keycloak kullanıcılarını, hepsini belleğe almadan sayfa sayfa döndürür."""
+    return _iter_admin_pages(f"{settings.keycloak.admin_api_realm_url}/users", settings)
+
+
+def iter_keycloak_groups_pages(settings: Settings) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Tüm Keycloak gruplarını, hepsini belleğe almadan sayfa sayfa döndürür."""
+    return _iter_admin_pages(
+        f"{settings.keycloak.admin_api_realm_url}/groups", settings, {"briefRepresentation": "false"}
+    )
+
+
+async def _fetch_admin_resource(path: str, settings: Settings, params: Optional[Dict[str, Any]] = None) -> Optional[Any]:
+    """
+    Admin API'den tek bir kaynağı getirir. Kaynak yoksa (404) None döner; diğer hatalarda exception
+    fırlatır. Artımlı senkronizasyon "silinmiş" ile "ulaşılamadı" durumlarını ayırt etmek için bunu kullanır.
+    """
+    admin_token = await get_admin_api_token(settings)
+    if not admin_token:
+        raise RuntimeError("Admin token alınamadı.")
+    response = await _send(
+        "GET", f"{settings.keycloak.admin_api_realm_url}/{path}", settings,
+        headers={"Authorization": f"Bearer {admin_token}"}, params=params,
+    )
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return response.json()
+
+
+async def fetch_keycloak_user(user_id: str, settings: Settings) -> Optional[Dict[str, Any]]:
+    """Kullanıcı temsilini getirir; kullanıcı silinmişse None, erişim hatasında exception."""
+    return await _fetch_admin_resource(f"users/{user_id}", settings)
+
+
+async def fetch_keycloak_user_realm_role_names(user_id: str, settings: Settings) -> Optional[List[str]]:
+    """Kullanıcının realm rol adlarını getirir; kullanıcı silinmişse None, erişim hatasında exception."""
+    roles = await _fetch_admin_resource(f"users/{user_id}/role-mappings/realm", settings)
+    return None if roles is None else [role["name"] for role in roles]
+
+
+async def fetch_keycloak_user_groups(user_id: str, settings: Settings) -> Optional[List[Dict[str, Any]]]:
+    """Kullanıcının üye olduğu grupları getirir; kullanıcı silinmişse None, erişim hatasında exception."""
+    return await _fetch_admin_resource(f"users/{user_id}/groups", settings)
+
+
+async def fetch_keycloak_group(group_id: str, settings: Settings) -> Optional[Dict[str, Any]]:
+    """Grup temsilini getirir; grup silinmişse None, erişim hatasında exception."""
+    return await _fetch_admin_resource(f"groups/{group_id}", settings)
+
+
+def iter_keycloak_admin_events_pages(settings: Settings, date_from: str, resource_types: List[str]) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Realm admin event'lerini (`dateFrom` gününden itibaren, verilen kaynak tipleri için) sayfa sayfa döndürür.
+    Keycloak event'leri yeniden eskiye sıralar; araya yeni event girmesi sayfaları yalnızca kaydırır,
+    dolayısıyla offset sayfalamada event kaçmaz (en fazla tekrar gelir).
+    Realm'de admin event kaydının açık olması gerekir.
+    """
+    return _iter_admin_pages(
+        f"{settings.keycloak.admin_api_realm_url}/admin-events", settings,
+        {"dateFrom": date_from, "resourceTypes": resource_types},
+    )
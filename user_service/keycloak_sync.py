@@ -0,0 +1,387 @@
+# user_service/keycloak_sync.py
+"""
+Keycloak -> lokal veritabanı senkronizasyonu.
+
+Kullanıcılar ve gruplar Admin API'den sayfa sayfa (sınırlı eşzamanlılıkla) çekilir ve her sayfa
+tek bir `INSERT ... ON CONFLICT DO UPDATE` ile yazılır; böylece dizinin tamamı belleğe alınmaz ve
+kayıt başına SELECT/COMMIT/REFRESH yapılmaz.
+
+Senkronizasyon uygulama başlangıcını bloklamaz: lifespan `start_background_sync` ile denetlenen
+bir arka plan görevi başlatır, servis bu sırada mevcut veritabanından hizmet verir ve ilerleme
+`sync_progress` üzerinden (readiness endpoint'i ile) izlenebilir.
+
+Artımlı modda (KEYCLOAK_SYNC_MODE=incremental) tam tarama yalnızca hiç watermark yoksa yapılır;
+sonrasında Keycloak admin event'leri kayıtlı watermark'tan itibaren yoklanır ve yalnızca değişen
+kullanıcı/gruplar Keycloak'tan yeniden okunup uygulanır. Maliyet dizin boyutuyla değil değişiklik
+sayısıyla orantılıdır.
+"""
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+try:
+    import resource  # Yalnızca Unix; Windows'ta tepe bellek raporlanmaz.
+except ImportError:  # pragma: no cover
+    resource = None
+
+from . import crud as user_crud
+from . import company_crud
+from . import keycloak_api_helpers
+from . import models as user_pydantic_models
+from .config import Settings
+from .database import AsyncSessionLocal
+
+# Arka plan senkronizasyonunun süreç içi durumu (readiness endpoint'i bunu raporlar).
+sync_progress = user_pydantic_models.SyncProgress()
+_sync_task: Optional[asyncio.Task] = None
+
+ADMIN_EVENTS_WATERMARK = "admin_events"
+# Tam senkronizasyon sonrası watermark, taramanın başladığı andan bu kadar geriye alınır; tarama sırasında
+# oluşan event'ler ve saat kayması nedeniyle kaçabilecek değişiklikler yeniden (idempotent) uygulanır.
+_WATERMARK_SAFETY_MS = 60_000
+_ADMIN_EVENT_RESOURCE_TYPES = ["USER", "GROUP", "GROUP_MEMBERSHIP", "REALM_ROLE_MAPPING"]
+
+
+def _peak_memory_mb() -> Optional[float]:
+    """Sürecin bugüne kadarki tepe RSS değeri (MB). Linux'ta ru_maxrss KB cinsindendir."""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _log_sync_stats(label: str, rows: int, pages: int, started_at: float) -> None:
+    elapsed = max(time.perf_counter() - started_at, 1e-6)
+    peak_memory = _peak_memory_mb()
+    peak_text = f"{peak_memory:.1f} MB" if peak_memory is not None else "bilinmiyor"
+    print(
+        f"STARTUP SYNC: {label} senkronizasyonu tamamlandı: {rows} kayıt, {pages} sayfa, "
+        f"{elapsed:.2f} sn ({rows / elapsed:.0f} kayıt/sn), tepe bellek: {peak_text}."
+    )
+
+
+def _company_from_group(group_rep: Dict[str, Any]) -> Optional[user_pydantic_models.CompanyCreate]:
+    kc_group_id_str = group_rep.get("id")
+    kc_group_name = group_rep.get("name")
+    if not kc_group_id_str or not kc_group_name:
+        return None
+    return user_pydantic_models.CompanyCreate(
+        name=kc_group_name,
+        keycloak_group_id=uuid.UUID(kc_group_id_str),
+        status="active"
+    )
+
+
+def _user_from_representation(user_rep: Dict[str, Any]) -> Optional[user_pydantic_models.UserCreateInternal]:
+    user_id_str = user_rep.get("id")
+    if not user_id_str or not user_rep.get("email"):
+        return None
+    return user_pydantic_models.UserCreateInternal(
+        id=uuid.UUID(user_id_str),
+        email=user_rep.get("email"),
+        full_name=f"{user_rep.get('firstName', '')} {user_rep.get('lastName', '')}".strip() or user_rep.get("username"),
+        roles=user_rep.get("realmRoles", []),
+        is_active=user_rep.get("enabled", False)
+    )
+
+
+async def sync_all_tenants_from_keycloak(db: AsyncSession, settings: Settings) -> None:
+    """Keycloak'taki grupları lokal 'companies' tablosuyla senkronize eder. Hata durumunda exception fırlatır."""
+    print("STARTUP SYNC: Tenant'lar (gruplar) senkronize ediliyor...")
+    if not await keycloak_api_helpers.get_admin_api_token(settings):
+        raise RuntimeError("Admin token alınamadığı için tenant senkronizasyonu yapılamadı.")
+
+    started_at, rows, pages = time.perf_counter(), 0, 0
+    try:
+        async for group_page in keycloak_api_helpers.iter_keycloak_groups_pages(settings):
+            companies: List[user_pydantic_models.CompanyCreate] = [
+                company for company in map(_company_from_group, group_page) if company
+            ]
+            rows += await company_crud.bulk_upsert_companies(db, companies)
+            await db.commit()
+            pages += 1
+            sync_progress.tenants_synced = rows
+        _log_sync_stats("Tenant", rows, pages, started_at)
+    except Exception as e:
+        await db.rollback()
+        print(f"KRİTİK HATA (Startup Sync - Tenants): {e}")
+        raise
+
+
+async def sync_all_users_from_keycloak(db: AsyncSession, settings: Settings) -> None:
+    """Keycloak'taki kullanıcıları lokal 'users' tablosuyla senkronize eder. Hata durumunda exception fırlatır."""
+    print("STARTUP SYNC: Kullanıcılar senkronize ediliyor...")
+    if not await keycloak_api_helpers.get_admin_api_token(settings):
+        raise RuntimeError("Admin token alınamadığı için kullanıcı senkronizasyonu yapılamadı.")
+
+    started_at, rows, pages = time.perf_counter(), 0, 0
+    try:
+        async for user_page in keycloak_api_helpers.iter_keycloak_users_pages(settings):
+            users: List[user_pydantic_models.UserCreateInternal] = [
+                user for user in map(_user_from_representation, user_page) if user
+            ]
+            rows += await user_crud.bulk_upsert_users(db, users)
+            await db.commit()
+            pages += 1
+            sync_progress.users_synced = rows
+        _log_sync_stats("Kullanıcı", rows, pages, started_at)
+    except Exception as e:
+        await db.rollback()
+        print(f"KRİTİK HATA (Startup Sync - Users): {e}")
+        raise
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def _watermark_datetime(watermark_ms: int) -> datetime:
+    return datetime.fromtimestamp(watermark_ms / 1000, tz=timezone.utc)
+
+
+def _affected_resource(resource_path: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Admin event'in resourcePath'inden etkilenen kaynağı çıkarır:
+    "users/{id}", "users/{id}/role-mappings/realm", "users/{id}/groups/{gid}" -> ("users", id);
+    "groups/{id}", "groups/{id}/children" -> ("groups", id).
+    """
+    parts = (resource_path or "").strip("/").split("/")
+    if len(parts) >= 2 and parts[0] in ("users", "groups") and parts[1]:
+        return parts[0], parts[1]
+    return None, None
+
+
+async def _collect_changed_resources(settings: Settings, watermark: int) -> Tuple[Set[str], Set[str], int, int]:
+    """
+    Watermark'tan yeni admin event'lerini okur ve etkilenen kullanıcı/grup ID'lerini toplar.
+    Event'ler yeniden eskiye geldiği için watermark'a ulaşılınca okuma durdurulur.
+    Dönüş: (user_ids, group_ids, event sayısı, en yeni event zamanı).
+    """
+    # dateFrom gün çözünürlüklüdür ve sunucunun saat dilimine göre yorumlanır; bir gün geriden başlayıp
+    # asıl filtrelemeyi event zamanıyla yapıyoruz.
+    date_from = (_watermark_datetime(watermark) - timedelta(days=1)).date().isoformat()
+    user_ids: Set[str] = set()
+    group_ids: Set[str] = set()
+    seen_events: Set[Tuple[int, str, str]] = set()
+    newest = watermark
+
+    pages = keycloak_api_helpers.iter_keycloak_admin_events_pages(settings, date_from, _ADMIN_EVENT_RESOURCE_TYPES)
+    try:
+        async for event_page in pages:
+            for event in event_page:
+                event_time = event.get("time") or 0
+                if event_time <= watermark:
+                    continue
+                # Offset sayfalamada araya giren event'ler aynı kaydın iki kez gelmesine yol açabilir.
+                event_key = (event_time, event.get("operationType", ""), event.get("resourcePath", ""))
+                if event_key in seen_events:
+                    continue
+                seen_events.add(event_key)
+                newest = max(newest, event_time)
+
+                kind, resource_id = _affected_resource(event.get("resourcePath", ""))
+                if kind == "users":
+                    user_ids.add(resource_id)
+                elif kind == "groups":
+                    group_ids.add(resource_id)
+            if event_page and (event_page[-1].get("time") or 0) <= watermark:
+                break
+    finally:
+        await pages.aclose()
+
+    return user_ids, group_ids, len(seen_events), newest
+
+
+async def _fetch_user_state(user_id: str, settings: Settings) -> Tuple[str, Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Kullanıcının güncel temsilini (realm rolleriyle) ve gruplarını getirir; kullanıcı silinmişse temsil None olur."""
+    user_rep = await keycloak_api_helpers.fetch_keycloak_user(user_id, settings)
+    if user_rep is None:
+        return user_id, None, []
+    role_names = await keycloak_api_helpers.fetch_keycloak_user_realm_role_names(user_id, settings)
+    groups = await keycloak_api_helpers.fetch_keycloak_user_groups(user_id, settings)
+    return user_id, {**user_rep, "realmRoles": role_names or []}, groups or []
+
+
+async def sync_incremental_from_keycloak(db: AsyncSession, settings: Settings) -> int:
+    """
+    Kayıtlı watermark'tan sonraki admin event'lerinin etkilediği kullanıcı ve grupları Keycloak'tan
+    yeniden okur ve yerel tabloları günceller. Deltalar ve yeni watermark tek transaction'da yazılır.
+    İşlenen event sayısını döndürür. Hata durumunda exception fırlatır (watermark ilerlemez).
+    """
+    watermark = await user_crud.get_sync_watermark(db, ADMIN_EVENTS_WATERMARK)
+    if watermark is None:
+        raise RuntimeError("Artımlı senkronizasyon için watermark bulunamadı; önce tam senkronizasyon yapılmalı.")
+
+    try:
+        user_ids, group_ids, event_count, newest = await _collect_changed_resources(settings, watermark)
+        if not event_count:
+            sync_progress.watermark = _watermark_datetime(watermark)
+            return 0
+
+        # Gruplar önce işlenir ki kullanıcıların yeni tenant'ları aynı turda eşlenebilsin.
+        companies: List[user_pydantic_models.CompanyCreate] = []
+        deleted_group_ids: List[uuid.UUID] = []
+        for group_id in group_ids:
+            group_rep = await keycloak_api_helpers.fetch_keycloak_group(group_id, settings)
+            if group_rep is None:
+                deleted_group_ids.append(uuid.UUID(group_id))
+            elif (group_rep.get("path") or "").count("/") <= 1:  # Yalnızca üst seviye gruplar tenant'tır.
+                company = _company_from_group(group_rep)
+                if company:
+                    companies.append(company)
+        await company_crud.delete_companies_by_keycloak_group_ids(db, deleted_group_ids)
+        await company_crud.bulk_upsert_companies(db, companies)
+
+        semaphore = asyncio.Semaphore(max(1, settings.keycloak.sync_concurrency))
+
+        async def fetch_with_limit(user_id: str):
+            async with semaphore:
+                return await _fetch_user_state(user_id, settings)
+
+        user_states = await asyncio.gather(*(fetch_with_limit(user_id) for user_id in user_ids))
+
+        users: List[user_pydantic_models.UserCreateInternal] = []
+        deleted_user_ids: List[uuid.UUID] = []
+        tenant_group_by_user: Dict[uuid.UUID, List[uuid.UUID]] = {}
+        for user_id, user_rep, groups in user_states:
+            if user_rep is None:
+                deleted_user_ids.append(uuid.UUID(user_id))
+                continue
+            user = _user_from_representation(user_rep)
+            if user:
+                users.append(user)
+                tenant_group_by_user[user.id] = [uuid.UUID(group["id"]) for group in groups if group.get("id")]
+
+        # Silinen kullanıcılar önce kaldırılır; e-postası yeni bir kullanıcıya geçmişse unique çakışması olmasın.
+        await user_crud.delete_users_by_keycloak_ids(db, deleted_user_ids)
+        await user_crud.bulk_upsert_users(db, users)
+
+        company_by_group = await company_crud.get_company_ids_by_keycloak_group_ids(
+            db, list({group_id for group_ids_of_user in tenant_group_by_user.values() for group_id in group_ids_of_user})
+        )
+        await user_crud.set_user_companies(db, {
+            user_id: next((company_by_group[group_id] for group_id in user_group_ids if group_id in company_by_group), None)
+            for user_id, user_group_ids in tenant_group_by_user.items()
+        })
+
+        await user_crud.set_sync_watermark(db, ADMIN_EVENTS_WATERMARK, newest)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        print(f"KRİTİK HATA (Incremental Sync): {e}")
+        raise
+
+    sync_progress.watermark = _watermark_datetime(newest)
+    print(
+        f"INCREMENTAL SYNC: {event_count} event işlendi; {len(users)} kullanıcı güncellendi, {len(deleted_user_ids)} silindi; "
+        f"{len(companies)} tenant güncellendi, {len(deleted_group_ids)} silindi."
+    )
+    return event_count
+
+
+async def _run_initial_sync(settings: Settings) -> None:
+    async with AsyncSessionLocal() as db_session:
+        if settings.keycloak.sync_mode == "incremental":
+            watermark = await user_crud.get_sync_watermark(db_session, ADMIN_EVENTS_WATERMARK)
+            if watermark is not None:
+                # Tam tarama gerekmez; servis kapalıyken birikmiş event'ler uygulanır.
+                await sync_incremental_from_keycloak(db=db_session, settings=settings)
+                return
+            full_sync_started_ms = _now_ms() - _WATERMARK_SAFETY_MS
+
+        await sync_all_tenants_from_keycloak(db=db_session, settings=settings)
+        await sync_all_users_from_keycloak(db=db_session, settings=settings)
+
+        if settings.keycloak.sync_mode == "incremental":
+            await user_crud.set_sync_watermark(db_session, ADMIN_EVENTS_WATERMARK, full_sync_started_ms)
+            await db_session.commit()
+            sync_progress.watermark = _watermark_datetime(full_sync_started_ms)
+
+
+async def _poll_admin_events(settings: Settings) -> None:
+    """Artımlı modda admin event'lerini periyodik olarak yoklar. Hatalar loglanır, bir sonraki turda yeniden denenir."""
+    interval = max(1.0, settings.keycloak.incremental_sync_interval)
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with AsyncSessionLocal() as db_session:
+                await sync_incremental_from_keycloak(db=db_session, settings=settings)
+            sync_progress.last_error = None
+        except Exception as e:
+            sync_progress.last_error = str(e)
+            print(f"UYARI (Incremental Sync): Yoklama başarısız, {interval:.0f} sn sonra yeniden denenecek: {e}")
+
+
+async def run_startup_sync(settings: Settings) -> None:
+    """
+    Tenant ve kullanıcı senkronizasyonunu çalıştırır; başarısız olursa üstel bekleme ile
+    `sync_max_attempts` kez yeniden dener. Her deneme kendi DB oturumunu kullanır.
+    Artımlı modda ilk senkronizasyondan sonra admin event yoklamasına devam eder.
+    """
+    sync_progress.mode = settings.keycloak.sync_mode
+    max_attempts = max(1, settings.keycloak.sync_max_attempts)
+    for attempt in range(1, max_attempts + 1):
+        sync_progress.phase = "running"
+        sync_progress.attempts = attempt
+        sync_progress.tenants_synced = 0
+        sync_progress.users_synced = 0
+        sync_progress.started_at = datetime.now(timezone.utc)
+        sync_progress.finished_at = None
+        try:
+            await _run_initial_sync(settings)
+        except Exception as e:
+            sync_progress.phase = "failed"
+            sync_progress.last_error = str(e)
+            sync_progress.finished_at = datetime.now(timezone.utc)
+            if attempt == max_attempts:
+                print(f"KRİTİK HATA (Background Sync): {attempt} denemenin ardından senkronizasyondan vazgeçildi. Servis mevcut DB verisiyle çalışmaya devam ediyor.")
+                return
+            delay = settings.keycloak.sync_retry_delay * (2 ** (attempt - 1))
+            print(f"UYARI (Background Sync): Deneme {attempt}/{max_attempts} başarısız, {delay:.1f} sn sonra yeniden denenecek.")
+            await asyncio.sleep(delay)
+            continue
+
+        sync_progress.phase = "complete"
+        sync_progress.last_error = None
+        sync_progress.finished_at = datetime.now(timezone.utc)
+        print("BACKGROUND SYNC: Keycloak senkronizasyonu tamamlandı.")
+        break
+
+    if sync_progress.phase == "complete" and settings.keycloak.sync_mode == "incremental":
+        await _poll_admin_events(settings)
+
+
+def _on_sync_task_done(task: asyncio.Task) -> None:
+    if task.cancelled():
+        return
+    exc = task.exception()
+    if exc is not None:
+        # run_startup_sync kendi hatalarını yakalar; buraya düşen her şey beklenmedik bir hatadır.
+        sync_progress.phase = "failed"
+        sync_progress.last_error = str(exc)
+        print(f"KRİTİK HATA (Background Sync): Senkronizasyon görevi beklenmedik şekilde sonlandı: {exc}")
+
+
+def start_background_sync(settings: Settings) -> asyncio.Task:
+    """Senkronizasyonu arka plan görevi olarak başlatır (zaten çalışıyorsa mevcut görevi döndürür)."""
+    global _sync_task
+    if _sync_task is None or _sync_task.done():
+        _sync_task = asyncio.create_task(run_startup_sync(settings), name="keycloak-startup-sync")
+        _sync_task.add_done_callback(_on_sync_task_done)
+    return _sync_task
+
+
+async def stop_background_sync() -> None:
+    """Uygulama kapanırken devam eden senkronizasyon görevini iptal eder."""
+    global _sync_task
+    if _sync_task is not None and not _sync_task.done():
+        _sync_task.cancel()
+        try:
+            await _sync_task
+        except asyncio.CancelledError:
+            pass
+        print("BACKGROUND SYNC: Devam eden senkronizasyon kapanış nedeniyle iptal edildi.")
+    _sync_task = None
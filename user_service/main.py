@@ -5,102 +5,41 @@ from contextlib import asynccontextmanager
 from typing import Annotated, Dict, Any, List, Optional
 
 import httpx
-from fastapi import FastAPI, Depends, HTTPException, status, Response
+from fastapi import FastAPI, Depends, HTTPException, status, Response, Query, Header
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text, inspect as sa_inspect
 from sqlalchemy.exc import IntegrityError
 
 # user_service'e ait yerel modüllerin import edilmesi
 # DÜZELTME: Tüm importları tek bir yerden ve doğru takma adlarla yapıyoruz.
 from . import crud as user_crud
 from . import company_crud
+from . import etag
+from . import fieldsets
 from . import keycloak_api_helpers
+from . import keycloak_sync
 from . import db_models # SQLAlchemy modelleri
 from . import models as user_pydantic_models # Pydantic modelleri
-from .database import get_db, SessionLocal # SessionLocal'ı lifespan için import ediyoruz
+from .database import get_async_db
 from .auth import get_current_user_payload, verify_internal_secret
 from .config import Settings, get_settings
 
-async def sync_all_tenants_from_keycloak_on_startup(db: Session, settings: Settings):
-    """Keycloak'taki grupları lokal 'companies' tablosuyla senkronize eder."""
-    print("STARTUP SYNC: Tenant'lar (gruplar) senkronize ediliyor...")
-    try:
-        all_kc_groups = await keycloak_api_helpers.get_all_keycloak_groups_paginated(settings)
-        if all_kc_groups is None:
-            print("HATA (Startup Sync): Admin token alınamadığı için tenant senkronizasyonu atlandı.")
-            return
-
-        for group_rep in all_kc_groups:
-            kc_group_id_str = group_rep.get("id")
-            kc_group_name = group_rep.get("name")
-            if not kc_group_id_str or not kc_group_name:
-                continue
-            
-            kc_group_uuid = uuid.UUID(kc_group_id_str)
-            company_in_db = company_crud.get_company_by_keycloak_group_id(db, keycloak_group_id=kc_group_uuid)
-
-            if not company_in_db:
-                # DÜZELTME: `common_schemas` yerine `user_pydantic_models` kullanılıyor.
-                new_company_data = user_pydantic_models.CompanyCreate(
-                    name=kc_group_name,
-                    keycloak_group_id=kc_group_uuid,
-                    status="active"
-                )
-                company_crud.create_company(db, company=new_company_data)
-                print(f"BİLGİ (Startup Sync): Yeni tenant eklendi: {kc_group_name}")
-            elif company_in_db.name != kc_group_name:
-                # DÜZELTME: `common_schemas` yerine `user_pydantic_models` kullanılıyor.
-                company_crud.update_company(db, company_in_db, user_pydantic_models.CompanyUpdate(name=kc_group_name))
-                print(f"BİLGİ (Startup Sync): Tenant adı güncellendi: {kc_group_name}")
-
-        print("STARTUP SYNC: Tenant senkronizasyonu tamamlandı.")
-    except Exception as e:
-        print(f"KRİTİK HATA (Startup Sync - Tenants): {e}")
-
-async def sync_all_users_from_keycloak_on_startup(db: Session, settings: Settings):
-    """Keycloak'taki kullanıcıları lokal 'users' tablosuyla senkronize eder."""
-    print("STARTUP SYNC: Kullanıcılar senkronize ediliyor...")
-    try:
-        all_kc_users = await keycloak_api_helpers.get_all_keycloak_users_paginated(settings)
-        if all_kc_users is None:
-            print("HATA (Startup Sync): Admin token alınamadığı için kullanıcı senkronizasyonu atlandı.")
-            return
-
-        for user_rep in all_kc_users:
-            user_id_str = user_rep.get("id")
-            if not user_id_str or not user_rep.get("email"):
-                continue
-
-            # DÜZELTME: `user_models` yerine `user_pydantic_models` kullanılıyor.
-            user_create_data = user_pydantic_models.UserCreateInternal(
-                id=uuid.UUID(user_id_str),
-                email=user_rep.get("email"),
-                full_name=f"{user_rep.get('firstName', '')} {user_rep.get('lastName', '')}".strip() or user_rep.get("username"),
-                roles=user_rep.get("realmRoles", []),
-                is_active=user_rep.get("enabled", False)
-            )
-            user_crud.get_or_create_user(db, user_data=user_create_data)
-        
-        print("STARTUP SYNC: Kullanıcı senkronizasyonu tamamlandı.")
-    except Exception as e:
-        print(f"KRİTİK HATA (Startup Sync - Users): {e}")
-
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Uygulama yaşam döngüsü yöneticisi."""
     print("Uygulama başlıyor...")
-    # DÜZELTME: `SessionLocal` doğru import edildi.
-    db_session = SessionLocal()
     app_settings = get_settings()
-    try:
-        await sync_all_tenants_from_keycloak_on_startup(db=db_session, settings=app_settings)
-        await sync_all_users_from_keycloak_on_startup(db=db_session, settings=app_settings)
-    finally:
-        db_session.close()
+    await keycloak_api_helpers.start_http_client(app_settings)
+    # Senkronizasyon trafiği bloklamasın: servis mevcut DB'den hizmet verirken arka planda çalışır.
+    keycloak_sync.start_background_sync(app_settings)
     yield
     print("Uygulama kapanıyor...")
+    await keycloak_sync.stop_background_sync()
+    await keycloak_api_helpers.close_http_client()
 
 # --- FastAPI Uygulama Tanımı ---
 
@@ -120,6 +59,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 class UserListResponse(BaseModel):
@@ -137,7 +77,7 @@ def _split_full_name(full_name: str) -> tuple[str, str]:
 async def delete_tenant_by_admin(
     company_id: uuid.UUID,
     current_user_payload: Annotated[Dict[str, Any], Depends(get_current_user_payload)],
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     settings: Settings = Depends(get_settings)
 ):
     user_roles = current_user_payload.get("roles", [])
@@ -151,7 +91,7 @@ async def delete_tenant_by_admin(
     print(f"{log_prefix} Attempting to delete company (tenant) with ID: {company_id}")
 
     # 1. Lokal DB'den şirketi (tenant'ı) bul
-    db_company = company_crud.get_company(db, company_id=company_id)
+    db_company = await company_crud.get_company(db, company_id=company_id)
     if not db_company:
         print(f"WARN ({log_prefix}): Company with ID {company_id} not found in local DB. Nothing to delete.")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Silinecek şirket (tenant) bulunamadı.")
@@ -181,7 +121,7 @@ async def delete_tenant_by_admin(
     # bu bağımlı kayıtların da silinmesi/güncellenmesi gerekebilir (CASCADE, SET NULL vb.).
     # Şimdilik, doğrudan silmeyi deniyoruz. CRUD fonksiyonu bu durumu ele alabilir.
     
-    deleted_company_from_db = company_crud.delete_company(db, company_id=company_id)
+    deleted_company_from_db = await company_crud.delete_company(db, company_id=company_id)
     if deleted_company_from_db is None: # delete_company bulamazsa None döner, ama yukarıda zaten bulduk. Bu bir tutarlılık kontrolü.
         print(f"HATA ({log_prefix}): Company (ID: {company_id}) was found but could not be deleted from local DB. This is unexpected.")
         # Keycloak grubu silinmiş olabilir. Manuel müdahale gerekebilir.
@@ -196,7 +136,7 @@ async def read_user_details_for_admin(
     user_id: uuid.UUID,
     current_admin_payload: Annotated[dict, Depends(get_current_user_payload)],
     settings: Annotated[Settings, Depends(get_settings)],
-    db: Annotated[Session, Depends(get_db)] # <-- DEĞİŞİKLİK BURADA
+    db: Annotated[AsyncSession, Depends(get_async_db)] # <-- DEĞİŞİKLİK BURADA
 ):
     """
     (General Admin Only) Belirli bir kullanıcının detaylarını getirir.
@@ -207,7 +147,7 @@ async def read_user_details_for_admin(
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Bu işlem için yetkiniz yok.")
 
     # Lokal veritabanından kullanıcıyı al
-    db_user = user_crud.get_user_by_keycloak_id(db, keycloak_id=user_id)
+    db_user = await user_crud.get_user_by_keycloak_id(db, keycloak_id=user_id)
     if not db_user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Kullanıcı ID '{user_id}' bulunamadı.")
 
@@ -237,7 +177,7 @@ async def read_user_details_for_admin(
             if keycloak_group_id_str:
                 try:
                     kc_group_uuid = uuid.UUID(keycloak_group_id_str)
-                    company_in_db = company_crud.get_company_by_keycloak_group_id(db, keycloak_group_id=kc_group_uuid)
+                    company_in_db = await company_crud.get_company_by_keycloak_group_id(db, keycloak_group_id=kc_group_uuid)
                     if company_in_db:
                         # Pydantic modelini kullanarak şirket bilgisini oluştur
                         user_company_info = user_pydantic_models.CompanyBasicInfo(
@@ -268,7 +208,7 @@ async def update_user_for_admin(
     user_update_data: user_pydantic_models.AdminUserUpdateRequest,
     current_admin_payload: Annotated[dict, Depends(get_current_user_payload)],
     settings: Annotated[Settings, Depends(get_settings)],
-    db: Annotated[Session, Depends(get_db)] # <-- DEĞİŞİKLİK BURADA
+    db: Annotated[AsyncSession, Depends(get_async_db)] # <-- DEĞİŞİKLİK BURADA
 ):
     """
     (General Admin Only) Belirli bir kullanıcının bilgilerini günceller.
@@ -277,7 +217,7 @@ async def update_user_for_admin(
     if "general-admin" not in current_admin_payload.get("realm_access", {}).get("roles", []):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Bu işlem için yetkiniz yok.")
 
-    db_user = user_crud.get_user_by_keycloak_id(db, keycloak_id=user_id)
+    db_user = await user_crud.get_user_by_keycloak_id(db, keycloak_id=user_id)
     if not db_user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Güncellenecek kullanıcı ID '{user_id}' bulunamadı.")
 
@@ -354,7 +294,7 @@ async def update_user_for_admin(
         # Eğer yeni bir tenant_id (lokal DB şirket ID'si) verilmişse (null değilse),
         # kullanıcıyı o tenant'ın Keycloak grubuna ekle
         if new_tenant_id is not None:
-            target_company_db = company_crud.get_company(db, company_id=new_tenant_id)
+            target_company_db = await company_crud.get_company(db, company_id=new_tenant_id)
             if not target_company_db:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Belirtilen tenant_id '{new_tenant_id}' ile şirket bulunamadı.")
             if not target_company_db.keycloak_group_id:
@@ -368,8 +308,8 @@ async def update_user_for_admin(
                 raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Kullanıcı yeni Keycloak grubuna eklenirken hata oluştu.")
 
     db.add(db_user) # Değişiklikleri session'a ekle
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
 
     # Güncellenmiş kullanıcı bilgilerini tam olarak döndürmek için GET endpoint'ini çağır
     # Bu, tüm bağlı verilerin (yeni roller, yeni şirket) doğru şekilde yüklenmesini sağlar.
@@ -381,10 +321,12 @@ async def get_user_for_internal_service(
     # Bu endpoint'in sadece diğer servisler tarafından çağrıldığından emin olmak için
     # basit bir "shared secret" doğrulaması kullanıyoruz.
     is_internal: Annotated[bool, Depends(verify_internal_secret)],
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    fields: Optional[str] = Query(None, description=fieldsets.FIELDS_QUERY_DESCRIPTION),
 ):
     """
     İç servis iletişimi için belirli bir kullanıcının detaylarını döndürür.
+    `fields` verilirse yalnızca istenen kolonlar seçilir ve döndürülür.
     """
     if not is_internal:
         # Bu hata normalde `verify_internal_secret` içinde fırlatılır,
@@ -392,7 +334,14 @@ async def get_user_for_internal_service(
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Yetkisiz erişim.")
     
     print(f"INTERNAL CALL: Fetching details for user_id: {user_id}")
-    db_user = user_crud.get_user_by_keycloak_id(db, keycloak_id=user_id)
+    selected_fields = fieldsets.parse_fields(fields, user_pydantic_models.User.model_fields)
+    if selected_fields is not None:
+        user_data = await user_crud.get_user_projection(db, keycloak_id=user_id, fields=selected_fields)
+        if user_data is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Kullanıcı bulunamadı.")
+        return JSONResponse(content=jsonable_encoder(user_data))
+
+    db_user = await user_crud.get_user_by_keycloak_id(db, keycloak_id=user_id)
     
     if not db_user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Kullanıcı bulunamadı.")
@@ -400,6 +349,42 @@ async def get_user_for_internal_service(
     # Yanıtı Pydantic modeline uygun şekilde döndür
     return db_user
 
+@app.post(f"{API_PREFIX}/internal/users/batch", response_model=user_pydantic_models.UserBatchResponse, tags=["Internal"])
+async def get_users_batch_for_internal_service(
+    batch_request: user_pydantic_models.UserBatchRequest,
+    is_internal: Annotated[bool, Depends(verify_internal_secret)],
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    İç servis iletişimi için birden çok kullanıcıyı (şirketleriyle birlikte) tek sorguda döndürür.
+    Yanıt ID'ye göre anahtarlanmış bir sözlüktür; bulunamayan ID'ler `missing` listesinde döner.
+    """
+    if not is_internal:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Yetkisiz erişim.")
+
+    requested_ids = list(dict.fromkeys(batch_request.ids))  # Sırayı koruyarak tekrarları at
+    print(f"INTERNAL CALL: Fetching details for {len(requested_ids)} users (batch).")
+    db_users = await user_crud.get_users_by_keycloak_ids(db, requested_ids)
+
+    users_by_id = {db_user.id: user_pydantic_models.User.model_validate(db_user) for db_user in db_users}
+    return user_pydantic_models.UserBatchResponse(
+        users=users_by_id,
+        missing=[user_id for user_id in requested_ids if user_id not in users_by_id],
+    )
+
+@app.get(f"{API_PREFIX}/internal/tenants", response_model=List[user_pydantic_models.TenantDirectoryEntry], tags=["Internal"])
+async def get_tenant_directory_for_internal_service(
+    is_internal: Annotated[bool, Depends(verify_internal_secret)],
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    İç servislerin (örn. ticket_service) token'daki grup yolunu tenant ID'sine kendi başına
+    çözebilmesi için tüm tenant'ların hafif listesini döndürür. Çağıran taraf bunu önbelleğe alır.
+    """
+    if not is_internal:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Yetkisiz erişim.")
+    return await company_crud.get_tenant_directory(db)
+
 @app.post(f"{API_PREFIX}/admin/users",
     response_model=user_pydantic_models.User,
     status_code=status.HTTP_201_CREATED,
@@ -408,7 +393,7 @@ async def get_user_for_internal_service(
 async def admin_create_user(
     request_data: user_pydantic_models.AdminUserCreateRequest,
     current_user_payload: Annotated[Dict[str, Any], Depends(get_current_user_payload)],
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     settings: Settings = Depends(get_settings)
 ):
     user_roles_from_token = current_user_payload.get("roles", [])
@@ -424,7 +409,7 @@ async def admin_create_user(
     # 1. Tenant/Grup ID'sini Belirle (Eğer request_data.tenant_id sağlanmışsa)
     keycloak_group_id_to_assign: Optional[str] = None
     if request_data.tenant_id:
-        company = company_crud.get_company(db, company_id=request_data.tenant_id)
+        company = await company_crud.get_company(db, company_id=request_data.tenant_id)
         if not company:
             print(f"HATA ({log_prefix}): Belirtilen tenant_id ({request_data.tenant_id}) ile şirket bulunamadı.")
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Belirtilen tenant ID ({request_data.tenant_id}) ile şirket bulunamadı.")
@@ -506,15 +491,15 @@ async def admin_create_user(
     )
     
     try:
-        db_user = user_crud.get_or_create_user(db=db, user_data=user_data_for_local_db)
+        db_user = await user_crud.get_or_create_user(db=db, user_data=user_data_for_local_db)
     except IntegrityError as e: # Örneğin email unique constraint ihlali (Keycloak'ta yokken DB'de varsa)
-        db.rollback()
+        await db.rollback()
         print(f"HATA ({log_prefix}): Kullanıcı lokal DB'ye kaydedilirken IntegrityError: {e}")
         # Bu durum, Keycloak'ta kullanıcı oluşturulduktan sonra DB'de bir çakışma olduğunu gösterir.
         # İdealde Keycloak'taki kullanıcı silinmeli.
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Kullanıcı bilgileri lokal veritabanıyla çakışıyor.")
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"HATA ({log_prefix}): Kullanıcı lokal DB'ye kaydedilirken beklenmedik hata: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Kullanıcı lokal veritabanına kaydedilirken bir hata oluştu.")
 
@@ -533,7 +518,7 @@ async def admin_create_user(
 @app.post(f"{API_PREFIX}/internal/users/sync", response_model=user_pydantic_models.User, tags=["Internal"])
 async def sync_user_internally(
     sync_data: user_pydantic_models.UserCreateInternal, # JIT için gelen veri
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     # is_internal: Annotated[bool, Depends(verify_internal_secret)], # Güvenlik için eklenebilir
 ):
     """
@@ -542,25 +527,33 @@ async def sync_user_internally(
     """
     # if not is_internal: raise HTTPException(status_code=403, detail="Yetkisiz erişim.")
 
-    # 1. Kullanıcıyı lokal DB'de oluştur veya bilgilerini güncelle
-    db_user = user_crud.get_or_create_user(db=db, user_data=sync_data)
+    # Aynı veri kısa süre önce uygulandıysa tenant çözümlemesi de atlanır (get_or_create_user bunu günceller).
+    recently_synced = user_crud.was_recently_synced(sync_data)
+
+    # 1. Kullanıcıyı lokal DB'de oluştur veya bilgilerini güncelle (değişiklik yoksa yazma yapılmaz)
+    db_user = await user_crud.get_or_create_user(db=db, user_data=sync_data)
     
     # 2. Keycloak'tan gelen grup bilgisine göre kullanıcının şirketini (tenant) ayarla
     user_company_info = None
     if sync_data.keycloak_groups:
-        # Şimdilik ilk grubu kullanıcının ana grubu olarak kabul ediyoruz
-        group_path = sync_data.keycloak_groups[0]
-        # Bu path'ten grup ID'sini ve adını almamız gerekebilir,
-        # şimdilik sadece path'in adını şirket adı olarak varsayalım.
-        # İdealde burada keycloak_api_helpers kullanılır.
-        group_name = group_path.strip("/").split("/")[-1]
-        
-        company = company_crud.get_company_by_name(db, name=group_name)
-        if company:
-            db_user.company_id = company.id
-            db.commit()
-            db.refresh(db_user)
-            user_company_info = user_pydantic_models.CompanyBasicInfo.from_orm(company)
+        if recently_synced and "company" not in sa_inspect(db_user).unloaded and db_user.company is not None:
+            # get_user_by_keycloak_id şirketi aynı sorguda yükler; ek sorgu gerekmez.
+            user_company_info = user_pydantic_models.CompanyBasicInfo.from_orm(db_user.company)
+        else:
+            # Şimdilik ilk grubu kullanıcının ana grubu olarak kabul ediyoruz
+            group_path = sync_data.keycloak_groups[0]
+            # Bu path'ten grup ID'sini ve adını almamız gerekebilir,
+            # şimdilik sadece path'in adını şirket adı olarak varsayalım.
+            # İdealde burada keycloak_api_helpers kullanılır.
+            group_name = group_path.strip("/").split("/")[-1]
+            
+            company = await company_crud.get_company_by_name(db, name=group_name)
+            if company:
+                if db_user.company_id != company.id:
+                    db_user.company_id = company.id
+                    await db.commit()
+                    await db.refresh(db_user)
+                user_company_info = user_pydantic_models.CompanyBasicInfo.from_orm(company)
 
     # 3. Frontend ve diğer servislerin kullanması için tam kullanıcı modelini döndür
     response_user = user_pydantic_models.User(
@@ -580,10 +573,18 @@ async def sync_user_internally(
 )
 async def list_users_for_admin(
     current_user_payload: Annotated[Dict[str, Any], Depends(get_current_user_payload)],
-    db: Session = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    fields: Optional[str] = Query(None, description=fieldsets.FIELDS_QUERY_DESCRIPTION),
+    if_none_match: Optional[str] = Header(None),
 ):
+    """
+    Kullanıcıları sayfalayarak listeler.
+    `fields` verilirse yalnızca istenen kolonlar seçilir ve döndürülür (`company` istenirse aynı sorguda gelir).
+    Yanıt ETag taşır; If-None-Match eşleşirse yalnızca sürüm sorgusu çalıştırılıp 304 döner.
+    """
     user_roles_from_token = current_user_payload.get("roles", [])
     if not user_roles_from_token and current_user_payload.get("realm_access"):
         user_roles_from_token = current_user_payload.get("realm_access", {}).get("roles", [])
@@ -591,10 +592,23 @@ async def list_users_for_admin(
     if "general-admin" not in user_roles_from_token:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Bu işlemi yapma yetkiniz yok.")
 
+    selected_fields = fieldsets.parse_fields(fields, user_pydantic_models.User.model_fields)
     print(f"INFO (GET /admin/users): General admin '{current_user_payload.get('sub')}' listing users. Skip: {skip}, Limit: {limit}")
-    
-    db_users = user_crud.get_users(db, skip=skip, limit=limit)
-    total_users = user_crud.count_users(db)
+
+    users_version, companies_version = await user_crud.get_users_version(db)
+    current_etag = etag.make_etag("users", users_version, companies_version, skip, limit, selected_fields)
+    if etag.is_not_modified(if_none_match, current_etag):
+        return etag.not_modified_response(current_etag)
+
+    total_users = await user_crud.count_users(db)
+    if selected_fields is not None:
+        users_data = await user_crud.get_users_projection(db, fields=selected_fields, skip=skip, limit=limit)
+        json_response = JSONResponse(content=jsonable_encoder({"items": users_data, "total": total_users}))
+        etag.set_etag_headers(json_response, current_etag)
+        return json_response
+
+    db_users = await user_crud.get_users(db, skip=skip, limit=limit)
+    etag.set_etag_headers(response, current_etag)
     
     # Pydantic user_models.User listesine dönüştür
     # ve roles alanını DB'deki role enum değerinden oluştur
@@ -617,6 +631,28 @@ async def list_users_for_admin(
         
     return UserListResponse(items=pydantic_users, total=total_users)
 
+@app.get(f"{API_PREFIX}/healthz", status_code=status.HTTP_200_OK, tags=["Health Check"])
+async def health_check():
+    return {"status": "healthy"}
+
+@app.get(f"{API_PREFIX}/readyz", response_model=user_pydantic_models.ReadinessStatus, tags=["Health Check"])
+async def readiness_check(db: AsyncSession = Depends(get_async_db)):
+    """
+    Veritabanına erişilebiliyorsa servis trafiğe hazırdır; Keycloak senkronizasyonunun bitmesi beklenmez.
+    `status` senkronizasyon bitene kadar "serving_from_existing_db", bittikten sonra "sync_complete" olur.
+    """
+    try:
+        await db.execute(text("SELECT 1"))
+    except Exception as e:
+        print(f"HATA (Readiness): Veritabanına erişilemiyor: {e}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Veritabanına erişilemiyor.")
+
+    progress = keycloak_sync.sync_progress
+    return user_pydantic_models.ReadinessStatus(
+        status="sync_complete" if progress.phase == "complete" else "serving_from_existing_db",
+        sync=progress,
+    )
+
 @app.get(f"{API_PREFIX}/", tags=["Root"])
 async def read_root_user_service():
     return {"message": "User Service API çalışıyor"}
@@ -626,7 +662,7 @@ async def read_root_user_service():
 async def create_new_tenant(
     tenant_request: user_pydantic_models.TenantCreateRequest, 
     current_user_payload: Annotated[Dict[str, Any], Depends(get_current_user_payload)],
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     settings: Settings = Depends(get_settings)
 ):
     user_roles = current_user_payload.get("roles", [])
@@ -639,7 +675,7 @@ async def create_new_tenant(
 
     print(f"INFO (POST /admin/tenants): General admin '{current_user_payload.get('sub')}' trying to create tenant with name: '{tenant_request.name}'")
 
-    existing_company_by_name = company_crud.get_company_by_name(db, name=tenant_request.name)
+    existing_company_by_name = await company_crud.get_company_by_name(db, name=tenant_request.name)
     if existing_company_by_name:
         print(f"HATA (POST /admin/tenants): Tenant name '{tenant_request.name}' already exists locally with ID {existing_company_by_name.id}.")
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"'{tenant_request.name}' adlı şirket zaten mevcut.")
@@ -663,7 +699,7 @@ async def create_new_tenant(
         print(f"HATA (POST /admin/tenants): Keycloak'tan dönen grup ID'si ('{created_keycloak_group_id_str}') geçerli bir UUID değil.")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Keycloak'tan geçersiz grup ID formatı alındı.")
 
-    existing_company_by_kc_id = company_crud.get_company_by_keycloak_group_id(db, keycloak_group_id=keycloak_group_uuid)
+    existing_company_by_kc_id = await company_crud.get_company_by_keycloak_group_id(db, keycloak_group_id=keycloak_group_uuid)
     if existing_company_by_kc_id:
         print(f"HATA (POST /admin/tenants): Keycloak group ID '{keycloak_group_uuid}' already linked to local company '{existing_company_by_kc_id.name}'. This is an inconsistency.")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Kritik sistem hatası: Keycloak grup ID çakışması.")
@@ -675,25 +711,28 @@ async def create_new_tenant(
     )
     
     try:
-        db_company = company_crud.create_company(db=db, company=company_to_create)
+        db_company = await company_crud.create_company(db=db, company=company_to_create)
         print(f"INFO (POST /admin/tenants): Tenant '{db_company.name}' (ID: {db_company.id}) created successfully with Keycloak Group ID: {db_company.keycloak_group_id}")
         return db_company
     except IntegrityError as e: 
-        db.rollback()
+        await db.rollback()
         print(f"HATA (POST /admin/tenants): Veritabanına şirket kaydedilirken IntegrityError: {e}")
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Şirket adı veya Keycloak ID'si veritabanında zaten mevcut.")
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"HATA (POST /admin/tenants): Veritabanına şirket kaydedilirken beklenmedik hata: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Şirket veritabanına kaydedilirken bir hata oluştu.")
 
 @app.get(f"{API_PREFIX}/admin/tenants", response_model=user_pydantic_models.CompanyList, summary="Tüm tenantları (müşteri şirketlerini) listeler (Sadece General Admin)")
 async def list_tenants(
     current_user_payload: Annotated[Dict[str, Any], Depends(get_current_user_payload)],
-    db: Session = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    if_none_match: Optional[str] = Header(None),
 ):
+    """Tenantları sayfalayarak listeler. Yanıt ETag taşır; If-None-Match eşleşirse 304 döner."""
     user_roles = current_user_payload.get("roles", [])
     if not user_roles and current_user_payload.get("realm_access"):
         user_roles = current_user_payload.get("realm_access", {}).get("roles", [])
@@ -703,16 +742,21 @@ async def list_tenants(
 
     print(f"INFO (GET /admin/tenants): General admin '{current_user_payload.get('sub')}' listing tenants. Skip: {skip}, Limit: {limit}")
     
-    companies = company_crud.get_companies(db, skip=skip, limit=limit)
-    total_companies = company_crud.count_companies(db)
-    
+    companies_version = await company_crud.get_companies_version(db)
+    current_etag = etag.make_etag("tenants", companies_version, skip, limit)
+    if etag.is_not_modified(if_none_match, current_etag):
+        return etag.not_modified_response(current_etag)
+
+    total_companies = await company_crud.count_companies(db)
+    companies = await company_crud.get_companies(db, skip=skip, limit=limit)
+    etag.set_etag_headers(response, current_etag)
     return user_pydantic_models.CompanyList(items=companies, total=total_companies)
 
 @app.get(f"{API_PREFIX}/admin/tenants/{{company_id}}", response_model=user_pydantic_models.Company, summary="Belirli bir tenantın detaylarını getirir (Sadece General Admin)")
 async def get_tenant_details(
     company_id: uuid.UUID, 
     current_user_payload: Annotated[Dict[str, Any], Depends(get_current_user_payload)],
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     user_roles = current_user_payload.get("roles", [])
     if not user_roles and current_user_payload.get("realm_access"):
@@ -723,7 +767,7 @@ async def get_tenant_details(
 
     print(f"INFO (GET /admin/tenants/{{company_id}}): General admin '{current_user_payload.get('sub')}' requesting details for company ID: {company_id}")
     
-    db_company = company_crud.get_company(db, company_id=company_id)
+    db_company = await company_crud.get_company(db, company_id=company_id)
     if db_company is None:
         print(f"WARN (GET /admin/tenants/{{company_id}}): Company with ID {company_id} not found.")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Şirket (tenant) bulunamadı.")
@@ -735,7 +779,7 @@ async def update_tenant_details( # Fonksiyon adını daha genel yaptım
     company_id: uuid.UUID, 
     company_update_request: user_pydantic_models.CompanyUpdate, # database_pkg.schemas.CompanyUpdate Pydantic modeli
     current_user_payload: Annotated[Dict[str, Any], Depends(get_current_user_payload)],
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     settings: Settings = Depends(get_settings)
 ):
     user_roles = current_user_payload.get("roles", [])
@@ -749,7 +793,7 @@ async def update_tenant_details( # Fonksiyon adını daha genel yaptım
     log_prefix = f"INFO (PATCH /admin/tenants/{company_id} User: {current_user_payload.get('sub')}):"
     print(f"{log_prefix} Attempting to update company with data: {company_update_request.model_dump(exclude_unset=True)}")
 
-    db_company = company_crud.get_company(db, company_id=company_id)
+    db_company = await company_crud.get_company(db, company_id=company_id)
     if db_company is None:
         print(f"{log_prefix} Company with ID {company_id} not found.")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Güncellenecek şirket (tenant) bulunamadı.")
@@ -758,7 +802,7 @@ async def update_tenant_details( # Fonksiyon adını daha genel yaptım
         print(f"{log_prefix} Name update requested from '{db_company.name}' to '{company_update_request.name}'.")
         
         # 1. Lokal DB'de yeni isimle başka bir tenant var mı kontrol et (aynı ID hariç)
-        existing_company_with_new_name = company_crud.get_company_by_name(db, name=company_update_request.name)
+        existing_company_with_new_name = await company_crud.get_company_by_name(db, name=company_update_request.name)
         if existing_company_with_new_name and existing_company_with_new_name.id != company_id:
             print(f"{log_prefix} Attempt to update company name to '{company_update_request.name}', but this name is already used by company ID {existing_company_with_new_name.id}.")
             raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"'{company_update_request.name}' adlı şirket zaten mevcut.")
@@ -785,7 +829,10 @@ async def update_tenant_details( # Fonksiyon adını daha genel yaptım
         print(f"{log_prefix} Keycloak group name updated successfully for group ID: {db_company.keycloak_group_id}.")
         # İsim Keycloak'ta başarıyla güncellendi, şimdi lokal DB'yi güncelleyebiliriz.
 
-    updated_company = company_crud.update_company(db=db, company_db=db_company, company_in=company_update_request)
+    updated_company = await company_crud.update_company(db=db, company_id=company_id, company_in=company_update_request)
+    if updated_company is None:
+        # Ad kontrolü ile güncelleme arasında şirket silinmiş olabilir.
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Güncellenecek şirket (tenant) bulunamadı.")
     
     print(f"{log_prefix} Company '{updated_company.name}' (ID: {updated_company.id}) updated successfully. New data: {updated_company}")
     return updated_company
@@ -797,7 +844,7 @@ async def update_tenant_details( # Fonksiyon adını daha genel yaptım
 async def admin_delete_user(
     user_id: uuid.UUID, # Path parametresi olarak kullanıcı ID'si
     current_admin_payload: Annotated[Dict[str, Any], Depends(get_current_user_payload)],
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     settings: Settings = Depends(get_settings)
 ):
     admin_roles = current_admin_payload.get("roles", [])
@@ -827,7 +874,7 @@ async def admin_delete_user(
 
     # 2. Lokal veritabanından kullanıcıyı sil
     # Bu işlem, Keycloak'tan silme başarılı olduktan sonra (veya kullanıcı zaten Keycloak'ta yoksa) yapılır.
-    deleted_db_user = user_crud.delete_user_by_keycloak_id(db, keycloak_id=user_id)
+    deleted_db_user = await user_crud.delete_user_by_keycloak_id(db, keycloak_id=user_id)
 
     if deleted_db_user:
         print(f"{log_prefix} User (ID: {user_id}, Email: {deleted_db_user.email}) also deleted from local DB.")
@@ -845,14 +892,14 @@ async def admin_update_user(
     user_id: uuid.UUID,
     update_data: user_pydantic_models.AdminUserUpdateRequest,
     current_admin_payload: Annotated[Dict, Depends(get_current_user_payload)],
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     settings: Settings = Depends(get_settings),
 ):
     """Bir kullanıcının adını, aktiflik durumunu, rollerini ve tenant'ını günceller."""
     if "general-admin" not in current_admin_payload.get("realm_access", {}).get("roles", []):
         raise HTTPException(status_code=403, detail="Bu işlem için yetkiniz yok.")
 
-    db_user = user_crud.get_user_by_keycloak_id(db, user_id)
+    db_user = await user_crud.get_user_by_keycloak_id(db, user_id)
     if not db_user:
         raise HTTPException(status_code=404, detail="Güncellenecek kullanıcı bulunamadı.")
 
@@ -883,7 +930,7 @@ async def admin_update_user(
             await keycloak_api_helpers.remove_user_from_keycloak_group(kc_user_id_str, group['id'], settings)
         
         if new_tenant_id is not None:
-            target_company = company_crud.get_company(db, new_tenant_id)
+            target_company = await company_crud.get_company(db, new_tenant_id)
             if not target_company or not target_company.keycloak_group_id:
                 raise HTTPException(status_code=404, detail="Hedef tenant veya Keycloak grup ID'si bulunamadı.")
             await keycloak_api_helpers.add_user_to_group(kc_user_id_str, str(target_company.keycloak_group_id), settings)
@@ -893,7 +940,7 @@ async def admin_update_user(
     updated_user_response = await get_user_details_for_admin(user_id, current_admin_payload, db, settings)
     
     # get_or_create_user'ı çağırarak lokal DB'deki temel bilgilerin de (isim, rol vs.) güncel olduğundan emin olalım
-    user_crud.get_or_create_user(db, user_pydantic_models.UserCreateInternal(
+    await user_crud.get_or_create_user(db, user_pydantic_models.UserCreateInternal(
         id=updated_user_response.id,
         email=updated_user_response.email,
         full_name=updated_user_response.full_name,
@@ -907,14 +954,14 @@ async def admin_update_user(
 async def get_user_details_for_admin(
     user_id: uuid.UUID,
     current_admin_payload: Annotated[Dict, Depends(get_current_user_payload)],
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     settings: Settings = Depends(get_settings),
 ):
     """(TEK VE DOĞRU VERSİYON) Belirli bir kullanıcının detaylarını getirir."""
     if "general-admin" not in current_admin_payload.get("realm_access", {}).get("roles", []):
         raise HTTPException(status_code=403, detail="Bu işlem için yetkiniz yok.")
 
-    db_user = user_crud.get_user_by_keycloak_id(db, user_id)
+    db_user = await user_crud.get_user_by_keycloak_id(db, user_id)
     if not db_user:
         raise HTTPException(status_code=404, detail="Kullanıcı bulunamadı.")
 
@@ -929,7 +976,7 @@ async def get_user_details_for_admin(
         kc_group_id_str = kc_user_groups[0].get('id')
         if kc_group_id_str:
             try:
-                company = company_crud.get_company_by_keycloak_group_id(db, uuid.UUID(kc_group_id_str))
+                company = await company_crud.get_company_by_keycloak_group_id(db, uuid.UUID(kc_group_id_str))
                 if company:
                     user_company_info = user_pydantic_models.CompanyBasicInfo.from_orm(company)
             except (ValueError, IndexError):
@@ -949,11 +996,11 @@ async def get_user_details_for_admin(
 async def sync_user_from_keycloak(
     user_in: user_pydantic_models.UserCreateInternal,
     is_internal: Annotated[bool, Depends(verify_internal_secret)],
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """İç servis çağrısıyla kullanıcıyı lokal DB'ye senkronize eder/oluşturur."""
     if not is_internal: raise HTTPException(status_code=403, detail="Yetkisiz erişim.")
-    db_user = user_crud.get_or_create_user(db=db, user_data=user_in)
+    db_user = await user_crud.get_or_create_user(db=db, user_data=user_in)
     return user_pydantic_models.User(
         id=db_user.id, email=db_user.email, full_name=db_user.full_name,
         roles=user_in.roles, is_active=db_user.is_active, created_at=db_user.created_at
@@ -962,7 +1009,7 @@ async def sync_user_from_keycloak(
 @app.get(f"{API_PREFIX}/users/me", response_model=user_pydantic_models.User, tags=["Users"])
 async def read_users_me(
     current_user_payload: Annotated[Dict, Depends(get_current_user_payload)],
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Mevcut (login olmuş) kullanıcının bilgilerini JIT Provisioning ile getirir."""
     keycloak_id_str = current_user_payload.get("sub")
@@ -977,7 +1024,7 @@ async def read_users_me(
         roles=current_user_payload.get("realm_access", {}).get("roles", []),
         is_active=current_user_payload.get("email_verified", True)
     )
-    db_user = user_crud.get_or_create_user(db=db, user_data=user_data)
+    db_user = await user_crud.get_or_create_user(db=db, user_data=user_data)
     
     return user_pydantic_models.User(
         id=db_user.id, email=db_user.email, full_name=db_user.full_name,
@@ -2,7 +2,7 @@
 from __future__ import annotations
 from enum import Enum  # Role için Enum importu gerekli
 from pydantic import BaseModel, Field, EmailStr
-from typing import Optional, List
+from typing import Optional, List, Dict
 import uuid
 from datetime import datetime
 
@@ -69,6 +69,14 @@ class User(UserBase):
     class Config:
         from_attributes = True # SQLAlchemy modelinden Pydantic modeline dönüşüm için
 
+class UserBatchRequest(BaseModel):
+    """İç servislerin tek istekte birden çok kullanıcıyı çözmesi için."""
+    ids: List[uuid.UUID] = Field(..., min_length=1, max_length=5000, description="Getirilecek kullanıcıların Keycloak ID'leri")
+
+class UserBatchResponse(BaseModel):
+    users: Dict[uuid.UUID, User] = Field(default_factory=dict, description="ID'ye göre bulunan kullanıcılar")
+    missing: List[uuid.UUID] = Field(default_factory=list, description="Lokal DB'de bulunamayan ID'ler")
+
 class TenantCreateRequest(BaseModel):
     name: str = Field(..., min_length=2, max_length=255, description="Oluşturulacak yeni tenant'ın (şirketin) adı")
 
@@ -125,4 +133,30 @@ class Company(CompanyInDBBase):
 
 class CompanyList(BaseModel):
     items: List[Company]
-    total: int
\ No newline at end of file
+    total: int
+
+class TenantDirectoryEntry(BaseModel):
+    """Diğer servislerin Keycloak grup yolunu yerel tenant ID'sine çözmesi için hafif tenant kaydı."""
+    id: uuid.UUID
+    name: str
+    keycloak_group_id: uuid.UUID
+    status: str
+
+    class Config:
+        from_attributes = True
+class SyncProgress(BaseModel):
+    """Arka planda çalışan Keycloak senkronizasyonunun anlık durumu."""
+    phase: str = Field(default="pending", description="pending | running | complete | failed")
+    mode: str = Field(default="full", description="full | incremental")
+    attempts: int = Field(default=0, description="Şu ana kadar yapılan senkronizasyon denemesi sayısı")
+    tenants_synced: int = Field(default=0, description="Bu denemede yazılan tenant sayısı")
+    users_synced: int = Field(default=0, description="Bu denemede yazılan kullanıcı sayısı")
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    watermark: Optional[datetime] = Field(default=None, description="Artımlı modda işlenmiş son admin event'in zamanı")
+
+class ReadinessStatus(BaseModel):
+    """Readiness yanıtı: servis her durumda mevcut DB'den hizmet verir; senkronizasyon durumu ayrıca raporlanır."""
+    status: str = Field(..., description="serving_from_existing_db | sync_complete")
+    sync: SyncProgress
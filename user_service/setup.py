@@ -30,11 +30,13 @@ setup(
         'uvicorn[standard]==0.29.0',
         'SQLAlchemy==2.0.30',
         'psycopg2-binary==2.9.9',
+        'asyncpg==0.29.0',
+        'aiosqlite==0.20.0',
         'alembic==1.13.1',
         'python-jose[cryptography]==3.3.0',
         'passlib[bcrypt]==1.7.4',
         'pyjwt==2.8.0',
-        'httpx==0.27.0',
+        'httpx[http2]==0.27.0',
         'python-dotenv==1.0.1',
         'pydantic==2.7.1',
         'pydantic-settings==2.2.1',